@@ -0,0 +1,10 @@
+from fitai_backend.async_api import async_api_view, json_response
+from .models import User
+from .serializers import UserSerializer
+
+
+@async_api_view
+async def profile(request):
+    """Mesma resposta de GET /api/auth/profile/"""
+    user = await User.objects.aget(pk=request.user.pk)
+    return json_response(UserSerializer(user).data)
@@ -0,0 +1,287 @@
+"""
+Autenticação por token sem consulta ao banco no caminho quente.
+
+``CachedTokenAuthentication`` substitui o TokenAuthentication do DRF: a
+primeira requisição de um token faz a consulta Token + User e guarda um
+retrato do usuário (id, username, role, flags e ``token_version``) em um LRU
+em memória com TTL. As seguintes montam o usuário a partir do retrato; os
+demais campos ficam adiados e são lidos do banco só se forem acessados.
+
+Logout, troca de senha, de role ou desativação invalidam as entradas do
+usuário neste processo (ver ``signals.py``) e incrementam a ``token_version``
+no banco. Como o LRU é por processo, cada acerto confere a versão guardada no
+retrato com a atual: se outro processo revogou os tokens, o retrato é
+descartado e o token volta a ser consultado.
+
+Com ``STATELESS`` ligado, login e registro devolvem um token assinado
+(``django.core.signing``) que já traz o retrato e a ``token_version`` do
+usuário; tokens com versão antiga são recusados.
+
+Nos dois modos a versão atual é lida do cache ``CACHE_ALIAS`` (sem consulta
+ao banco) quando ele é compartilhado; com um cache local do processo
+(LocMem, o padrão sem ``CACHES``) é lida do banco a cada requisição, uma
+consulta por chave primária. Configuração em ``settings.ACCOUNTS_TOKEN_AUTH``.
+"""
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core import signing
+from django.core.cache import caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.db import transaction
+from django.db.models import F
+from django.db.models import DEFERRED
+from django.utils.translation import gettext_lazy as _
+from rest_framework import exceptions
+from rest_framework.authentication import TokenAuthentication, get_authorization_header
+from rest_framework.authtoken.models import Token
+
+from fitai_backend.profiling import timer
+from .models import User
+
+DEFAULTS = {
+    'MAX_ENTRIES': 10000,
+    'TTL': 300,
+    'STATELESS': False,
+    'MAX_AGE': 60 * 60 * 24 * 30,
+    'CACHE_ALIAS': 'default',
+}
+SNAPSHOT_FIELDS = ('id', 'username', 'role', 'is_active', 'is_staff', 'is_superuser')
+SIGNING_SALT = 'accounts.authentication.stateless'
+
+
+def get_auth_settings():
+    return {**DEFAULTS, **getattr(settings, 'ACCOUNTS_TOKEN_AUTH', {})}
+
+
+def snapshot_user(user):
+    return {field: getattr(user, field) for field in SNAPSHOT_FIELDS}
+
+
+def user_from_snapshot(snapshot):
+    """Instância de User com os campos do retrato; os demais ficam adiados."""
+    values = [snapshot.get(field.attname, DEFERRED) for field in User._meta.concrete_fields]
+    return User.from_db('default', list(snapshot), values)
+
+
+class TokenCache:
+    """LRU de token -> retrato do usuário, com TTL e índice por usuário para invalidação."""
+
+    def __init__(self, max_entries=10000):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._by_user = {}
+        self._lock = threading.Lock()
+        self.reset_stats()
+
+    def reset_stats(self):
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > now:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            if entry is not None:
+                self._remove(key)
+            self.misses += 1
+            return None
+
+    def set(self, key, snapshot, ttl):
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (time.monotonic() + ttl, snapshot)
+            self._by_user.setdefault(snapshot['id'], set()).add(key)
+            while len(self._entries) > self.max_entries:
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+
+    def _remove(self, key):
+        _, snapshot = self._entries.pop(key)
+        keys = self._by_user.get(snapshot['id'])
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._by_user[snapshot['id']]
+
+    def invalidate_key(self, key):
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+
+    def invalidate_user(self, user_id):
+        with self._lock:
+            for key in list(self._by_user.get(user_id, ())):
+                self._remove(key)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._by_user.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0,
+            }
+
+
+token_cache = TokenCache(max_entries=get_auth_settings()['MAX_ENTRIES'])
+
+
+def _version_key(user_id):
+    return f'accounts:token-version:{user_id}'
+
+
+def _shared_cache(config):
+    """Cache da versão dos tokens, ou None se ele só existe neste processo."""
+    cache = caches[config['CACHE_ALIAS']]
+    return None if isinstance(cache, LocMemCache) else cache
+
+
+def invalidate_user(user_id, revoke=False):
+    """
+    Descarta os retratos em cache do usuário. Com ``revoke``, também recusa
+    os tokens assinados emitidos até agora.
+    """
+    token_cache.invalidate_user(user_id)
+    if revoke:
+        User.objects.filter(pk=user_id).update(token_version=F('token_version') + 1)
+        cache = _shared_cache(get_auth_settings())
+        if cache is not None:
+            cache.delete(_version_key(user_id))
+            # De novo após o commit: outra requisição pode ter guardado a versão antiga
+            transaction.on_commit(lambda: cache.delete(_version_key(user_id)))
+
+
+def token_version(user_id, config):
+    """Versão atual dos tokens do usuário (None se ele não existe mais)."""
+    cache = _shared_cache(config)
+    version = cache.get(_version_key(user_id)) if cache is not None else None
+    if version is None:
+        version = User.objects.filter(pk=user_id).values_list('token_version', flat=True).first()
+        if cache is not None and version is not None:
+            cache.set(_version_key(user_id), version, config['MAX_AGE'])
+    return version
+
+
+async def atoken_version(user_id, config):
+    cache = _shared_cache(config)
+    version = await cache.aget(_version_key(user_id)) if cache is not None else None
+    if version is None:
+        version = await User.objects.filter(pk=user_id).values_list('token_version', flat=True).afirst()
+        if cache is not None and version is not None:
+            await cache.aset(_version_key(user_id), version, config['MAX_AGE'])
+    return version
+
+
+def invalidate_token(key):
+    token_cache.invalidate_key(key)
+
+
+def sign_token(user):
+    payload = snapshot_user(user)
+    payload['iat'] = time.time()
+    payload['ver'] = user.token_version
+    return signing.dumps(payload, salt=SIGNING_SALT)
+
+
+def issue_token(user):
+    """Token devolvido no login/registro: assinado no modo stateless, senão o Token do DRF."""
+    if get_auth_settings()['STATELESS']:
+        return sign_token(user)
+    token, created = Token.objects.get_or_create(user=user)
+    return token.key
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """TokenAuthentication com cache do usuário e suporte a tokens assinados."""
+
+    def authenticate(self, request):
+        with timer('auth'):
+            return super().authenticate(request)
+
+    def authenticate_credentials(self, key):
+        config = get_auth_settings()
+        if config['STATELESS'] and ':' in key:
+            payload = self._load_signed(key, config)
+            return self._check_signed(key, payload, token_version(payload['id'], config))
+
+        snapshot = token_cache.get(key)
+        if snapshot is not None and snapshot['token_version'] != token_version(snapshot['id'], config):
+            snapshot = self._discard(key)
+        if snapshot is None:
+            snapshot = self._store(key, Token.objects.select_related('user').filter(key=key).first(), config)
+        return self._build(key, snapshot)
+
+    async def aauthenticate(self, request):
+        """Versão de ``authenticate`` para views assíncronas (HttpRequest do Django)."""
+        auth = get_authorization_header(request).split()
+        if not auth or auth[0].lower() != self.keyword.lower().encode():
+            return None
+        if len(auth) != 2:
+            raise exceptions.AuthenticationFailed(_('Invalid token header. No credentials provided.'))
+        try:
+            key = auth[1].decode()
+        except UnicodeError:
+            raise exceptions.AuthenticationFailed(_('Invalid token header. Token string should not contain invalid characters.'))
+
+        config = get_auth_settings()
+        if config['STATELESS'] and ':' in key:
+            payload = self._load_signed(key, config)
+            return self._check_signed(key, payload, await atoken_version(payload['id'], config))
+
+        snapshot = token_cache.get(key)
+        if snapshot is not None and snapshot['token_version'] != await atoken_version(snapshot['id'], config):
+            snapshot = self._discard(key)
+        if snapshot is None:
+            snapshot = self._store(key, await Token.objects.select_related('user').filter(key=key).afirst(), config)
+        return self._build(key, snapshot)
+
+    def _store(self, key, token, config):
+        if token is None:
+            raise exceptions.AuthenticationFailed(_('Invalid token.'))
+        snapshot = snapshot_user(token.user)
+        snapshot['token_version'] = token.user.token_version
+        token_cache.set(key, snapshot, config['TTL'])
+        return snapshot
+
+    def _discard(self, key):
+        # Revogado em outro processo (logout, desativação, troca de role ou senha)
+        token_cache.invalidate_key(key)
+        return None
+
+    def _build(self, key, snapshot):
+        if not snapshot['is_active']:
+            raise exceptions.AuthenticationFailed(_('User inactive or deleted.'))
+        user = user_from_snapshot(snapshot)
+        token = Token.from_db('default', ['key', 'user_id'], [key, user.pk, DEFERRED])
+        token.user = user
+        return user, token
+
+    def _load_signed(self, key, config):
+        try:
+            return signing.loads(key, salt=SIGNING_SALT, max_age=config['MAX_AGE'])
+        except signing.BadSignature:
+            raise exceptions.AuthenticationFailed(_('Invalid token.'))
+
+    def _check_signed(self, key, payload, version):
+        if version is None or payload.get('ver', 0) != version:
+            raise exceptions.AuthenticationFailed(_('Invalid token.'))
+        if not payload['is_active']:
+            raise exceptions.AuthenticationFailed(_('User inactive or deleted.'))
+        return user_from_snapshot({field: payload[field] for field in SNAPSHOT_FIELDS}), key
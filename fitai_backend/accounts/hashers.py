@@ -0,0 +1,47 @@
+"""
+Hashers de senha com custo configurável (``settings.ACCOUNTS_PASSWORD_HASHING``).
+
+O primeiro hasher de ``PASSWORD_HASHERS`` é o preferido. Um hash gravado com
+outro algoritmo ou com outro custo é refeito de forma transparente no
+próximo login bem-sucedido (``check_password`` do Django chama o setter
+quando ``must_update`` é verdadeiro).
+
+Argon2 depende do pacote ``argon2-cffi``; sem ele o settings mantém o PBKDF2
+como preferido.
+"""
+from django.conf import settings
+from django.contrib.auth.hashers import Argon2PasswordHasher, PBKDF2PasswordHasher
+
+DEFAULTS = {
+    'ALGORITHM': 'argon2',
+    # None mantém o padrão do Django (recomendado); reduzir só em testes/desenvolvimento
+    'PBKDF2_ITERATIONS': None,
+    # Parâmetros mínimos recomendados pela OWASP: 19 MiB, 2 iterações, 1 thread
+    'ARGON2_TIME_COST': 2,
+    'ARGON2_MEMORY_COST': 19456,
+    'ARGON2_PARALLELISM': 1,
+}
+
+
+def get_hashing_settings():
+    return {**DEFAULTS, **getattr(settings, 'ACCOUNTS_PASSWORD_HASHING', {})}
+
+
+class TunedPBKDF2PasswordHasher(PBKDF2PasswordHasher):
+    @property
+    def iterations(self):
+        return get_hashing_settings()['PBKDF2_ITERATIONS'] or PBKDF2PasswordHasher.iterations
+
+
+class TunedArgon2PasswordHasher(Argon2PasswordHasher):
+    @property
+    def time_cost(self):
+        return get_hashing_settings()['ARGON2_TIME_COST']
+
+    @property
+    def memory_cost(self):
+        return get_hashing_settings()['ARGON2_MEMORY_COST']
+
+    @property
+    def parallelism(self):
+        return get_hashing_settings()['ARGON2_PARALLELISM']
@@ -0,0 +1,71 @@
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor
+from importlib.util import find_spec
+
+from django.contrib.auth.hashers import Argon2PasswordHasher, PBKDF2PasswordHasher, get_hasher
+from django.core.management.base import BaseCommand, CommandError
+
+from accounts.hashers import TunedArgon2PasswordHasher, TunedPBKDF2PasswordHasher
+
+PASSWORD = 'senha-de-benchmark-123'
+# "antes" (padrões do Django) e "depois" (custos de ACCOUNTS_PASSWORD_HASHING)
+HASHERS = {
+    'pbkdf2-django': PBKDF2PasswordHasher,
+    'argon2-django': Argon2PasswordHasher,
+    'pbkdf2': TunedPBKDF2PasswordHasher,
+    'argon2': TunedArgon2PasswordHasher,
+}
+
+
+def _verify_loop(args):
+    """Executado nos workers: verificações de senha por ``seconds`` segundos."""
+    name, encoded, seconds = args
+    hasher = HASHERS[name]()
+    count = 0
+    started = time.perf_counter()
+    while time.perf_counter() - started < seconds:
+        hasher.verify(PASSWORD, encoded)
+        count += 1
+    return count, time.perf_counter() - started
+
+
+class Command(BaseCommand):
+    help = 'Mede logins/s (verificações de senha) por núcleo para cada hasher'
+
+    def add_arguments(self, parser):
+        parser.add_argument('hashers', nargs='*',
+                            help=f'Hashers medidos (padrão: todos disponíveis): {", ".join(HASHERS)}')
+        parser.add_argument('--seconds', type=float, default=3.0, help='Duração da medição por hasher')
+        parser.add_argument('--processes', type=int, default=1,
+                            help='Processos em paralelo (um por núcleo)')
+
+    def handle(self, *args, **options):
+        names = options['hashers'] or [
+            name for name in HASHERS if not name.startswith('argon2') or find_spec('argon2')
+        ]
+        unknown = set(names) - HASHERS.keys()
+        if unknown:
+            raise CommandError(f'Hasher desconhecido: {", ".join(sorted(unknown))}')
+        if any(name.startswith('argon2') for name in names) and not find_spec('argon2'):
+            raise CommandError('Argon2 requer o pacote argon2-cffi')
+        processes = max(1, options['processes'])
+        self.stdout.write(f'Hasher preferido: {get_hasher().algorithm} ({type(get_hasher()).__name__})')
+
+        for name in names:
+            hasher = HASHERS[name]()
+            encoded = hasher.encode(PASSWORD, hasher.salt())
+            jobs = [(name, encoded, options['seconds'])] * processes
+            if processes > 1 and 'fork' in multiprocessing.get_all_start_methods():
+                context = multiprocessing.get_context('fork')
+                with ProcessPoolExecutor(max_workers=processes, mp_context=context) as executor:
+                    results = list(executor.map(_verify_loop, jobs))
+            else:
+                results = [_verify_loop(job) for job in jobs]
+
+            total = sum(count / elapsed for count, elapsed in results)
+            params = ', '.join(f'{key}={value}' for key, value in hasher.decode(encoded).items()
+                               if key not in ('algorithm', 'salt', 'hash'))
+            self.stdout.write(
+                f'{name:<14} {total:8.1f} logins/s  {total / processes:8.1f} logins/s por núcleo  ({params})'
+            )
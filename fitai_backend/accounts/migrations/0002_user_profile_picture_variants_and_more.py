@@ -0,0 +1,24 @@
+# Generated by Django 5.2.18 on 2026-10-18 07:19
+
+import fitai_backend.images
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='profile_picture_variants',
+            field=models.JSONField(blank=True, default=dict, editable=False),
+        ),
+        migrations.AlterField(
+            model_name='user',
+            name='profile_picture',
+            field=models.ImageField(blank=True, null=True, upload_to=fitai_backend.images.HashedUploadTo('profiles/', 'profile_picture')),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-18 08:00
+
+import fitai_backend.images
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0003_user_token_version'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='user',
+            name='profile_picture',
+            field=fitai_backend.images.HashedImageField(blank=True, null=True, upload_to=fitai_backend.images.HashedUploadTo('profiles/', 'profile_picture')),
+        ),
+    ]
@@ -1,6 +1,9 @@
+from django.contrib.auth.hashers import check_password
 from django.contrib.auth.models import AbstractUser
 from django.db import models
 
+from fitai_backend.images import HashedImageField, HashedUploadTo
+
 class User(AbstractUser):
     ROLE_CHOICES = [
         ('client', 'Cliente'),
@@ -13,9 +16,24 @@ class User(AbstractUser):
     birth_date = models.DateField(null=True, blank=True)
     height = models.FloatField(null=True, blank=True, help_text="Altura em metros")
     weight = models.FloatField(null=True, blank=True, help_text="Peso em kg")
-    profile_picture = models.ImageField(upload_to='profiles/', null=True, blank=True)
+    profile_picture = HashedImageField(upload_to=HashedUploadTo('profiles/', 'profile_picture'), null=True, blank=True)
+    # Variantes responsivas de profile_picture (ver fitai_backend/images.py)
+    profile_picture_variants = models.JSONField(default=dict, blank=True, editable=False)
+    # Incrementada na revogação: tokens assinados com versão anterior são recusados (ver authentication.py)
+    token_version = models.PositiveIntegerField(default=0, editable=False)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    def check_password(self, raw_password):
+        def setter(raw_password):
+            # Rehash para o hasher/custo preferido: a senha não mudou, tokens continuam válidos
+            self.set_password(raw_password)
+            self._password = None
+            self._password_upgraded = True
+            self.save(update_fields=['password'])
+            self._password_upgraded = False
+
+        return check_password(raw_password, self.password, setter)
+
     def __str__(self):
         return f"{self.username} ({self.get_role_display()})"
\ No newline at end of file
@@ -1,15 +1,17 @@
 from rest_framework import serializers
 from django.contrib.auth import authenticate
+from fitai_backend.images import ImageVariantsField
 from .models import User
 
 class UserSerializer(serializers.ModelSerializer):
     password = serializers.CharField(write_only=True)
+    profile_picture_variants = ImageVariantsField('profile_picture')
     
     class Meta:
         model = User
         fields = ('id', 'username', 'email', 'first_name', 'last_name', 
                  'role', 'phone', 'birth_date', 'height', 'weight', 
-                 'profile_picture', 'password')
+                 'profile_picture', 'profile_picture_variants', 'password')
     
     def create(self, validated_data):
         password = validated_data.pop('password')
@@ -18,6 +20,12 @@ class UserSerializer(serializers.ModelSerializer):
         user.save()
         return user
 
+class ProfilePictureSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = User
+        fields = ('profile_picture',)
+        extra_kwargs = {'profile_picture': {'required': True, 'allow_null': False}}
+
 class LoginSerializer(serializers.Serializer):
     username = serializers.CharField()
     password = serializers.CharField()
@@ -0,0 +1,53 @@
+"""Invalidação do cache de autenticação (ver authentication.py) e variantes da foto de perfil."""
+from django.db import transaction
+from django.db.models.signals import pre_save, post_save, post_delete
+from django.dispatch import receiver
+from rest_framework.authtoken.models import Token
+
+from fitai_backend import images
+from .authentication import invalidate_user, invalidate_token
+from .models import User
+
+# Campos cuja alteração revoga também os tokens assinados já emitidos
+AUTH_FIELDS = ('password', 'username', 'role', 'is_active', 'is_staff', 'is_superuser')
+
+
+@receiver(pre_save, sender=User)
+def detect_auth_change(sender, instance, update_fields=None, **kwargs):
+    instance._auth_changed = False
+    if instance._state.adding or instance.pk is None:
+        return
+    if update_fields is not None and not set(update_fields) & set(AUTH_FIELDS):
+        return  # ex.: last_login
+    if getattr(instance, '_password_upgraded', False):
+        return  # só o custo do hash mudou
+    current = User.objects.filter(pk=instance.pk).values(*AUTH_FIELDS).first()
+    instance._auth_changed = current is not None and any(
+        current[field] != getattr(instance, field) for field in AUTH_FIELDS
+    )
+
+
+@receiver(post_save, sender=User)
+def invalidate_user_cache(sender, instance, created, **kwargs):
+    if created:
+        return
+    user_id, revoke = instance.pk, getattr(instance, '_auth_changed', False)
+    invalidate_user(user_id, revoke)
+    if revoke:
+        # A instância não pode regravar a versão antiga num save posterior
+        instance.refresh_from_db(fields=['token_version'])
+    # De novo após o commit: requisições concorrentes podem ter lido o valor antigo
+    transaction.on_commit(lambda: invalidate_user(user_id))
+
+
+@receiver(post_delete, sender=User)
+def invalidate_deleted_user(sender, instance, **kwargs):
+    invalidate_user(instance.pk, revoke=True)
+
+
+@receiver(post_delete, sender=Token)
+def invalidate_deleted_token(sender, instance, **kwargs):
+    invalidate_token(instance.key)
+
+
+images.register(User, 'profile_picture', 'profile_picture_variants')
@@ -1,3 +1,265 @@
-from django.test import TestCase
+import io
+import tempfile
+
+from django.core.cache import cache, caches
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.db.models import F
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from PIL import Image
+from rest_framework.test import APIClient
+
+from .authentication import get_auth_settings, token_cache
+from .hashers import TunedPBKDF2PasswordHasher
+from .models import User
+
+
+class CachedTokenAuthenticationTestCase(TestCase):
+    # Sem cache compartilhado, cada acerto do LRU confere a token_version no banco
+    version_queries = 1
+
+    def setUp(self):
+        token_cache.clear()
+        cache.clear()
+        User.objects.create_user(username='trainer', password='senha-123', role='trainer')
+        self.api = APIClient()
+
+    def login(self, password='senha-123'):
+        response = self.api.post('/api/auth/login/', {'username': 'trainer', 'password': password})
+        self.assertEqual(response.status_code, 200)
+        self.api.credentials(HTTP_AUTHORIZATION='Token ' + response.data['token'])
+        return response.data['token']
+
+    def auth_queries(self, path='/api/workouts/templates/'):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.api.get(path)
+        self.assertEqual(response.status_code, 200)
+        return [query['sql'] for query in queries.captured_queries
+                if 'authtoken_token' in query['sql'] or 'FROM "accounts_user"' in query['sql']]
+
+    def test_cached_token_needs_no_auth_queries(self):
+        self.login()
+        self.assertEqual(len(self.auth_queries()), 1)
+        hits = token_cache.stats()['hits']
+        # Segunda requisição: usuário (com role) vem do cache, só a versão é conferida
+        self.assertEqual([sql for sql in self.auth_queries() if 'authtoken_token' in sql], [])
+        self.assertEqual(len(self.auth_queries()), self.version_queries)
+        self.assertEqual(token_cache.stats()['hits'], hits + 2)
+
+    def test_profile_loads_deferred_fields(self):
+        self.login()
+        self.auth_queries()
+        self.auth_queries()
+        self.assertEqual(len(self.auth_queries('/api/auth/profile/')), 1 + self.version_queries)
+        response = self.api.get('/api/auth/profile/')
+        self.assertEqual(response.data['username'], 'trainer')
+        self.assertEqual(response.data['role'], 'trainer')
+
+    def test_role_change_and_deactivation_invalidate(self):
+        self.login()
+        self.auth_queries()
+        user = User.objects.get(username='trainer')
+        user.role = 'client'
+        user.save()
+        self.assertEqual(len(self.auth_queries()), 1)
+
+        user.is_active = False
+        user.save()
+        self.assertEqual(self.api.get('/api/workouts/templates/').status_code, 401)
+
+    def test_logout_invalidates_token(self):
+        self.login()
+        self.auth_queries()
+        self.assertEqual(self.api.post('/api/auth/logout/').status_code, 204)
+        self.assertEqual(self.api.get('/api/workouts/templates/').status_code, 401)
+
+    def test_revocation_in_other_process_discards_snapshot(self):
+        self.login()
+        self.auth_queries()
+        # Outro processo troca a role: o LRU deste não fica sabendo, mas a versão muda
+        User.objects.filter(username='trainer').update(role='client', token_version=F('token_version') + 1)
+        caches[get_auth_settings()['CACHE_ALIAS']].clear()
+        response = self.api.get('/api/auth/profile/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['role'], 'client')
+
+    def test_lru_evicts_oldest_and_expires(self):
+        token_cache.set('a', {'id': 1}, 60)
+        token_cache.set('b', {'id': 2}, -1)
+        self.assertIsNone(token_cache.get('b'))
+        token_cache.invalidate_user(1)
+        self.assertIsNone(token_cache.get('a'))
+        self.assertEqual(token_cache.stats()['entries'], 0)
+
+
+# Cache compartilhado entre processos (em produção, Redis/Memcached)
+SHARED_CACHES = {
+    'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'},
+    'shared': {'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache', 'LOCATION': tempfile.mkdtemp()},
+}
+
+
+@override_settings(CACHES=SHARED_CACHES, ACCOUNTS_TOKEN_AUTH={'CACHE_ALIAS': 'shared'})
+class SharedCacheTokenTestCase(CachedTokenAuthenticationTestCase):
+    version_queries = 0
+
+    def setUp(self):
+        super().setUp()
+        caches['shared'].clear()
+
+    def test_cached_token_needs_no_auth_queries(self):
+        self.login()
+        self.assertEqual(len(self.auth_queries()), 1)
+        # A versão é lida do banco uma vez e depois vem do cache compartilhado
+        self.assertEqual(len(self.auth_queries()), 1)
+        self.assertEqual(self.auth_queries(), [])
+
+
+@override_settings(CACHES=SHARED_CACHES, ACCOUNTS_TOKEN_AUTH={'STATELESS': True, 'CACHE_ALIAS': 'shared'})
+class StatelessTokenTestCase(CachedTokenAuthenticationTestCase):
+    version_queries = 0
+
+    def setUp(self):
+        super().setUp()
+        caches['shared'].clear()
+
+    def test_cached_token_needs_no_auth_queries(self):
+        token = self.login()
+        self.assertIn(':', token)
+        # Só a versão dos tokens, lida uma vez e guardada no cache compartilhado
+        self.assertEqual(len(self.auth_queries()), 1)
+        self.assertEqual(self.auth_queries(), [])
+
+    def test_role_change_and_deactivation_invalidate(self):
+        self.login()
+        user = User.objects.get(username='trainer')
+        user.role = 'client'
+        user.save()
+        # Token assinado com a role antiga é revogado; um novo login volta a funcionar
+        self.assertEqual(self.api.get('/api/workouts/templates/').status_code, 401)
+        self.login()
+        self.assertEqual(self.auth_queries(), [])
+
+    def test_profile_update_keeps_token(self):
+        self.login()
+        self.auth_queries()
+        User.objects.filter(username='trainer').update(phone='11999999999')
+        user = User.objects.get(username='trainer')
+        user.phone = '11888888888'
+        user.save()
+        self.assertEqual(self.auth_queries(), [])
+
+    def test_revocation_in_other_process_discards_snapshot(self):
+        self.login()
+        User.objects.filter(username='trainer').update(token_version=F('token_version') + 1)
+        caches['shared'].clear()
+        self.assertEqual(self.api.get('/api/workouts/templates/').status_code, 401)
+
+    def test_revocation_is_read_from_database_without_shared_cache(self):
+        with override_settings(ACCOUNTS_TOKEN_AUTH={'STATELESS': True}):
+            self.login()
+            self.assertEqual(len(self.auth_queries()), 1)
+            # Revogação feita por outro processo: só o banco sabe dela
+            User.objects.filter(username='trainer').update(token_version=F('token_version') + 1)
+            self.assertEqual(self.api.get('/api/workouts/templates/').status_code, 401)
+
+    def test_tampered_token_is_rejected(self):
+        token = self.login()
+        self.api.credentials(HTTP_AUTHORIZATION='Token ' + token[:-2] + 'xx')
+        self.assertEqual(self.api.get('/api/workouts/templates/').status_code, 401)
+
+
+class PasswordHashingTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.api = APIClient()
+
+    @override_settings(ACCOUNTS_PASSWORD_HASHING={'PBKDF2_ITERATIONS': 1000})
+    def create_user(self):
+        return User.objects.create_user(username='client', password='senha-123')
+
+    def test_login_upgrades_hash_cost(self):
+        user = self.create_user()
+        self.assertIn('$1000$', user.password)
+        with override_settings(PASSWORD_HASHERS=['accounts.hashers.TunedPBKDF2PasswordHasher'],
+                               ACCOUNTS_PASSWORD_HASHING={'PBKDF2_ITERATIONS': 2000},
+                               ACCOUNTS_TOKEN_AUTH={'STATELESS': True}):
+            token = self.api.post('/api/auth/login/', {'username': 'client', 'password': 'senha-123'}).data['token']
+            user.refresh_from_db()
+            self.assertIn('$2000$', user.password)
+            self.assertFalse(TunedPBKDF2PasswordHasher().must_update(user.password))
+            # Rehash não é troca de senha: o token continua válido
+            self.api.credentials(HTTP_AUTHORIZATION='Token ' + token)
+            self.assertEqual(self.api.get('/api/auth/profile/').status_code, 200)
+
+
+@override_settings(REST_FRAMEWORK={
+    'DEFAULT_AUTHENTICATION_CLASSES': ['accounts.authentication.CachedTokenAuthentication'],
+    'DEFAULT_THROTTLE_RATES': {'login': '5/hour', 'login_username': '3/hour', 'register': '2/hour'},
+})
+class LoginThrottleTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.api = APIClient()
+
+    def attempt(self, username, ip='10.0.0.1'):
+        return self.api.post('/api/auth/login/', {'username': username, 'password': 'errada'},
+                             REMOTE_ADDR=ip).status_code
+
+    def test_username_limit_across_ips(self):
+        codes = [self.attempt('alvo', ip=f'10.0.0.{i}') for i in range(4)]
+        self.assertEqual(codes, [400, 400, 400, 429])
+        self.assertEqual(self.attempt('outro', ip='10.0.0.9'), 400)
+
+    def test_ip_limit_across_usernames(self):
+        codes = [self.attempt(f'user{i}') for i in range(6)]
+        self.assertEqual(codes, [400] * 5 + [429])
+        self.assertEqual(self.attempt('user0', ip='10.0.0.2'), 400)
+
+    def test_register_limit(self):
+        codes = [self.api.post('/api/auth/register/', {}).status_code for _ in range(3)]
+        self.assertEqual(codes, [400, 400, 429])
+
+
+class ProfilePictureTestCase(TestCase):
+    def setUp(self):
+        token_cache.clear()
+        media = tempfile.TemporaryDirectory()
+        self.addCleanup(media.cleanup)
+        overrides = override_settings(MEDIA_ROOT=media.name, IMAGE_VARIANTS={'WORKERS': 0})
+        overrides.enable()
+        self.addCleanup(overrides.disable)
+        User.objects.create_user(username='aluno', password='senha-123')
+        self.api = APIClient()
+        response = self.api.post('/api/auth/login/', {'username': 'aluno', 'password': 'senha-123'})
+        self.api.credentials(HTTP_AUTHORIZATION='Token ' + response.data['token'])
+
+    def upload(self, content=None):
+        if content is None:
+            buffer = io.BytesIO()
+            Image.new('RGB', (1200, 900), 'green').save(buffer, format='JPEG')
+            content = buffer.getvalue()
+        with self.captureOnCommitCallbacks(execute=True):
+            return self.api.put('/api/auth/profile/picture/', {
+                'profile_picture': SimpleUploadedFile('eu.jpg', content, content_type='image/jpeg'),
+            }, format='multipart')
+
+    def test_upload_exposes_variants(self):
+        response = self.upload()
+        self.assertEqual(response.status_code, 200)
+        self.assertRegex(response.data['profile_picture'], r'/media/profiles/[0-9a-f]{32}\.jpg$')
+        # Variantes geradas depois do commit: aparecem nas leituras seguintes
+        variants = self.api.get('/api/auth/profile/').data['profile_picture_variants']
+        self.assertEqual((variants['width'], variants['height']), (1200, 900))
+        self.assertEqual(list(variants['webp']), ['160', '320', '640', '1080'])
+        self.assertRegex(variants['jpeg']['160'], r'^/media/profiles/[0-9a-f]{32}/160w-q82\.jpg$')
+
+    def test_invalid_file_and_delete(self):
+        self.assertEqual(self.upload(b'nao e uma imagem').status_code, 400)
+        self.upload()
+        self.assertEqual(self.api.delete('/api/auth/profile/picture/').status_code, 204)
+        profile = self.api.get('/api/auth/profile/').data
+        self.assertIsNone(profile['profile_picture'])
+        self.assertIsNone(profile['profile_picture_variants'])
 
-# Create your tests here.
@@ -0,0 +1,77 @@
+"""
+Limite de tentativas de login/registro por IP e por username.
+
+As taxas vêm de ``REST_FRAMEWORK['DEFAULT_THROTTLE_RATES']`` (escopos
+``login``, ``login_username`` e ``register``). Em vez do histórico de
+instantes do SimpleRateThrottle (ler, alterar e gravar uma lista, sujeito a
+corrida entre requisições simultâneas), cada janela fixa é um contador
+incrementado com ``cache.add`` + ``cache.incr`` (atômico no LocMemCache,
+Redis e Memcached). O alias do cache fica em
+``settings.ACCOUNTS_THROTTLE_CACHE``: o LocMemCache limita por processo; um
+DatabaseCache (``manage.py createcachetable``) compartilha o contador entre
+processos, com ``incr`` não atômico, o que só deixa passar algumas
+tentativas simultâneas a mais.
+"""
+import hashlib
+
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework.settings import api_settings
+from rest_framework.throttling import SimpleRateThrottle
+
+
+class CounterRateThrottle(SimpleRateThrottle):
+    cache_format = 'accounts:throttle:%(scope)s:%(ident)s'
+
+    @property
+    def cache(self):
+        return caches[getattr(settings, 'ACCOUNTS_THROTTLE_CACHE', 'default')]
+
+    def get_rate(self):
+        # Lido a cada instância (THROTTLE_RATES do DRF é fixado na importação)
+        return api_settings.DEFAULT_THROTTLE_RATES.get(self.scope)
+
+    def allow_request(self, request, view):
+        if self.rate is None:
+            return True
+        self.key = self.get_cache_key(request, view)
+        if self.key is None:
+            return True
+
+        now = self.timer()
+        window_key = f'{self.key}:{int(now // self.duration)}'
+        self.cache.add(window_key, 0, self.duration)
+        try:
+            count = self.cache.incr(window_key)
+        except ValueError:
+            # Janela expirou entre o add e o incr
+            self.cache.set(window_key, 1, self.duration)
+            count = 1
+        self.remaining = self.duration - now % self.duration
+        return count <= self.num_requests
+
+    def wait(self):
+        return self.remaining
+
+
+class LoginIPThrottle(CounterRateThrottle):
+    scope = 'login'
+
+    def get_cache_key(self, request, view):
+        return self.cache_format % {'scope': self.scope, 'ident': self.get_ident(request)}
+
+
+class LoginUsernameThrottle(CounterRateThrottle):
+    """Protege uma conta específica de tentativas vindas de vários IPs."""
+    scope = 'login_username'
+
+    def get_cache_key(self, request, view):
+        username = request.data.get('username') if hasattr(request.data, 'get') else None
+        if not isinstance(username, str) or not username.strip():
+            return None
+        ident = hashlib.sha256(username.strip().lower().encode()).hexdigest()
+        return self.cache_format % {'scope': self.scope, 'ident': ident}
+
+
+class RegisterIPThrottle(LoginIPThrottle):
+    scope = 'register'
@@ -4,5 +4,7 @@ from . import views
 urlpatterns = [
     path('register/', views.register, name='register'),
     path('login/', views.login, name='login'),
+    path('logout/', views.logout, name='logout'),
     path('profile/', views.profile, name='profile'),
+    path('profile/picture/', views.profile_picture, name='profile-picture'),
 ]
\ No newline at end of file
@@ -1,38 +1,68 @@
 from rest_framework import status, generics
-from rest_framework.decorators import api_view, permission_classes
+from rest_framework.decorators import api_view, authentication_classes, permission_classes, throttle_classes
 from rest_framework.permissions import AllowAny
 from rest_framework.response import Response
 from rest_framework.authtoken.models import Token
-from .serializers import UserSerializer, LoginSerializer
+from .authentication import issue_token, invalidate_user
+from .throttling import LoginIPThrottle, LoginUsernameThrottle, RegisterIPThrottle
+from .serializers import UserSerializer, LoginSerializer, ProfilePictureSerializer
 from .models import User
 
 @api_view(['POST'])
+@authentication_classes([])
 @permission_classes([AllowAny])
+@throttle_classes([RegisterIPThrottle])
 def register(request):
     serializer = UserSerializer(data=request.data)
     if serializer.is_valid():
         user = serializer.save()
-        token, created = Token.objects.get_or_create(user=user)
         return Response({
             'user': UserSerializer(user).data,
-            'token': token.key
+            'token': issue_token(user)
         }, status=status.HTTP_201_CREATED)
     return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 @api_view(['POST'])
+@authentication_classes([])
 @permission_classes([AllowAny])
+@throttle_classes([LoginIPThrottle, LoginUsernameThrottle])
 def login(request):
     serializer = LoginSerializer(data=request.data)
     if serializer.is_valid():
         user = serializer.validated_data['user']
-        token, created = Token.objects.get_or_create(user=user)
         return Response({
             'user': UserSerializer(user).data,
-            'token': token.key
+            'token': issue_token(user)
         })
     return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
+@api_view(['POST'])
+def logout(request):
+    # Apagar o Token invalida o cache; a revogação cobre os tokens assinados
+    Token.objects.filter(user_id=request.user.pk).delete()
+    invalidate_user(request.user.pk, revoke=True)
+    return Response(status=status.HTTP_204_NO_CONTENT)
+
 @api_view(['GET'])
 def profile(request):
-    serializer = UserSerializer(request.user)
-    return Response(serializer.data)
\ No newline at end of file
+    user = request.user
+    if user.get_deferred_fields():
+        # Usuário montado pelo cache de autenticação: carrega o restante de uma vez
+        # (sem ``fields`` o refresh_from_db recarrega só os campos já carregados)
+        user.refresh_from_db(fields=user.get_deferred_fields())
+    serializer = UserSerializer(user)
+    return Response(serializer.data)
+
+@api_view(['PUT', 'DELETE'])
+def profile_picture(request):
+    """Envio (multipart, campo profile_picture) ou remoção da foto; as variantes são geradas em segundo plano"""
+    user = User.objects.get(pk=request.user.pk)
+    if request.method == 'DELETE':
+        user.profile_picture = None
+        user.save(update_fields=['profile_picture', 'updated_at'])
+        return Response(status=status.HTTP_204_NO_CONTENT)
+    serializer = ProfilePictureSerializer(user, data=request.data)
+    if not serializer.is_valid():
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+    serializer.save()
+    return Response(UserSerializer(user, context={'request': request}).data)
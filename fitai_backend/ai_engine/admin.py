@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import UserProfile, AIWorkoutRecommendation
+from .models import UserProfile, AIWorkoutRecommendation, AIGenerationJob
 
 @admin.register(UserProfile)
 class UserProfileAdmin(admin.ModelAdmin):
@@ -33,4 +33,11 @@ class AIWorkoutRecommendationAdmin(admin.ModelAdmin):
         ('Feedback', {
             'fields': ('feedback_rating', 'feedback_notes')
         }),
-    )
\ No newline at end of file
+    )
+
+@admin.register(AIGenerationJob)
+class AIGenerationJobAdmin(admin.ModelAdmin):
+    list_display = ('id', 'user_profile', 'status', 'attempts', 'created_at', 'finished_at')
+    list_filter = ('status', 'created_at')
+    search_fields = ('user_profile__user__username',)
+    readonly_fields = ('created_at', 'started_at', 'finished_at')
@@ -0,0 +1,19 @@
+from rest_framework import status
+
+from fitai_backend.async_api import async_api_view, apaginate, json_response
+from .models import UserProfile, AIWorkoutRecommendation
+from .serializers import AIWorkoutRecommendationSerializer
+from .views import RecommendationPagination
+
+
+@async_api_view
+async def my_recommendations(request):
+    """Mesma resposta de GET /api/ai/engine/my_recommendations/"""
+    profile_id = await UserProfile.objects.filter(user=request.user).values_list('id', flat=True).afirst()
+    if profile_id is None:
+        return json_response({'error': 'Perfil não encontrado'}, status=status.HTTP_404_NOT_FOUND)
+
+    paginator = RecommendationPagination()
+    page = await apaginate(paginator, AIWorkoutRecommendation.objects.filter(user_profile_id=profile_id), request)
+    serializer = AIWorkoutRecommendationSerializer(page, many=True)
+    return json_response(paginator.get_paginated_response(serializer.data).data)
@@ -0,0 +1,171 @@
+"""
+Geração de treinos em lote para vários perfis (onboarding de academias).
+
+Os perfis são lidos em blocos com ``values()``, sob demanda, a geração roda
+em um pool de processos (o índice do catálogo é construído antes do fork e
+herdado pelos workers) e as recomendações são gravadas com ``bulk_create``
+em blocos.
+Falhas de um perfil são registradas sem abortar o lote.
+"""
+import multiprocessing
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from types import SimpleNamespace
+
+from django.conf import settings
+from django.db import connections, transaction
+
+from .cache import generate_workout_cached
+from .engine import get_exercise_index
+from .models import UserProfile, AIWorkoutRecommendation
+
+PROFILE_FIELDS = ('id', 'primary_goal', 'experience_level', 'training_frequency',
+                  'available_equipment', 'limitations')
+
+DEFAULT_CHUNK_SIZE = 500
+
+
+class BatchResult:
+    """Resumo de uma execução em lote."""
+
+    def __init__(self):
+        self.created = 0
+        self.recommendation_ids = []
+        self.failures = []
+        self.elapsed = 0.0
+
+    def add_failure(self, profile_id, error):
+        self.failures.append({'profile_id': profile_id, 'error': str(error)})
+
+    @property
+    def processed(self):
+        return self.created + len(self.failures)
+
+    @property
+    def throughput(self):
+        """Perfis processados por segundo."""
+        return self.processed / self.elapsed if self.elapsed else 0.0
+
+    def as_dict(self):
+        return {
+            'created': self.created,
+            'failed': len(self.failures),
+            'failures': self.failures,
+            'recommendation_ids': self.recommendation_ids,
+            'elapsed_seconds': round(self.elapsed, 4),
+            'profiles_per_second': round(self.throughput, 1),
+        }
+
+
+# Índice do lote, construído antes do fork (os workers herdam sem consultar a versão no banco)
+_batch_index = None
+
+
+def _generate_chunk(profiles):
+    """Executado nos workers: gera os treinos de um bloco de perfis."""
+    results = []
+    for data in profiles:
+        try:
+            workout_data, confidence_score = generate_workout_cached(SimpleNamespace(**data), _batch_index)
+            results.append((data['id'], workout_data, confidence_score, None))
+        except Exception as exc:
+            results.append((data['id'], None, None, f'{type(exc).__name__}: {exc}'))
+    return results
+
+
+def _iter_profile_chunks(profile_ids, chunk_size, result):
+    for start in range(0, len(profile_ids), chunk_size):
+        chunk_ids = profile_ids[start:start + chunk_size]
+        profiles = list(UserProfile.objects.filter(id__in=chunk_ids).values(*PROFILE_FIELDS))
+        found = {profile['id'] for profile in profiles}
+        for profile_id in chunk_ids:
+            if profile_id not in found:
+                result.add_failure(profile_id, 'Perfil não encontrado')
+        if profiles:
+            yield profiles
+
+
+def _persist(rows, result):
+    recommendations = [
+        AIWorkoutRecommendation(
+            user_profile_id=profile_id,
+            workout_data=workout_data,
+            confidence_score=confidence_score,
+        )
+        for profile_id, workout_data, confidence_score in rows
+    ]
+    try:
+        with transaction.atomic():
+            AIWorkoutRecommendation.objects.bulk_create(recommendations)
+    except Exception:
+        # Isola as linhas com problema em vez de perder o bloco inteiro
+        for recommendation in recommendations:
+            recommendation.pk = None
+            try:
+                with transaction.atomic():
+                    recommendation.save()
+            except Exception as exc:
+                result.add_failure(recommendation.user_profile_id, exc)
+                continue
+            result.created += 1
+            result.recommendation_ids.append(recommendation.pk)
+        return
+
+    result.created += len(recommendations)
+    result.recommendation_ids.extend(r.pk for r in recommendations if r.pk is not None)
+
+
+def _handle(chunk_results, result):
+    rows = []
+    for profile_id, workout_data, confidence_score, error in chunk_results:
+        if error:
+            result.add_failure(profile_id, error)
+        else:
+            rows.append((profile_id, workout_data, confidence_score))
+    if rows:
+        _persist(rows, result)
+
+
+def generate_plans(profile_ids, workers=None, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Gera e grava uma recomendação para cada id de ``UserProfile``.
+
+    ``workers`` > 1 usa um pool de processos (requer o start method ``fork``);
+    caso contrário a geração roda no processo atual.
+    """
+    global _batch_index
+    if workers is None:
+        workers = getattr(settings, 'AI_ENGINE_BATCH_WORKERS', 1)
+    profile_ids = list(dict.fromkeys(profile_ids))
+    result = BatchResult()
+    started = time.perf_counter()
+
+    # Constrói o índice antes do fork para que os workers o herdem
+    _batch_index = get_exercise_index()
+    # Lidos sob demanda: no máximo ``2 * workers`` blocos em memória
+    chunks = _iter_profile_chunks(profile_ids, chunk_size, result)
+
+    if workers > 1 and 'fork' in multiprocessing.get_all_start_methods():
+        context = multiprocessing.get_context('fork')
+        with ProcessPoolExecutor(max_workers=workers, mp_context=context) as executor:
+            pending, started = deque(), False
+            for chunk in chunks:
+                if not started:
+                    # Com fork os workers nascem todos no primeiro submit; as conexões
+                    # abertas não devem ser compartilhadas com eles
+                    for connection in connections.all(initialized_only=True):
+                        if not connection.in_atomic_block:
+                            connection.close()
+                    started = True
+                pending.append(executor.submit(_generate_chunk, chunk))
+                if len(pending) >= 2 * workers:
+                    _handle(pending.popleft().result(), result)
+            while pending:
+                _handle(pending.popleft().result(), result)
+    else:
+        for chunk in chunks:
+            _handle(_generate_chunk(chunk), result)
+
+    result.elapsed = time.perf_counter() - started
+    return result
@@ -0,0 +1,152 @@
+"""
+Cache de recomendações geradas.
+
+Usuários com os mesmos objetivos, nível, frequência, equipamentos e
+limitações recebem o mesmo treino, então o resultado do gerador é guardado
+por uma chave canônica desses campos + versão do catálogo de exercícios.
+
+Há dois níveis: um LRU em memória, limitado por ``MAX_ENTRIES``, e,
+opcionalmente, um backend de cache do Django (``CACHE_ALIAS``) compartilhado
+entre processos. Configuração em ``settings.AI_ENGINE_CACHE``.
+"""
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import caches
+
+from .engine import EQUIPMENT_KEYS, WorkoutGenerator, get_exercise_index, normalize_text
+
+DEFAULTS = {
+    'ENABLED': True,
+    'MAX_ENTRIES': 1024,
+    'CACHE_ALIAS': None,
+    'TIMEOUT': 60 * 60 * 24,
+}
+
+
+def get_cache_settings():
+    return {**DEFAULTS, **getattr(settings, 'AI_ENGINE_CACHE', {})}
+
+
+def profile_cache_key(profile, catalog_version):
+    """Hash canônico dos campos do perfil que influenciam a geração."""
+    equipment = sorted({item for item in profile.available_equipment or [] if item in EQUIPMENT_KEYS})
+    limitations = ' '.join(normalize_text(profile.limitations).split())
+    payload = json.dumps([
+        profile.primary_goal,
+        profile.experience_level,
+        profile.training_frequency,
+        equipment,
+        limitations,
+        catalog_version,
+    ], separators=(',', ':'))
+    return 'ai_engine:recommendation:' + hashlib.sha256(payload.encode()).hexdigest()
+
+
+class RecommendationCache:
+    """LRU em memória com segundo nível opcional no cache do Django."""
+
+    def __init__(self, max_entries=1024, cache_alias=None, timeout=None):
+        self.max_entries = max_entries
+        self.cache_alias = cache_alias
+        self.timeout = timeout
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.reset_stats()
+
+    def reset_stats(self):
+        self.hits = 0
+        self.shared_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @property
+    def shared(self):
+        return caches[self.cache_alias] if self.cache_alias else None
+
+    def get(self, key):
+        with self._lock:
+            value = self._entries.get(key)
+            if value is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return value
+
+        value = self.shared.get(key) if self.shared else None
+        with self._lock:
+            if value is None:
+                self.misses += 1
+                return None
+            self.shared_hits += 1
+        self._store_local(key, value)
+        return value
+
+    def set(self, key, value):
+        self._store_local(key, value)
+        if self.shared:
+            self.shared.set(key, value, self.timeout)
+
+    def _store_local(self, key, value):
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.shared_hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'hits': self.hits,
+                'shared_hits': self.shared_hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': round((self.hits + self.shared_hits) / lookups, 4) if lookups else 0.0,
+            }
+
+
+def _build_cache():
+    config = get_cache_settings()
+    return RecommendationCache(
+        max_entries=config['MAX_ENTRIES'],
+        cache_alias=config['CACHE_ALIAS'],
+        timeout=config['TIMEOUT'],
+    )
+
+
+recommendation_cache = _build_cache()
+_cached_version = None
+
+
+def generate_workout_cached(profile, index=None):
+    """
+    Como ``engine.generate_workout``, mas reaproveitando resultados de perfis
+    equivalentes. Retorna ``(workout_data, confidence_score)``. Sem ``index``,
+    usa o índice do processo (uma query para conferir a versão do catálogo).
+    """
+    global _cached_version
+    index = index if index is not None else get_exercise_index()
+    if not get_cache_settings()['ENABLED']:
+        return WorkoutGenerator(index).generate(profile)
+
+    if index.version != _cached_version:
+        # Entradas de versões anteriores do catálogo nunca mais serão lidas
+        recommendation_cache.clear()
+        _cached_version = index.version
+
+    key = profile_cache_key(profile, index.version)
+    result = recommendation_cache.get(key)
+    if result is None:
+        result = WorkoutGenerator(index).generate(profile)
+        recommendation_cache.set(key, result)
+    return result
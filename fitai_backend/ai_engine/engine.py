@@ -0,0 +1,203 @@
+"""
+Motor de geração de treinos.
+
+O catálogo de exercícios é carregado uma única vez por processo em um índice
+vetorizado (matrizes NumPy) e reconstruído quando a versão do catálogo muda
+(ver ``exercises.catalog``). Cada geração é apenas aritmética sobre esse
+índice, sem queries ao banco.
+"""
+import threading
+
+import numpy as np
+
+from exercises.catalog import get_catalog_version
+from exercises.models import Exercise, MuscleGroup
+from exercises.search import normalize_text
+
+DIFFICULTY_LEVELS = ['beginner', 'intermediate', 'advanced', 'expert']
+EQUIPMENT_KEYS = [key for key, _ in Exercise.EQUIPMENT_CHOICES]
+
+# Preferência de equipamento por objetivo (na ordem de EQUIPMENT_KEYS)
+GOAL_EQUIPMENT_WEIGHTS = {
+    'strength':        {'barbell': 1.0, 'dumbbell': 0.6, 'kettlebell': 0.4, 'machine': 0.3},
+    'hypertrophy':     {'dumbbell': 0.8, 'machine': 0.8, 'cable': 0.8, 'barbell': 0.6},
+    'weight_loss':     {'bodyweight': 0.8, 'kettlebell': 0.8, 'resistance_band': 0.5, 'dumbbell': 0.3},
+    'neural_strength': {'barbell': 1.0, 'kettlebell': 0.6, 'bodyweight': 0.3},
+    'endurance':       {'bodyweight': 0.8, 'resistance_band': 0.7, 'kettlebell': 0.5, 'cable': 0.3},
+}
+
+# Peso do flag is_neural_training e de exercícios compostos (2+ grupos musculares)
+GOAL_NEURAL_WEIGHT = {'neural_strength': 2.0, 'strength': 0.5}
+GOAL_COMPOUND_WEIGHT = {'strength': 0.8, 'neural_strength': 0.6, 'weight_loss': 0.6, 'endurance': 0.3}
+
+GOAL_PRESCRIPTIONS = {
+    'strength':        {'name': 'Treino de Força IA', 'sets': 4, 'reps': '5', 'rest_time': 180, 'load': '80% 1RM'},
+    'hypertrophy':     {'name': 'Treino de Hipertrofia IA', 'sets': 4, 'reps': '8-12', 'rest_time': 90, 'load': '70% 1RM'},
+    'weight_loss':     {'name': 'Treino Metabólico IA', 'sets': 3, 'reps': '15', 'rest_time': 45, 'load': 'Moderada'},
+    'neural_strength': {'name': 'Treino Neural IA', 'sets': 5, 'reps': '3', 'rest_time': 240, 'load': 'Máxima velocidade'},
+    'endurance':       {'name': 'Treino de Resistência IA', 'sets': 3, 'reps': '15-20', 'rest_time': 45, 'load': '50% 1RM'},
+}
+
+EXERCISES_PER_LEVEL = {'beginner': 4, 'intermediate': 5, 'advanced': 6, 'expert': 6}
+
+# Penalidade por grupo muscular já trabalhado no treino (balanceamento)
+BALANCE_PENALTY = 1.5
+
+
+class ExerciseIndex:
+    """Representação vetorizada do catálogo de exercícios."""
+
+    def __init__(self, exercises, muscle_groups, memberships, version=None):
+        self.version = version
+        self.ids = np.array([row[0] for row in exercises], dtype=np.int64)
+        self.names = [row[1] for row in exercises]
+        self.equipment = np.array(
+            [EQUIPMENT_KEYS.index(row[2]) if row[2] in EQUIPMENT_KEYS else -1 for row in exercises],
+            dtype=np.int16,
+        )
+        self.difficulty = np.array(
+            [DIFFICULTY_LEVELS.index(row[3]) if row[3] in DIFFICULTY_LEVELS else 0 for row in exercises],
+            dtype=np.int8,
+        )
+        self.neural = np.array([row[4] for row in exercises], dtype=bool)
+
+        self.muscle_group_ids = [mg_id for mg_id, _ in muscle_groups]
+        self.muscle_group_names = [name for _, name in muscle_groups]
+        # Radical sem plural: "Ombros" casa com "dor no ombro"
+        self.muscle_group_keys = [normalize_text(name).rstrip('s') for name in self.muscle_group_names]
+
+        row_of = {exercise_id: row for row, exercise_id in enumerate(self.ids.tolist())}
+        col_of = {mg_id: col for col, mg_id in enumerate(self.muscle_group_ids)}
+        self.membership = np.zeros((len(self.ids), len(self.muscle_group_ids)), dtype=np.float32)
+        for exercise_id, mg_id in memberships:
+            if exercise_id in row_of and mg_id in col_of:
+                self.membership[row_of[exercise_id], col_of[mg_id]] = 1.0
+        self.muscle_group_count = self.membership.sum(axis=1)
+
+    def __len__(self):
+        return len(self.ids)
+
+    @classmethod
+    def from_database(cls, version=None):
+        exercises = list(
+            Exercise.objects.order_by('id').values_list(
+                'id', 'name', 'equipment', 'difficulty', 'is_neural_training'
+            )
+        )
+        muscle_groups = list(MuscleGroup.objects.order_by('id').values_list('id', 'name'))
+        memberships = Exercise.muscle_groups.through.objects.values_list('exercise_id', 'musclegroup_id')
+        return cls(exercises, muscle_groups, memberships, version)
+
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def get_exercise_index():
+    """Retorna o índice do processo, reconstruindo-o se o catálogo mudou."""
+    global _index
+    version = get_catalog_version()
+    index = _index
+    if index is None or index.version != version:
+        with _index_lock:
+            if _index is None or _index.version != version:
+                # A versão é lida antes da carga: uma edição concorrente gera nova reconstrução
+                _index = ExerciseIndex.from_database(version)
+            index = _index
+    return index
+
+
+class WorkoutGenerator:
+    """Seleciona exercícios do catálogo para um perfil de usuário."""
+
+    def __init__(self, index=None):
+        self.index = index if index is not None else get_exercise_index()
+
+    def _equipment_mask(self, available_equipment):
+        allowed = {'bodyweight'}
+        allowed.update(item for item in available_equipment or [] if item in EQUIPMENT_KEYS)
+        allowed_codes = np.array([EQUIPMENT_KEYS.index(item) for item in allowed], dtype=np.int16)
+        return np.isin(self.index.equipment, allowed_codes)
+
+    def _limited_groups(self, limitations):
+        """Colunas dos grupos musculares citados nas limitações do usuário."""
+        text = normalize_text(limitations)
+        if not text:
+            return []
+        return [col for col, key in enumerate(self.index.muscle_group_keys) if key and key in text]
+
+    def _base_scores(self, goal, level):
+        index = self.index
+        equipment_weights = GOAL_EQUIPMENT_WEIGHTS.get(goal, GOAL_EQUIPMENT_WEIGHTS['strength'])
+        weight_table = np.array([equipment_weights.get(key, 0.0) for key in EQUIPMENT_KEYS] + [0.0])
+        scores = weight_table[index.equipment]
+        scores = scores + GOAL_NEURAL_WEIGHT.get(goal, 0.0) * index.neural
+        scores = scores + GOAL_COMPOUND_WEIGHT.get(goal, 0.0) * (index.muscle_group_count > 1)
+        # Prioriza exercícios próximos do nível do usuário
+        scores = scores - 0.5 * (level - index.difficulty)
+        return scores
+
+    def generate(self, profile):
+        """
+        Gera o treino para ``profile`` (UserProfile ou objeto com os mesmos
+        atributos). Retorna ``(workout_data, confidence_score)``.
+        """
+        index = self.index
+        goal = profile.primary_goal
+        experience = profile.experience_level
+        level = DIFFICULTY_LEVELS.index(experience) if experience in DIFFICULTY_LEVELS else 0
+        prescription = GOAL_PRESCRIPTIONS.get(goal, GOAL_PRESCRIPTIONS['strength'])
+        target = EXERCISES_PER_LEVEL.get(experience, 4)
+
+        workout_data = {'name': prescription['name'], 'exercises': []}
+        if not len(index):
+            return workout_data, 0.0
+
+        eligible = self._equipment_mask(profile.available_equipment)
+        eligible &= index.difficulty <= level
+        limited = self._limited_groups(profile.limitations)
+        if limited and index.membership.shape[1]:
+            eligible &= index.membership[:, limited].sum(axis=1) == 0
+
+        scores = np.where(eligible, self._base_scores(goal, level), -np.inf)
+        best_possible = scores.max() if eligible.any() else 0.0
+        coverage = np.zeros(index.membership.shape[1], dtype=np.float32)
+        sets = max(prescription['sets'] - (1 if level == 0 else 0), 2)
+
+        selected_scores = []
+        for _ in range(min(target, int(eligible.sum()))):
+            adjusted = scores - BALANCE_PENALTY * (index.membership @ coverage)
+            row = int(np.argmax(adjusted))
+            if not np.isfinite(adjusted[row]):
+                break
+            selected_scores.append(float(adjusted[row]))
+            coverage += index.membership[row]
+            scores[row] = -np.inf
+
+            muscle_columns = np.flatnonzero(index.membership[row])
+            workout_data['exercises'].append({
+                'exercise_id': int(index.ids[row]),
+                'name': index.names[row],
+                'muscle_groups': [index.muscle_group_names[col] for col in muscle_columns],
+                'sets': sets,
+                'reps': prescription['reps'],
+                'rest_time': prescription['rest_time'],
+                'load': prescription['load'],
+            })
+
+        return workout_data, self._confidence(selected_scores, best_possible, target)
+
+    @staticmethod
+    def _confidence(selected_scores, best_possible, target):
+        """Quão completo e aderente ao objetivo ficou o treino, entre 0 e 0.99."""
+        if not selected_scores:
+            return 0.0
+        fill_ratio = len(selected_scores) / target
+        scale = max(abs(best_possible), 1.0)
+        quality = float(np.clip(np.mean(selected_scores) / scale, 0.0, 1.0))
+        return round(0.99 * fill_ratio * (0.6 + 0.4 * quality), 4)
+
+
+def generate_workout(profile):
+    """Atalho para gerar um treino com o índice do processo."""
+    return WorkoutGenerator().generate(profile)
@@ -0,0 +1,138 @@
+"""
+Fila de geração de treinos em tabela do próprio banco (sem broker externo).
+
+``enqueue_generation`` cria o job e retorna imediatamente; o comando
+``run_ai_worker`` reivindica jobs pendentes e grava a recomendação. Em bancos
+com suporte a ``SELECT ... FOR UPDATE SKIP LOCKED`` (PostgreSQL, MySQL 8) os
+workers não disputam as mesmas linhas; no SQLite a reivindicação é feita com
+um UPDATE condicional por job.
+"""
+import logging
+import threading
+from datetime import timedelta
+
+from django.db import connection, transaction, close_old_connections
+from django.utils import timezone
+
+from .cache import generate_workout_cached
+from .models import AIGenerationJob, AIWorkoutRecommendation
+
+logger = logging.getLogger(__name__)
+
+MAX_ATTEMPTS = 3
+
+
+def enqueue_generation(profile):
+    return AIGenerationJob.objects.create(user_profile=profile)
+
+
+def _claim_skip_locked(limit):
+    with transaction.atomic():
+        job_ids = list(
+            AIGenerationJob.objects.select_for_update(skip_locked=True)
+            .filter(status='pending')
+            .order_by('created_at', 'id')
+            .values_list('id', flat=True)[:limit]
+        )
+        AIGenerationJob.objects.filter(id__in=job_ids).update(status='running', started_at=timezone.now())
+    return job_ids
+
+
+def _claim_conditional_update(limit):
+    candidates = list(
+        AIGenerationJob.objects.filter(status='pending')
+        .order_by('created_at', 'id')
+        .values_list('id', flat=True)[:limit]
+    )
+    claimed = []
+    for job_id in candidates:
+        # Só um worker consegue mudar pending -> running para o mesmo job
+        if AIGenerationJob.objects.filter(id=job_id, status='pending').update(
+            status='running', started_at=timezone.now()
+        ):
+            claimed.append(job_id)
+    return claimed
+
+
+def claim_jobs(limit=1):
+    """Marca até ``limit`` jobs pendentes como em execução e os retorna."""
+    if connection.features.has_select_for_update_skip_locked:
+        job_ids = _claim_skip_locked(limit)
+    else:
+        job_ids = _claim_conditional_update(limit)
+    if not job_ids:
+        return []
+    return list(
+        AIGenerationJob.objects.select_related('user_profile')
+        .filter(id__in=job_ids)
+        .order_by('created_at', 'id')
+    )
+
+
+def run_job(job):
+    """Gera o treino do job e registra o resultado."""
+    job.attempts += 1
+    try:
+        workout_data, confidence_score = generate_workout_cached(job.user_profile)
+        with transaction.atomic():
+            job.recommendation = AIWorkoutRecommendation.objects.create(
+                user_profile=job.user_profile,
+                workout_data=workout_data,
+                confidence_score=confidence_score
+            )
+            job.status = 'completed'
+            job.error = ''
+            job.finished_at = timezone.now()
+            job.save(update_fields=['recommendation', 'status', 'error', 'attempts', 'finished_at'])
+    except Exception as exc:
+        logger.exception('Falha no job de geração %s', job.id)
+        job.status = 'pending' if job.attempts < MAX_ATTEMPTS else 'failed'
+        job.error = f'{type(exc).__name__}: {exc}'
+        job.finished_at = timezone.now() if job.status == 'failed' else None
+        job.save(update_fields=['status', 'error', 'attempts', 'finished_at'])
+    return job
+
+
+def requeue_stale_jobs(timeout):
+    """Devolve à fila jobs 'running' de workers que morreram no meio da execução."""
+    limit = timezone.now() - timedelta(seconds=timeout)
+    return AIGenerationJob.objects.filter(status='running', started_at__lt=limit).update(status='pending')
+
+
+def process_available_jobs(batch_size=10):
+    """Processa um bloco de jobs; retorna quantos foram executados."""
+    jobs = claim_jobs(batch_size)
+    for job in jobs:
+        run_job(job)
+    return len(jobs)
+
+
+def run_worker(threads=1, batch_size=10, poll_interval=1.0, stop_event=None, once=False):
+    """
+    Executa ``threads`` workers até ``stop_event`` ser sinalizado. Com
+    ``once=True`` cada worker termina assim que a fila esvazia.
+    """
+    stop_event = stop_event or threading.Event()
+
+    def loop():
+        try:
+            while not stop_event.is_set():
+                if not connection.in_atomic_block:
+                    close_old_connections()
+                if process_available_jobs(batch_size):
+                    continue
+                if once:
+                    break
+                stop_event.wait(poll_interval)
+        finally:
+            if not connection.in_atomic_block:
+                connection.close()
+
+    if threads <= 1:
+        loop()
+        return
+    workers = [threading.Thread(target=loop, name=f'ai-worker-{i}', daemon=True) for i in range(threads)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
@@ -0,0 +1,41 @@
+import os
+
+from django.core.management.base import BaseCommand, CommandError
+
+from ai_engine.batch import generate_plans, DEFAULT_CHUNK_SIZE
+from ai_engine.models import UserProfile
+
+
+class Command(BaseCommand):
+    help = 'Gera recomendações de treino em lote para vários perfis'
+
+    def add_arguments(self, parser):
+        parser.add_argument('profile_ids', nargs='*', type=int, help='IDs de UserProfile')
+        parser.add_argument('--all', action='store_true', help='Gera para todos os perfis')
+        parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                            help='Processos usados na geração (padrão: número de CPUs)')
+        parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE,
+                            help='Perfis por bloco de leitura/gravação')
+
+    def handle(self, *args, **options):
+        profile_ids = options['profile_ids']
+        if options['all']:
+            profile_ids = list(UserProfile.objects.order_by('id').values_list('id', flat=True))
+        if not profile_ids:
+            raise CommandError('Informe os IDs dos perfis ou use --all')
+
+        self.stdout.write(f'Gerando treinos para {len(profile_ids)} perfis...')
+        result = generate_plans(
+            profile_ids,
+            workers=options['workers'],
+            chunk_size=options['chunk_size'],
+        )
+
+        for failure in result.failures:
+            self.stderr.write(f"Perfil {failure['profile_id']}: {failure['error']}")
+
+        self.stdout.write(
+            f'{result.created} recomendações criadas, {len(result.failures)} falhas '
+            f'em {result.elapsed:.2f}s ({result.throughput:.1f} perfis/s)'
+        )
+        self.stdout.write(self.style.SUCCESS('Geração em lote concluída!'))
@@ -0,0 +1,38 @@
+import signal
+import threading
+
+from django.core.management.base import BaseCommand
+
+from ai_engine.jobs import run_worker, requeue_stale_jobs
+
+
+class Command(BaseCommand):
+    help = 'Processa a fila de geração de treinos da IA'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threads', type=int, default=2, help='Threads de worker')
+        parser.add_argument('--batch-size', type=int, default=10, help='Jobs reivindicados por vez')
+        parser.add_argument('--poll-interval', type=float, default=1.0,
+                            help='Segundos de espera quando a fila está vazia')
+        parser.add_argument('--stale-after', type=int, default=300,
+                            help='Reenfileira jobs em execução há mais de N segundos')
+        parser.add_argument('--once', action='store_true', help='Esvazia a fila e termina')
+
+    def handle(self, *args, **options):
+        requeued = requeue_stale_jobs(options['stale_after'])
+        if requeued:
+            self.stdout.write(f'{requeued} jobs travados reenfileirados')
+
+        stop_event = threading.Event()
+        signal.signal(signal.SIGTERM, lambda *_: stop_event.set())
+        signal.signal(signal.SIGINT, lambda *_: stop_event.set())
+
+        self.stdout.write(f"Worker da IA iniciado com {options['threads']} threads")
+        run_worker(
+            threads=options['threads'],
+            batch_size=options['batch_size'],
+            poll_interval=options['poll_interval'],
+            stop_event=stop_event,
+            once=options['once'],
+        )
+        self.stdout.write(self.style.SUCCESS('Worker da IA finalizado'))
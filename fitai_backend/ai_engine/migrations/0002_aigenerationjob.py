@@ -0,0 +1,31 @@
+# Generated by Django 5.2.18 on 2026-10-18 05:32
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ai_engine', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AIGenerationJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.CharField(choices=[('pending', 'Pendente'), ('running', 'Em Execução'), ('completed', 'Concluído'), ('failed', 'Falhou')], default='pending', max_length=10)),
+                ('error', models.TextField(blank=True)),
+                ('attempts', models.PositiveIntegerField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('started_at', models.DateTimeField(blank=True, null=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+                ('recommendation', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to='ai_engine.aiworkoutrecommendation')),
+                ('user_profile', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='ai_engine.userprofile')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['status', 'created_at'], name='ai_engine_a_status_7c7933_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.18 on 2026-10-18 05:39
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ai_engine', '0002_aigenerationjob'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='aiworkoutrecommendation',
+            index=models.Index(fields=['user_profile', '-generated_at', '-id'], name='ai_engine_a_user_pr_c394db_idx'),
+        ),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 5.2.18 on 2026-10-18 05:46
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ai_engine', '0003_aiworkoutrecommendation_ai_engine_a_user_pr_c394db_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='aiworkoutrecommendation',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddIndex(
+            model_name='aiworkoutrecommendation',
+            index=models.Index(fields=['user_profile', 'updated_at'], name='ai_engine_a_user_pr_d588fa_idx'),
+        ),
+    ]
@@ -37,6 +37,45 @@ class AIWorkoutRecommendation(models.Model):
     generated_at = models.DateTimeField(auto_now_add=True)
     feedback_rating = models.IntegerField(null=True, blank=True)
     feedback_notes = models.TextField(blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        indexes = [
+            # Histórico paginado por cursor em my_recommendations
+            models.Index(fields=['user_profile', '-generated_at', '-id']),
+            # Delta da sincronização offline
+            models.Index(fields=['user_profile', 'updated_at']),
+        ]
+    
+    def __str__(self):
+        return f"IA Recommendation - {self.user_profile.user.username}"
+
+class AIGenerationJob(models.Model):
+    STATUS_CHOICES = [
+        ('pending', 'Pendente'),
+        ('running', 'Em Execução'),
+        ('completed', 'Concluído'),
+        ('failed', 'Falhou'),
+    ]
+    
+    user_profile = models.ForeignKey(UserProfile, on_delete=models.CASCADE)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='pending')
+    recommendation = models.ForeignKey(
+        AIWorkoutRecommendation, 
+        on_delete=models.SET_NULL, 
+        null=True, 
+        blank=True
+    )
+    error = models.TextField(blank=True)
+    attempts = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'created_at']),
+        ]
     
     def __str__(self):
-        return f"IA Recommendation - {self.user_profile.user.username}"
\ No newline at end of file
+        return f"Job IA #{self.id} - {self.get_status_display()}"
@@ -1,5 +1,5 @@
 from rest_framework import serializers
-from .models import UserProfile, AIWorkoutRecommendation
+from .models import UserProfile, AIWorkoutRecommendation, AIGenerationJob
 
 class UserProfileSerializer(serializers.ModelSerializer):
     class Meta:
@@ -13,6 +13,14 @@ class AIWorkoutRecommendationSerializer(serializers.ModelSerializer):
         fields = '__all__'
         read_only_fields = ('user_profile', 'generated_at')
 
+class AIGenerationJobSerializer(serializers.ModelSerializer):
+    recommendation = AIWorkoutRecommendationSerializer(read_only=True)
+    
+    class Meta:
+        model = AIGenerationJob
+        fields = ('id', 'status', 'recommendation', 'error', 'created_at', 'started_at', 'finished_at')
+        read_only_fields = fields
+
 class AnamneseSerializer(serializers.Serializer):
     primary_goal = serializers.ChoiceField(choices=UserProfile.GOAL_CHOICES)
     experience_level = serializers.ChoiceField(choices=UserProfile.EXPERIENCE_CHOICES)
@@ -23,4 +31,11 @@ class AnamneseSerializer(serializers.Serializer):
     def validate_training_frequency(self, value):
         if value < 1 or value > 7:
             raise serializers.ValidationError("Frequência deve ser entre 1 e 7 dias por semana")
-        return value
\ No newline at end of file
+        return value
+
+class BatchGenerateSerializer(serializers.Serializer):
+    profile_ids = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        allow_empty=False,
+        max_length=5000,
+    )
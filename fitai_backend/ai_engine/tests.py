@@ -1,3 +1,339 @@
+import time
+from types import SimpleNamespace
+
 from django.test import TestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from accounts.models import User
+from exercises.models import Exercise, MuscleGroup
+from workouts.models import UserWorkout, WorkoutTemplate
+from .batch import generate_plans
+from .cache import RecommendationCache, generate_workout_cached, profile_cache_key, recommendation_cache
+from .engine import ExerciseIndex, WorkoutGenerator, get_exercise_index, EQUIPMENT_KEYS, DIFFICULTY_LEVELS
+from .jobs import enqueue_generation, claim_jobs, process_available_jobs, run_worker
+from .models import UserProfile, AIWorkoutRecommendation, AIGenerationJob
+
+
+def make_profile(**overrides):
+    data = {
+        'primary_goal': 'strength',
+        'experience_level': 'intermediate',
+        'training_frequency': 3,
+        'available_equipment': ['barbell', 'dumbbell'],
+        'limitations': '',
+    }
+    data.update(overrides)
+    return SimpleNamespace(**data)
+
+
+class WorkoutGeneratorTestCase(TestCase):
+
+    def setUp(self):
+        self.groups = {name: MuscleGroup.objects.create(name=name)
+                       for name in ['Peito', 'Costas', 'Pernas', 'Ombros']}
+        self.add('Supino Reto', 'barbell', 'intermediate', ['Peito', 'Ombros'])
+        self.add('Remada Curvada', 'barbell', 'intermediate', ['Costas'])
+        self.add('Agachamento', 'barbell', 'intermediate', ['Pernas'])
+        self.add('Desenvolvimento', 'dumbbell', 'beginner', ['Ombros'])
+        self.add('Flexão de Braço', 'bodyweight', 'beginner', ['Peito'])
+        self.add('Puxada na Polia', 'cable', 'beginner', ['Costas'])
+        self.add('Agachamento Explosivo', 'barbell', 'advanced', ['Pernas'], is_neural_training=True)
+
+    def add(self, name, equipment, difficulty, groups, **extra):
+        exercise = Exercise.objects.create(
+            name=name, description='', equipment=equipment,
+            difficulty=difficulty, instructions='', **extra,
+        )
+        exercise.muscle_groups.set([self.groups[group] for group in groups])
+        return exercise
+
+    def generate(self, **overrides):
+        return WorkoutGenerator().generate(make_profile(**overrides))
+
+    def test_respects_equipment_and_difficulty(self):
+        workout, confidence = self.generate()
+        names = {exercise['name'] for exercise in workout['exercises']}
+        self.assertNotIn('Puxada na Polia', names)
+        self.assertNotIn('Agachamento Explosivo', names)
+        self.assertEqual(len(workout['exercises']), 5)
+        self.assertGreater(confidence, 0)
+
+    def test_balances_muscle_groups(self):
+        self.add('Supino Inclinado', 'barbell', 'intermediate', ['Peito'])
+        workout, _ = self.generate()
+        first = [exercise['name'] for exercise in workout['exercises'][:3]]
+        self.assertEqual(first[0], 'Supino Reto')
+        self.assertEqual(set(first[1:]), {'Remada Curvada', 'Agachamento'})
+
+    def test_limitations_exclude_muscle_groups(self):
+        workout, _ = self.generate(limitations='Dor no ombro e nas pernas')
+        for exercise in workout['exercises']:
+            self.assertNotIn('Ombros', exercise['muscle_groups'])
+            self.assertNotIn('Pernas', exercise['muscle_groups'])
+
+    def test_is_deterministic(self):
+        self.assertEqual(self.generate(), self.generate())
+
+    def test_index_invalidated_on_catalog_changes(self):
+        index = get_exercise_index()
+        self.assertIs(get_exercise_index(), index)
+        exercise = self.add('Levantamento Terra', 'barbell', 'advanced', ['Costas'])
+        self.assertIsNot(get_exercise_index(), index)
+        index = get_exercise_index()
+        exercise.muscle_groups.add(self.groups['Pernas'])
+        self.assertIsNot(get_exercise_index(), index)
+
+    def test_generation_does_not_query_database(self):
+        index = get_exercise_index()
+        with self.assertNumQueries(0):
+            WorkoutGenerator(index).generate(make_profile())
+
+    def test_large_catalog_latency(self):
+        size, n_groups = 10000, 20
+        exercises = [
+            (i, f'Exercício {i}', EQUIPMENT_KEYS[i % len(EQUIPMENT_KEYS)],
+             DIFFICULTY_LEVELS[i % len(DIFFICULTY_LEVELS)], i % 5 == 0)
+            for i in range(size)
+        ]
+        groups = [(i, f'Grupo {i}') for i in range(n_groups)]
+        memberships = [(i, (i * 7 + k) % n_groups) for i in range(size) for k in range(2)]
+        generator = WorkoutGenerator(ExerciseIndex(exercises, groups, memberships))
+
+        timings = []
+        for _ in range(200):
+            start = time.perf_counter()
+            generator.generate(make_profile(experience_level='expert'))
+            timings.append(time.perf_counter() - start)
+        timings.sort()
+        self.assertLess(timings[int(len(timings) * 0.99)], 0.005)
+
+
+class GenerateWorkoutEndpointTestCase(TestCase):
+
+    def test_generate_workout_persists_recommendation(self):
+        user = User.objects.create_user(username='client', password='x')
+        UserProfile.objects.create(
+            user=user, primary_goal='strength', experience_level='beginner',
+            training_frequency=3, available_equipment=[],
+        )
+        exercise = Exercise.objects.create(
+            name='Flexão de Braço', description='', equipment='bodyweight',
+            difficulty='beginner', instructions='',
+        )
+        api = APIClient()
+        api.force_authenticate(user)
+
+        response = api.post('/api/ai/engine/generate_workout/')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['workout']['exercises'][0]['exercise_id'], exercise.id)
+        recommendation = AIWorkoutRecommendation.objects.get(pk=response.data['recommendation_id'])
+        self.assertEqual(recommendation.workout_data, response.data['workout'])
+
+
+class BatchGenerationTestCase(TestCase):
+
+    def setUp(self):
+        Exercise.objects.create(
+            name='Flexão de Braço', description='', equipment='bodyweight',
+            difficulty='beginner', instructions='',
+        )
+        self.profiles = []
+        for index in range(5):
+            user = User.objects.create_user(username=f'client{index}', password='x')
+            self.profiles.append(UserProfile.objects.create(
+                user=user, primary_goal='endurance', experience_level='beginner',
+                training_frequency=3, available_equipment=[],
+            ))
+        self.trainer = User.objects.create_user(username='trainer', password='x', role='trainer')
+
+    def test_generate_plans_reports_failures_without_aborting(self):
+        ids = [profile.id for profile in self.profiles] + [999999]
+        result = generate_plans(ids, workers=1, chunk_size=2)
+
+        self.assertEqual(result.created, 5)
+        self.assertEqual(result.failures, [{'profile_id': 999999, 'error': 'Perfil não encontrado'}])
+        self.assertEqual(AIWorkoutRecommendation.objects.count(), 5)
+        self.assertGreater(result.throughput, 0)
+
+    def test_generate_plans_with_process_pool(self):
+        result = generate_plans([profile.id for profile in self.profiles], workers=2, chunk_size=2)
+        self.assertEqual(result.created, 5)
+        self.assertEqual(
+            set(AIWorkoutRecommendation.objects.values_list('user_profile_id', flat=True)),
+            {profile.id for profile in self.profiles},
+        )
+
+    def test_batch_endpoint_requires_trainer(self):
+        api = APIClient()
+        api.force_authenticate(self.profiles[0].user)
+        response = api.post('/api/ai/engine/generate_batch/', {'profile_ids': [1]}, format='json')
+        self.assertEqual(response.status_code, 403)
+
+    def test_batch_endpoint_rejects_other_trainers_clients(self):
+        template = WorkoutTemplate.objects.create(
+            name='Base', description='', trainer=self.trainer, difficulty='beginner',
+            estimated_duration=30, goal='endurance',
+        )
+        UserWorkout.objects.create(user=self.profiles[0].user, workout_template=template,
+                                   scheduled_date=timezone.now())
+        api = APIClient()
+        api.force_authenticate(self.trainer)
+        ids = [self.profiles[0].id, self.profiles[1].id]
+        response = api.post('/api/ai/engine/generate_batch/', {'profile_ids': ids}, format='json')
+        self.assertEqual(response.status_code, 403)
+        self.assertEqual(response.data['profile_ids'], [self.profiles[1].id])
+        self.assertFalse(AIWorkoutRecommendation.objects.exists())
+        response = api.post('/api/ai/engine/generate_batch/', {'profile_ids': ids[:1]}, format='json')
+        self.assertEqual(response.status_code, 201)
+
+    def test_batch_endpoint(self):
+        api = APIClient()
+        self.trainer.is_staff = True
+        self.trainer.save()
+        api.force_authenticate(self.trainer)
+        response = api.post(
+            '/api/ai/engine/generate_batch/',
+            {'profile_ids': [profile.id for profile in self.profiles]},
+            format='json',
+        )
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data['created'], 5)
+        self.assertEqual(len(response.data['recommendation_ids']), 5)
+
+
+class AsyncGenerationTestCase(TestCase):
+
+    def setUp(self):
+        Exercise.objects.create(
+            name='Flexão de Braço', description='', equipment='bodyweight',
+            difficulty='beginner', instructions='',
+        )
+        self.user = User.objects.create_user(username='client', password='x')
+        self.profile = UserProfile.objects.create(
+            user=self.user, primary_goal='strength', experience_level='beginner',
+            training_frequency=3, available_equipment=[],
+        )
+        self.api = APIClient()
+        self.api.force_authenticate(self.user)
+
+    def test_async_generation_flow(self):
+        response = self.api.post('/api/ai/engine/generate_workout/', {'async': True}, format='json')
+        self.assertEqual(response.status_code, 202)
+        job_url = f"/api/ai/engine/jobs/{response.data['job_id']}/"
+        self.assertEqual(self.api.get(job_url).data['status'], 'pending')
+        self.assertFalse(AIWorkoutRecommendation.objects.exists())
+
+        self.assertEqual(process_available_jobs(), 1)
+        self.assertEqual(process_available_jobs(), 0)
+
+        data = self.api.get(job_url).data
+        self.assertEqual(data['status'], 'completed')
+        self.assertEqual(data['recommendation']['user_profile'], self.profile.id)
+
+    def test_list_body_falls_back_to_default(self):
+        response = self.api.post('/api/ai/engine/generate_workout/', [1, 2], format='json')
+        self.assertEqual(response.status_code, 200)
+
+    def test_job_claimed_only_once(self):
+        job = enqueue_generation(self.profile)
+        self.assertEqual([claimed.id for claimed in claim_jobs(5)], [job.id])
+        self.assertEqual(claim_jobs(5), [])
+
+    def test_run_worker_drains_queue(self):
+        for _ in range(3):
+            enqueue_generation(self.profile)
+        run_worker(once=True)
+        self.assertEqual(AIGenerationJob.objects.filter(status='completed').count(), 3)
+
+    def test_job_status_is_private(self):
+        job = enqueue_generation(self.profile)
+        other = APIClient()
+        other.force_authenticate(User.objects.create_user(username='other', password='x'))
+        self.assertEqual(other.get(f'/api/ai/engine/jobs/{job.id}/').status_code, 404)
+
+
+class RecommendationCacheTestCase(TestCase):
+
+    def setUp(self):
+        self.exercise = Exercise.objects.create(
+            name='Flexão de Braço', description='', equipment='bodyweight',
+            difficulty='beginner', instructions='',
+        )
+        recommendation_cache.clear()
+        recommendation_cache.reset_stats()
+
+    def test_key_is_canonical(self):
+        first = make_profile(available_equipment=['dumbbell', 'barbell'], limitations='Dor no  Ombro')
+        second = make_profile(available_equipment=['barbell', 'dumbbell', 'barbell'], limitations='dor no ombro')
+        self.assertEqual(profile_cache_key(first, 1), profile_cache_key(second, 1))
+        self.assertNotEqual(profile_cache_key(first, 1), profile_cache_key(first, 2))
+        self.assertNotEqual(
+            profile_cache_key(first, 1),
+            profile_cache_key(make_profile(available_equipment=['barbell'], limitations='dor no ombro'), 1),
+        )
+
+    def test_hits_and_misses(self):
+        generate_workout_cached(make_profile())
+        generate_workout_cached(make_profile(available_equipment=['dumbbell', 'barbell']))
+        stats = recommendation_cache.stats()
+        self.assertEqual((stats['hits'], stats['misses'], stats['entries']), (1, 1, 1))
+
+    def test_catalog_change_invalidates(self):
+        workout, _ = generate_workout_cached(make_profile())
+        self.assertEqual(len(workout['exercises']), 1)
+        Exercise.objects.create(
+            name='Agachamento', description='', equipment='barbell',
+            difficulty='beginner', instructions='',
+        )
+        workout, _ = generate_workout_cached(make_profile())
+        self.assertEqual(len(workout['exercises']), 2)
+        self.assertEqual(recommendation_cache.stats()['misses'], 2)
+
+    def test_lru_eviction(self):
+        cache = RecommendationCache(max_entries=2)
+        cache.set('a', 1)
+        cache.set('b', 2)
+        cache.get('a')
+        cache.set('c', 3)
+        self.assertIsNone(cache.get('b'))
+        self.assertEqual(cache.get('a'), 1)
+        self.assertEqual(cache.stats()['evictions'], 1)
+
+    def test_shared_tier(self):
+        writer = RecommendationCache(cache_alias='default')
+        reader = RecommendationCache(cache_alias='default')
+        writer.set('ai_engine:test', ({'name': 'x'}, 0.9))
+        self.assertEqual(reader.get('ai_engine:test'), ({'name': 'x'}, 0.9))
+        self.assertEqual(reader.stats()['shared_hits'], 1)
+
+    def test_stats_endpoint_is_admin_only(self):
+        api = APIClient()
+        api.force_authenticate(User.objects.create_user(username='client', password='x'))
+        self.assertEqual(api.get('/api/ai/engine/cache_stats/').status_code, 403)
+        api.force_authenticate(User.objects.create_user(username='staff', password='x', is_staff=True))
+        self.assertEqual(api.get('/api/ai/engine/cache_stats/').data['max_entries'], 1024)
+
+
+class RecommendationHistoryTestCase(TestCase):
+
+    def test_my_recommendations_is_cursor_paginated(self):
+        user = User.objects.create_user(username='client', password='x')
+        profile = UserProfile.objects.create(
+            user=user, primary_goal='strength', experience_level='beginner',
+            training_frequency=3, available_equipment=[],
+        )
+        ids = [
+            AIWorkoutRecommendation.objects.create(user_profile=profile, workout_data={}, confidence_score=0.9).id
+            for _ in range(25)
+        ]
+        api = APIClient()
+        api.force_authenticate(user)
+
+        first = api.get('/api/ai/engine/my_recommendations/').data
+        second = api.get(first['next']).data
 
-# Create your tests here.
+        self.assertEqual([row['id'] for row in first['results']], ids[::-1][:20])
+        self.assertEqual([row['id'] for row in second['results']], ids[::-1][20:])
+        self.assertIsNone(second['next'])
@@ -1,22 +1,32 @@
 from rest_framework import viewsets, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
-from rest_framework.permissions import IsAuthenticated
+from rest_framework.permissions import IsAuthenticated, IsAdminUser
+from django.conf import settings
 from django.utils import timezone
-import random
-from .models import UserProfile, AIWorkoutRecommendation
+from fitai_backend.pagination import KeysetPagination
+from workouts.models import UserWorkout
+from .batch import generate_plans
+from .cache import generate_workout_cached, recommendation_cache
+from .jobs import enqueue_generation
+from .models import UserProfile, AIWorkoutRecommendation, AIGenerationJob
 from .serializers import (
     UserProfileSerializer, 
     AIWorkoutRecommendationSerializer,
-    AnamneseSerializer
+    AIGenerationJobSerializer,
+    AnamneseSerializer,
+    BatchGenerateSerializer
 )
 
+class RecommendationPagination(KeysetPagination):
+    ordering = ('-generated_at', '-id')
+
 class UserProfileViewSet(viewsets.ModelViewSet):
     serializer_class = UserProfileSerializer
     permission_classes = [IsAuthenticated]
     
     def get_queryset(self):
-        return UserProfile.objects.filter(user=self.request.user)
+        return UserProfile.objects.filter(user=self.request.user).order_by('id')
     
     def perform_create(self, serializer):
         serializer.save(user=self.request.user)
@@ -60,9 +70,15 @@ class AIEngineViewSet(viewsets.ViewSet):
             return Response({'error': 'Perfil não encontrado. Faça a anamnese primeiro.'}, 
                           status=status.HTTP_404_NOT_FOUND)
         
-        # Simulação de IA (aqui você implementaria o algoritmo real)
-        workout_data = self._simulate_ai_workout_generation(profile)
-        confidence_score = random.uniform(0.85, 0.98)
+        if self._use_async(request):
+            job = enqueue_generation(profile)
+            return Response({
+                'job_id': job.id,
+                'status': job.status,
+                'message': 'Geração de treino enfileirada'
+            }, status=status.HTTP_202_ACCEPTED)
+        
+        workout_data, confidence_score = generate_workout_cached(profile)
         
         # Salvar recomendação
         recommendation = AIWorkoutRecommendation.objects.create(
@@ -78,41 +94,69 @@ class AIEngineViewSet(viewsets.ViewSet):
             'message': 'Treino gerado com sucesso pela IA!'
         })
     
-    def _simulate_ai_workout_generation(self, profile):
-        """Simulação do algoritmo de IA - substitua pela implementação real"""
-        goal_workouts = {
-            'neural_strength': {
-                'name': 'Treino Neural IA',
-                'exercises': [
-                    {'name': 'Agachamento Explosivo', 'sets': 4, 'reps': '6', 'load': '85% 1RM'},
-                    {'name': 'Supino Velocidade', 'sets': 5, 'reps': '3', 'load': 'Máxima velocidade'},
-                    {'name': 'Levantamento Olímpico', 'sets': 4, 'reps': '4', 'load': 'Técnica perfeita'},
-                ]
-            },
-            'strength': {
-                'name': 'Treino de Força IA',
-                'exercises': [
-                    {'name': 'Agachamento', 'sets': 4, 'reps': '5', 'load': '80% 1RM'},
-                    {'name': 'Supino', 'sets': 4, 'reps': '5', 'load': '80% 1RM'},
-                    {'name': 'Levantamento Terra', 'sets': 3, 'reps': '5', 'load': '85% 1RM'},
-                ]
-            }
-        }
+    def _use_async(self, request):
+        # Corpo pode ser uma lista JSON
+        body = request.data if isinstance(request.data, dict) else {}
+        value = request.query_params.get('async', body.get('async'))
+        if value is None:
+            return getattr(settings, 'AI_ENGINE_ASYNC', False)
+        return str(value).lower() in ('1', 'true', 'yes')
+    
+    @action(detail=False, methods=['get'], url_path=r'jobs/(?P<job_id>[0-9]+)')
+    def job_status(self, request, job_id=None):
+        """Status de um job de geração assíncrona"""
+        try:
+            job = AIGenerationJob.objects.select_related('recommendation').get(
+                id=job_id, user_profile__user=request.user
+            )
+        except AIGenerationJob.DoesNotExist:
+            return Response({'error': 'Job não encontrado'}, 
+                          status=status.HTTP_404_NOT_FOUND)
+        
+        return Response(AIGenerationJobSerializer(job).data)
+    
+    @action(detail=False, methods=['get'], permission_classes=[IsAdminUser])
+    def cache_stats(self, request):
+        """Contadores do cache de recomendações (monitoramento)"""
+        return Response(recommendation_cache.stats())
+    
+    @action(detail=False, methods=['post'])
+    def generate_batch(self, request):
+        """Gerar treinos em lote para vários perfis (personal trainers)"""
+        if request.user.role not in ('trainer', 'admin') and not request.user.is_staff:
+            return Response({'error': 'Apenas personal trainers podem gerar treinos em lote'}, 
+                          status=status.HTTP_403_FORBIDDEN)
+        
+        serializer = BatchGenerateSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        
+        profile_ids = serializer.validated_data['profile_ids']
+        if request.user.role != 'admin' and not request.user.is_staff:
+            # Trainers só geram para os próprios clientes (com treinos nos templates deles)
+            clients = UserWorkout.objects.filter(workout_template__trainer=request.user).values('user_id')
+            allowed = set(
+                UserProfile.objects.filter(id__in=profile_ids, user_id__in=clients).values_list('id', flat=True)
+            )
+            forbidden = sorted(set(profile_ids) - allowed)
+            if forbidden:
+                return Response({'error': 'Perfis que não pertencem aos seus clientes', 'profile_ids': forbidden},
+                              status=status.HTTP_403_FORBIDDEN)
         
-        return goal_workouts.get(profile.primary_goal, goal_workouts['strength'])
+        result = generate_plans(profile_ids)
+        return Response(result.as_dict(), status=status.HTTP_201_CREATED)
     
     @action(detail=False, methods=['get'])
     def my_recommendations(self, request):
-        """Histórico de recomendações da IA"""
+        """Histórico de recomendações da IA (paginado por cursor)"""
         try:
             profile = UserProfile.objects.get(user=request.user)
-            recommendations = AIWorkoutRecommendation.objects.filter(
-                user_profile=profile
-            ).order_by('-generated_at')
-            
-            serializer = AIWorkoutRecommendationSerializer(recommendations, many=True)
-            return Response(serializer.data)
-            
         except UserProfile.DoesNotExist:
             return Response({'error': 'Perfil não encontrado'}, 
-                          status=status.HTTP_404_NOT_FOUND)
\ No newline at end of file
+                          status=status.HTTP_404_NOT_FOUND)
+        
+        recommendations = AIWorkoutRecommendation.objects.filter(user_profile=profile)
+        paginator = RecommendationPagination()
+        page = paginator.paginate_queryset(recommendations, request, view=self)
+        serializer = AIWorkoutRecommendationSerializer(page, many=True)
+        return paginator.get_paginated_response(serializer.data)
\ No newline at end of file
@@ -0,0 +1,45 @@
+from asgiref.sync import sync_to_async
+from django.core.cache import cache
+from django.utils.cache import get_conditional_response
+
+from fitai_backend.async_api import async_api_view, apaginate, json_response
+from .catalog import (aget_catalog_state, catalog_cache_key, catalog_cache_timeout,
+                      catalog_etag, catalog_last_modified, set_validators)
+from .views import ExerciseViewSet
+
+
+async def _exercise_list_data(request):
+    view = ExerciseViewSet(action='list', request=request, args=(), kwargs={}, format_kwarg=None)
+    queryset = view.get_queryset()
+    params = request.query_params
+    # Filtros e busca podem consultar o banco ao validar/expandir termos
+    needs_sync = params.get('search') or any(field in params for field in view.filterset_fields)
+    if needs_sync:
+        queryset = await sync_to_async(view.filter_queryset)(queryset)
+
+    page = await apaginate(view.paginator, queryset, request)
+    data = view.get_serializer(page, many=True).data
+    if params.get('search') or params.get('facets') in ('1', 'true'):
+        return (await sync_to_async(view.get_paginated_response)(data)).data
+    return view.get_paginated_response(data).data
+
+
+@async_api_view
+async def exercise_list(request):
+    """Mesma resposta (e cache/ETag) de GET /api/exercises/exercises/"""
+    version, changed_at = await aget_catalog_state()
+    # Chave própria: os links de paginação apontam para /api/async/
+    key = catalog_cache_key(version, request.get_host(), 'exercise', 'async-list', None, request.query_params)
+    etag = catalog_etag(key, 'json')
+    last_modified = catalog_last_modified(changed_at)
+
+    response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if response is None:
+        data = await cache.aget(key)
+        if data is None:
+            data = await _exercise_list_data(request)
+            await cache.aset(key, data, catalog_cache_timeout())
+        response = json_response(data)
+
+    set_validators(response, etag, last_modified)
+    return response
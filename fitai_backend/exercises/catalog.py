@@ -0,0 +1,161 @@
+"""
+Versão do catálogo de exercícios.
+
+Um contador numa linha do banco (``CatalogVersion``), incrementado na mesma
+transação de qualquer alteração em Exercise, MuscleGroup ou na relação entre
+eles: todos os processos e servidores passam a ver a nova versão assim que a
+alteração é commitada. Caches derivados do catálogo (índice do motor de IA,
+respostas da API, vocabulário da busca) usam a versão na chave e ficam
+automaticamente obsoletos após qualquer edição.
+
+A versão lida fica no cache ``default`` por ``CATALOG_VERSION_TTL`` segundos,
+então o caminho quente (inclusive os 304) não consulta o banco. A alteração
+apaga essa entrada, e de novo após o commit; com um cache local do processo
+(LocMem), os outros processos veem a nova versão quando a entrada expira.
+"""
+import hashlib
+import json
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import F, Value
+from django.db.models.functions import Greatest
+from django.utils import timezone
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date
+from rest_framework.response import Response
+
+from .models import CatalogVersion
+
+CATALOG_VERSION_ID = 1
+CATALOG_STATE_KEY = 'exercises:catalog-state'
+
+
+def _initial_state():
+    # Começa do relógio: um banco recriado não repete versões já usadas em caches
+    return {'version': time.time_ns(), 'changed_at': timezone.now()}
+
+
+def catalog_version_ttl():
+    return getattr(settings, 'CATALOG_VERSION_TTL', 5)
+
+
+def get_catalog_state():
+    """``(versão, momento da última alteração)``"""
+    state = cache.get(CATALOG_STATE_KEY)
+    if state is None:
+        state = CatalogVersion.objects.filter(pk=CATALOG_VERSION_ID).values_list('version', 'changed_at').first()
+        if state is None:
+            row, _ = CatalogVersion.objects.get_or_create(pk=CATALOG_VERSION_ID, defaults=_initial_state())
+            state = (row.version, row.changed_at)
+        cache.set(CATALOG_STATE_KEY, state, catalog_version_ttl())
+    return state
+
+
+async def aget_catalog_state():
+    state = await cache.aget(CATALOG_STATE_KEY)
+    if state is None:
+        state = await CatalogVersion.objects.filter(pk=CATALOG_VERSION_ID).values_list('version', 'changed_at').afirst()
+        if state is None:
+            row, _ = await CatalogVersion.objects.aget_or_create(pk=CATALOG_VERSION_ID, defaults=_initial_state())
+            state = (row.version, row.changed_at)
+        await cache.aset(CATALOG_STATE_KEY, state, catalog_version_ttl())
+    return state
+
+
+def get_catalog_version():
+    return get_catalog_state()[0]
+
+
+def bump_catalog_version():
+    # Também o relógio: uma transação desfeita não pode devolver uma versão que já chaveou
+    # dados não commitados em algum cache
+    updated = CatalogVersion.objects.filter(pk=CATALOG_VERSION_ID).update(
+        version=Greatest(F('version') + 1, Value(time.time_ns())), changed_at=timezone.now(),
+    )
+    if not updated:
+        CatalogVersion.objects.get_or_create(pk=CATALOG_VERSION_ID, defaults=_initial_state())
+    cache.delete(CATALOG_STATE_KEY)
+    # De novo após o commit: outra requisição pode ter guardado a versão antiga nesse meio-tempo
+    transaction.on_commit(lambda: cache.delete(CATALOG_STATE_KEY))
+
+
+def catalog_last_modified(changed_at, now=None):
+    """
+    Momento da última alteração em segundos, para o header Last-Modified.
+    None enquanto ainda é o mesmo segundo da alteração: outra alteração nesse
+    segundo teria o mesmo Last-Modified, e um If-Modified-Since receberia 304
+    com dados antigos. Sem Last-Modified, vale só o ETag.
+    """
+    last_modified = int(changed_at.timestamp())
+    if (now if now is not None else time.time()) < last_modified + 1:
+        return None
+    return last_modified
+
+
+def set_validators(response, etag, last_modified):
+    response['ETag'] = etag
+    if last_modified is not None:
+        response['Last-Modified'] = http_date(last_modified)
+    patch_cache_control(response, private=True, no_cache=True)
+
+
+def catalog_cache_key(version, host, basename, action, pk, query_params):
+    """Chave da resposta em cache; compartilhada pelas views síncronas e assíncronas."""
+    params = sorted((key, value) for key in query_params for value in query_params.getlist(key))
+    raw = json.dumps([host, basename, action, pk, params], separators=(',', ':'), default=str)
+    return f'exercises:response:{version}:' + hashlib.sha256(raw.encode()).hexdigest()
+
+
+def catalog_etag(key, renderer_format):
+    return '"%s"' % hashlib.sha256(f'{key}:{renderer_format}'.encode()).hexdigest()[:32]
+
+
+def catalog_cache_timeout():
+    return getattr(settings, 'CATALOG_CACHE_TIMEOUT', 60 * 60 * 24)
+
+
+class CatalogCacheMixin:
+    """
+    Respostas GET do catálogo servidas de um cache chaveado por
+    (versão, action, pk, filtros/busca/página), com ETag forte e
+    Last-Modified. A versão vem do banco (via cache, por
+    ``CATALOG_VERSION_TTL``), então ETag e cache são os mesmos em todos os
+    processos. Requisições condicionais recebem 304 sem consultar o banco.
+    """
+    def get_catalog_cache_key(self, version):
+        return catalog_cache_key(
+            version, self.request.get_host(), self.basename, self.action,
+            self.kwargs.get(self.lookup_url_kwarg or self.lookup_field), self.request.query_params,
+        )
+
+    def cached_response(self, handler, *args, **kwargs):
+        version, changed_at = get_catalog_state()
+        key = self.get_catalog_cache_key(version)
+        renderer_format = getattr(self.request.accepted_renderer, 'format', '')
+        etag = catalog_etag(key, renderer_format)
+        last_modified = catalog_last_modified(changed_at)
+
+        not_modified = get_conditional_response(self.request, etag=etag, last_modified=last_modified)
+        if not_modified is not None:
+            response = not_modified
+        else:
+            data = cache.get(key)
+            if data is not None:
+                response = Response(data)
+            else:
+                response = handler(self.request, *args, **kwargs)
+                if response.status_code != 200:
+                    return response
+                cache.set(key, response.data, catalog_cache_timeout())
+
+        set_validators(response, etag, last_modified)
+        return response
+
+    def list(self, request, *args, **kwargs):
+        return self.cached_response(super().list, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.cached_response(super().retrieve, *args, **kwargs)
@@ -0,0 +1,129 @@
+import json
+import os
+import tempfile
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from accounts.models import User
+from exercises.catalog import bump_catalog_version
+from exercises.search import rebuild_index
+from fitai_backend.benchmark import (
+    build_scenarios, check_budgets, environment, get_budget_settings, run_concurrent, run_scenarios,
+)
+from fitai_backend.synthetic import PASSWORD, SyntheticDataset
+from workouts.models import WorkoutTemplate
+from workouts.rankings import rebuild_rankings
+from workouts.stats import rebuild_stats
+
+PREFIX = 'bench'
+
+
+class Command(BaseCommand):
+    help = ('Benchmark de ponta a ponta da API em uma base de teste com dados sintéticos fixos; '
+            'falha quando um orçamento (settings.PERFORMANCE_BUDGETS) é excedido')
+
+    def add_arguments(self, parser):
+        parser.add_argument('scenarios', nargs='*', help='Cenários medidos (padrão: todos)')
+        parser.add_argument('--users', type=int, default=500, help='Clientes sintéticos')
+        parser.add_argument('--exercises', type=int, default=300, help='Exercícios sintéticos')
+        parser.add_argument('--workouts-per-user', type=int, default=40, help='Treinos por cliente')
+        parser.add_argument('--seed', type=int, default=42, help='Semente dos dados')
+        parser.add_argument('--iterations', type=int, default=30, help='Requisições medidas por cenário')
+        parser.add_argument('--warmup', type=int, default=3, help='Requisições de aquecimento por cenário')
+        parser.add_argument('--alloc-iterations', type=int, default=3,
+                            help='Requisições medidas com tracemalloc por cenário')
+        parser.add_argument('--concurrency', type=int, default=8, help='Conexões simultâneas no servidor local')
+        parser.add_argument('--duration', type=float, default=5.0,
+                            help='Duração (s) da carga concorrente; 0 desliga')
+        parser.add_argument('--output', help='Arquivo JSON com os resultados')
+        parser.add_argument('--baseline', help='Resultado JSON de uma execução anterior, para comparação')
+        parser.add_argument('--budgets', help='JSON com orçamentos que sobrepõem PERFORMANCE_BUDGETS')
+
+    def handle(self, *args, **options):
+        baseline = self.load_json(options['baseline']) if options['baseline'] else None
+        budgets = get_budget_settings(self.load_json(options['budgets']) if options['budgets'] else None)
+
+        # Base própria, criada e apagada aqui; no SQLite em arquivo, para o servidor usar várias conexões
+        old_name = connection.settings_dict['NAME']
+        directory = tempfile.TemporaryDirectory(prefix='benchmark-')
+        if connection.vendor == 'sqlite':
+            connection.settings_dict['TEST']['NAME'] = os.path.join(directory.name, 'benchmark.sqlite3')
+        connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        try:
+            results = self.run(options)
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            directory.cleanup()
+
+        if options['output']:
+            with open(options['output'], 'w') as output:
+                json.dump(results, output, indent=2, ensure_ascii=False)
+            self.stdout.write(f'Resultados em {options["output"]}')
+
+        violations = check_budgets(results, budgets, baseline)
+        for violation in violations:
+            self.stderr.write(violation)
+        if violations:
+            raise CommandError(f'{len(violations)} orçamento(s) de desempenho excedido(s)')
+        self.stdout.write(self.style.SUCCESS('Todos os orçamentos respeitados'))
+
+    def load_json(self, path):
+        try:
+            with open(path) as source:
+                return json.load(source)
+        except (OSError, ValueError) as error:
+            raise CommandError(f'Não foi possível ler {path}: {error}')
+
+    def run(self, options):
+        started = time.perf_counter()
+        dataset = SyntheticDataset(
+            users=options['users'], exercises=options['exercises'],
+            workouts_per_user=options['workouts_per_user'], seed=options['seed'], prefix=PREFIX,
+        )
+        counts = dataset.generate()
+        bump_catalog_version()
+        rebuild_index()
+        rebuild_rankings()
+        rebuild_stats(dataset.clients, workers=1)
+        self.stdout.write(f'Base semeada em {time.perf_counter() - started:.1f}s: {counts}')
+
+        client = User.objects.get(username=f'{PREFIX}_client_0')
+        trainer = WorkoutTemplate.objects.select_related('trainer').order_by('id').first().trainer
+        scenarios = build_scenarios(client, trainer, password=PASSWORD)
+        if options['scenarios']:
+            unknown = set(options['scenarios']) - {scenario.name for scenario in scenarios}
+            if unknown:
+                raise CommandError(f'Cenário desconhecido: {", ".join(sorted(unknown))}')
+            scenarios = [scenario for scenario in scenarios if scenario.name in options['scenarios']]
+
+        self.stdout.write(f'{"cenário":<32} {"p50":>8} {"p95":>8} {"p99":>8} {"queries":>8} {"KB":>8}')
+
+        def log(name, result):
+            latency = result['latency_ms']
+            self.stdout.write(
+                f'{name:<32} {latency["p50"]:>8.2f} {latency["p95"]:>8.2f} {latency["p99"]:>8.2f} '
+                f'{result["queries"]:>8} {result["alloc_peak_kb"]:>8.0f}'
+            )
+
+        results = {
+            'environment': environment(),
+            'dataset': {
+                'users': options['users'], 'exercises': options['exercises'],
+                'workouts_per_user': options['workouts_per_user'], 'seed': options['seed'], 'counts': counts,
+            },
+            'iterations': options['iterations'],
+            'scenarios': run_scenarios(
+                scenarios, options['iterations'], options['warmup'], options['alloc_iterations'], log=log,
+            ),
+        }
+        if options['duration'] > 0:
+            concurrent = run_concurrent(scenarios, options['concurrency'], options['duration'])
+            results['concurrent'] = concurrent
+            self.stdout.write(
+                f'Concorrente ({concurrent["concurrency"]} conexões): {concurrent["requests_per_second"]} req/s, '
+                f'p50 {concurrent["latency_ms"]["p50"]} p95 {concurrent["latency_ms"]["p95"]} '
+                f'p99 {concurrent["latency_ms"]["p99"]} ms, {concurrent["errors"]} erros'
+            )
+        return results
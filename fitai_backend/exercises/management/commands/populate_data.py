@@ -1,14 +1,40 @@
-from django.core.management.base import BaseCommand
+import os
+import time
+
+from django.core.management.base import BaseCommand, CommandError
 from django.contrib.auth import get_user_model
+from exercises.catalog import bump_catalog_version
 from exercises.models import MuscleGroup, Exercise
+from exercises.search import rebuild_index
+from fitai_backend.synthetic import SyntheticDataset
 from workouts.models import WorkoutTemplate, WorkoutExercise
+from workouts.rankings import rebuild_rankings
+from workouts.stats import rebuild_stats
 
 User = get_user_model()
 
 class Command(BaseCommand):
-    help = 'Popula o banco com dados de teste'
+    help = ('Popula o banco com dados de teste. Com --users/--exercises gera um conjunto '
+            'sintético determinístico em escala (fitai_backend.synthetic)')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=0, help='Clientes sintéticos')
+        parser.add_argument('--exercises', type=int, default=0, help='Exercícios sintéticos')
+        parser.add_argument('--workouts-per-user', type=int, default=50, help='Treinos por cliente')
+        parser.add_argument('--trainers', type=int, help='Personal trainers (padrão: 1 a cada 100 clientes)')
+        parser.add_argument('--templates', type=int, help='Templates (padrão: 1 a cada 50 clientes, mínimo 10)')
+        parser.add_argument('--seed', type=int, default=42, help='Semente: a mesma semente gera os mesmos dados')
+        parser.add_argument('--prefix', default='sim', help='Prefixo dos usernames sintéticos')
+        parser.add_argument('--chunk-size', type=int, default=5000, help='Linhas por bloco de inserção')
+        parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                            help='Processos usados no recálculo das estatísticas')
+        parser.add_argument('--skip-derived', action='store_true',
+                            help='Não reconstrói índice de busca, rankings e estatísticas')
 
     def handle(self, *args, **options):
+        if options['users'] or options['exercises']:
+            return self.generate(options)
+        
         self.stdout.write('Criando dados de teste...')
         
         # Criar grupos musculares
@@ -132,4 +158,33 @@ class Command(BaseCommand):
         
         self.stdout.write(
             self.style.SUCCESS('Dados de teste criados com sucesso!')
-        )
\ No newline at end of file
+        )
+    
+    def generate(self, options):
+        prefix = options['prefix']
+        if User.objects.filter(username__startswith=f'{prefix}_').exists():
+            raise CommandError(f'Já existem usuários "{prefix}_*"; use outro --prefix')
+        if options['users'] and not options['exercises'] and not Exercise.objects.exists():
+            raise CommandError('Sem exercícios no banco: informe --exercises')
+        
+        started = time.perf_counter()
+        dataset = SyntheticDataset(
+            users=options['users'], exercises=options['exercises'],
+            workouts_per_user=options['workouts_per_user'] if options['users'] else 0,
+            trainers=options['trainers'], templates=options['templates'], seed=options['seed'],
+            prefix=prefix, chunk_size=options['chunk_size'], log=self.stdout.write,
+        )
+        dataset.generate()
+        
+        if not options['skip_derived']:
+            # Inserções em massa não disparam os sinais: recalcula o que depende deles
+            bump_catalog_version()
+            self.stdout.write(f'Índice de busca: {rebuild_index()} exercícios')
+            self.stdout.write(f'Rankings: {rebuild_rankings()} templates')
+            if dataset.clients:
+                total, elapsed = rebuild_stats(dataset.clients, workers=options['workers'])
+                self.stdout.write(f'Estatísticas: {total} usuários em {elapsed:.1f}s')
+        
+        self.stdout.write(self.style.SUCCESS(
+            f'Dados sintéticos criados em {time.perf_counter() - started:.1f}s'
+        ))
@@ -0,0 +1,43 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand
+
+from fitai_backend import images
+
+
+class Command(BaseCommand):
+    help = ('Gera as variantes responsivas das imagens ainda sem variantes (ou de todas, com --force); '
+            'ver fitai_backend/images.py')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--force', action='store_true', help='Reprocessa também as imagens já processadas')
+        parser.add_argument('--workers', type=int, default=None,
+                            help='Threads de processamento; 0 processa sem threads (padrão: IMAGE_VARIANTS["WORKERS"])')
+
+    def handle(self, *args, **options):
+        config = images.get_image_settings()
+        workers = config['WORKERS'] if options['workers'] is None else options['workers']
+        # 0: na thread do comando, como o schedule() do pipeline
+        executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='images') if workers > 0 else None
+        started = time.perf_counter()
+        try:
+            for model, field_name, variants_field, on_update in images.targets:
+                rows = model._default_manager.exclude(**{field_name: ''}).exclude(**{f'{field_name}__isnull': True})
+                pending = [
+                    pk for pk, name, variants in rows.values_list('pk', field_name, variants_field).iterator()
+                    if options['force'] or (variants or {}).get('source') != name
+                ]
+                # --force: variantes já existentes no storage são reaproveitadas pelo nome
+                if executor is None:
+                    for pk in pending:
+                        images.process(model, pk, field_name, variants_field, on_update, config)
+                else:
+                    list(executor.map(
+                        lambda pk: images.run_job(model, pk, field_name, variants_field, on_update, config), pending,
+                    ))
+                self.stdout.write(f'{model._meta.label}.{field_name}: {len(pending)} imagem(ns) processada(s)')
+        finally:
+            if executor is not None:
+                executor.shutdown()
+        self.stdout.write(self.style.SUCCESS(f'Concluído em {time.perf_counter() - started:.1f}s'))
@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from exercises.search import rebuild_index
+
+
+class Command(BaseCommand):
+    help = 'Reconstrói o índice de busca textual dos exercícios'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--database', default=None, help='Alias do banco (padrão: o do router)')
+        parser.add_argument('--chunk-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        total = rebuild_index(using=options['database'], chunk_size=options['chunk_size'])
+        self.stdout.write(self.style.SUCCESS(f'{total} exercícios indexados'))
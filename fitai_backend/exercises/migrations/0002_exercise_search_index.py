@@ -0,0 +1,42 @@
+from django.db import migrations, OperationalError
+
+
+def create_search_index(apps, schema_editor):
+    from exercises.search import BACKENDS, build_document
+
+    backend_class = BACKENDS.get(schema_editor.connection.vendor)
+    if backend_class is None:
+        return
+    backend = backend_class(schema_editor.connection)
+    try:
+        backend.create()
+    except OperationalError:
+        # SQLite compilado sem FTS5: a busca usa o fallback por substring
+        return
+
+    Exercise = apps.get_model('exercises', 'Exercise')
+    rows = [
+        (exercise.pk, *build_document(exercise))
+        for exercise in Exercise.objects.prefetch_related('muscle_groups')
+    ]
+    if rows:
+        backend.upsert(rows)
+
+
+def drop_search_index(apps, schema_editor):
+    from exercises.search import BACKENDS
+
+    backend_class = BACKENDS.get(schema_editor.connection.vendor)
+    if backend_class is not None:
+        backend_class(schema_editor.connection).drop()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('exercises', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
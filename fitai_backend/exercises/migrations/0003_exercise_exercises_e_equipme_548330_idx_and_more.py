@@ -0,0 +1,21 @@
+# Generated by Django 5.2.18 on 2026-10-18 05:41
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('exercises', '0002_exercise_search_index'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='exercise',
+            index=models.Index(fields=['equipment', 'difficulty', 'is_neural_training'], name='exercises_e_equipme_548330_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='exercise',
+            index=models.Index(condition=models.Q(('is_neural_training', True)), fields=['id'], name='exercise_neural_idx'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 05:46
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('exercises', '0003_exercise_exercises_e_equipme_548330_idx_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='exercise',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, db_index=True),
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 5.2.18 on 2026-10-18 07:19
+
+import fitai_backend.images
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('exercises', '0004_exercise_updated_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='exercise',
+            name='image_variants',
+            field=models.JSONField(blank=True, default=dict, editable=False),
+        ),
+        migrations.AlterField(
+            model_name='exercise',
+            name='image',
+            field=models.ImageField(blank=True, upload_to=fitai_backend.images.HashedUploadTo('exercises/', 'image')),
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 5.2.18 on 2026-10-18 07:35
+
+import time
+
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def create_version(apps, schema_editor):
+    CatalogVersion = apps.get_model('exercises', 'CatalogVersion')
+    CatalogVersion.objects.using(schema_editor.connection.alias).get_or_create(
+        pk=1, defaults={'version': time.time_ns(), 'changed_at': timezone.now()},
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('exercises', '0005_exercise_image_variants_alter_exercise_image'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CatalogVersion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('version', models.BigIntegerField()),
+                ('changed_at', models.DateTimeField()),
+            ],
+        ),
+        migrations.RunPython(create_version, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-18 08:00
+
+import fitai_backend.images
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('exercises', '0006_catalogversion'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='exercise',
+            name='image',
+            field=fitai_backend.images.HashedImageField(blank=True, upload_to=fitai_backend.images.HashedUploadTo('exercises/', 'image')),
+        ),
+    ]
@@ -1,5 +1,7 @@
 from django.db import models
 
+from fitai_backend.images import HashedImageField, HashedUploadTo
+
 class MuscleGroup(models.Model):
     name = models.CharField(max_length=50, unique=True)
     description = models.TextField(blank=True)
@@ -32,9 +34,26 @@ class Exercise(models.Model):
     difficulty = models.CharField(max_length=15, choices=DIFFICULTY_CHOICES)
     instructions = models.TextField()
     video_url = models.URLField(blank=True)
-    image = models.ImageField(upload_to='exercises/', blank=True)
+    image = HashedImageField(upload_to=HashedUploadTo('exercises/', 'image'), blank=True)
+    # Variantes responsivas de image (ver fitai_backend/images.py)
+    image_variants = models.JSONField(default=dict, blank=True, editable=False)
     is_neural_training = models.BooleanField(default=False, help_text="Exercício para força neural")
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
+    
+    class Meta:
+        indexes = [
+            # O booleano fica por último: filtros por equipamento/dificuldade usam o prefixo
+            models.Index(fields=['equipment', 'difficulty', 'is_neural_training']),
+            # Índice parcial para o endpoint neural_training (WHERE is_neural_training)
+            models.Index(fields=['id'], condition=models.Q(is_neural_training=True),
+                         name='exercise_neural_idx'),
+        ]
     
     def __str__(self):
-        return self.name
\ No newline at end of file
+        return self.name
+
+class CatalogVersion(models.Model):
+    """Linha única com a versão do catálogo, compartilhada entre processos (ver catalog.py)"""
+    version = models.BigIntegerField()
+    changed_at = models.DateTimeField()
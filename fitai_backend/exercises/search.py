@@ -0,0 +1,309 @@
+"""
+Busca textual e facetada de exercícios.
+
+O índice invertido fica no próprio banco: uma tabela virtual FTS5 no SQLite
+(tokenizer ``unicode61 remove_diacritics``) ou uma tabela com coluna
+``tsvector`` + índice GIN no PostgreSQL. Os documentos (nome, descrição e
+grupos musculares, sem acentos) são atualizados pelos signals a cada edição e
+podem ser reconstruídos com ``manage.py rebuild_search_index``.
+
+A consulta casa cada termo por prefixo e, para termos com 4+ letras, também
+pelas palavras do vocabulário do catálogo a uma edição de distância
+("agachamneto" -> "agachamento").
+"""
+import re
+import threading
+import unicodedata
+
+from django.db import connections, router
+from django.db.models import Count, Q
+from django.db.models.expressions import RawSQL
+from rest_framework.filters import BaseFilterBackend
+
+from .catalog import get_catalog_version
+from .models import Exercise, MuscleGroup
+
+SQLITE_TABLE = 'exercises_exercise_fts'
+POSTGRES_TABLE = 'exercises_exercise_search'
+
+TYPO_MIN_LENGTH = 4
+TOKEN_RE = re.compile(r'[^\W_]+')
+
+
+def normalize_text(value):
+    """Minúsculas e sem acentos, para comparar textos em português."""
+    value = unicodedata.normalize('NFKD', value or '')
+    return ''.join(ch for ch in value if not unicodedata.combining(ch)).lower()
+
+
+def tokenize(value):
+    return TOKEN_RE.findall(normalize_text(value))
+
+
+def _deletes(token):
+    return {token[:i] + token[i + 1:] for i in range(len(token))}
+
+
+class Vocabulary:
+    """Termos do catálogo com índice de deleções para correção de digitação."""
+
+    def __init__(self, documents):
+        self.terms = set()
+        for document in documents:
+            self.terms.update(tokenize(document))
+        self._by_delete = {}
+        for term in self.terms:
+            if len(term) >= TYPO_MIN_LENGTH:
+                for variant in _deletes(term) | {term}:
+                    self._by_delete.setdefault(variant, set()).add(term)
+
+    def similar(self, token):
+        """Termos a uma edição (inserção, remoção, troca ou transposição) de ``token``."""
+        if len(token) < TYPO_MIN_LENGTH:
+            return set()
+        candidates = set()
+        for variant in _deletes(token) | {token}:
+            candidates |= self._by_delete.get(variant, set())
+        candidates.discard(token)
+        return candidates
+
+
+_vocabulary = None
+_vocabulary_lock = threading.Lock()
+
+
+def get_vocabulary():
+    global _vocabulary
+    version = get_catalog_version()
+    if _vocabulary is None or _vocabulary[0] != version:
+        with _vocabulary_lock:
+            if _vocabulary is None or _vocabulary[0] != version:
+                documents = [f'{name} {description}' for name, description
+                             in Exercise.objects.values_list('name', 'description')]
+                documents += [name for name, in MuscleGroup.objects.values_list('name')]
+                _vocabulary = (version, Vocabulary(documents))
+    return _vocabulary[1]
+
+
+def build_document(exercise):
+    """Texto indexado de um exercício: nome, descrição e grupos musculares."""
+    muscle_groups = ' '.join(mg.name for mg in exercise.muscle_groups.all())
+    return (
+        normalize_text(exercise.name),
+        normalize_text(f'{exercise.description} {muscle_groups}'),
+    )
+
+
+class SQLiteSearchBackend:
+    vendor = 'sqlite'
+
+    def __init__(self, connection):
+        self.connection = connection
+
+    def create(self):
+        with self.connection.cursor() as cursor:
+            cursor.execute(
+                f"CREATE VIRTUAL TABLE IF NOT EXISTS {SQLITE_TABLE} USING fts5("
+                "name, body, tokenize='unicode61 remove_diacritics 2')"
+            )
+
+    def drop(self):
+        with self.connection.cursor() as cursor:
+            cursor.execute(f'DROP TABLE IF EXISTS {SQLITE_TABLE}')
+
+    def upsert(self, rows):
+        with self.connection.cursor() as cursor:
+            cursor.executemany(f'DELETE FROM {SQLITE_TABLE} WHERE rowid = %s', [(pk,) for pk, _, _ in rows])
+            cursor.executemany(f'INSERT INTO {SQLITE_TABLE} (rowid, name, body) VALUES (%s, %s, %s)', rows)
+
+    def delete(self, pks):
+        with self.connection.cursor() as cursor:
+            cursor.executemany(f'DELETE FROM {SQLITE_TABLE} WHERE rowid = %s', [(pk,) for pk in pks])
+
+    def clear(self):
+        with self.connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {SQLITE_TABLE}')
+
+    def build_query(self, groups):
+        return ' AND '.join(
+            '(' + ' OR '.join([f'"{prefix}"*'] + [f'"{term}"' for term in sorted(similar)]) + ')'
+            for prefix, similar in groups
+        )
+
+    def filter(self, queryset, query):
+        table = Exercise._meta.db_table
+        # bm25: quanto menor, mais relevante; o nome pesa mais que a descrição
+        rank = RawSQL(
+            f'SELECT bm25({SQLITE_TABLE}, 10.0, 1.0) FROM {SQLITE_TABLE} '
+            f'WHERE {SQLITE_TABLE}.rowid = {table}.id AND {SQLITE_TABLE} MATCH %s',
+            [query],
+        )
+        matches = RawSQL(f'SELECT rowid FROM {SQLITE_TABLE} WHERE {SQLITE_TABLE} MATCH %s', [query])
+        return queryset.filter(id__in=matches).annotate(search_rank=rank).order_by('search_rank', 'id')
+
+
+class PostgresSearchBackend:
+    vendor = 'postgresql'
+
+    def __init__(self, connection):
+        self.connection = connection
+
+    def create(self):
+        with self.connection.cursor() as cursor:
+            cursor.execute(
+                f'CREATE TABLE IF NOT EXISTS {POSTGRES_TABLE} ('
+                f'exercise_id bigint PRIMARY KEY REFERENCES {Exercise._meta.db_table}(id) '
+                'ON DELETE CASCADE DEFERRABLE INITIALLY DEFERRED, '
+                'document tsvector NOT NULL)'
+            )
+            cursor.execute(
+                f'CREATE INDEX IF NOT EXISTS {POSTGRES_TABLE}_document_idx '
+                f'ON {POSTGRES_TABLE} USING GIN (document)'
+            )
+
+    def drop(self):
+        with self.connection.cursor() as cursor:
+            cursor.execute(f'DROP TABLE IF EXISTS {POSTGRES_TABLE}')
+
+    def upsert(self, rows):
+        # Os textos já chegam sem acentos: a configuração 'simple' basta
+        with self.connection.cursor() as cursor:
+            cursor.executemany(
+                f'INSERT INTO {POSTGRES_TABLE} (exercise_id, document) VALUES '
+                "(%s, setweight(to_tsvector('simple', %s), 'A') || setweight(to_tsvector('simple', %s), 'B')) "
+                'ON CONFLICT (exercise_id) DO UPDATE SET document = EXCLUDED.document',
+                rows,
+            )
+
+    def delete(self, pks):
+        with self.connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {POSTGRES_TABLE} WHERE exercise_id = ANY(%s)', [list(pks)])
+
+    def clear(self):
+        with self.connection.cursor() as cursor:
+            cursor.execute(f'TRUNCATE {POSTGRES_TABLE}')
+
+    def build_query(self, groups):
+        return ' & '.join(
+            '(' + ' | '.join([f'{prefix}:*'] + sorted(similar)) + ')'
+            for prefix, similar in groups
+        )
+
+    def filter(self, queryset, query):
+        table = Exercise._meta.db_table
+        rank = RawSQL(
+            f"SELECT ts_rank(document, to_tsquery('simple', %s)) FROM {POSTGRES_TABLE} "
+            f'WHERE {POSTGRES_TABLE}.exercise_id = {table}.id',
+            [query],
+        )
+        matches = RawSQL(
+            f"SELECT exercise_id FROM {POSTGRES_TABLE} WHERE document @@ to_tsquery('simple', %s)",
+            [query],
+        )
+        return queryset.filter(id__in=matches).annotate(search_rank=rank).order_by('-search_rank', 'id')
+
+
+BACKENDS = {backend.vendor: backend for backend in (SQLiteSearchBackend, PostgresSearchBackend)}
+INDEX_TABLES = {'sqlite': SQLITE_TABLE, 'postgresql': POSTGRES_TABLE}
+
+_index_available = {}
+
+
+def get_search_backend(using=None):
+    """Backend de busca do banco configurado, ou None se o índice não existir."""
+    alias = using or router.db_for_write(Exercise)
+    connection = connections[alias]
+    backend_class = BACKENDS.get(connection.vendor)
+    if backend_class is None:
+        return None
+    if alias not in _index_available:
+        # SQLite sem FTS5 não cria a tabela na migração: cai no fallback
+        _index_available[alias] = INDEX_TABLES[connection.vendor] in connection.introspection.table_names()
+    return backend_class(connection) if _index_available[alias] else None
+
+
+def build_search_groups(text):
+    """Para cada termo da busca: (prefixo, termos parecidos do vocabulário)."""
+    tokens = tokenize(text)
+    if not tokens:
+        return []
+    vocabulary = get_vocabulary()
+    return [(token, vocabulary.similar(token)) for token in tokens]
+
+
+def search_exercises(queryset, text):
+    """Filtra e ordena ``queryset`` por relevância para ``text``."""
+    groups = build_search_groups(text)
+    if not groups:
+        return queryset
+    backend = get_search_backend(queryset.db)
+    if backend is None:
+        # Bancos sem FTS: busca simples por substring em cada termo
+        for prefix, _ in groups:
+            queryset = queryset.filter(Q(name__icontains=prefix) | Q(description__icontains=prefix))
+        return queryset
+    return backend.filter(queryset, backend.build_query(groups))
+
+
+def index_exercises(pks, using=None):
+    """Atualiza os documentos dos exercícios indicados (removendo os apagados)."""
+    backend = get_search_backend(using)
+    if backend is None:
+        return
+    pks = set(pks)
+    exercises = Exercise.objects.filter(pk__in=pks).prefetch_related('muscle_groups')
+    rows = [(exercise.pk, *build_document(exercise)) for exercise in exercises]
+    missing = pks - {pk for pk, _, _ in rows}
+    if rows:
+        backend.upsert(rows)
+    if missing:
+        backend.delete(missing)
+
+
+def rebuild_index(using=None, chunk_size=1000):
+    alias = using or router.db_for_write(Exercise)
+    backend_class = BACKENDS.get(connections[alias].vendor)
+    if backend_class is None:
+        return 0
+    backend = backend_class(connections[alias])
+    backend.create()
+    _index_available[alias] = True
+    backend.clear()
+    total = 0
+    pks = list(Exercise.objects.order_by('pk').values_list('pk', flat=True))
+    for start in range(0, len(pks), chunk_size):
+        index_exercises(pks[start:start + chunk_size], using)
+        total += len(pks[start:start + chunk_size])
+    return total
+
+
+def compute_facets(queryset):
+    """Contagens por equipamento, dificuldade e grupo muscular do resultado."""
+    ids = queryset.order_by().values('id')
+    matched = Exercise.objects.filter(id__in=ids).order_by()
+    equipment = matched.values('equipment').annotate(count=Count('id'))
+    difficulty = matched.values('difficulty').annotate(count=Count('id'))
+    muscle_groups = (
+        Exercise.muscle_groups.through.objects
+        .filter(exercise_id__in=ids)
+        .values('musclegroup_id', 'musclegroup__name')
+        .annotate(count=Count('exercise_id'))
+        .order_by('musclegroup__name')
+    )
+    return {
+        'equipment': {row['equipment']: row['count'] for row in equipment},
+        'difficulty': {row['difficulty']: row['count'] for row in difficulty},
+        'muscle_groups': [
+            {'id': row['musclegroup_id'], 'name': row['musclegroup__name'], 'count': row['count']}
+            for row in muscle_groups
+        ],
+    }
+
+
+class ExerciseSearchFilter(BaseFilterBackend):
+    """Substitui o SearchFilter (LIKE '%q%') pelo índice textual."""
+    search_param = 'search'
+
+    def filter_queryset(self, request, queryset, view):
+        text = request.query_params.get(self.search_param, '')
+        return search_exercises(queryset, text) if text.strip() else queryset
@@ -1,4 +1,7 @@
+from collections import defaultdict
 from rest_framework import serializers
+from fitai_backend.fast_serialization import FastSerializer
+from fitai_backend.images import ImageVariantsField
 from .models import Exercise, MuscleGroup
 
 class MuscleGroupSerializer(serializers.ModelSerializer):
@@ -9,6 +12,7 @@ class MuscleGroupSerializer(serializers.ModelSerializer):
 class ExerciseSerializer(serializers.ModelSerializer):
     muscle_groups = MuscleGroupSerializer(many=True, read_only=True)
     muscle_group_names = serializers.StringRelatedField(source='muscle_groups', many=True, read_only=True)
+    image_variants = ImageVariantsField('image')
     
     class Meta:
         model = Exercise
@@ -17,7 +21,56 @@ class ExerciseSerializer(serializers.ModelSerializer):
 class ExerciseListSerializer(serializers.ModelSerializer):
     """Serializer simplificado para listagens"""
     muscle_groups = serializers.StringRelatedField(many=True, read_only=True)
+    image_variants = ImageVariantsField('image')
     
     class Meta:
         model = Exercise
-        fields = ['id', 'name', 'muscle_groups', 'equipment', 'difficulty', 'is_neural_training']
\ No newline at end of file
+        fields = ['id', 'name', 'muscle_groups', 'equipment', 'difficulty', 'is_neural_training', 'image_variants']
+
+def muscle_groups_by_exercise(exercise_ids, *columns):
+    """
+    ``{exercise_id: [linha do grupo]}`` com ``columns`` de MuscleGroup, numa
+    única query e na mesma ordem do prefetch de muscle_groups.
+    """
+    grouped = defaultdict(list)
+    lookups = [f'musclegroup__{column}' for column in columns]
+    for row in (
+        Exercise.muscle_groups.through.objects.filter(exercise_id__in=exercise_ids)
+        .order_by('exercise_id', 'musclegroup_id').values('exercise_id', *lookups)
+    ):
+        grouped[row['exercise_id']].append({column: row[lookup] for column, lookup in zip(columns, lookups)})
+    return grouped
+
+class FastMuscleGroupSerializer(FastSerializer):
+    serializer_class = MuscleGroupSerializer
+
+class FastExerciseSerializer(FastSerializer):
+    serializer_class = ExerciseSerializer
+    custom_fields = ('muscle_groups', 'muscle_group_names')
+    
+    def serialize(self, rows):
+        rows = list(rows)
+        groups = FastMuscleGroupSerializer(self.context)
+        self._groups = {
+            exercise_id: groups.serialize(group_rows)
+            for exercise_id, group_rows in muscle_groups_by_exercise(
+                [row['id'] for row in rows], *groups.columns
+            ).items()
+        }
+        return super().serialize(rows)
+    
+    def resolve_muscle_groups(self, rows):
+        return {row['id']: self._groups.get(row['id'], []) for row in rows}
+    
+    def resolve_muscle_group_names(self, rows):
+        # StringRelatedField: str(MuscleGroup) é o nome
+        return {row['id']: [group['name'] for group in self._groups.get(row['id'], [])] for row in rows}
+
+class FastExerciseListSerializer(FastSerializer):
+    """Mesma saída de ExerciseListSerializer(many=True) a partir de values()"""
+    serializer_class = ExerciseListSerializer
+    custom_fields = ('muscle_groups',)
+    
+    def resolve_muscle_groups(self, rows):
+        groups = muscle_groups_by_exercise([row['id'] for row in rows], 'name')
+        return {row['id']: [group['name'] for group in groups[row['id']]] for row in rows}
@@ -0,0 +1,67 @@
+from django.db.models.signals import post_save, post_delete, pre_delete, m2m_changed
+from django.dispatch import receiver
+from django.utils import timezone
+
+from fitai_backend import images
+from .catalog import bump_catalog_version
+from .models import Exercise, MuscleGroup
+from .search import index_exercises
+
+
+def _bump():
+    # Na transação da alteração: a nova versão fica visível junto com os dados
+    bump_catalog_version()
+
+
+def _refresh(exercise_ids, using):
+    """Reindexa e marca como alterados exercícios afetados por mudanças nos grupos"""
+    if not exercise_ids:
+        return
+    index_exercises(exercise_ids, using)
+    # update() não dispara signals nem o auto_now; a sincronização usa updated_at
+    Exercise.objects.using(using).filter(pk__in=exercise_ids).update(updated_at=timezone.now())
+
+
+@receiver([post_save, post_delete], sender=Exercise)
+def exercise_changed(sender, instance, using, **kwargs):
+    """Qualquer edição no catálogo gera uma nova versão e reindexa a busca"""
+    _bump()
+    index_exercises([instance.pk], using)
+
+
+@receiver(pre_delete, sender=MuscleGroup)
+def muscle_group_deleting(sender, instance, **kwargs):
+    instance._indexed_exercise_ids = list(instance.exercises.values_list('pk', flat=True))
+
+
+@receiver([post_save, post_delete], sender=MuscleGroup)
+def muscle_group_changed(sender, instance, using, **kwargs):
+    _bump()
+    exercise_ids = getattr(instance, '_indexed_exercise_ids', None)
+    if exercise_ids is None:
+        exercise_ids = list(instance.exercises.values_list('pk', flat=True))
+    _refresh(exercise_ids, using)
+
+
+@receiver(m2m_changed, sender=Exercise.muscle_groups.through)
+def exercise_muscle_groups_changed(sender, instance, action, reverse, pk_set, using, **kwargs):
+    if action == 'pre_clear' and reverse:
+        instance._indexed_exercise_ids = list(instance.exercises.values_list('pk', flat=True))
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    _bump()
+    if not reverse:
+        _refresh([instance.pk], using)
+    elif action == 'post_clear':
+        _refresh(getattr(instance, '_indexed_exercise_ids', []), using)
+    else:
+        _refresh(pk_set, using)
+
+
+def variants_ready(exercise_id):
+    # Variantes gravadas com update() pelo pipeline: nova versão do catálogo e updated_at para a sincronização
+    Exercise.objects.filter(pk=exercise_id).update(updated_at=timezone.now())
+    bump_catalog_version()
+
+
+images.register(Exercise, 'image', 'image_variants', on_update=variants_ready)
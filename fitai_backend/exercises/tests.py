@@ -1,3 +1,252 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db.models import F
 from django.test import TestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from accounts.models import User
+from ai_engine.models import UserProfile
+from workouts.models import UserWorkout, UserStats
+from .catalog import CATALOG_STATE_KEY, catalog_last_modified
+from .models import CatalogVersion, Exercise, MuscleGroup
+from .search import search_exercises
+
+
+class ExerciseQueryCountTestCase(TestCase):
+    """Fixa o número de queries dos endpoints do catálogo."""
+
+    def setUp(self):
+        self.muscle_groups = [
+            MuscleGroup.objects.create(name='Pernas'),
+            MuscleGroup.objects.create(name='Core'),
+        ]
+        self.api = APIClient()
+        self.api.force_authenticate(User.objects.create_user(username='client', password='x'))
+
+    def add_exercises(self, count, **extra):
+        for _ in range(count):
+            exercise = Exercise.objects.create(
+                name=f'Exercício {Exercise.objects.count()}',
+                description='Exercício de teste',
+                equipment='bodyweight',
+                difficulty='beginner',
+                instructions='Execute o movimento',
+                **extra,
+            )
+            exercise.muscle_groups.set(self.muscle_groups)
+
+    def assertConstantQueries(self, url, expected, grow):
+        expected += 1  # versão do catálogo
+        with self.assertNumQueries(expected):
+            self.assertEqual(self.api.get(url).status_code, 200)
+        grow()
+        with self.assertNumQueries(expected):
+            response = self.api.get(url)
+        self.assertEqual(response.status_code, 200)
+        return response
+
+    def test_exercise_list(self):
+        self.add_exercises(1)
+        response = self.assertConstantQueries('/api/exercises/exercises/', 3, lambda: self.add_exercises(19))
+        self.assertEqual(sorted(response.data['results'][0]['muscle_groups']), ['Core', 'Pernas'])
+
+    def test_exercise_detail(self):
+        self.add_exercises(1)
+        exercise = Exercise.objects.get()
+        self.assertConstantQueries(
+            f'/api/exercises/exercises/{exercise.pk}/', 2,
+            lambda: exercise.muscle_groups.add(MuscleGroup.objects.create(name='Ombros')),
+        )
+
+    def test_neural_training(self):
+        self.add_exercises(1, is_neural_training=True)
+        self.assertConstantQueries(
+            '/api/exercises/exercises/neural_training/', 2,
+            lambda: self.add_exercises(10, is_neural_training=True),
+        )
+
+    def test_muscle_group_list(self):
+        self.assertConstantQueries(
+            '/api/exercises/muscle-groups/', 2,
+            lambda: MuscleGroup.objects.create(name='Ombros'),
+        )
+
+
+class CatalogCacheTestCase(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.muscle_group = MuscleGroup.objects.create(name='Pernas')
+        self.exercise = Exercise.objects.create(
+            name='Agachamento', description='', equipment='barbell',
+            difficulty='intermediate', instructions='',
+        )
+        self.exercise.muscle_groups.add(self.muscle_group)
+        self.api = APIClient()
+        self.api.force_authenticate(User.objects.create_user(username='client', password='x'))
+
+    def age_catalog(self, seconds=5):
+        CatalogVersion.objects.update(changed_at=timezone.now() - timedelta(seconds=seconds))
+        cache.delete(CATALOG_STATE_KEY)
+
+    def test_repeated_requests_skip_database(self):
+        self.age_catalog()
+        url = '/api/exercises/exercises/?equipment=barbell'
+        first = self.api.get(url)
+        with self.assertNumQueries(0):
+            second = self.api.get(url)
+        self.assertEqual(first.data, second.data)
+        self.assertEqual(first['ETag'], second['ETag'])
+        self.assertIn('Last-Modified', second)
+
+    def test_conditional_request_returns_304(self):
+        url = f'/api/exercises/exercises/{self.exercise.pk}/'
+        etag = self.api.get(url)['ETag']
+        with self.assertNumQueries(0):
+            response = self.api.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['ETag'], etag)
+
+    def test_catalog_changes_invalidate(self):
+        url = '/api/exercises/muscle-groups/'
+        etag = self.api.get(url)['ETag']
+        MuscleGroup.objects.create(name='Core')
+        response = self.api.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['count'], 2)
+        self.assertNotEqual(response['ETag'], etag)
+
+        etag = response['ETag']
+        self.exercise.muscle_groups.add(MuscleGroup.objects.get(name='Core'))
+        self.assertEqual(self.api.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_last_modified_only_after_the_change_second(self):
+        changed_at = timezone.now().replace(microsecond=900000)
+        second = int(changed_at.timestamp())
+        # Ainda no segundo da alteração: sem Last-Modified, If-Modified-Since não pode dar 304
+        self.assertIsNone(catalog_last_modified(changed_at, now=changed_at.timestamp() + 0.05))
+        self.assertEqual(catalog_last_modified(changed_at, now=second + 1), second)
+
+        url = '/api/exercises/muscle-groups/'
+        self.age_catalog()
+        last_modified = self.api.get(url)['Last-Modified']
+        self.assertEqual(self.api.get(url, HTTP_IF_MODIFIED_SINCE=last_modified).status_code, 304)
+        MuscleGroup.objects.create(name='Core')
+        response = self.api.get(url, HTTP_IF_MODIFIED_SINCE=last_modified)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['count'], 2)
+
+    def test_version_is_shared_through_database(self):
+        url = '/api/exercises/muscle-groups/'
+        etag = self.api.get(url)['ETag']
+        # Alteração feita por outro processo: só a linha do banco muda; vale quando a versão expira do cache
+        CatalogVersion.objects.update(version=F('version') + 1)
+        self.assertEqual(self.api.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        cache.delete(CATALOG_STATE_KEY)
+        response = self.api.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_filters_are_part_of_the_key(self):
+        self.assertEqual(self.api.get('/api/exercises/exercises/?search=Agach').data['count'], 1)
+        self.assertEqual(self.api.get('/api/exercises/exercises/?search=Supino').data['count'], 0)
+
+    def test_not_found_is_not_cached(self):
+        self.assertEqual(self.api.get('/api/exercises/exercises/999999/').status_code, 404)
+        self.assertNotIn('ETag', self.api.get('/api/exercises/exercises/999999/'))
+
+
+class ExerciseSearchTestCase(TestCase):
+
+    def setUp(self):
+        self.legs = MuscleGroup.objects.create(name='Pernas')
+        self.chest = MuscleGroup.objects.create(name='Peito')
+        self.push_up = self.add('Flexão de Braço', 'Exercício com peso corporal', 'bodyweight', [self.chest])
+        self.squat = self.add('Agachamento Livre', 'Exercício composto', 'barbell', [self.legs])
+        self.jump_squat = self.add('Agachamento com Salto', 'Pliometria', 'bodyweight', [self.legs])
+        self.api = APIClient()
+        self.api.force_authenticate(User.objects.create_user(username='client', password='x'))
+
+    def add(self, name, description, equipment, groups):
+        exercise = Exercise.objects.create(
+            name=name, description=description, equipment=equipment,
+            difficulty='beginner', instructions='',
+        )
+        exercise.muscle_groups.set(groups)
+        return exercise
+
+    def search(self, text):
+        return [exercise.name for exercise in search_exercises(Exercise.objects.all(), text)]
+
+    def test_accent_insensitive(self):
+        self.assertEqual(self.search('flexao'), ['Flexão de Braço'])
+        self.assertEqual(self.search('BRAÇO'), ['Flexão de Braço'])
+
+    def test_prefix_and_typos(self):
+        self.assertEqual(len(self.search('agach')), 2)
+        self.assertEqual(len(self.search('agachamneto')), 2)
+        self.assertEqual(self.search('agachamento salto'), ['Agachamento com Salto'])
+
+    def test_matches_muscle_groups_and_follows_updates(self):
+        self.assertEqual(self.search('peito'), ['Flexão de Braço'])
+        self.squat.muscle_groups.add(self.chest)
+        self.assertEqual(sorted(self.search('peito')), ['Agachamento Livre', 'Flexão de Braço'])
+        self.chest.name = 'Peitoral'
+        self.chest.save()
+        self.assertEqual(len(self.search('peitoral')), 2)
+        self.push_up.delete()
+        self.assertEqual(self.search('flexao'), [])
+
+    def test_name_matches_rank_first(self):
+        self.add('Prancha', 'Variação de agachamento isométrico', 'bodyweight', [])
+        self.assertEqual(self.search('agachamento')[-1], 'Prancha')
+
+    def test_list_endpoint_returns_facets(self):
+        response = self.api.get('/api/exercises/exercises/?search=agachamento')
+        self.assertEqual(response.data['count'], 2)
+        facets = response.data['facets']
+        self.assertEqual(facets['equipment'], {'barbell': 1, 'bodyweight': 1})
+        self.assertEqual(facets['difficulty'], {'beginner': 2})
+        self.assertEqual(facets['muscle_groups'], [{'id': self.legs.id, 'name': 'Pernas', 'count': 2}])
+
+    def test_search_combines_with_filters(self):
+        response = self.api.get('/api/exercises/exercises/?search=agachamento&equipment=bodyweight')
+        self.assertEqual([row['name'] for row in response.data['results']], ['Agachamento com Salto'])
+        self.assertEqual(response.data['facets']['equipment'], {'bodyweight': 1})
+
+
+class PopulateDataTestCase(TestCase):
+
+    def populate(self, prefix, **options):
+        options = {'users': 30, 'exercises': 40, 'workouts_per_user': 12, 'seed': 7, 'workers': 1, **options}
+        call_command('populate_data', prefix=prefix, stdout=StringIO(), **options)
+        return list(
+            UserWorkout.objects.filter(user__username__startswith=f'{prefix}_')
+            .order_by('user_id', 'scheduled_date', 'id')
+            .values_list('user__username', 'scheduled_date', 'status', 'workout_template__name')
+        )
+
+    def test_generates_deterministic_dataset(self):
+        first = self.populate('a')
+        self.assertEqual(len(first), 30 * 12)
+        self.assertEqual(Exercise.objects.count(), 40)
+        self.assertFalse(Exercise.objects.filter(muscle_groups=None).exists())
+        self.assertEqual(UserProfile.objects.count(), 30)
+        # Derivados recalculados: busca e estatísticas
+        self.assertTrue(search_exercises(Exercise.objects.all(), 'supino').exists())
+        completed = UserWorkout.objects.filter(status='completed').count()
+        self.assertEqual(sum(UserStats.objects.values_list('workouts_completed', flat=True)), completed)
+
+        second = self.populate('b')
+        strip = lambda rows: [(user.split('_', 1)[1], *rest) for user, *rest in rows]
+        self.assertEqual(strip(second), strip(first))
 
-# Create your tests here.
+    def test_rejects_existing_prefix(self):
+        self.populate('a', users=2, exercises=5, workouts_per_user=1)
+        with self.assertRaises(CommandError):
+            self.populate('a', users=2, exercises=5, workouts_per_user=1)
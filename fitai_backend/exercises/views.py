@@ -1,29 +1,48 @@
-from rest_framework import viewsets, filters
+from rest_framework import viewsets
 from rest_framework.decorators import action
+from rest_framework.renderers import BrowsableAPIRenderer
 from rest_framework.response import Response
 from django_filters.rest_framework import DjangoFilterBackend
+from fitai_backend.fast_serialization import FastListMixin
+from fitai_backend.prefetch import SerializerPrefetchMixin
+from fitai_backend.renderers import FastJSONRenderer
+from fitai_backend.replicas import ReplicaReadMixin
+from .catalog import CatalogCacheMixin
 from .models import Exercise, MuscleGroup
-from .serializers import ExerciseSerializer, ExerciseListSerializer, MuscleGroupSerializer
+from .search import ExerciseSearchFilter, compute_facets
+from .serializers import ExerciseSerializer, ExerciseListSerializer, FastExerciseListSerializer, MuscleGroupSerializer
 
-class MuscleGroupViewSet(viewsets.ReadOnlyModelViewSet):
-    queryset = MuscleGroup.objects.all()
+class MuscleGroupViewSet(ReplicaReadMixin, CatalogCacheMixin, viewsets.ReadOnlyModelViewSet):
+    queryset = MuscleGroup.objects.order_by('name', 'id')
     serializer_class = MuscleGroupSerializer
 
-class ExerciseViewSet(viewsets.ReadOnlyModelViewSet):
-    queryset = Exercise.objects.all()
+class ExerciseViewSet(ReplicaReadMixin, CatalogCacheMixin, FastListMixin, SerializerPrefetchMixin, viewsets.ReadOnlyModelViewSet):
+    # Ordem fixa para a paginação; a busca reordena por relevância
+    queryset = Exercise.objects.order_by('id')
     serializer_class = ExerciseSerializer
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter]
+    fast_serializer_class = FastExerciseListSerializer
+    renderer_classes = [FastJSONRenderer, BrowsableAPIRenderer]
+    filter_backends = [DjangoFilterBackend, ExerciseSearchFilter]
     filterset_fields = ['muscle_groups', 'equipment', 'difficulty', 'is_neural_training']
-    search_fields = ['name', 'description']
     
     def get_serializer_class(self):
         if self.action == 'list':
             return ExerciseListSerializer
         return ExerciseSerializer
     
+    def get_paginated_response(self, data):
+        response = super().get_paginated_response(data)
+        params = self.request.query_params
+        if params.get('search') or params.get('facets') in ('1', 'true'):
+            response.data['facets'] = compute_facets(self.filter_queryset(self.get_queryset()))
+        return response
+    
     @action(detail=False, methods=['get'])
-    def neural_training(self):
+    def neural_training(self, request):
         """Endpoint específico para exercícios de força neural"""
-        exercises = self.queryset.filter(is_neural_training=True)
+        return self.cached_response(self._neural_training)
+    
+    def _neural_training(self, request):
+        exercises = self.get_queryset().filter(is_neural_training=True)
         serializer = self.get_serializer(exercises, many=True)
         return Response(serializer.data)
\ No newline at end of file
@@ -0,0 +1,98 @@
+"""
+Base das views assíncronas das leituras mais frequentes (catálogo, treinos de
+hoje, histórico de recomendações e perfil), montadas em ``/api/async/``.
+
+As views do DRF são síncronas: cada requisição segura uma thread do worker
+enquanto espera o banco. As versões em ``<app>/async_views.py`` fazem as
+mesmas leituras com o ORM assíncrono e devolvem o mesmo JSON das rotas
+síncronas. Num servidor ASGI (``uvicorn fitai_backend.asgi:application``) um
+worker atende outras requisições enquanto as queries estão em andamento; em
+WSGI elas funcionam, mas sem esse ganho. ``fitai_backend/loadtest.py`` compara
+as duas implantações.
+
+Só GET, autenticação por token (CachedTokenAuthentication) e JSON.
+"""
+import functools
+
+from django.core.paginator import InvalidPage
+from django.http import HttpResponse
+from rest_framework import exceptions
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+
+from accounts.authentication import CachedTokenAuthentication
+from .prefetch import optimize_queryset
+from .profiling import timer
+
+renderer = JSONRenderer()
+
+
+def json_response(data, status=200, headers=None):
+    return HttpResponse(renderer.render(data), status=status, content_type='application/json', headers=headers)
+
+
+def exception_response(exc, request, authenticator):
+    # Mesmo formato do exception_handler do DRF
+    data = exc.detail if isinstance(exc.detail, (list, dict)) else {'detail': exc.detail}
+    headers = {}
+    if isinstance(exc, (exceptions.NotAuthenticated, exceptions.AuthenticationFailed)):
+        headers['WWW-Authenticate'] = authenticator.authenticate_header(request)
+    if getattr(exc, 'wait', None):
+        headers['Retry-After'] = '%d' % exc.wait
+    return json_response(data, exc.status_code, headers)
+
+
+def async_api_view(view):
+    """
+    Decorator de views ``async def view(request, ...)``: exige GET e token
+    válido e entrega à view um ``Request`` do DRF (query_params etc.) com
+    ``user``/``auth`` já preenchidos. A view devolve um HttpResponse.
+    """
+    @functools.wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        authenticator = CachedTokenAuthentication()
+        try:
+            if request.method != 'GET':
+                raise exceptions.MethodNotAllowed(request.method)
+            with timer('auth'):
+                result = await authenticator.aauthenticate(request)
+            if result is None:
+                raise exceptions.NotAuthenticated()
+            drf_request = Request(request, authenticators=())
+            drf_request.user, drf_request.auth = result
+            return await view(drf_request, *args, **kwargs)
+        except exceptions.APIException as exc:
+            response = exception_response(exc, request, authenticator)
+            if isinstance(exc, exceptions.MethodNotAllowed):
+                response['Allow'] = 'GET'
+            return response
+    return wrapper
+
+
+async def afetch(queryset, serializer_class):
+    """Instâncias de ``queryset`` com o prefetch que ``serializer_class`` precisa."""
+    return [obj async for obj in optimize_queryset(queryset, serializer_class)]
+
+
+async def apaginate(paginator, queryset, request):
+    """
+    ``paginate_queryset`` de um paginator do DRF com o ORM assíncrono. Depois
+    dela ``paginator.get_paginated_response`` funciona como na view síncrona.
+    """
+    if hasattr(paginator, 'apaginate_queryset'):
+        return await paginator.apaginate_queryset(queryset, request)
+
+    page_size = paginator.get_page_size(request)
+    if not page_size:
+        return None
+    django_paginator = paginator.django_paginator_class(queryset, page_size)
+    # count é uma cached_property: preenchida aqui, o Paginator não faz o COUNT síncrono
+    django_paginator.count = await queryset.acount()
+    page_number = paginator.get_page_number(request, django_paginator)
+    try:
+        page = django_paginator.page(page_number)
+    except InvalidPage as exc:
+        raise exceptions.NotFound(paginator.invalid_page_message.format(page_number=page_number, message=str(exc)))
+    page.object_list = [obj async for obj in page.object_list]
+    paginator.page, paginator.request = page, request
+    return page.object_list
@@ -0,0 +1,298 @@
+"""
+Benchmark de ponta a ponta da API com orçamentos de desempenho
+(``manage.py benchmark_api``).
+
+Cada cenário é uma requisição real (autenticada por token, com middlewares,
+autenticação, serialização e renderer) a uma rota dos routers, ao login ou à
+geração de treino. Para cada cenário:
+
+- ``run_scenario`` mede a latência (p50/p95/p99) e as queries por requisição
+  com o cliente de testes do Django, no mesmo processo;
+- uma segunda passada, mais curta, mede com ``tracemalloc`` o pico de memória
+  alocada por requisição (separada porque o tracemalloc distorce o tempo).
+
+``run_concurrent`` sobe um servidor WSGI local em uma thread e dispara carga
+com ``fitai_backend.loadtest`` nas rotas GET. O resultado é um dict pronto
+para JSON; ``check_budgets`` compara com os orçamentos de
+``settings.PERFORMANCE_BUDGETS`` e, se houver, com o resultado de uma
+execução anterior (regressão relativa).
+"""
+import asyncio
+import platform
+import subprocess
+import threading
+import time
+import tracemalloc
+from collections import namedtuple
+
+import django
+from django.conf import settings
+from django.core.servers.basehttp import ThreadedWSGIServer, WSGIRequestHandler, get_internal_wsgi_application
+from django.db import connection
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from accounts.authentication import issue_token
+from ai_engine.models import AIGenerationJob
+from exercises.models import Exercise, MuscleGroup
+from workouts.models import WorkoutTemplate, UserWorkout
+from .loadtest import percentile, run_load
+
+DEFAULTS = {
+    # Limites aplicados a todo cenário; None desliga a métrica
+    'DEFAULT': {'p95_ms': 250, 'p99_ms': 500, 'queries': 6, 'alloc_peak_kb': 4096},
+    # Limites por cenário (mesmo formato), somados aos padrões
+    'SCENARIOS': {},
+    # Carga concorrente: p99 máximo e fração máxima de erros
+    'CONCURRENT': {'p99_ms': 2000, 'error_rate': 0.0},
+    # Regressão tolerada em relação à execução de base (p50, memória, vazão)
+    'MAX_REGRESSION': 0.25,
+    # Diferenças de latência abaixo disso (ms) são ruído, mesmo acima da fração
+    'MIN_REGRESSION_MS': 2.0,
+}
+
+Scenario = namedtuple('Scenario', 'name basename user method url data status')
+
+
+def get_budget_settings(overrides=None):
+    """Orçamentos de ``settings.PERFORMANCE_BUDGETS`` sobre os padrões, mais ``overrides``."""
+    config = dict(DEFAULTS)
+    for source in (getattr(settings, 'PERFORMANCE_BUDGETS', {}), overrides or {}):
+        for key, value in source.items():
+            config[key] = {**config[key], **value} if isinstance(value, dict) else value
+    return config
+
+
+def build_scenarios(client, trainer, password=None):
+    """
+    Cenários para ``client`` (usuário com perfil e histórico) e ``trainer``
+    (dono de templates). Sem ``password`` o login fica de fora.
+    """
+    exercise = Exercise.objects.order_by('id').first()
+    group = MuscleGroup.objects.order_by('id').first()
+    template = WorkoutTemplate.objects.filter(trainer=trainer).order_by('id').first()
+    workout = UserWorkout.objects.filter(user=client).order_by('id').first()
+    job = AIGenerationJob.objects.filter(user_profile__user=client).order_by('id').first()
+    if job is None:
+        job = AIGenerationJob.objects.create(user_profile=client.userprofile)
+
+    def get(name, basename, url, user=client):
+        return Scenario(name, basename, user, 'get', url, None, 200)
+
+    scenarios = [
+        get('exercise-list', 'exercise', '/api/exercises/exercises/'),
+        get('exercise-filter', 'exercise', '/api/exercises/exercises/?equipment=barbell&difficulty=beginner'),
+        get('exercise-search', 'exercise', '/api/exercises/exercises/?search=supino'),
+        get('exercise-detail', 'exercise', f'/api/exercises/exercises/{exercise.id}/'),
+        get('exercise-neural-training', 'exercise', '/api/exercises/exercises/neural_training/'),
+        get('musclegroup-list', 'musclegroup', '/api/exercises/muscle-groups/'),
+        get('musclegroup-detail', 'musclegroup', f'/api/exercises/muscle-groups/{group.id}/'),
+        get('workouttemplate-list', 'workouttemplate', '/api/workouts/templates/'),
+        get('workouttemplate-detail', 'workouttemplate', f'/api/workouts/templates/{template.id}/'),
+        get('workouttemplate-popular', 'workouttemplate', '/api/workouts/templates/popular/'),
+        get('workouttemplate-recommended', 'workouttemplate', '/api/workouts/templates/recommended/'),
+        get('workouttemplate-my-templates', 'workouttemplate', '/api/workouts/templates/my_templates/', trainer),
+        get('trainerdashboard-list', 'trainerdashboard', '/api/workouts/trainer-dashboard/', trainer),
+        get('userworkout-list', 'userworkout', '/api/workouts/user-workouts/'),
+        get('userworkout-detail', 'userworkout', f'/api/workouts/user-workouts/{workout.id}/'),
+        get('userworkout-today', 'userworkout', '/api/workouts/user-workouts/today/'),
+        get('userworkout-stats', 'userworkout', '/api/workouts/user-workouts/stats/'),
+        get('userworkout-calendar', 'userworkout', '/api/workouts/user-workouts/calendar/'),
+        get('workoutschedule-list', 'workoutschedule', '/api/workouts/schedules/'),
+        get('userprofile-list', 'userprofile', '/api/ai/profile/'),
+        get('aiengine-my-recommendations', 'aiengine', '/api/ai/engine/my_recommendations/'),
+        get('aiengine-job-status', 'aiengine', f'/api/ai/engine/jobs/{job.id}/'),
+        Scenario('aiengine-generate-workout', 'aiengine', client, 'post', '/api/ai/engine/generate_workout/',
+                 {'async': False}, 200),
+        get('auth-profile', None, '/api/auth/profile/'),
+    ]
+    if password is not None:
+        scenarios.append(Scenario('auth-login', None, None, 'post', '/api/auth/login/',
+                                  {'username': client.username, 'password': password}, 200))
+    return scenarios
+
+
+def _client_for(scenario, tokens):
+    api = APIClient()
+    if scenario.user is not None:
+        if scenario.user.pk not in tokens:
+            tokens[scenario.user.pk] = issue_token(scenario.user)
+        api.credentials(HTTP_AUTHORIZATION=f'Token {tokens[scenario.user.pk]}')
+    return api
+
+
+def _request(api, scenario):
+    return getattr(api, scenario.method)(scenario.url, scenario.data, format='json')
+
+
+def run_scenario(scenario, iterations=30, warmup=3, alloc_iterations=3, tokens=None):
+    """Mede ``scenario`` e retorna latências (ms), queries por requisição e pico de memória (KB)."""
+    api = _client_for(scenario, {} if tokens is None else tokens)
+    errors = []
+    for _ in range(warmup):
+        _request(api, scenario)
+
+    latencies, queries = [], []
+    for _ in range(iterations):
+        with CaptureQueriesContext(connection) as context:
+            started = time.perf_counter()
+            response = _request(api, scenario)
+            latencies.append(time.perf_counter() - started)
+        queries.append(len(context.captured_queries))
+        if response.status_code != scenario.status:
+            errors.append(response.status_code)
+
+    peaks = []
+    already_tracing = tracemalloc.is_tracing()
+    if not already_tracing:
+        tracemalloc.start()
+    try:
+        for _ in range(alloc_iterations):
+            tracemalloc.reset_peak()
+            baseline = tracemalloc.get_traced_memory()[0]
+            _request(api, scenario)
+            peaks.append(tracemalloc.get_traced_memory()[1] - baseline)
+    finally:
+        if not already_tracing:
+            tracemalloc.stop()
+
+    return {
+        'basename': scenario.basename,
+        'method': scenario.method.upper(),
+        'url': scenario.url,
+        'requests': iterations,
+        'errors': len(errors),
+        'error_statuses': sorted(set(errors)),
+        'latency_ms': {
+            'mean': round(sum(latencies) / len(latencies) * 1000, 3) if latencies else 0.0,
+            'p50': round(percentile(latencies, 0.50) * 1000, 3),
+            'p95': round(percentile(latencies, 0.95) * 1000, 3),
+            'p99': round(percentile(latencies, 0.99) * 1000, 3),
+        },
+        # Máximo: a primeira requisição após uma escrita pode recarregar cache
+        'queries': max(queries, default=0),
+        'alloc_peak_kb': round(max(peaks, default=0) / 1024, 1),
+    }
+
+
+def run_scenarios(scenarios, iterations=30, warmup=3, alloc_iterations=3, log=None):
+    tokens = {}
+    results = {}
+    # Sem limites de tentativas: o login repetido seria barrado pelo throttle e mediria só o 429
+    rest_framework = {**getattr(settings, 'REST_FRAMEWORK', {}), 'DEFAULT_THROTTLE_RATES': {}}
+    with override_settings(REST_FRAMEWORK=rest_framework):
+        for scenario in scenarios:
+            results[scenario.name] = run_scenario(scenario, iterations, warmup, alloc_iterations, tokens)
+            if log:
+                log(scenario.name, results[scenario.name])
+    return results
+
+
+class QuietRequestHandler(WSGIRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+
+def run_concurrent(scenarios, concurrency=8, duration=5.0, warmup=1.0):
+    """
+    Sobe um servidor WSGI com threads em uma porta livre e dispara carga nas
+    rotas GET do cliente dos cenários (todas com o mesmo token).
+    """
+    scenarios = [scenario for scenario in scenarios if scenario.method == 'get' and scenario.user is not None]
+    user = scenarios[0].user
+    scenarios = [scenario for scenario in scenarios if scenario.user == user]
+    token = issue_token(user)
+
+    server = ThreadedWSGIServer(('127.0.0.1', 0), QuietRequestHandler, allow_reuse_address=False)
+    server.daemon_threads = True
+    server.set_app(get_internal_wsgi_application())
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        base = f'http://127.0.0.1:{server.server_address[1]}'
+        return asyncio.run(run_load(
+            [base + scenario.url for scenario in scenarios], concurrency=concurrency, duration=duration,
+            warmup=warmup, headers=[f'Authorization: Token {token}'],
+        ))
+    finally:
+        server.shutdown()
+        server.server_close()
+        thread.join()
+
+
+def environment():
+    """Dados da execução, para comparar resultados entre commits."""
+    try:
+        commit = subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, cwd=settings.BASE_DIR,
+            timeout=5,
+        ).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        commit = None
+    return {
+        'created_at': timezone.now().isoformat(),
+        'commit': commit,
+        'python': platform.python_version(),
+        'django': django.get_version(),
+        'database': connection.vendor,
+        'machine': platform.machine(),
+    }
+
+
+def _regressed(current, previous, tolerance, floor=0.0):
+    return previous is not None and current > previous * (1 + tolerance) and current - previous > floor
+
+
+def check_budgets(results, budgets=None, baseline=None):
+    """
+    Lista as violações de ``results`` (saída do benchmark): limites absolutos
+    de ``budgets`` (padrão: ``get_budget_settings()``) e regressões em relação
+    a ``baseline``. Queries a mais que na base sempre contam como regressão.
+    """
+    budgets = budgets or get_budget_settings()
+    tolerance, floor = budgets['MAX_REGRESSION'], budgets['MIN_REGRESSION_MS']
+    previous_scenarios = (baseline or {}).get('scenarios', {})
+    violations = []
+
+    for name, result in results.get('scenarios', {}).items():
+        limits = {**budgets['DEFAULT'], **budgets['SCENARIOS'].get(name, {})}
+        measured = {
+            'p95_ms': result['latency_ms']['p95'],
+            'p99_ms': result['latency_ms']['p99'],
+            'queries': result['queries'],
+            'alloc_peak_kb': result['alloc_peak_kb'],
+        }
+        if result['errors']:
+            violations.append(f'{name}: {result["errors"]} respostas com status {result["error_statuses"]}')
+        for metric, value in measured.items():
+            limit = limits.get(metric)
+            if limit is not None and value > limit:
+                violations.append(f'{name}: {metric} {value} acima do orçamento {limit}')
+
+        previous = previous_scenarios.get(name)
+        if previous is None:
+            continue
+        if result['queries'] > previous['queries']:
+            violations.append(f'{name}: queries {previous["queries"]} -> {result["queries"]}')
+        # A mediana é estável entre execuções; p95/p99 ficam só com os limites absolutos
+        if _regressed(result['latency_ms']['p50'], previous['latency_ms']['p50'], tolerance, floor):
+            violations.append(f'{name}: p50 {previous["latency_ms"]["p50"]} -> {result["latency_ms"]["p50"]} ms')
+        if _regressed(result['alloc_peak_kb'], previous['alloc_peak_kb'], tolerance):
+            violations.append(f'{name}: alloc_peak_kb {previous["alloc_peak_kb"]} -> {result["alloc_peak_kb"]}')
+
+    concurrent = results.get('concurrent')
+    if concurrent:
+        limits = budgets['CONCURRENT']
+        total = concurrent['requests'] + concurrent['errors']
+        error_rate = concurrent['errors'] / total if total else 1.0
+        if limits.get('p99_ms') is not None and concurrent['latency_ms']['p99'] > limits['p99_ms']:
+            violations.append(f'concorrente: p99 {concurrent["latency_ms"]["p99"]} acima do orçamento {limits["p99_ms"]}')
+        if limits.get('error_rate') is not None and error_rate > limits['error_rate']:
+            violations.append(f'concorrente: taxa de erros {error_rate:.3f} acima de {limits["error_rate"]}')
+        previous = (baseline or {}).get('concurrent')
+        if previous and concurrent['requests_per_second'] < previous['requests_per_second'] * (1 - tolerance):
+            violations.append(
+                f'concorrente: requests/s {previous["requests_per_second"]} -> {concurrent["requests_per_second"]}'
+            )
+    return violations
@@ -0,0 +1,63 @@
+"""
+Inserção em massa com ``executemany``, para volumes em que o ``bulk_create``
+pesa: ele compila cada valor de cada objeto em Python, o que domina o tempo
+em centenas de milhares de linhas.
+
+As linhas chegam como tuplas já no formato do banco (datas convertidas com
+``adapt_datetime``) e são consumidas em blocos, então um gerador é gravado
+com memória constante. Sinais e ``auto_now`` não rodam: quem chama preenche
+todas as colunas NOT NULL.
+"""
+from itertools import islice
+
+from django.db import connections, router
+from django.db.models.constants import OnConflict
+
+DEFAULT_BATCH_SIZE = 2000
+
+
+def adapt_datetime(using):
+    """Conversor datetime -> valor do banco, com memória dos instantes repetidos."""
+    adapt = connections[using].ops.adapt_datetimefield_value
+    cache = {}
+
+    def convert(value):
+        if value is None:
+            return None
+        if value not in cache:
+            if len(cache) > 100000:
+                cache.clear()
+            cache[value] = adapt(value)
+        return cache[value]
+    return convert
+
+
+def insert_rows(model, columns, rows, batch_size=DEFAULT_BATCH_SIZE, using=None, ignore_conflicts=False):
+    """
+    Grava ``rows`` (tuplas na ordem de ``columns``, nomes de coluna do banco)
+    em ``model``. Com ``ignore_conflicts`` linhas que violam restrições únicas
+    são descartadas. Retorna quantas linhas foram gravadas.
+    """
+    using = using or router.db_for_write(model)
+    connection = connections[using]
+    ops = connection.ops
+    on_conflict = OnConflict.IGNORE if ignore_conflicts else None
+    by_column = {field.column: field for field in model._meta.concrete_fields}
+    fields = [by_column[column] for column in columns]
+    sql = '{} {} ({}) VALUES ({}) {}'.format(
+        ops.insert_statement(on_conflict=on_conflict), ops.quote_name(model._meta.db_table),
+        ', '.join(ops.quote_name(column) for column in columns), ', '.join(['%s'] * len(columns)),
+        ops.on_conflict_suffix_sql(fields, on_conflict, None, None) or '',
+    ).rstrip()
+
+    rows = iter(rows)
+    total = 0
+    with connection.cursor() as cursor:
+        while True:
+            batch = list(islice(rows, batch_size))
+            if not batch:
+                break
+            cursor.executemany(sql, batch)
+            # Com conflitos ignorados, rowcount conta só as linhas gravadas
+            total += cursor.rowcount if ignore_conflicts and cursor.rowcount >= 0 else len(batch)
+    return total
@@ -0,0 +1,66 @@
+"""
+Verificação de planos de execução (EXPLAIN) das queries de um endpoint.
+
+Usado pelos testes para garantir que filtros e ordenações dos endpoints são
+atendidos por índices. Uma query é considerada problemática quando o plano
+varre uma tabela inteira para aplicar um filtro; listagens sem WHERE (ex.:
+todos os grupos musculares) são permitidas.
+"""
+import re
+
+from django.db import transaction
+
+SQLITE_SCAN_RE = re.compile(r'\bSCAN (?:TABLE )?(\w+)(?!.*\b(?:USING (?:COVERING |INTEGER PRIMARY KEY|INDEX)|VIRTUAL TABLE))')
+POSTGRES_SCAN_RE = re.compile(r'Seq Scan on (\w+)')
+
+
+def explain(connection, sql):
+    """Linhas do plano de execução de ``sql`` (já com parâmetros interpolados)."""
+    if connection.vendor == 'sqlite':
+        with connection.cursor() as cursor:
+            cursor.execute(f'EXPLAIN QUERY PLAN {sql}')
+            return [row[-1] for row in cursor.fetchall()]
+    if connection.vendor == 'postgresql':
+        # SET LOCAL só vale dentro de uma transação (em autocommit é ignorado com um WARNING)
+        with transaction.atomic(using=connection.alias), connection.cursor() as cursor:
+            # Sem seq scan "barato" o planner só escolhe Seq Scan se não houver índice aplicável
+            cursor.execute('SET LOCAL enable_seqscan = off')
+            cursor.execute(f'EXPLAIN {sql}')
+            plan = [row[0] for row in cursor.fetchall()]
+            # Desfaz o SET LOCAL também quando já havia uma transação (savepoint)
+            transaction.set_rollback(True, using=connection.alias)
+            return plan
+    return []
+
+
+def full_scans(connection, sql):
+    """Tabelas varridas por inteiro para filtrar linhas na query ``sql``."""
+    if not sql.lstrip().upper().startswith('SELECT') or ' WHERE ' not in sql.upper():
+        return []
+    plan = explain(connection, sql)
+    if connection.vendor == 'sqlite':
+        scans = [match.group(1) for line in plan for match in [SQLITE_SCAN_RE.search(line)] if match]
+        # Subqueries materializadas e tabelas internas do SQLite não contam
+        return [table for table in scans if table != 'subquery' and not table.startswith('sqlite_')]
+    if connection.vendor == 'postgresql':
+        scans = []
+        for position, line in enumerate(plan):
+            match = POSTGRES_SCAN_RE.search(line)
+            following = plan[position + 1] if position + 1 < len(plan) else ''
+            if match and 'Filter:' in following:
+                scans.append(match.group(1))
+        return scans
+    return []
+
+
+def find_full_scans(connection, captured_queries):
+    """
+    Para cada query capturada (``CaptureQueriesContext.captured_queries``),
+    retorna ``(sql, tabelas)`` das que fazem varredura completa.
+    """
+    problems = []
+    for query in captured_queries:
+        tables = full_scans(connection, query['sql'])
+        if tables:
+            problems.append((query['sql'], tables))
+    return problems
@@ -0,0 +1,138 @@
+"""
+Serialização rápida de listagens a partir de ``values()``.
+
+Um ``FastSerializer`` espelha um ModelSerializer (``serializer_class``): os
+campos declarados nele viram colunas de um único ``values()`` e um conversor
+por campo, montados uma vez na criação. Campos aninhados ou calculados são
+listados em ``custom_fields`` e resolvidos em bloco por ``resolve_<campo>``
+(que recebe as linhas e devolve ``{pk: valor}``), com uma query agrupada por
+id em vez de uma instância por linha. O resultado é o mesmo de
+``serializer_class(many=True).data``, o que é verificado pelos testes de
+paridade de cada app.
+
+``FastListMixin`` usa o FastSerializer na action ``list`` dos viewsets.
+``settings.FAST_SERIALIZATION = False`` volta para o serializer do DRF.
+"""
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.exceptions import FieldDoesNotExist, ImproperlyConfigured
+from rest_framework import serializers
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+
+from .profiling import timer
+
+# Campos cujo to_representation devolve o próprio valor lido do banco
+IDENTITY_FIELDS = (
+    serializers.CharField, serializers.IntegerField, serializers.BooleanField, serializers.ChoiceField,
+)
+
+
+def fast_serialization_enabled():
+    return getattr(settings, 'FAST_SERIALIZATION', True)
+
+
+class FastSerializer:
+    serializer_class = None
+    custom_fields = ()
+    # Colunas adicionais lidas para os resolve_<campo>
+    extra_columns = ()
+
+    def __init__(self, context=None):
+        self.context = context or {}
+        serializer = self.serializer_class(context=self.context)
+        self.model = serializer.Meta.model
+        self.pk = self.model._meta.pk.attname
+        self.plan = []
+        columns = {self.pk: None}
+        for name, field in serializer.fields.items():
+            if field.write_only:
+                continue
+            if name in self.custom_fields:
+                self.plan.append((name, None, None))
+                continue
+            try:
+                model_field = self.model._meta.get_field(field.source)
+            except FieldDoesNotExist:
+                raise ImproperlyConfigured(
+                    f'{type(self).__name__}: o campo "{name}" precisa estar em custom_fields'
+                )
+            columns[model_field.attname] = None
+            self.plan.append((name, model_field.attname, self.get_converter(field, model_field)))
+        columns.update(dict.fromkeys(self.extra_columns))
+        self.columns = list(columns)
+
+    def get_converter(self, field, model_field):
+        """Função valor do banco -> representação; None quando é o próprio valor."""
+        if isinstance(field, serializers.PrimaryKeyRelatedField) and field.pk_field is None:
+            return None
+        if isinstance(field, serializers.FileField):
+            return self._file_converter(field, model_field)
+        if isinstance(field, IDENTITY_FIELDS):
+            return None
+        if isinstance(field, serializers.FloatField):
+            return float
+        return field.to_representation
+
+    def _file_converter(self, field, model_field):
+        if not getattr(field, 'use_url', api_settings.UPLOADED_FILES_USE_URL):
+            return lambda name: name or None
+        request = self.context.get('request')
+        storage = model_field.storage
+
+        def convert(name):
+            if not name:
+                return None
+            url = storage.url(name)
+            return request.build_absolute_uri(url) if request is not None else url
+        return convert
+
+    def values(self, queryset, *extra):
+        """``queryset`` como dicts com as colunas do plano (e ``extra``)."""
+        return queryset.prefetch_related(None).values(*dict.fromkeys([*self.columns, *extra]))
+
+    def serialize(self, rows):
+        with timer('serialize'):
+            rows = list(rows)
+            resolved = {name: getattr(self, f'resolve_{name}')(rows) for name in self.custom_fields}
+            data = []
+            for row in rows:
+                item = {}
+                for name, key, convert in self.plan:
+                    if key is None:
+                        item[name] = resolved[name][row[self.pk]]
+                    else:
+                        value = row[key]
+                        item[name] = value if value is None or convert is None else convert(value)
+                data.append(item)
+            return data
+
+    def serialize_grouped(self, queryset, parent):
+        """``{id do pai: [itens]}`` para as linhas de ``queryset``, na ordem da query."""
+        rows = list(self.values(queryset, parent))
+        grouped = defaultdict(list)
+        for row, item in zip(rows, self.serialize(rows)):
+            grouped[row[parent]].append(item)
+        return grouped
+
+
+class FastListMixin:
+    """Action ``list`` com ``fast_serializer_class`` no lugar do serializer do DRF."""
+    fast_serializer_class = None
+
+    def get_fast_serializer(self):
+        if self.fast_serializer_class is None or not fast_serialization_enabled():
+            return None
+        return self.fast_serializer_class(context=self.get_serializer_context())
+
+    def list(self, request, *args, **kwargs):
+        fast = self.get_fast_serializer()
+        if fast is None:
+            return super().list(request, *args, **kwargs)
+
+        rows = fast.values(self.filter_queryset(self.get_queryset()))
+        page = self.paginate_queryset(rows)
+        if page is not None:
+            return self.get_paginated_response(fast.serialize(page))
+        return Response(fast.serialize(rows))
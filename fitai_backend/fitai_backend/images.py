@@ -0,0 +1,268 @@
+"""
+Variantes responsivas das imagens enviadas (``Exercise.image``,
+``User.profile_picture``).
+
+- Upload: ``HashedUploadTo`` nomeia o arquivo pelo sha256 do conteúdo, lido
+  em blocos (``chunks()``), e o storage grava também em blocos: o original
+  nunca é carregado inteiro na memória. ``HashedImageField`` reaproveita o
+  arquivo quando o mesmo conteúdo já está no storage (sem cópia com sufixo
+  nem variantes repetidas).
+- Processamento: depois do commit, um pool de threads (``WORKERS``) gera as
+  variantes em WebP e JPEG nas larguras de ``WIDTHS`` (sem ampliar) e grava
+  os nomes em ``<campo>_variants``. O Pillow libera o GIL ao decodificar,
+  redimensionar e codificar, então as threads não seguram as requisições.
+  ``WORKERS = 0`` processa na hora (testes); ``manage.py process_images``
+  processa o que ficou pendente (imagens antigas, processo reiniciado).
+- Cache: original e variantes têm nomes derivados do hash e nunca mudam de
+  conteúdo, então podem ser servidos com ``Cache-Control: immutable``
+  (``serve_media`` em DEBUG; em produção, o mesmo cabeçalho no servidor web
+  ou CDN para ``MEDIA_URL``). Mudar ``QUALITY`` muda os nomes das variantes.
+
+``register`` liga um modelo ao pipeline (ver ``signals.py`` dos apps) e
+``ImageVariantsField`` expõe as URLs nos serializers. Configuração em
+``settings.IMAGE_VARIANTS``.
+"""
+import hashlib
+import io
+import logging
+import os
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db import close_old_connections, models, transaction
+from django.db.models.signals import post_save
+from django.utils.deconstruct import deconstructible
+from django.views.static import serve
+from PIL import ExifTags, Image, ImageOps
+from rest_framework import serializers
+
+logger = logging.getLogger(__name__)
+
+DEFAULTS = {
+    'WIDTHS': (160, 320, 640, 1080),
+    'FORMATS': ('webp', 'jpeg'),
+    'QUALITY': {'webp': 80, 'jpeg': 82},
+    # Threads do pool; 0 processa de forma síncrona
+    'WORKERS': 2,
+}
+
+# formato -> (formato do Pillow, extensão, opções do save)
+ENCODERS = {
+    'webp': ('WEBP', 'webp', {'method': 4}),
+    'jpeg': ('JPEG', 'jpg', {'optimize': True, 'progressive': True}),
+}
+
+IMMUTABLE = 'public, max-age=31536000, immutable'
+HASHED_NAME = re.compile(r'(^|/)[0-9a-f]{32}[./]')
+
+# Modelos registrados: (model, campo da imagem, campo das variantes, on_update)
+targets = []
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_image_settings():
+    config = {**DEFAULTS, **getattr(settings, 'IMAGE_VARIANTS', {})}
+    config['QUALITY'] = {**DEFAULTS['QUALITY'], **config['QUALITY']}
+    return config
+
+
+@deconstructible
+class HashedUploadTo:
+    """``upload_to`` que nomeia o arquivo pelo hash do conteúdo: ``<prefixo><sha256[:32]>.<ext>``."""
+
+    def __init__(self, prefix, field_name):
+        self.prefix = prefix
+        self.field_name = field_name
+
+    def __call__(self, instance, filename):
+        content = getattr(instance, self.field_name)
+        digest = hashlib.sha256()
+        for chunk in content.chunks():
+            digest.update(chunk)
+        # O storage volta ao início antes de gravar (File.chunks faz seek(0))
+        extension = os.path.splitext(filename)[1].lower()
+        return f'{self.prefix}{digest.hexdigest()[:32]}{extension}'
+
+    def __eq__(self, other):
+        return (isinstance(other, HashedUploadTo) and
+                (self.prefix, self.field_name) == (other.prefix, other.field_name))
+
+
+class HashedImageFieldFile(models.fields.files.ImageFieldFile):
+    def save(self, name, content, save=True):
+        name = self.field.generate_filename(self.instance, name)
+        # Nome derivado do conteúdo: se já existe, é o mesmo arquivo
+        if not self.storage.exists(name):
+            name = self.storage.save(name, content, max_length=self.field.max_length)
+        self.name = name
+        setattr(self.instance, self.field.attname, self.name)
+        self._committed = True
+        if save:
+            self.instance.save()
+
+    save.alters_data = True
+
+
+class HashedImageField(models.ImageField):
+    """ImageField para ``upload_to=HashedUploadTo(...)``: conteúdo repetido usa o arquivo já gravado."""
+    attr_class = HashedImageFieldFile
+
+
+def variant_name(name, width, image_format, quality):
+    base = os.path.splitext(name)[0]
+    return f'{base}/{width}w-q{quality}.{ENCODERS[image_format][1]}'
+
+
+def build_variants(storage, name, config=None):
+    """Gera as variantes de ``name`` no ``storage``; devolve o conteúdo de ``<campo>_variants``."""
+    config = config or get_image_settings()
+    with storage.open(name, 'rb') as source, Image.open(source) as original:
+        # Dimensões do original já na orientação do EXIF (as de ``image`` podem vir reduzidas pelo draft)
+        full_size = original.size
+        if original.getexif().get(ExifTags.Base.Orientation) in (5, 6, 7, 8):
+            full_size = full_size[::-1]
+        largest = max(config['WIDTHS'])
+        # JPEG: decodifica já reduzido pela escala DCT (fotos de câmera são muito maiores que as variantes)
+        original.draft(None, (largest, largest))
+        image = ImageOps.exif_transpose(original)
+        has_alpha = image.mode in ('RGBA', 'LA', 'PA') or 'transparency' in image.info
+        image = image.convert('RGBA' if has_alpha else 'RGB')
+
+    width, height = image.size
+    files = {image_format: {} for image_format in config['FORMATS']}
+    current = image
+    # Da maior para a menor: cada redução parte da anterior
+    for target in sorted({min(size, width) for size in config['WIDTHS']}, reverse=True):
+        if target != current.width:
+            current = current.resize(
+                (target, max(1, round(height * target / width))), Image.Resampling.LANCZOS, reducing_gap=3.0,
+            )
+        for image_format in config['FORMATS']:
+            pil_format, _, options = ENCODERS[image_format]
+            quality = config['QUALITY'][image_format]
+            path = variant_name(name, target, image_format, quality)
+            if not storage.exists(path):
+                output = current
+                if has_alpha and image_format == 'jpeg':
+                    output = Image.new('RGB', current.size, 'white')
+                    output.paste(current, mask=current.getchannel('A'))
+                buffer = io.BytesIO()
+                output.save(buffer, format=pil_format, quality=quality, **options)
+                storage.save(path, ContentFile(buffer.getvalue()))
+            files[image_format][str(target)] = path
+    files = {image_format: dict(reversed(by_width.items())) for image_format, by_width in files.items()}
+    return {'source': name, 'width': full_size[0], 'height': full_size[1], 'files': files}
+
+
+def process(model, pk, field_name, variants_field, on_update=None, config=None):
+    """Processa a imagem atual da linha ``pk``; False se não havia o que fazer."""
+    row = model._default_manager.filter(pk=pk).values(field_name).first()
+    name = row and row[field_name]
+    if not name:
+        return False
+    storage = model._meta.get_field(field_name).storage
+    try:
+        data = build_variants(storage, name, config)
+    except (OSError, ValueError, SyntaxError, Image.DecompressionBombError) as error:
+        logger.warning('Não foi possível gerar as variantes de %s: %s', name, error)
+        data = {'source': name, 'error': str(error)}
+    # Só grava se a imagem não foi trocada durante o processamento
+    updated = model._default_manager.filter(pk=pk, **{field_name: name}).update(**{variants_field: data})
+    if updated and on_update is not None:
+        on_update(pk)
+    return bool(updated)
+
+
+def run_job(*args):
+    close_old_connections()
+    try:
+        process(*args)
+    except Exception:
+        logger.exception('Falha no processamento de imagem %r', args[:3])
+    finally:
+        close_old_connections()
+
+
+def get_executor(config):
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=config['WORKERS'], thread_name_prefix='images')
+        return _executor
+
+
+def schedule(model, pk, field_name, variants_field, on_update=None):
+    config = get_image_settings()
+    if config['WORKERS'] <= 0:
+        process(model, pk, field_name, variants_field, on_update, config)
+        return
+    get_executor(config).submit(run_job, model, pk, field_name, variants_field, on_update, config)
+
+
+def register(model, field_name, variants_field, on_update=None):
+    """Processa ``field_name`` depois de cada save que trouxer uma imagem nova."""
+    targets.append((model, field_name, variants_field, on_update))
+
+    def image_saved(sender, instance, update_fields=None, **kwargs):
+        if update_fields is not None and field_name not in update_fields:
+            return
+        if {field_name, variants_field} & instance.get_deferred_fields():
+            return  # ex.: usuário montado pelo cache de autenticação
+        name = getattr(instance, field_name).name or ''
+        variants = getattr(instance, variants_field) or {}
+        if variants.get('source', '') == name:
+            return
+        if not name:
+            model._default_manager.filter(pk=instance.pk).update(**{variants_field: {}})
+            setattr(instance, variants_field, {})
+            return
+        pk = instance.pk
+        transaction.on_commit(lambda: schedule(model, pk, field_name, variants_field, on_update))
+
+    post_save.connect(image_saved, sender=model, weak=False,
+                      dispatch_uid=f'images:{model._meta.label}.{field_name}')
+
+
+class ImageVariantsField(serializers.Field):
+    """
+    URLs das variantes: ``{'width', 'height', 'webp': {'320': url}, 'jpeg': {...}}``
+    (dimensões do original), ou None enquanto não foram geradas.
+    """
+
+    def __init__(self, image_field, **kwargs):
+        self.image_field = image_field
+        kwargs['read_only'] = True
+        super().__init__(**kwargs)
+
+    def to_representation(self, value):
+        files = (value or {}).get('files')
+        if not files:
+            return None
+        storage = self.parent.Meta.model._meta.get_field(self.image_field).storage
+        request = self.context.get('request')
+
+        def url(name):
+            url = storage.url(name)
+            return request.build_absolute_uri(url) if request is not None else url
+
+        return {
+            'width': value['width'],
+            'height': value['height'],
+            **{
+                image_format: {width: url(name) for width, name in by_width.items()}
+                for image_format, by_width in files.items()
+            },
+        }
+
+
+def serve_media(request, path, document_root=None, show_indexes=False):
+    """``django.views.static.serve`` com cache imutável para os arquivos com hash no nome."""
+    response = serve(request, path, document_root, show_indexes)
+    if response.status_code == 200 and HASHED_NAME.search(path):
+        response['Cache-Control'] = IMMUTABLE
+    return response
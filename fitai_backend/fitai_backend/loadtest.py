@@ -0,0 +1,159 @@
+"""
+Gerador de carga HTTP (só biblioteca padrão) para comparar a implantação WSGI
+(views síncronas) com a ASGI (views de ``/api/async/``) com o mesmo número de
+workers. Exemplo, com o mesmo banco e 4 workers em cada servidor:
+
+    gunicorn fitai_backend.wsgi:application --workers 4 --bind 127.0.0.1:8000
+    uvicorn fitai_backend.asgi:application --workers 4 --port 8001
+
+    python -m fitai_backend.loadtest --token <token> -c 64 -d 30 \\
+        http://127.0.0.1:8000/api/workouts/user-workouts/today/
+    python -m fitai_backend.loadtest --token <token> -c 64 -d 30 \\
+        http://127.0.0.1:8001/api/async/workouts/user-workouts/today/
+
+Cada conexão mantém keep-alive e dispara a próxima requisição assim que
+recebe a resposta; várias URLs são usadas em rodízio. O resultado traz
+requisições/s, erros e latências p50/p95/p99.
+"""
+import argparse
+import asyncio
+import json
+import statistics
+import time
+from urllib.parse import urlsplit
+
+
+def percentile(values, fraction):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))]
+
+
+async def _read_response(reader):
+    status_line = await reader.readline()
+    if not status_line:
+        raise ConnectionError('Conexão encerrada pelo servidor')
+    status = int(status_line.split()[1])
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if line in (b'\r\n', b'\n', b''):
+            break
+        name, _, value = line.decode('latin-1').partition(':')
+        headers[name.strip().lower()] = value.strip()
+
+    if headers.get('transfer-encoding', '').lower() == 'chunked':
+        while True:
+            size = int((await reader.readline()).split(b';')[0], 16)
+            await reader.readexactly(size + 2)
+            if size == 0:
+                break
+    elif 'content-length' in headers:
+        await reader.readexactly(int(headers['content-length']))
+    return status, headers.get('connection', '').lower() != 'close'
+
+
+class Worker:
+    def __init__(self, urls, headers):
+        self.urls = urls
+        self.headers = headers
+        self.connection = None
+
+    async def _connect(self, target):
+        port = target.port or (443 if target.scheme == 'https' else 80)
+        return await asyncio.open_connection(target.hostname, port, ssl=target.scheme == 'https' or None)
+
+    async def request(self, url):
+        target = urlsplit(url)
+        if self.connection is None:
+            self.connection = await self._connect(target)
+        reader, writer = self.connection
+        path = target.path + (f'?{target.query}' if target.query else '')
+        lines = [f'GET {path} HTTP/1.1', f'Host: {target.netloc}', 'Connection: keep-alive',
+                 'Accept: application/json', *self.headers]
+        writer.write(('\r\n'.join(lines) + '\r\n\r\n').encode())
+        await writer.drain()
+        status, keep_alive = await _read_response(reader)
+        if not keep_alive:
+            self.close()
+        return status
+
+    def close(self):
+        if self.connection is not None:
+            self.connection[1].close()
+            self.connection = None
+
+    async def run(self, deadline, offset, results):
+        index = offset
+        while time.perf_counter() < deadline:
+            url = self.urls[index % len(self.urls)]
+            index += 1
+            started = time.perf_counter()
+            try:
+                status = await self.request(url)
+            except (OSError, ConnectionError, ValueError, asyncio.IncompleteReadError):
+                self.close()
+                results['errors'] += 1
+                continue
+            results['latencies'].append(time.perf_counter() - started)
+            if status >= 400:
+                results['errors'] += 1
+        self.close()
+
+
+async def run_load(urls, concurrency=32, duration=10.0, warmup=1.0, headers=()):
+    """Dispara carga em ``urls`` e retorna um dict com vazão e latências."""
+    if warmup:
+        await _run_phase(urls, concurrency, warmup, headers)
+    results, elapsed = await _run_phase(urls, concurrency, duration, headers)
+    latencies = results['latencies']
+    return {
+        'urls': urls,
+        'concurrency': concurrency,
+        'duration': round(elapsed, 3),
+        'requests': len(latencies),
+        'errors': results['errors'],
+        'requests_per_second': round(len(latencies) / elapsed, 1) if elapsed else 0.0,
+        'latency_ms': {
+            'mean': round(statistics.fmean(latencies) * 1000, 2) if latencies else 0.0,
+            'p50': round(percentile(latencies, 0.50) * 1000, 2),
+            'p95': round(percentile(latencies, 0.95) * 1000, 2),
+            'p99': round(percentile(latencies, 0.99) * 1000, 2),
+        },
+    }
+
+
+async def _run_phase(urls, concurrency, duration, headers):
+    results = {'latencies': [], 'errors': 0}
+    started = time.perf_counter()
+    deadline = started + duration
+    workers = [Worker(urls, headers) for _ in range(concurrency)]
+    await asyncio.gather(*(worker.run(deadline, offset, results) for offset, worker in enumerate(workers)))
+    return results, time.perf_counter() - started
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Teste de carga HTTP para endpoints GET da API')
+    parser.add_argument('urls', nargs='+', help='URLs completas, usadas em rodízio')
+    parser.add_argument('--token', help='Token enviado em "Authorization: Token <token>"')
+    parser.add_argument('-c', '--concurrency', type=int, default=32, help='Conexões simultâneas')
+    parser.add_argument('-d', '--duration', type=float, default=10.0, help='Duração da medição (s)')
+    parser.add_argument('--warmup', type=float, default=1.0, help='Aquecimento antes da medição (s)')
+    parser.add_argument('--json', action='store_true', help='Imprime o resultado em JSON')
+    args = parser.parse_args(argv)
+
+    headers = [f'Authorization: Token {args.token}'] if args.token else []
+    result = asyncio.run(run_load(args.urls, args.concurrency, args.duration, args.warmup, headers))
+    if args.json:
+        print(json.dumps(result, indent=2))
+        return
+    latency = result['latency_ms']
+    print(f"{result['requests']} requisições em {result['duration']}s "
+          f"({result['requests_per_second']} req/s), {result['errors']} erros")
+    print(f"latência (ms): média {latency['mean']}  p50 {latency['p50']}  "
+          f"p95 {latency['p95']}  p99 {latency['p99']}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,115 @@
+"""
+Paginação por keyset (cursor) para históricos longos.
+
+Em vez de OFFSET, cada página filtra a partir da última linha da página
+anterior pela tupla de ordenação (ex.: ``(-generated_at, -id)``), então a
+página 1000 custa o mesmo que a primeira quando há um índice composto com as
+mesmas colunas.
+"""
+import base64
+import json
+from operator import attrgetter
+
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """
+    Subclasses definem ``ordering``; o último campo deve ser único (ex.: ``-id``)
+    para desempatar linhas com o mesmo valor.
+    """
+    ordering = ('-id',)
+    page_size = api_settings.PAGE_SIZE
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    cursor_query_param = 'cursor'
+    invalid_cursor_message = 'Cursor inválido'
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return min(max(size, 1), self.max_page_size)
+
+    def _fields(self):
+        return [(name.lstrip('-'), name.startswith('-')) for name in self.ordering]
+
+    def encode_cursor(self, instance):
+        values = [attrgetter(name)(instance) for name, _ in self._fields()]
+        payload = json.dumps([value.isoformat() if hasattr(value, 'isoformat') else value for value in values])
+        return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+    def decode_cursor(self, request, model):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            padded = encoded + '=' * (-len(encoded) % 4)
+            values = json.loads(base64.urlsafe_b64decode(padded.encode()).decode())
+            fields = self._fields()
+            if not isinstance(values, list) or len(values) != len(fields):
+                raise ValueError
+            return [model._meta.get_field(name).to_python(value) for (name, _), value in zip(fields, values)]
+        except Exception:
+            raise NotFound(self.invalid_cursor_message)
+
+    def _after(self, position):
+        """Linhas estritamente depois de ``position`` na ordenação."""
+        condition = Q()
+        equal = Q()
+        for (name, descending), value in zip(self._fields(), position):
+            lookup = f'{name}__lt' if descending else f'{name}__gt'
+            condition |= equal & Q(**{lookup: value})
+            equal &= Q(**{name: value})
+        return condition
+
+    def _page_queryset(self, queryset, request):
+        """Queryset da página com uma linha extra, para saber se há próxima."""
+        self.request = request
+        self.current_page_size = self.get_page_size(request)
+        queryset = queryset.order_by(*self.ordering)
+
+        position = self.decode_cursor(request, queryset.model)
+        if position is not None:
+            queryset = queryset.filter(self._after(position))
+        return queryset[:self.current_page_size + 1]
+
+    def _finish_page(self, rows):
+        self.has_next = len(rows) > self.current_page_size
+        rows = rows[:self.current_page_size]
+        self.next_cursor = self.encode_cursor(rows[-1]) if self.has_next else None
+        return rows
+
+    def paginate_queryset(self, queryset, request, view=None):
+        return self._finish_page(list(self._page_queryset(queryset, request)))
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        return self._finish_page([row async for row in self._page_queryset(queryset, request)])
+
+    def get_next_link(self):
+        if self.next_cursor is None:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, self.next_cursor)
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_next_link(),
+            'results': data,
+        })
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
@@ -0,0 +1,128 @@
+"""
+Montagem automática de select_related/prefetch_related a partir dos serializers.
+
+Cada serializer declara, pelos próprios campos, as relações que vai percorrer
+(serializers aninhados, campos relacionados e ``source`` com pontos). Os
+viewsets usam essa declaração para montar a árvore exata de ``Prefetch``,
+mantendo o número de queries constante independentemente do tamanho da página.
+
+Relações que o serializer acessa de forma indireta (ex.: SerializerMethodField)
+podem ser declaradas em ``Meta.select_related`` / ``Meta.prefetch_related``.
+"""
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import Prefetch
+from rest_framework import serializers
+
+
+def _resolve_relation(model, name):
+    """Retorna o campo/relação de ``model`` para um nome de atributo ou accessor."""
+    try:
+        return model._meta.get_field(name)
+    except FieldDoesNotExist:
+        pass
+    for rel in model._meta.related_objects:
+        if rel.get_accessor_name() == name:
+            return rel
+    return None
+
+
+def _unwrap(field):
+    """Separa campos ``many=True`` do campo filho que serializa cada item."""
+    if isinstance(field, serializers.ListSerializer):
+        return field.child, True
+    if isinstance(field, serializers.ManyRelatedField):
+        return field.child_relation, True
+    return field, False
+
+
+def _get_model(serializer):
+    meta = getattr(serializer, 'Meta', None)
+    return getattr(meta, 'model', None)
+
+
+def _collect(serializer, model, prefix, select, prefetch):
+    meta = getattr(serializer, 'Meta', None)
+    for path in getattr(meta, 'select_related', ()):
+        select.add(prefix + path)
+    for path in getattr(meta, 'prefetch_related', ()):
+        prefetch.setdefault(prefix + path, None)
+
+    for field in serializer.fields.values():
+        if field.write_only or field.source == '*':
+            continue
+
+        child, many = _unwrap(field)
+        parts = field.source.split('.')
+        current_model = model
+        lookup = prefix
+
+        for index, part in enumerate(parts):
+            relation = _resolve_relation(current_model, part)
+            if relation is None or not relation.is_relation:
+                break
+
+            lookup += part
+            is_last = index == len(parts) - 1
+
+            if relation.many_to_many or relation.one_to_many:
+                nested = child if is_last and isinstance(child, serializers.BaseSerializer) else None
+                if nested is not None or lookup not in prefetch:
+                    prefetch[lookup] = (relation.related_model, nested)
+                break
+
+            # FK/OneToOne: evita o JOIN quando só o id é serializado
+            if (is_last and len(parts) == 1 and isinstance(child, serializers.RelatedField)
+                    and child.use_pk_only_optimization()):
+                break
+
+            select.add(lookup)
+            current_model = relation.related_model
+            if is_last and isinstance(child, serializers.BaseSerializer):
+                _collect(child, current_model, lookup + '__', select, prefetch)
+            lookup += '__'
+
+
+def optimize_queryset(queryset, serializer):
+    """
+    Aplica ao queryset as relações que o serializer (classe ou instância) percorre.
+    """
+    if isinstance(serializer, type):
+        serializer = serializer()
+    if isinstance(serializer, serializers.ListSerializer):
+        serializer = serializer.child
+    model = _get_model(serializer)
+    if model is None:
+        return queryset
+
+    select = set()
+    prefetch = {}
+    _collect(serializer, model, '', select, prefetch)
+
+    if select:
+        queryset = queryset.select_related(*sorted(select))
+
+    lookups = []
+    for lookup, spec in sorted(prefetch.items()):
+        if spec is None:
+            lookups.append(lookup)
+            continue
+        related_model, nested = spec
+        if nested is None:
+            lookups.append(lookup)
+        else:
+            child_queryset = optimize_queryset(related_model._default_manager.all(), nested)
+            lookups.append(Prefetch(lookup, queryset=child_queryset))
+    if lookups:
+        queryset = queryset.prefetch_related(*lookups)
+    return queryset
+
+
+class SerializerPrefetchMixin:
+    """
+    Mixin para GenericViewSets: otimiza o queryset de acordo com o serializer
+    da action atual.
+    """
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        return optimize_queryset(queryset, self.get_serializer_class())
@@ -0,0 +1,325 @@
+"""
+Perfil por requisição: tempo total, de autenticação, da view, de
+serialização e de renderização, mais queries (contagem, tempo, repetidas),
+devolvidos no cabeçalho ``Server-Timing`` (visível no DevTools do navegador
+e no ``curl -i``).
+
+Ativação (``settings.REQUEST_PROFILING``):
+
+- por requisição, com o cabeçalho ``X-Profile: 1`` (``HEADER``). O resultado
+  só volta para usuários staff (``STAFF_ONLY``); como o usuário do token só é
+  conhecido depois da autenticação do DRF, a decisão é tomada na resposta;
+- em toda requisição com ``ALWAYS`` (desenvolvimento);
+- por amostragem, ``SAMPLE_RATE`` das requisições síncronas rodam sob
+  cProfile e gravam em ``SAMPLE_DIR`` um ``.prof`` (``python -m pstats``,
+  snakeviz) e um ``.json`` com os tempos e as queries, para análise offline.
+
+As fases vêm de ``timer(name)`` (``auth`` em accounts.authentication,
+``serialize`` em fast_serialization) e dos hooks de view/template response
+(``view``, ``render``); fases aninhadas contam inteiras (``view`` inclui
+``auth``). Cada query é atribuída à fase mais interna em andamento. Queries
+``duplicated`` repetem SQL e parâmetros; ``similar`` repetem o SQL com
+quaisquer parâmetros (o padrão N+1).
+
+O perfil corrente fica numa ContextVar e as queries passam por um
+execute_wrapper instalado em cada conexão, que só mede quando há perfil
+ativo. Sem perfil, o custo por requisição é a leitura de um cabeçalho.
+"""
+import cProfile
+import json
+import logging
+import os
+import random
+import re
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.utils import timezone
+from django.utils.functional import SimpleLazyObject, empty
+
+logger = logging.getLogger(__name__)
+
+DEFAULTS = {
+    # Cabeçalho que liga o perfil na requisição
+    'HEADER': 'X-Profile',
+    # Resultado só para usuários staff
+    'STAFF_ONLY': True,
+    # Perfil em todas as requisições, para qualquer usuário (só em desenvolvimento)
+    'ALWAYS': False,
+    # Fração das requisições síncronas gravadas com cProfile em SAMPLE_DIR
+    'SAMPLE_RATE': 0.0,
+    'SAMPLE_DIR': None,
+    # Amostras mantidas no diretório; além disso novas amostras são descartadas
+    'MAX_SAMPLES': 500,
+    # Queries mais caras incluídas no .json da amostra
+    'TOP_QUERIES': 20,
+}
+
+_current = ContextVar('request_profile', default=None)
+
+
+def get_profiling_settings():
+    config = {**DEFAULTS, **getattr(settings, 'REQUEST_PROFILING', {})}
+    if config['SAMPLE_DIR'] is None:
+        config['SAMPLE_DIR'] = os.path.join(settings.BASE_DIR, 'profiles')
+    return config
+
+
+class RequestProfile:
+    """Fases e queries de uma requisição."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.total = None
+        self.phases = {}
+        self.open = []
+        self.queries = []
+
+    def begin(self, name):
+        self.open.append((name, time.perf_counter()))
+
+    def end(self, name):
+        """Fecha ``name`` e as fases abertas depois dela."""
+        while any(open_name == name for open_name, _ in self.open):
+            open_name, started = self.open.pop()
+            self.phases[open_name] = self.phases.get(open_name, 0.0) + time.perf_counter() - started
+
+    def is_open(self, name):
+        return any(open_name == name for open_name, _ in self.open)
+
+    def record_query(self, sql, params, duration):
+        phase = self.open[-1][0] if self.open else None
+        self.queries.append((sql, repr(params), duration, phase))
+
+    def finish(self):
+        while self.open:
+            self.end(self.open[-1][0])
+        self.total = time.perf_counter() - self.started
+
+    def query_stats(self):
+        exact = Counter((sql, params) for sql, params, _, _ in self.queries)
+        by_sql = Counter(sql for sql, _, _, _ in self.queries)
+        return {
+            'count': len(self.queries),
+            'time': sum(duration for _, _, duration, _ in self.queries),
+            'duplicated': sum(count - 1 for count in exact.values()),
+            'similar': sum(count - 1 for count in by_sql.values()),
+        }
+
+    def server_timing(self):
+        stats = self.query_stats()
+        by_phase = {}
+        for _, _, duration, phase in self.queries:
+            count, total = by_phase.get(phase, (0, 0.0))
+            by_phase[phase] = (count + 1, total + duration)
+
+        metrics = [f'total;dur={self.total * 1000:.2f}']
+        for name, seconds in self.phases.items():
+            metric = f'{name};dur={seconds * 1000:.2f}'
+            if name in by_phase:
+                count, total = by_phase[name]
+                metric += f';desc="{count} queries / {total * 1000:.2f}ms"'
+            metrics.append(metric)
+        metrics.append(
+            f'db;dur={stats["time"] * 1000:.2f};desc="{stats["count"]} queries / '
+            f'{stats["duplicated"]} duplicated / {stats["similar"]} similar"'
+        )
+        return ', '.join(metrics)
+
+    def as_dict(self, top=20):
+        grouped = {}
+        for sql, _, duration, phase in self.queries:
+            entry = grouped.setdefault(sql, {'sql': sql, 'count': 0, 'ms': 0.0, 'phases': set()})
+            entry['count'] += 1
+            entry['ms'] += duration * 1000
+            entry['phases'].add(phase or '-')
+        queries = sorted(grouped.values(), key=lambda entry: entry['ms'], reverse=True)[:top]
+        stats = self.query_stats()
+        return {
+            'total_ms': round(self.total * 1000, 3),
+            'phases_ms': {name: round(seconds * 1000, 3) for name, seconds in self.phases.items()},
+            'db': {**stats, 'time': round(stats['time'] * 1000, 3)},
+            'queries': [
+                {**entry, 'ms': round(entry['ms'], 3), 'phases': sorted(entry['phases'])} for entry in queries
+            ],
+        }
+
+
+def current_profile():
+    return _current.get()
+
+
+@contextmanager
+def timer(name):
+    """Mede o bloco como a fase ``name`` do perfil ativo (sem perfil não faz nada)."""
+    profile = _current.get()
+    if profile is None or profile.is_open(name):
+        # Chamadas aninhadas da mesma fase contam uma vez só
+        yield
+        return
+    profile.begin(name)
+    try:
+        yield
+    finally:
+        profile.end(name)
+
+
+def record_query(execute, sql, params, many, context):
+    profile = _current.get()
+    if profile is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        profile.record_query(sql, params, time.perf_counter() - started)
+
+
+def install_query_recorder(connection):
+    # No início da lista: connection.execute_wrapper() remove o último da lista ao sair
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.insert(0, record_query)
+
+
+def _on_connection_created(sender, connection, **kwargs):
+    install_query_recorder(connection)
+
+
+connection_created.connect(_on_connection_created, dispatch_uid='fitai_backend.profiling')
+
+
+def _is_staff(request, evaluate_lazy=True):
+    user = getattr(request, 'user', None)
+    if isinstance(user, SimpleLazyObject) and user._wrapped is empty and not evaluate_lazy:
+        # Usuário da sessão ainda não carregado: carregar exigiria query síncrona
+        return False
+    return bool(user is not None and getattr(user, 'is_staff', False))
+
+
+class ProfilingMiddleware:
+    """
+    Mede a requisição quando ``HEADER`` está presente, ``ALWAYS`` está ligado
+    ou a requisição é sorteada para amostragem. Funciona em WSGI e ASGI; a
+    amostragem com cProfile só nas requisições síncronas.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+            # Hooks assíncronos: os síncronos seriam executados em outra thread
+            self.process_view = self.aprocess_view
+            self.process_template_response = self.aprocess_template_response
+
+    def start(self, request):
+        config = get_profiling_settings()
+        header = config['HEADER'] and request.headers.get(config['HEADER'], '').lower() in ('1', 'true', 'yes')
+        sampled = not self.async_mode and config['SAMPLE_RATE'] > 0 and random.random() < config['SAMPLE_RATE']
+        if not (header or sampled or config['ALWAYS']):
+            return None, None, None
+        if not self.async_mode:
+            # Conexões abertas antes do middleware não passaram pelo connection_created
+            for connection in connections.all(initialized_only=True):
+                install_query_recorder(connection)
+        return RequestProfile(), config, sampled
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        profile, config, sampled = self.start(request)
+        if profile is None:
+            return self.get_response(request)
+
+        profiler = cProfile.Profile() if sampled else None
+        token = _current.set(profile)
+        try:
+            if profiler is not None:
+                try:
+                    profiler.enable()
+                except ValueError:
+                    # Outro profiler já ativo no processo
+                    profiler = None
+            response = self.get_response(request)
+        finally:
+            if profiler is not None:
+                profiler.disable()
+            _current.reset(token)
+        profile.finish()
+        if profiler is not None:
+            self.save_sample(request, response, profile, profiler, config)
+        return self.emit(request, response, profile, config, evaluate_lazy=True)
+
+    async def __acall__(self, request):
+        profile, config, _ = self.start(request)
+        if profile is None:
+            return await self.get_response(request)
+        token = _current.set(profile)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current.reset(token)
+        profile.finish()
+        return self.emit(request, response, profile, config, evaluate_lazy=False)
+
+    def emit(self, request, response, profile, config, evaluate_lazy):
+        if config['ALWAYS'] or not config['STAFF_ONLY'] or _is_staff(request, evaluate_lazy):
+            response['Server-Timing'] = profile.server_timing()
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        self.view_started()
+
+    def process_template_response(self, request, response):
+        return self.view_finished(response)
+
+    async def aprocess_view(self, request, view_func, view_args, view_kwargs):
+        self.view_started()
+
+    async def aprocess_template_response(self, request, response):
+        return self.view_finished(response)
+
+    def view_started(self):
+        profile = _current.get()
+        if profile is not None:
+            profile.begin('view')
+
+    def view_finished(self, response):
+        """Antes do render da TemplateResponse: fecha ``view`` e abre ``render``."""
+        profile = _current.get()
+        if profile is not None:
+            profile.end('view')
+            profile.begin('render')
+            # O callback não pode devolver nada: o retorno substituiria a resposta
+            response.add_post_render_callback(lambda rendered: profile.end('render'))
+        return response
+
+    def save_sample(self, request, response, profile, profiler, config):
+        directory = config['SAMPLE_DIR']
+        try:
+            os.makedirs(directory, exist_ok=True)
+            if sum(1 for entry in os.scandir(directory) if entry.name.endswith('.prof')) >= config['MAX_SAMPLES']:
+                return
+            slug = re.sub(r'[^a-zA-Z0-9]+', '-', request.path).strip('-')[:80] or 'root'
+            name = (f'{timezone.now():%Y%m%dT%H%M%S%f}-{request.method}-{slug}-'
+                    f'{profile.total * 1000:.0f}ms')
+            base = os.path.join(directory, name)
+            profiler.dump_stats(f'{base}.prof')
+            with open(f'{base}.json', 'w') as output:
+                json.dump({
+                    'method': request.method,
+                    'path': request.get_full_path(),
+                    'status': response.status_code,
+                    'user_id': getattr(getattr(request, 'user', None), 'pk', None),
+                    **profile.as_dict(config['TOP_QUERIES']),
+                }, output, indent=2)
+        except OSError:
+            logger.exception('Não foi possível gravar a amostra de perfil em %s', directory)
@@ -0,0 +1,45 @@
+"""
+JSONRenderer com orjson, quando instalado, produzindo os mesmos bytes do
+JSONRenderer do DRF (UNICODE_JSON e COMPACT_JSON padrão).
+
+Tipos que o orjson formata de outro jeito (datetime, Decimal, lazy strings...)
+passam pelo ``default`` do encoder do DRF. O orjson escreve floats muito
+pequenos ou muito grandes sem a notação exponencial do Python (``0.00001`` em
+vez de ``1e-05``); quando a saída pode conter um desses números, e também com
+indentação, a renderização volta para o ``json`` da biblioteca padrão.
+"""
+import re
+
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson é opcional
+    orjson = None
+
+# Números que o json do Python escreveria em notação exponencial
+EXPONENT_RE = re.compile(rb'[:,\[]-?(?:0\.0000|[0-9.]+e)')
+
+
+class FastJSONRenderer(JSONRenderer):
+    _encoder = JSONEncoder()
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if (orjson is None or data is None or self.ensure_ascii or not self.compact
+                or self.get_indent(accepted_media_type, renderer_context or {}) is not None):
+            return super().render(data, accepted_media_type, renderer_context)
+
+        try:
+            ret = orjson.dumps(
+                data, default=self._encoder.default,
+                option=orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME,
+            )
+        except orjson.JSONEncodeError:
+            # Ex.: inteiros acima de 64 bits
+            return super().render(data, accepted_media_type, renderer_context)
+        if EXPONENT_RE.search(ret):
+            return super().render(data, accepted_media_type, renderer_context)
+        if b'\xe2\x80\xa8' in ret or b'\xe2\x80\xa9' in ret:
+            ret = ret.replace('\u2028'.encode(), b'\\u2028').replace('\u2029'.encode(), b'\\u2029')
+        return ret
@@ -0,0 +1,174 @@
+"""
+Leituras em réplicas com read-your-writes.
+
+``ReplicaReadMixin`` (viewsets de catálogo e histórico) escolhe uma réplica
+para as requisições GET/HEAD/OPTIONS depois da autenticação, e
+``ReplicaRouter`` manda as leituras da requisição para ela. Ficam no primário:
+
+- todas as escritas e as leituras que vierem depois de uma escrita na mesma
+  requisição (ex.: ``today`` materializando agendas);
+- as leituras de um usuário por ``STICKY_SECONDS`` depois de uma requisição
+  de escrita bem-sucedida dele (``ReadYourWritesMiddleware`` marca o usuário
+  no cache ``CACHE_ALIAS``), para que ele veja o que acabou de gravar mesmo
+  com atraso de replicação. A marca precisa valer em todos os processos:
+  com réplicas, um cache local (LocMem, o padrão sem ``CACHES``) é
+  ImproperlyConfigured;
+- tudo, quando não há réplicas.
+
+Configuração em ``settings.DATABASE_ROUTING``; sem ``REPLICAS`` explícitas,
+os aliases de DATABASES que começam com ``replica`` (ver
+``fitai_backend.database``).
+"""
+import random
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.exceptions import ImproperlyConfigured
+from django.db import DEFAULT_DB_ALIAS
+from django.utils.functional import SimpleLazyObject, empty
+from rest_framework.permissions import SAFE_METHODS
+
+DEFAULTS = {
+    'REPLICAS': None,
+    'STICKY_SECONDS': 10,
+    'CACHE_ALIAS': 'default',
+}
+
+# {'alias': réplica da requisição, 'written': houve escrita} (dict para o router alterar)
+_reads = ContextVar('replica_reads', default=None)
+
+
+def get_routing_settings():
+    config = {**DEFAULTS, **getattr(settings, 'DATABASE_ROUTING', {})}
+    if config['REPLICAS'] is None:
+        config['REPLICAS'] = [alias for alias in settings.DATABASES if alias.startswith('replica')]
+    return config
+
+
+def _pin_key(user_id):
+    return f'db:primary:{user_id}'
+
+
+def pin_cache(config):
+    """Cache das marcas de read-your-writes; recusa caches que não são vistos pelos outros processos."""
+    cache = caches[config['CACHE_ALIAS']]
+    if config['REPLICAS'] and isinstance(cache, (LocMemCache, DummyCache)):
+        raise ImproperlyConfigured(
+            f"DATABASE_ROUTING['CACHE_ALIAS'] ({config['CACHE_ALIAS']!r}) precisa ser um cache compartilhado "
+            f"entre processos quando há réplicas; {type(cache).__name__} vale só para este processo"
+        )
+    return cache
+
+
+def pin_to_primary(user, config=None):
+    config = config or get_routing_settings()
+    pin_cache(config).set(_pin_key(user.pk), True, config['STICKY_SECONDS'])
+
+
+def is_pinned(user, config=None):
+    config = config or get_routing_settings()
+    return bool(user.pk) and pin_cache(config).get(_pin_key(user.pk), False)
+
+
+def start_replica_reads(user):
+    """Passa as leituras seguintes do contexto para uma réplica; token para ``end_replica_reads`` ou None."""
+    config = get_routing_settings()
+    if not config['REPLICAS'] or (user.is_authenticated and is_pinned(user, config)):
+        return None
+    return _reads.set({'alias': random.choice(config['REPLICAS']), 'written': False})
+
+
+def end_replica_reads(token):
+    if token is not None:
+        _reads.reset(token)
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        state = _reads.get()
+        if state is None or state['written']:
+            return None
+        return state['alias']
+
+    def db_for_write(self, model, **hints):
+        state = _reads.get()
+        if state is not None:
+            state['written'] = True
+        # Também para objetos lidos de uma réplica (o padrão seria gravar onde foram lidos)
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        aliases = {DEFAULT_DB_ALIAS, *get_routing_settings()['REPLICAS']}
+        if obj1._state.db in aliases and obj2._state.db in aliases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        if db in get_routing_settings()['REPLICAS']:
+            return False
+        return None
+
+
+class ReplicaReadMixin:
+    """Viewset cujas leituras (métodos seguros) podem vir de uma réplica."""
+
+    def initial(self, request, *args, **kwargs):
+        # Autenticação, permissões e throttles antes: leem do primário
+        super().initial(request, *args, **kwargs)
+        if request.method in SAFE_METHODS:
+            self._replica_token = start_replica_reads(request.user)
+
+    def dispatch(self, request, *args, **kwargs):
+        self._replica_token = None
+        try:
+            return super().dispatch(request, *args, **kwargs)
+        finally:
+            end_replica_reads(self._replica_token)
+
+
+def _authenticated_user(request, evaluate_lazy=True):
+    user = getattr(request, 'user', None)
+    if isinstance(user, SimpleLazyObject) and user._wrapped is empty and not evaluate_lazy:
+        return None
+    return user if user is not None and user.is_authenticated else None
+
+
+class ReadYourWritesMiddleware:
+    """Depois de uma escrita bem-sucedida, as leituras do usuário ficam no primário por STICKY_SECONDS."""
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+        # Na inicialização: um cache local com réplicas falha aqui, não na primeira escrita
+        pin_cache(get_routing_settings())
+
+    def should_pin(self, request, response, config):
+        return config['REPLICAS'] and request.method not in SAFE_METHODS and response.status_code < 400
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        response = self.get_response(request)
+        config = get_routing_settings()
+        if self.should_pin(request, response, config):
+            user = _authenticated_user(request)
+            if user is not None:
+                pin_to_primary(user, config)
+        return response
+
+    async def __acall__(self, request):
+        response = await self.get_response(request)
+        config = get_routing_settings()
+        if self.should_pin(request, response, config):
+            user = _authenticated_user(request, evaluate_lazy=False)
+            if user is not None:
+                await pin_cache(config).aset(_pin_key(user.pk), True, config['STICKY_SECONDS'])
+        return response
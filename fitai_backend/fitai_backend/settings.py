@@ -1,6 +1,9 @@
 import os
+from importlib.util import find_spec
 from pathlib import Path
 
+from fitai_backend.database import database_settings
+
 BASE_DIR = Path(__file__).resolve().parent.parent
 
 SECRET_KEY = 'django-insecure-your-secret-key-here'
@@ -34,6 +37,8 @@ LOCAL_APPS = [
 INSTALLED_APPS = DJANGO_APPS + THIRD_PARTY_APPS + LOCAL_APPS
 
 MIDDLEWARE = [
+    # Primeiro, para o tempo total cobrir os demais middlewares
+    'fitai_backend.profiling.ProfilingMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -42,6 +47,7 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',  # CORREÇÃO AQUI
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'fitai_backend.replicas.ReadYourWritesMiddleware',
 ]
 
 ROOT_URLCONF = 'fitai_backend.urls'
@@ -65,23 +71,106 @@ TEMPLATES = [
 WSGI_APPLICATION = 'fitai_backend.wsgi.application'
 
 # Database
-DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
-    }
+# DATABASE_URL, DATABASE_REPLICA_URLS e DATABASE_CONN_MAX_AGE (fitai_backend.database);
+# no SQLite, WAL e demais PRAGMAs em cada conexão
+DATABASES = database_settings(BASE_DIR)
+# Leituras de catálogo e histórico nas réplicas, com read-your-writes (fitai_backend.replicas)
+DATABASE_ROUTERS = ['fitai_backend.replicas.ReplicaRouter']
+DATABASE_ROUTING = {
+    # Segundos em que as leituras de quem acabou de escrever ficam no primário
+    'STICKY_SECONDS': 10,
+    # Com réplicas, precisa ser um cache compartilhado (Redis/Memcached), não o LocMem padrão
+    'CACHE_ALIAS': 'default',
 }
 
 # REST Framework
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework.authentication.TokenAuthentication',
+        'accounts.authentication.CachedTokenAuthentication',
     ],
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
     ],
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
-    'PAGE_SIZE': 20
+    'PAGE_SIZE': 20,
+    # Tentativas de login por IP e por username, e registros por IP (accounts.throttling)
+    'DEFAULT_THROTTLE_RATES': {
+        'login': '30/min',
+        'login_username': '10/min',
+        'register': '20/hour',
+    },
+}
+# Cache dos contadores de tentativas; use um DatabaseCache para compartilhar entre processos
+ACCOUNTS_THROTTLE_CACHE = 'default'
+
+# Hash de senhas: o primeiro da lista é o preferido e hashes antigos são refeitos no login.
+# Argon2 (argon2-cffi) quando disponível; PASSWORD_HASHER=pbkdf2 força o PBKDF2
+ACCOUNTS_PASSWORD_HASHING = {
+    'ALGORITHM': os.environ.get('PASSWORD_HASHER', 'argon2'),
+    'PBKDF2_ITERATIONS': None,
+    'ARGON2_TIME_COST': 2,
+    'ARGON2_MEMORY_COST': 19456,
+    'ARGON2_PARALLELISM': 1,
+}
+PASSWORD_HASHERS = [
+    'accounts.hashers.TunedArgon2PasswordHasher',
+    'accounts.hashers.TunedPBKDF2PasswordHasher',
+    'django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher',
+    'django.contrib.auth.hashers.ScryptPasswordHasher',
+]
+if ACCOUNTS_PASSWORD_HASHING['ALGORITHM'] != 'argon2' or find_spec('argon2') is None:
+    PASSWORD_HASHERS.insert(0, PASSWORD_HASHERS.pop(1))
+
+# Autenticação: cache token -> usuário (LRU com TTL) e modo opcional de token assinado
+# (a revogação fica em User.token_version; sem consulta ao banco só se CACHE_ALIAS for compartilhado)
+ACCOUNTS_TOKEN_AUTH = {
+    'MAX_ENTRIES': 10000,
+    'TTL': 300,
+    'STATELESS': os.environ.get('ACCOUNTS_STATELESS_TOKENS', 'false').lower() == 'true',
+    'MAX_AGE': 60 * 60 * 24 * 30,
+    'CACHE_ALIAS': 'default',
+}
+
+# AI Engine
+# Quando True, generate_workout enfileira um job processado por `manage.py run_ai_worker`
+AI_ENGINE_ASYNC = os.environ.get('AI_ENGINE_ASYNC', 'false').lower() == 'true'
+AI_ENGINE_BATCH_WORKERS = int(os.environ.get('AI_ENGINE_BATCH_WORKERS', '1'))
+# Cache de recomendações: LRU em memória + alias opcional de CACHES compartilhado
+AI_ENGINE_CACHE = {
+    'MAX_ENTRIES': 1024,
+    'CACHE_ALIAS': None,
+    'TIMEOUT': 60 * 60 * 24,
+}
+
+# Tempo máximo (s) das respostas do catálogo em cache; edições invalidam pela versão
+CATALOG_CACHE_TIMEOUT = 60 * 60 * 24
+# Segundos em que a versão do catálogo lida do banco fica no cache (304 sem query)
+CATALOG_VERSION_TTL = 5
+# Agendas recorrentes: dias à frente com UserWorkout gerados (workouts.scheduling)
+WORKOUT_SCHEDULING = {
+    'WINDOW_DAYS': 28,
+    'REFRESH_DAYS': 7,
+    'HORIZON_DAYS': 93,
+}
+# Listagens de exercícios e templates montadas de values() (fitai_backend.fast_serialization)
+FAST_SERIALIZATION = True
+# Perfil por requisição (fitai_backend.profiling): cabeçalho "X-Profile: 1" de usuários staff
+# devolve Server-Timing; SAMPLE_RATE grava cProfile de uma fração das requisições em SAMPLE_DIR
+REQUEST_PROFILING = {
+    'HEADER': 'X-Profile',
+    'STAFF_ONLY': True,
+    'SAMPLE_RATE': float(os.environ.get('REQUEST_PROFILING_SAMPLE_RATE', '0')),
+    'SAMPLE_DIR': BASE_DIR / 'profiles',
+}
+# Orçamentos do benchmark de ponta a ponta (manage.py benchmark_api, fitai_backend.benchmark)
+PERFORMANCE_BUDGETS = {
+    'DEFAULT': {'p95_ms': 250, 'p99_ms': 500, 'queries': 6, 'alloc_peak_kb': 4096},
+    'SCENARIOS': {
+        # Dominado pela verificação da senha (custo do hasher, ver ACCOUNTS_PASSWORD_HASHING)
+        'auth-login': {'p95_ms': 1500, 'p99_ms': 2000},
+    },
+    'CONCURRENT': {'p99_ms': 2000, 'error_rate': 0.0},
+    'MAX_REGRESSION': 0.25,
 }
 
 # CORS Settings
@@ -102,6 +191,12 @@ USE_TZ = True
 STATIC_URL = 'static/'
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
+# Variantes responsivas de Exercise.image e User.profile_picture (fitai_backend/images.py)
+IMAGE_VARIANTS = {
+    'WIDTHS': (160, 320, 640, 1080),
+    'FORMATS': ('webp', 'jpeg'),
+    'WORKERS': int(os.environ.get('IMAGE_VARIANTS_WORKERS', '2')),
+}
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
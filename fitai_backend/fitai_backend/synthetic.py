@@ -0,0 +1,301 @@
+"""
+Gerador de dados sintéticos em escala de produção (``manage.py populate_data
+--users ...``).
+
+Os dados são determinísticos para a mesma ``seed`` e seguem distribuições
+plausíveis: cada cliente tem frequência semanal, horário preferido, taxa de
+adesão e um pequeno rodízio de templates; o histórico de treinos anda para
+trás a partir de hoje com concluídos, pulados e agendados perdidos, mais a
+próxima semana agendada.
+
+Cada etapa consome geradores em blocos de ``chunk_size`` (um bloco por
+transação), então a memória não cresce com o volume de treinos: só os ids
+de usuários, exercícios e templates ficam em memória. Usuários, exercícios e
+templates usam ``bulk_create`` (os ids voltam do banco); as tabelas grandes
+(UserWorkout e a tabela M2M de grupos musculares) usam
+``fitai_backend.bulk.insert_rows``. Sinais não rodam: índice de busca,
+versão do catálogo, rankings e estatísticas são recalculados no fim.
+"""
+import random
+import time
+from datetime import datetime, timedelta
+from itertools import islice
+
+from django.contrib.auth.hashers import make_password
+from django.db import router, transaction
+from django.utils import timezone
+
+from accounts.models import User
+from ai_engine.models import UserProfile
+from exercises.models import Exercise, MuscleGroup
+from workouts.models import WorkoutTemplate, WorkoutExercise, UserWorkout
+from .bulk import adapt_datetime, insert_rows
+
+MUSCLE_GROUPS = [
+    ('Peito', 'Músculos peitorais'),
+    ('Costas', 'Músculos das costas'),
+    ('Pernas', 'Quadríceps e posteriores'),
+    ('Glúteos', 'Glúteo máximo e médio'),
+    ('Panturrilhas', 'Gastrocnêmio e sóleo'),
+    ('Ombros', 'Deltoides'),
+    ('Bíceps', 'Flexores do cotovelo'),
+    ('Tríceps', 'Extensores do cotovelo'),
+    ('Antebraços', 'Flexores e extensores do punho'),
+    ('Core', 'Músculos do core'),
+    ('Trapézio', 'Trapézio superior e médio'),
+    ('Lombar', 'Eretores da espinha'),
+]
+
+# Movimento -> grupos musculares trabalhados
+MOVEMENTS = [
+    ('Supino', ['Peito', 'Tríceps', 'Ombros']),
+    ('Crucifixo', ['Peito']),
+    ('Remada', ['Costas', 'Bíceps']),
+    ('Puxada', ['Costas', 'Bíceps']),
+    ('Agachamento', ['Pernas', 'Glúteos']),
+    ('Afundo', ['Pernas', 'Glúteos']),
+    ('Levantamento Terra', ['Costas', 'Pernas', 'Lombar']),
+    ('Elevação Pélvica', ['Glúteos']),
+    ('Panturrilha em Pé', ['Panturrilhas']),
+    ('Desenvolvimento', ['Ombros', 'Tríceps']),
+    ('Elevação Lateral', ['Ombros']),
+    ('Rosca', ['Bíceps', 'Antebraços']),
+    ('Tríceps Testa', ['Tríceps']),
+    ('Encolhimento', ['Trapézio']),
+    ('Prancha', ['Core']),
+    ('Abdominal', ['Core']),
+    ('Extensão Lombar', ['Lombar']),
+]
+VARIATIONS = ['', 'Inclinado', 'Declinado', 'Unilateral', 'com Pausa', 'Explosivo', 'Sumô', 'Fechado',
+              'Aberto', 'Isométrico']
+
+FIRST_NAMES = ['Ana', 'Bruno', 'Carla', 'Diego', 'Eduarda', 'Felipe', 'Gabriela', 'Henrique', 'Isabela',
+               'João', 'Larissa', 'Marcos', 'Natália', 'Otávio', 'Paula', 'Rafael', 'Sofia', 'Thiago',
+               'Vanessa', 'William']
+LAST_NAMES = ['Silva', 'Santos', 'Oliveira', 'Souza', 'Rodrigues', 'Ferreira', 'Alves', 'Pereira', 'Lima',
+              'Gomes', 'Costa', 'Ribeiro', 'Martins', 'Carvalho', 'Almeida', 'Lopes']
+
+PASSWORD = '123456789'
+
+
+def chunked(iterable, size):
+    iterator = iter(iterable)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+class SyntheticDataset:
+    """
+    ``SyntheticDataset(users=..., exercises=..., workouts_per_user=...,
+    seed=42).generate()`` grava o conjunto e retorna as contagens por tabela.
+    Usernames começam com ``prefix``.
+    """
+
+    def __init__(self, users, exercises, workouts_per_user, trainers=None, templates=None,
+                 seed=42, prefix='sim', chunk_size=5000, log=None):
+        self.n_users = users
+        self.n_exercises = exercises
+        self.workouts_per_user = workouts_per_user
+        self.n_trainers = trainers if trainers is not None else max(1, users // 100)
+        self.n_templates = templates if templates is not None else max(10, users // 50)
+        self.seed = seed
+        self.prefix = prefix
+        self.chunk_size = chunk_size
+        self.log = log or (lambda message: None)
+        self.counts = {}
+
+    def rng(self, stage):
+        # Um gerador por etapa: mudar o volume de uma etapa não altera as outras
+        return random.Random(f'{self.seed}:{stage}')
+
+    def generate(self):
+        self.today = timezone.localdate()
+        self.muscle_groups = self.create_muscle_groups()
+        self.exercises = self.create_exercises() if self.n_exercises else list(
+            Exercise.objects.values_list('id', 'difficulty')
+        )
+        password = make_password(PASSWORD)
+        self.trainers = self.create_users('trainer', self.n_trainers, password)
+        self.clients = self.create_users('client', self.n_users, password)
+        self.create_profiles()
+        self.templates = self.create_templates()
+        self.create_workouts()
+        return self.counts
+
+    def _timed(self, label, total):
+        self.counts[label] = total
+        self.log(f'{label}: {total} em {time.perf_counter() - self._started:.1f}s')
+
+    def create_muscle_groups(self):
+        MuscleGroup.objects.bulk_create(
+            [MuscleGroup(name=name, description=description) for name, description in MUSCLE_GROUPS],
+            ignore_conflicts=True,
+        )
+        return dict(MuscleGroup.objects.filter(name__in=[name for name, _ in MUSCLE_GROUPS]).values_list('name', 'id'))
+
+    def create_exercises(self):
+        self._started = time.perf_counter()
+        rng = self.rng('exercises')
+        difficulties = [value for value, _ in Exercise.DIFFICULTY_CHOICES]
+        equipment = [value for value, _ in Exercise.EQUIPMENT_CHOICES]
+
+        def build():
+            for i in range(self.n_exercises):
+                movement, groups = MOVEMENTS[i % len(MOVEMENTS)]
+                variation = rng.choice(VARIATIONS)
+                tool = rng.choice(equipment)
+                name = ' '.join(part for part in (movement, variation, f'#{i + 1}') if part)
+                yield Exercise(
+                    name=name[:100],
+                    description=f'{movement} {variation}'.strip() + f' ({dict(Exercise.EQUIPMENT_CHOICES)[tool]})',
+                    equipment=tool,
+                    difficulty=rng.choices(difficulties, weights=[4, 4, 2, 1])[0],
+                    instructions='Mantenha a postura e controle a fase excêntrica',
+                    is_neural_training=rng.random() < 0.1,
+                ), groups
+
+        Through = Exercise.muscle_groups.through
+        created = []
+        links = 0
+        for chunk in chunked(build(), self.chunk_size):
+            with transaction.atomic():
+                objs = Exercise.objects.bulk_create([exercise for exercise, _ in chunk])
+                links += insert_rows(Through, ('exercise_id', 'musclegroup_id'), (
+                    (exercise.id, self.muscle_groups[group])
+                    for exercise, (_, groups) in zip(objs, chunk) for group in groups
+                ), batch_size=self.chunk_size)
+            created += [(exercise.id, exercise.difficulty) for exercise in objs]
+        self._timed('exercises', len(created))
+        self.counts['exercise_muscle_groups'] = links
+        return created
+
+    def create_users(self, role, count, password):
+        self._started = time.perf_counter()
+        rng = self.rng(role)
+
+        def build():
+            for i in range(count):
+                first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+                yield User(
+                    username=f'{self.prefix}_{role}_{i}', password=password, role=role,
+                    first_name=first, last_name=last, email=f'{self.prefix}.{role}.{i}@example.com',
+                    height=round(rng.gauss(1.70, 0.09), 2), weight=round(rng.gauss(74, 12), 1),
+                    is_active=True,
+                )
+
+        ids = []
+        for chunk in chunked(build(), self.chunk_size):
+            with transaction.atomic():
+                ids += [user.id for user in User.objects.bulk_create(chunk)]
+        self._timed(f'{role}s', len(ids))
+        return ids
+
+    def create_profiles(self):
+        self._started = time.perf_counter()
+        rng = self.rng('profiles')
+        goals = [value for value, _ in UserProfile.GOAL_CHOICES]
+        levels = [value for value, _ in UserProfile.EXPERIENCE_CHOICES]
+        equipment = [value for value, _ in Exercise.EQUIPMENT_CHOICES]
+        # Atributos usados na geração do histórico: (frequência, hora, adesão)
+        self.habits = {}
+
+        def build():
+            for user_id in self.clients:
+                frequency = rng.choices([2, 3, 4, 5, 6], weights=[2, 4, 3, 2, 1])[0]
+                self.habits[user_id] = (frequency, rng.choice([6, 7, 8, 12, 18, 19, 20]), rng.uniform(0.45, 0.95))
+                yield UserProfile(
+                    user_id=user_id, primary_goal=rng.choice(goals),
+                    experience_level=rng.choices(levels, weights=[4, 3, 2, 1])[0],
+                    training_frequency=frequency,
+                    available_equipment=rng.sample(equipment, rng.randint(1, 4)),
+                )
+
+        total = 0
+        for chunk in chunked(build(), self.chunk_size):
+            with transaction.atomic():
+                total += len(UserProfile.objects.bulk_create(chunk))
+        self._timed('profiles', total)
+
+    def create_templates(self):
+        self._started = time.perf_counter()
+        rng = self.rng('templates')
+        goals = [value for value, _ in WorkoutTemplate.GOAL_CHOICES]
+        difficulties = ['beginner', 'intermediate', 'advanced']
+        exercise_ids = [exercise_id for exercise_id, _ in self.exercises]
+
+        def build():
+            for i in range(self.n_templates):
+                goal = rng.choice(goals)
+                yield WorkoutTemplate(
+                    name=f'{dict(WorkoutTemplate.GOAL_CHOICES)[goal]} {chr(65 + i % 5)} #{i + 1}',
+                    description='Template gerado para testes de carga', goal=goal,
+                    difficulty=rng.choice(difficulties), estimated_duration=rng.choice([30, 45, 60, 75]),
+                    trainer_id=self.trainers[i % len(self.trainers)], is_ai_generated=rng.random() < 0.2,
+                )
+
+        created = []
+        exercises = 0
+        for chunk in chunked(build(), self.chunk_size):
+            with transaction.atomic():
+                templates = WorkoutTemplate.objects.bulk_create(chunk)
+                rows = [
+                    WorkoutExercise(
+                        workout_template_id=template.id, exercise_id=exercise_id, sets=rng.choice([3, 4, 5]),
+                        reps=rng.choice(['6', '8-12', '10', '12-15', '30 segundos']),
+                        rest_time=rng.choice([45, 60, 90, 120, 180]), order=order,
+                    )
+                    for template in templates
+                    for order, exercise_id in enumerate(
+                        rng.sample(exercise_ids, min(len(exercise_ids), rng.randint(4, 8)))
+                    )
+                ]
+                exercises += len(WorkoutExercise.objects.bulk_create(rows, batch_size=self.chunk_size))
+            created += [(template.id, template.estimated_duration) for template in templates]
+        self._timed('templates', len(created))
+        self.counts['template_exercises'] = exercises
+        return created
+
+    def iter_workouts(self, adapt):
+        """Linhas de UserWorkout de cada cliente, do mais antigo para a próxima semana."""
+        rng = self.rng('workouts')
+        tz = timezone.get_current_timezone()
+        updated_at = adapt(timezone.now())
+        now = timezone.now()
+        for user_id in self.clients:
+            frequency, hour, adherence = self.habits[user_id]
+            rotation = rng.sample(self.templates, min(len(self.templates), rng.randint(2, 4)))
+            gap = 7 / frequency
+            # Uma semana à frente agendada; o resto é histórico
+            upcoming = min(frequency, self.workouts_per_user)
+            for n in range(self.workouts_per_user):
+                offset = round((upcoming - n) * gap)
+                day = self.today + timedelta(days=offset)
+                template_id, duration = rotation[n % len(rotation)]
+                scheduled = datetime.combine(day, datetime.min.time(), tzinfo=tz).replace(hour=hour)
+                started = completed = None
+                if scheduled > now:
+                    status = 'scheduled'
+                else:
+                    roll = rng.random()
+                    status = 'completed' if roll < adherence else 'skipped' if roll < adherence + 0.1 else 'scheduled'
+                    if status == 'completed':
+                        started = scheduled + timedelta(minutes=5 * rng.randint(0, 6))
+                        completed = started + timedelta(minutes=duration + 5 * rng.randint(-2, 3))
+                yield (user_id, template_id, adapt(scheduled), adapt(started), adapt(completed),
+                       status, '', updated_at)
+
+    def create_workouts(self):
+        self._started = time.perf_counter()
+        using = router.db_for_write(UserWorkout)
+        columns = ('user_id', 'workout_template_id', 'scheduled_date', 'started_at', 'completed_at',
+                   'status', 'notes', 'updated_at')
+        total = 0
+        rows = self.iter_workouts(adapt_datetime(using))
+        # Transações de ``chunk_size`` * 20 linhas: poucas confirmações sem segurar tudo em memória
+        for chunk in chunked(rows, self.chunk_size * 20):
+            with transaction.atomic(using=using):
+                total += insert_rows(UserWorkout, columns, chunk, batch_size=self.chunk_size, using=using)
+        self._timed('user_workouts', total)
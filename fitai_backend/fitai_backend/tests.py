@@ -0,0 +1,686 @@
+import io
+import json
+import os
+import pstats
+import random
+import tempfile
+from datetime import timedelta
+from pathlib import Path
+
+from django.core.cache import cache, caches
+from django.core.exceptions import ImproperlyConfigured
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import connection
+from django.db.utils import ConnectionDoesNotExist
+from django.test import RequestFactory, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import get_resolver
+from django.utils import timezone
+from rest_framework.authtoken.models import Token
+from rest_framework.renderers import JSONRenderer
+from PIL import Image
+from rest_framework.test import APIClient
+
+from accounts.authentication import token_cache
+from accounts.models import User
+from ai_engine.models import UserProfile, AIWorkoutRecommendation, AIGenerationJob
+from exercises.models import Exercise, MuscleGroup
+from exercises.search import rebuild_index
+from exercises.serializers import ExerciseListSerializer
+from workouts.models import WorkoutTemplate, WorkoutExercise, UserWorkout
+from workouts.rankings import rebuild_rankings
+from .benchmark import build_scenarios, check_budgets, get_budget_settings, run_scenarios
+from .database import database_settings
+from .explain import find_full_scans
+from .images import IMMUTABLE, serve_media
+from .profiling import RequestProfile, timer
+from .renderers import FastJSONRenderer
+from .replicas import (
+    ReadYourWritesMiddleware, ReplicaRouter, end_replica_reads, is_pinned, pin_to_primary, start_replica_reads,
+)
+
+N_USERS = 200
+N_EXERCISES = 500
+N_TEMPLATES = 100
+WORKOUTS_PER_USER = 20
+RECOMMENDATIONS_PER_USER = 10
+
+
+def seed_dataset():
+    rng = random.Random(42)
+    now = timezone.now()
+
+    muscle_groups = MuscleGroup.objects.bulk_create(
+        [MuscleGroup(name=f'Grupo {i}') for i in range(12)]
+    )
+    exercises = Exercise.objects.bulk_create([
+        Exercise(
+            name=f'Exercício {i}',
+            description='Descrição do exercício',
+            equipment=rng.choice(Exercise.EQUIPMENT_CHOICES)[0],
+            difficulty=rng.choice(Exercise.DIFFICULTY_CHOICES)[0],
+            instructions='',
+            is_neural_training=i % 7 == 0,
+        )
+        for i in range(N_EXERCISES)
+    ])
+    Through = Exercise.muscle_groups.through
+    Through.objects.bulk_create([
+        Through(exercise_id=exercise.id, musclegroup_id=group.id)
+        for exercise in exercises
+        for group in rng.sample(muscle_groups, 2)
+    ])
+
+    trainers = User.objects.bulk_create([
+        User(username=f'trainer{i}', role='trainer') for i in range(10)
+    ])
+    clients = User.objects.bulk_create([
+        User(username=f'client{i}') for i in range(N_USERS)
+    ])
+    templates = WorkoutTemplate.objects.bulk_create([
+        WorkoutTemplate(
+            name=f'Template {i}', description='', goal=rng.choice(WorkoutTemplate.GOAL_CHOICES)[0],
+            difficulty='intermediate', estimated_duration=45, trainer=trainers[i % len(trainers)],
+        )
+        for i in range(N_TEMPLATES)
+    ])
+    WorkoutExercise.objects.bulk_create([
+        WorkoutExercise(
+            workout_template=template, exercise=exercise, sets=3, reps='10', rest_time=60, order=order,
+        )
+        for template in templates
+        for order, exercise in enumerate(rng.sample(exercises, 5))
+    ])
+    UserWorkout.objects.bulk_create([
+        UserWorkout(
+            user=client, workout_template=rng.choice(templates),
+            scheduled_date=now - timedelta(days=day),
+            status=rng.choice(UserWorkout.STATUS_CHOICES)[0],
+        )
+        for client in clients
+        for day in range(WORKOUTS_PER_USER)
+    ])
+    profiles = UserProfile.objects.bulk_create([
+        UserProfile(
+            user=client, primary_goal='strength', experience_level='beginner',
+            training_frequency=3, available_equipment=['barbell'],
+        )
+        for client in clients
+    ])
+    AIWorkoutRecommendation.objects.bulk_create([
+        AIWorkoutRecommendation(user_profile=profile, workout_data={}, confidence_score=0.9)
+        for profile in profiles
+        for _ in range(RECOMMENDATIONS_PER_USER)
+    ])
+    rebuild_rankings()
+    return {'trainers': trainers, 'clients': clients, 'templates': templates, 'exercises': exercises}
+
+
+def registered_basenames():
+    from ai_engine.urls import router as ai_router
+    from exercises.urls import router as exercises_router
+    from workouts.urls import router as workouts_router
+    get_resolver()  # garante que os routers foram importados
+    routers = [ai_router, exercises_router, workouts_router]
+    return {basename for router in routers for _, _, basename in router.registry}
+
+
+class QueryPlanTestCase(TestCase):
+    """
+    Nenhum endpoint registrado nos routers pode filtrar com varredura completa
+    de tabela sobre uma base de tamanho realista.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.data = seed_dataset()
+        client = cls.data['clients'][0]
+        cls.job = AIGenerationJob.objects.create(user_profile=client.userprofile)
+
+    def endpoints(self):
+        """(basename, usuário, url) de cada rota GET coberta por este teste."""
+        client = self.data['clients'][0]
+        trainer = self.data['trainers'][0]
+        exercise = self.data['exercises'][0]
+        template = self.data['templates'][0]
+        workout = UserWorkout.objects.filter(user=client).first()
+        group = MuscleGroup.objects.first()
+        return [
+            ('exercise', client, '/api/exercises/exercises/'),
+            ('exercise', client, '/api/exercises/exercises/?equipment=barbell&difficulty=beginner&is_neural_training=true'),
+            ('exercise', client, f'/api/exercises/exercises/?muscle_groups={group.id}'),
+            ('exercise', client, '/api/exercises/exercises/?search=exercicio'),
+            ('exercise', client, f'/api/exercises/exercises/{exercise.id}/'),
+            ('exercise', client, '/api/exercises/exercises/neural_training/'),
+            ('musclegroup', client, '/api/exercises/muscle-groups/'),
+            ('musclegroup', client, f'/api/exercises/muscle-groups/{group.id}/'),
+            ('workouttemplate', client, '/api/workouts/templates/?goal=strength'),
+            ('workouttemplate', trainer, '/api/workouts/templates/?goal=strength'),
+            ('workouttemplate', client, f'/api/workouts/templates/{template.id}/'),
+            ('workouttemplate', client, '/api/workouts/templates/popular/?goal=strength'),
+            ('workouttemplate', client, '/api/workouts/templates/recommended/'),
+            ('workouttemplate', trainer, '/api/workouts/templates/my_templates/'),
+            ('trainerdashboard', trainer, '/api/workouts/trainer-dashboard/'),
+            ('trainerdashboard', trainer, '/api/workouts/trainer-dashboard/?ordering=username'),
+            ('userworkout', client, '/api/workouts/user-workouts/'),
+            ('userworkout', client, '/api/workouts/user-workouts/?status=completed'),
+            ('userworkout', client, f'/api/workouts/user-workouts/{workout.id}/'),
+            ('userworkout', client, '/api/workouts/user-workouts/today/'),
+            ('userworkout', client, '/api/workouts/user-workouts/stats/'),
+            ('userworkout', client, '/api/workouts/user-workouts/calendar/'),
+            ('workoutschedule', client, '/api/workouts/schedules/'),
+            ('userworkout', client, f'/api/workouts/user-workouts/{workout.id}/sets/'),
+            ('userprofile', client, '/api/ai/profile/'),
+            ('aiengine', client, '/api/ai/engine/my_recommendations/'),
+            ('aiengine', client, f'/api/ai/engine/jobs/{self.job.id}/'),
+        ]
+
+    def test_all_registered_endpoints_are_covered(self):
+        covered = {basename for basename, _, _ in self.endpoints()}
+        self.assertEqual(registered_basenames() - covered, set())
+
+    def test_no_full_table_scans(self):
+        api = APIClient()
+        problems = []
+        for _, user, url in self.endpoints():
+            api.force_authenticate(user)
+            with CaptureQueriesContext(connection) as context:
+                response = api.get(url)
+            self.assertEqual(response.status_code, 200, url)
+            for sql, tables in find_full_scans(connection, context.captured_queries):
+                problems.append(f'{url}: {", ".join(tables)}\n    {sql}')
+        self.assertEqual(problems, [], '\n'.join(problems))
+
+
+# Cache visto por todos os processos (em produção, Redis/Memcached): versão dos
+# tokens e marcas de read-your-writes
+SHARED_CACHES = {
+    'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'},
+    'shared': {'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache', 'LOCATION': tempfile.mkdtemp()},
+}
+SHARED_TOKEN_AUTH = {'CACHE_ALIAS': 'shared'}
+
+
+class AsyncViewsTestCase(TestCase):
+    """As rotas de /api/async/ devolvem exatamente o JSON das rotas síncronas."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.data = seed_dataset()
+        cls.token = Token.objects.create(user=cls.data['clients'][0])
+
+    def setUp(self):
+        cache.clear()
+        self.api = APIClient()
+        self.api.credentials(HTTP_AUTHORIZATION='Token ' + self.token.key)
+
+    def assert_same_response(self, path):
+        async_response = self.api.get('/api/async' + path)
+        cache.clear()  # o catálogo não deve vir da resposta em cache da outra rota
+        sync_response = self.api.get('/api' + path)
+        self.assertEqual(async_response.status_code, sync_response.status_code, path)
+        # Links de paginação apontam para a própria rota
+        self.assertEqual(async_response.content.replace(b'/api/async/', b'/api/'), sync_response.content, path)
+        return async_response
+
+    def test_parity_with_sync_views(self):
+        group = MuscleGroup.objects.first()
+        paths = [
+            '/auth/profile/',
+            '/workouts/user-workouts/today/',
+            '/exercises/exercises/',
+            '/exercises/exercises/?page=3&difficulty=beginner',
+            f'/exercises/exercises/?muscle_groups={group.id}&facets=1',
+            '/exercises/exercises/?search=exercicio',
+            '/exercises/exercises/?page=999',
+            '/exercises/exercises/?difficulty=impossivel',
+            '/ai/engine/my_recommendations/?page_size=4',
+        ]
+        for path in paths:
+            self.assert_same_response(path)
+
+        first = self.assert_same_response('/ai/engine/my_recommendations/?page_size=4')
+        self.assertEqual(len(first.json()['results']), 4)
+        cursor = first.json()['next'].split('cursor=')[1]
+        self.assert_same_response(f'/ai/engine/my_recommendations/?page_size=4&cursor={cursor}')
+
+    @override_settings(CACHES=SHARED_CACHES, ACCOUNTS_TOKEN_AUTH=SHARED_TOKEN_AUTH)
+    def test_catalog_cache_and_etag(self):
+        caches['shared'].clear()
+        first = self.api.get('/api/async/exercises/exercises/')
+        self.api.get('/api/async/exercises/exercises/')  # guarda a versão do token no cache compartilhado
+        with CaptureQueriesContext(connection) as context:
+            second = self.api.get('/api/async/exercises/exercises/')
+            not_modified = self.api.get('/api/async/exercises/exercises/', HTTP_IF_NONE_MATCH=first['ETag'])
+        # Token, versão do catálogo e resposta em cache: nenhuma query
+        self.assertEqual(len(context.captured_queries), 0)
+        self.assertEqual(second.content, first.content)
+        self.assertEqual(not_modified.status_code, 304)
+
+    def test_authentication_and_methods(self):
+        self.assertEqual(APIClient().get('/api/async/auth/profile/').status_code, 401)
+        self.assertEqual(self.api.post('/api/async/auth/profile/').status_code, 405)
+        profile_less = APIClient()
+        profile_less.credentials(HTTP_AUTHORIZATION='Token ' + Token.objects.create(user=self.data['trainers'][0]).key)
+        self.assertEqual(profile_less.get('/api/async/ai/engine/my_recommendations/').status_code, 404)
+
+
+class FastSerializationTestCase(TestCase):
+    """As listagens montadas de values() têm os mesmos bytes das do DRF."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.data = seed_dataset()
+        trainer = cls.data['trainers'][0]
+        trainer.first_name, trainer.last_name = 'Ana', 'Souza'
+        trainer.save()
+        Exercise.objects.filter(id__in=[e.id for e in cls.data['exercises'][:30]]).update(
+            image='exercises/agachamento.png', video_url='https://example.com/v.mp4', image_variants={
+                'source': 'exercises/agachamento.png', 'width': 800, 'height': 600,
+                'files': {'webp': {'160': 'exercises/agachamento/160w-q80.webp'},
+                          'jpeg': {'160': 'exercises/agachamento/160w-q82.jpg'}},
+            },
+        )
+        rebuild_index()
+        cls.client_token = Token.objects.create(user=cls.data['clients'][0])
+        cls.trainer_token = Token.objects.create(user=trainer)
+
+    def setUp(self):
+        cache.clear()
+        self.api = APIClient()
+
+    def assert_parity(self, path, token):
+        self.api.credentials(HTTP_AUTHORIZATION='Token ' + token.key)
+        fast = self.api.get(path)
+        cache.clear()
+        with override_settings(FAST_SERIALIZATION=False):
+            slow = self.api.get(path)
+        cache.clear()
+        self.assertEqual(fast.status_code, slow.status_code, path)
+        self.assertEqual(fast.content, slow.content, path)
+        return fast
+
+    def test_exercise_list_parity(self):
+        group = MuscleGroup.objects.first()
+        paths = [
+            '/api/exercises/exercises/',
+            '/api/exercises/exercises/?page=2',
+            '/api/exercises/exercises/?page=25&difficulty=beginner',
+            f'/api/exercises/exercises/?muscle_groups={group.id}&facets=1',
+            '/api/exercises/exercises/?search=exercicio 1',
+            '/api/exercises/exercises/?search=exercicio&page=3',
+            '/api/exercises/exercises/?page=999',
+        ]
+        for path in paths:
+            self.assert_parity(path, self.client_token)
+
+    def test_template_list_parity(self):
+        for page in range(1, 7):
+            self.assert_parity(f'/api/workouts/templates/?page={page}', self.client_token)
+        self.assert_parity('/api/workouts/templates/?goal=strength', self.client_token)
+        response = self.assert_parity('/api/workouts/templates/', self.trainer_token)
+        self.assertEqual(response.json()['results'][0]['trainer_name'], 'Ana Souza')
+        self.assertEqual(len(response.json()['results'][0]['exercises']), 5)
+
+    @override_settings(CACHES=SHARED_CACHES, ACCOUNTS_TOKEN_AUTH=SHARED_TOKEN_AUTH)
+    def test_fast_list_query_count(self):
+        caches['shared'].clear()
+        self.api.credentials(HTTP_AUTHORIZATION='Token ' + self.client_token.key)
+        self.api.get('/api/auth/profile/')
+        self.api.get('/api/auth/profile/')
+        with CaptureQueriesContext(connection) as context:
+            self.api.get('/api/workouts/templates/')
+        # count, templates, exercícios dos templates (com JOIN no exercício) e grupos musculares
+        self.assertEqual(len(context.captured_queries), 4)
+
+    def test_renderer_matches_json_renderer(self):
+        data = {
+            'floats': [0.1, 1.5, 1e16, 1e-05, -2.5e-07, 123456789.0],
+            'text': 'ação \u2028\u2029 "aspas" \\ </script>',
+            'when': timezone.now(), 'today': timezone.localdate(),
+            'nested': [{'a': None, 'b': True}, []],
+            1: 'chave inteira',
+        }
+        self.assertEqual(FastJSONRenderer().render(data), JSONRenderer().render(data))
+
+
+class BenchmarkTestCase(TestCase):
+    """
+    Cenários do benchmark (fitai_backend.benchmark) cobrem os routers e
+    respeitam os orçamentos de queries; latência e memória ficam para o
+    ``manage.py benchmark_api``, fora da suíte.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.data = seed_dataset()
+        cls.client_user = cls.data['clients'][0]
+        cls.client_user.set_password('senha-123')
+        cls.client_user.save()
+
+    def setUp(self):
+        cache.clear()
+
+    def scenarios(self):
+        return build_scenarios(self.client_user, self.data['trainers'][0], password='senha-123')
+
+    def test_scenarios_cover_registered_endpoints(self):
+        names = [scenario.name for scenario in self.scenarios()]
+        self.assertEqual(len(names), len(set(names)))
+        covered = {scenario.basename for scenario in self.scenarios()}
+        self.assertEqual(registered_basenames() - covered, set())
+        self.assertIn('auth-login', names)
+        self.assertIn('aiengine-generate-workout', names)
+
+    def test_scenarios_within_query_budgets(self):
+        results = {'scenarios': run_scenarios(self.scenarios(), iterations=2, warmup=1, alloc_iterations=1)}
+        for result in results['scenarios'].values():
+            self.assertEqual(result['errors'], 0, result['url'])
+            self.assertGreater(result['alloc_peak_kb'], 0)
+        no_timing = get_budget_settings({'DEFAULT': {'p95_ms': None, 'p99_ms': None, 'alloc_peak_kb': None}})
+        self.assertEqual(check_budgets(results, no_timing), [])
+
+    def test_check_budgets_reports_regressions(self):
+        def result(p50, queries, errors=0):
+            return {
+                'latency_ms': {'mean': p50, 'p50': p50, 'p95': p50 * 2, 'p99': p50 * 3},
+                'queries': queries, 'alloc_peak_kb': 100.0, 'errors': errors, 'error_statuses': [500] if errors else [],
+            }
+
+        baseline = {
+            'scenarios': {'a': result(10, 2), 'b': result(10, 2), 'c': result(1, 2)},
+            'concurrent': {'requests': 1000, 'errors': 0, 'requests_per_second': 200.0,
+                           'latency_ms': {'p99': 100}},
+        }
+        results = {
+            # a: uma query a mais; b: mediana 50% maior; c: +100%, mas abaixo do piso de ruído
+            'scenarios': {'a': result(10, 3), 'b': result(15, 2), 'c': result(2, 2), 'd': result(400, 2, errors=1)},
+            'concurrent': {'requests': 500, 'errors': 5, 'requests_per_second': 100.0,
+                           'latency_ms': {'p99': 100}},
+        }
+        violations = check_budgets(results, get_budget_settings(), baseline)
+        self.assertEqual(violations, [
+            'a: queries 2 -> 3',
+            'b: p50 10 -> 15 ms',
+            'd: 1 respostas com status [500]',
+            'd: p95_ms 800 acima do orçamento 250',
+            'd: p99_ms 1200 acima do orçamento 500',
+            'concorrente: taxa de erros 0.010 acima de 0.0',
+            'concorrente: requests/s 200.0 -> 100.0',
+        ])
+        self.assertEqual(check_budgets(baseline, get_budget_settings(), baseline), [])
+
+
+def parse_server_timing(header):
+    """``{métrica: {'dur': ..., 'desc': ...}}`` de um cabeçalho Server-Timing."""
+    metrics = {}
+    for entry in header.split(', '):
+        name, *params = entry.split(';')
+        metrics[name] = dict(param.split('=', 1) for param in params)
+    return metrics
+
+
+class ProfilingMiddlewareTestCase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.staff = User.objects.create(username='staff', is_staff=True)
+        cls.trainer = User.objects.create(username='trainer', role='trainer', first_name='Ana')
+        cls.staff_token = Token.objects.create(user=cls.staff)
+        cls.trainer_token = Token.objects.create(user=cls.trainer)
+        exercises = Exercise.objects.bulk_create([Exercise(name=f'Exercício {i}') for i in range(5)])
+        for i in range(3):
+            template = WorkoutTemplate.objects.create(
+                name=f'Template {i}', goal='strength', difficulty='beginner', estimated_duration=30,
+                trainer=cls.trainer,
+            )
+            WorkoutExercise.objects.bulk_create([
+                WorkoutExercise(workout_template=template, exercise=exercise, sets=3, reps='10', rest_time=60, order=order)
+                for order, exercise in enumerate(exercises)
+            ])
+        UserProfile.objects.create(
+            user=cls.staff, primary_goal='strength', experience_level='beginner', training_frequency=3,
+        )
+
+    def setUp(self):
+        cache.clear()
+        token_cache.clear()
+
+    def get(self, path, token, **headers):
+        api = APIClient()
+        api.credentials(HTTP_AUTHORIZATION='Token ' + token.key)
+        return api.get(path, **headers)
+
+    def test_server_timing_for_staff(self):
+        with CaptureQueriesContext(connection) as context:
+            response = self.get('/api/workouts/templates/', self.staff_token, HTTP_X_PROFILE='1')
+        metrics = parse_server_timing(response['Server-Timing'])
+        self.assertEqual(set(metrics), {'total', 'auth', 'view', 'serialize', 'render', 'db'})
+        self.assertEqual(metrics['db']['desc'], f'"{len(context.captured_queries)} queries / 0 duplicated / 0 similar"')
+        # Token fora do cache de autenticação: a query dele é atribuída à autenticação
+        self.assertTrue(metrics['auth']['desc'].startswith('"1 queries /'))
+        self.assertGreaterEqual(float(metrics['total']['dur']), float(metrics['view']['dur']))
+
+    def test_only_staff_with_header(self):
+        self.assertNotIn('Server-Timing', self.get('/api/workouts/templates/', self.staff_token))
+        self.assertNotIn('Server-Timing', self.get('/api/workouts/templates/', self.trainer_token, HTTP_X_PROFILE='1'))
+        with override_settings(REQUEST_PROFILING={'STAFF_ONLY': False}):
+            response = self.get('/api/workouts/templates/', self.trainer_token, HTTP_X_PROFILE='1')
+        self.assertIn('Server-Timing', response)
+
+    def test_duplicated_and_similar_queries(self):
+        profile = RequestProfile()
+        with timer('view'):
+            for user_id in (1, 1, 2):
+                profile.record_query('SELECT * FROM accounts_user WHERE id = %s', (user_id,), 0.001)
+        profile.finish()
+        stats = profile.query_stats()
+        self.assertEqual((stats['count'], stats['duplicated'], stats['similar']), (3, 1, 2))
+
+    def test_sampling_writes_profile(self):
+        with tempfile.TemporaryDirectory() as directory:
+            with override_settings(REQUEST_PROFILING={'SAMPLE_RATE': 1.0, 'SAMPLE_DIR': directory}):
+                response = self.get('/api/workouts/templates/', self.trainer_token)
+            # Amostra gravada, mas o cabeçalho continua restrito a staff
+            self.assertNotIn('Server-Timing', response)
+            files = sorted(Path(directory).iterdir())
+            self.assertEqual([path.suffix for path in files], ['.json', '.prof'])
+            sample = json.loads(files[0].read_text())
+            self.assertEqual((sample['method'], sample['status']), ('GET', 200))
+            self.assertGreater(sample['db']['count'], 0)
+            self.assertTrue(pstats.Stats(str(files[1])).total_calls)
+
+    async def test_async_views(self):
+        response = await self.async_client.get(
+            '/api/async/auth/profile/', headers={'Authorization': 'Token ' + self.staff_token.key, 'X-Profile': '1'},
+        )
+        self.assertEqual(response.status_code, 200)
+        metrics = parse_server_timing(response['Server-Timing'])
+        self.assertIn('auth', metrics)
+        self.assertIn('view', metrics)
+        self.assertNotEqual(metrics['db']['desc'], '"0 queries / 0 duplicated / 0 similar"')
+
+
+REPLICA_ROUTING = {'REPLICAS': ['replica_1'], 'CACHE_ALIAS': 'shared'}
+
+
+class DatabaseLayerTestCase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create(username='cliente')
+        cls.token = Token.objects.create(user=cls.user)
+
+    def setUp(self):
+        cache.clear()
+        self.api = APIClient()
+        self.api.credentials(HTTP_AUTHORIZATION='Token ' + self.token.key)
+
+    def test_settings_from_environment(self):
+        default = database_settings('/srv/app', {})['default']
+        self.assertEqual(default['NAME'], '/srv/app/db.sqlite3')
+        self.assertIn('PRAGMA journal_mode=WAL', default['OPTIONS']['init_command'])
+        self.assertEqual(default['OPTIONS']['transaction_mode'], 'IMMEDIATE')
+        self.assertEqual((default['CONN_MAX_AGE'], default['CONN_HEALTH_CHECKS']), (60, True))
+
+        databases = database_settings('/srv/app', {
+            'DATABASE_URL': 'postgres://fitai:p%40ss@db:5433/fitai?sslmode=require',
+            'DATABASE_REPLICA_URLS': 'postgres://ro@replica1/fitai, postgres://ro@replica2/fitai',
+            'DATABASE_CONN_MAX_AGE': '0',
+        })
+        self.assertEqual(sorted(databases), ['default', 'replica_1', 'replica_2'])
+        default = databases['default']
+        self.assertEqual(default['ENGINE'], 'django.db.backends.postgresql')
+        self.assertEqual((default['NAME'], default['USER'], default['PASSWORD']), ('fitai', 'fitai', 'p@ss'))
+        self.assertEqual((default['HOST'], default['PORT'], default['OPTIONS']), ('db', '5433', {'sslmode': 'require'}))
+        self.assertEqual((default['CONN_MAX_AGE'], default['CONN_HEALTH_CHECKS']), (0, False))
+        self.assertEqual(databases['replica_2']['HOST'], 'replica2')
+        self.assertEqual(databases['replica_1']['TEST'], {'MIRROR': 'default'})
+        self.assertEqual(database_settings('/srv', {'DATABASE_URL': 'sqlite:////data/fitai.db'})['default']['NAME'],
+                         '/data/fitai.db')
+
+    def test_sqlite_pragmas_applied(self):
+        with connection.cursor() as cursor:
+            values = {}
+            for pragma in ('synchronous', 'busy_timeout', 'temp_store', 'cache_size'):
+                cursor.execute(f'PRAGMA {pragma}')
+                values[pragma] = cursor.fetchone()[0]
+        # synchronous=NORMAL (1), timeout de 20 s, temp_store=MEMORY (2)
+        self.assertEqual(values, {'synchronous': 1, 'busy_timeout': 20000, 'temp_store': 2, 'cache_size': -20000})
+
+    @override_settings(CACHES=SHARED_CACHES, DATABASE_ROUTING=REPLICA_ROUTING)
+    def test_router_reads_from_replica_until_a_write(self):
+        router = ReplicaRouter()
+        self.assertIsNone(router.db_for_read(Exercise))
+        token = start_replica_reads(self.user)
+        try:
+            self.assertEqual(router.db_for_read(Exercise), 'replica_1')
+            self.assertEqual(router.db_for_write(UserWorkout), 'default')
+            # Depois de escrever, a requisição lê o que gravou
+            self.assertIsNone(router.db_for_read(Exercise))
+        finally:
+            end_replica_reads(token)
+        self.assertIsNone(router.db_for_read(Exercise))
+        self.assertFalse(router.allow_migrate('replica_1', 'exercises'))
+
+        pin_to_primary(self.user)
+        self.assertIsNone(start_replica_reads(self.user))
+        caches['shared'].clear()
+
+    @override_settings(CACHES=SHARED_CACHES, DATABASE_ROUTING=REPLICA_ROUTING)
+    def test_viewsets_route_reads_and_pin_after_writes(self):
+        # Alias inexistente: a tentativa de ler dele mostra que a leitura foi roteada para a réplica
+        with self.assertRaises(ConnectionDoesNotExist):
+            self.api.get('/api/workouts/user-workouts/')
+        # Rotas sem o mixin seguem no primário
+        self.assertEqual(self.api.get('/api/workouts/schedules/').status_code, 200)
+
+        response = self.api.post('/api/ai/profile/', {
+            'primary_goal': 'strength', 'experience_level': 'beginner', 'training_frequency': 3,
+        }, format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertTrue(is_pinned(self.user))
+        self.assertEqual(self.api.get('/api/workouts/user-workouts/').status_code, 200)
+        caches['shared'].clear()
+
+    @override_settings(DATABASE_ROUTING={'REPLICAS': ['replica_1']})
+    def test_replicas_require_shared_pin_cache(self):
+        with self.assertRaises(ImproperlyConfigured):
+            ReadYourWritesMiddleware(lambda request: None)
+        with self.assertRaises(ImproperlyConfigured):
+            pin_to_primary(self.user)
+
+
+def image_upload(name='foto.png', size=(800, 600), color='red', mode='RGB'):
+    buffer = io.BytesIO()
+    Image.new(mode, size, color).save(buffer, format='PNG')
+    return SimpleUploadedFile(name, buffer.getvalue(), content_type='image/png')
+
+
+class ImagePipelineTestCase(TestCase):
+    """Nomes por hash do conteúdo e variantes responsivas geradas depois do commit."""
+
+    def setUp(self):
+        cache.clear()
+        media = tempfile.TemporaryDirectory()
+        self.addCleanup(media.cleanup)
+        self.media_root = media.name
+        overrides = override_settings(MEDIA_ROOT=self.media_root, IMAGE_VARIANTS={'WORKERS': 0})
+        overrides.enable()
+        self.addCleanup(overrides.disable)
+
+    def create_exercise(self, upload):
+        with self.captureOnCommitCallbacks(execute=True):
+            exercise = Exercise.objects.create(
+                name='Agachamento', description='-', equipment='barbell', difficulty='beginner',
+                instructions='-', image=upload,
+            )
+        exercise.refresh_from_db()
+        return exercise
+
+    def open_media(self, name):
+        return Image.open(os.path.join(self.media_root, name))
+
+    def test_upload_gets_content_hashed_name(self):
+        first = self.create_exercise(image_upload('Agachamento.PNG'))
+        self.assertRegex(first.image.name, r'^exercises/[0-9a-f]{32}\.png$')
+        other = self.create_exercise(image_upload('outra.png', color='blue'))
+        self.assertNotEqual(other.image.name[:42], first.image.name[:42])
+        # Mesmo conteúdo: o arquivo e as variantes já gravados são reaproveitados
+        copy = self.create_exercise(image_upload('copia.png'))
+        self.assertEqual(copy.image.name, first.image.name)
+        self.assertEqual(copy.image_variants, first.image_variants)
+        self.assertEqual(len(os.listdir(os.path.join(self.media_root, 'exercises'))), 4)
+
+    def test_variants_generated_without_upscaling(self):
+        exercise = self.create_exercise(image_upload(size=(800, 600)))
+        variants = exercise.image_variants
+        self.assertEqual((variants['source'], variants['width'], variants['height']), (exercise.image.name, 800, 600))
+        self.assertEqual(list(variants['files']['webp']), ['160', '320', '640', '800'])
+        with self.open_media(variants['files']['jpeg']['320']) as image:
+            self.assertEqual((image.format, image.size), ('JPEG', (320, 240)))
+        with self.open_media(variants['files']['webp']['160']) as image:
+            self.assertEqual((image.format, image.size), ('WEBP', (160, 120)))
+
+    def test_transparent_image_flattened_for_jpeg(self):
+        exercise = self.create_exercise(image_upload(mode='RGBA', color=(0, 0, 0, 0), size=(200, 100)))
+        with self.open_media(exercise.image_variants['files']['jpeg']['160']) as image:
+            self.assertEqual(image.mode, 'RGB')
+            self.assertEqual(image.getpixel((10, 10)), (255, 255, 255))
+        with self.open_media(exercise.image_variants['files']['webp']['160']) as image:
+            self.assertEqual(image.mode, 'RGBA')
+
+    def test_list_exposes_variant_urls(self):
+        exercise = self.create_exercise(image_upload(size=(400, 300)))
+        api = APIClient()
+        api.force_authenticate(User.objects.create_user(username='aluno', password='senha-123'))
+        item = api.get('/api/exercises/exercises/').json()['results'][0]
+        files = exercise.image_variants['files']
+        self.assertEqual(item['image_variants']['width'], 400)
+        self.assertEqual(item['image_variants']['webp']['320'], f'http://testserver/media/{files["webp"]["320"]}')
+        self.assertEqual(set(item['image_variants']['jpeg']), {'160', '320', '400'})
+
+    def test_invalid_image_records_error(self):
+        exercise = self.create_exercise(SimpleUploadedFile('quebrada.jpg', b'nao e uma imagem'))
+        self.assertEqual(exercise.image_variants['source'], exercise.image.name)
+        self.assertIn('error', exercise.image_variants)
+        self.assertIsNone(ExerciseListSerializer(exercise).data['image_variants'])
+
+    def test_process_images_command_fills_pending(self):
+        exercise = self.create_exercise(image_upload())
+        expected = exercise.image_variants
+        Exercise.objects.filter(pk=exercise.pk).update(image_variants={})
+        call_command('process_images', stdout=io.StringIO())
+        exercise.refresh_from_db()
+        self.assertEqual(exercise.image_variants, expected)
+
+    def test_hashed_media_served_immutable(self):
+        exercise = self.create_exercise(image_upload())
+        os.makedirs(os.path.join(self.media_root, 'legado'))
+        with open(os.path.join(self.media_root, 'legado', 'foto.png'), 'wb') as output:
+            output.write(b'png')
+        request = RequestFactory().get('/media/')
+        for name in (exercise.image.name, exercise.image_variants['files']['webp']['160']):
+            response = serve_media(request, name, document_root=self.media_root)
+            self.assertEqual(response['Cache-Control'], IMMUTABLE)
+        self.assertNotIn('Cache-Control', serve_media(request, 'legado/foto.png', document_root=self.media_root))
+
@@ -2,6 +2,20 @@ from django.contrib import admin
 from django.urls import path, include
 from django.conf import settings
 from django.conf.urls.static import static
+from accounts import async_views as accounts_async
+from fitai_backend.images import serve_media
+from ai_engine import async_views as ai_engine_async
+from exercises import async_views as exercises_async
+from workouts import async_views as workouts_async
+
+# Versões assíncronas das leituras mais frequentes, com as mesmas respostas
+# (ver fitai_backend/async_api.py)
+async_urlpatterns = [
+    path('auth/profile/', accounts_async.profile, name='async-profile'),
+    path('workouts/user-workouts/today/', workouts_async.today, name='async-userworkout-today'),
+    path('exercises/exercises/', exercises_async.exercise_list, name='async-exercise-list'),
+    path('ai/engine/my_recommendations/', ai_engine_async.my_recommendations, name='async-my-recommendations'),
+]
 
 urlpatterns = [
     path('admin/', admin.site.urls),
@@ -9,7 +23,9 @@ urlpatterns = [
     path('api/workouts/', include('workouts.urls')),
     path('api/exercises/', include('exercises.urls')),
     path('api/ai/', include('ai_engine.urls')),
+    path('api/async/', include(async_urlpatterns)),
 ]
 
 if settings.DEBUG:
-    urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
\ No newline at end of file
+    # Arquivos com hash no nome (ver fitai_backend/images.py) saem com cache imutável
+    urlpatterns += static(settings.MEDIA_URL, view=serve_media, document_root=settings.MEDIA_ROOT)
\ No newline at end of file
@@ -1,5 +1,8 @@
 from django.contrib import admin
-from .models import WorkoutTemplate, WorkoutExercise, UserWorkout
+from .models import (
+    WorkoutTemplate, WorkoutExercise, UserWorkout, ExerciseSetLog, UserStats, WeeklyStats, TemplatePopularity,
+    WorkoutSchedule, WorkoutScheduleTemplate,
+)
 
 class WorkoutExerciseInline(admin.TabularInline):
     model = WorkoutExercise
@@ -38,4 +41,45 @@ class UserWorkoutAdmin(admin.ModelAdmin):
         ('Execução', {
             'fields': ('started_at', 'completed_at', 'notes')
         }),
-    )
\ No newline at end of file
+    )
+
+@admin.register(ExerciseSetLog)
+class ExerciseSetLogAdmin(admin.ModelAdmin):
+    list_display = ('user_workout', 'exercise', 'set_index', 'reps', 'load', 'rpe', 'completed_at')
+    list_filter = ('completed_at',)
+    search_fields = ('user_workout__user__username', 'exercise__name')
+    raw_id_fields = ('user_workout', 'exercise')
+
+
+@admin.register(UserStats)
+class UserStatsAdmin(admin.ModelAdmin):
+    list_display = ('user', 'workouts_completed', 'total_minutes', 'current_streak', 'longest_streak', 'last_workout_date')
+    search_fields = ('user__username',)
+    raw_id_fields = ('user',)
+
+@admin.register(WeeklyStats)
+class WeeklyStatsAdmin(admin.ModelAdmin):
+    list_display = ('user', 'week_start', 'workouts_started', 'workouts_completed', 'total_minutes')
+    list_filter = ('week_start',)
+    search_fields = ('user__username',)
+    raw_id_fields = ('user',)
+
+
+@admin.register(TemplatePopularity)
+class TemplatePopularityAdmin(admin.ModelAdmin):
+    list_display = ('template', 'completions', 'skips', 'updated_at')
+    search_fields = ('template__name',)
+    raw_id_fields = ('template',)
+
+class WorkoutScheduleTemplateInline(admin.TabularInline):
+    model = WorkoutScheduleTemplate
+    extra = 1
+    fields = ('workout_template', 'position')
+
+@admin.register(WorkoutSchedule)
+class WorkoutScheduleAdmin(admin.ModelAdmin):
+    list_display = ('user', 'weekdays', 'time_of_day', 'start_date', 'end_date', 'is_active', 'materialized_until')
+    list_filter = ('is_active',)
+    search_fields = ('user__username',)
+    readonly_fields = ('materialized_until',)
+    inlines = [WorkoutScheduleTemplateInline]
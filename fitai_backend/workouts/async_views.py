@@ -0,0 +1,19 @@
+from asgiref.sync import sync_to_async
+
+from fitai_backend.async_api import async_api_view, afetch, json_response
+from .models import UserWorkout
+from .scheduling import ensure_materialized
+from .serializers import UserWorkoutSerializer
+from .views import today_bounds
+
+
+@async_api_view
+async def today(request):
+    """Mesma resposta de GET /api/workouts/user-workouts/today/"""
+    await sync_to_async(ensure_materialized)(request.user)
+    start, end = today_bounds()
+    workouts = await afetch(
+        UserWorkout.objects.filter(user=request.user, scheduled_date__gte=start, scheduled_date__lt=end),
+        UserWorkoutSerializer,
+    )
+    return json_response(UserWorkoutSerializer(workouts, many=True, context={'request': request}).data)
@@ -0,0 +1,74 @@
+"""
+Painel do trainer: métricas de cada cliente que tem treinos nos templates dele.
+
+Tudo sai de uma única query agrupada por cliente sobre UserWorkout, com
+agregações condicionais (``Count``/``Max`` com ``filter``), em vez de um laço
+por cliente. Só contam os treinos dos templates do trainer.
+
+- ``completed``/``skipped``: treinos concluídos/pulados;
+- ``due``: treinos cuja data já passou (os que o cliente deveria ter feito);
+- ``adherence_rate``: concluídos entre os ``due`` (None sem treinos vencidos);
+- ``pending``: agendados a partir de agora;
+- ``last_activity``: último início ou conclusão de treino.
+"""
+from django.db.models import Count, F, FloatField, Max, Q
+from django.db.models.functions import Cast, Coalesce, NullIf
+from django.utils import timezone
+
+from accounts.models import User
+from .models import UserWorkout
+
+# Valor de ``ordering`` -> expressão; o id do cliente desempata para a paginação ser estável
+ORDERING = {
+    'adherence_rate': F('adherence_rate'),
+    'last_activity': F('last_activity'),
+    'completed': F('completed'),
+    'pending': F('pending'),
+    'username': F('username'),
+}
+DEFAULT_ORDERING = '-last_activity'
+
+
+def client_metrics(trainer, now=None):
+    """Queryset (dicts) com uma linha de métricas por cliente de ``trainer``."""
+    now = now or timezone.now()
+    due = Q(scheduled_date__lt=now)
+    return (
+        UserWorkout.objects.filter(workout_template__trainer=trainer)
+        .values('user_id')
+        .annotate(
+            total=Count('id'),
+            completed=Count('id', filter=Q(status='completed')),
+            skipped=Count('id', filter=Q(status='skipped')),
+            due=Count('id', filter=due),
+            completed_due=Count('id', filter=due & Q(status='completed')),
+            pending=Count('id', filter=Q(status='scheduled', scheduled_date__gte=now)),
+            last_activity=Max(Coalesce('completed_at', 'started_at')),
+        )
+        .annotate(
+            adherence_rate=Cast('completed_due', FloatField()) / NullIf(F('due'), 0),
+        )
+    )
+
+
+def order_metrics(queryset, ordering):
+    """Ordena por ``ordering`` (com ``-`` para decrescente); None se o campo não é permitido."""
+    ordering = ordering or DEFAULT_ORDERING
+    descending = ordering.startswith('-')
+    expression = ORDERING.get(ordering.lstrip('-'))
+    if expression is None:
+        return None
+    if ordering.lstrip('-') == 'username':
+        queryset = queryset.annotate(username=F('user__username'))
+    expression = expression.desc(nulls_last=True) if descending else expression.asc(nulls_last=True)
+    return queryset.order_by(expression, 'user_id')
+
+
+def with_clients(rows):
+    """Acrescenta username e nome às linhas de uma página (uma query para a página toda)."""
+    rows = list(rows)
+    users = User.objects.only('username', 'first_name', 'last_name').in_bulk([row['user_id'] for row in rows])
+    for row in rows:
+        user = users[row['user_id']]
+        row['username'], row['full_name'] = user.username, user.get_full_name()
+    return rows
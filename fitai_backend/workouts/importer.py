@@ -0,0 +1,161 @@
+"""
+Importação em lote de programas de treino (templates com seus exercícios).
+
+Formatos aceitos:
+
+- JSON: uma lista de templates no formato de WorkoutTemplateCreateSerializer
+  (ou JSON Lines, um template por linha);
+- CSV: uma linha por exercício com as colunas de ``CSV_TEMPLATE_FIELDS`` e
+  ``CSV_EXERCISE_FIELDS``; linhas consecutivas com os mesmos dados de
+  template formam um template.
+
+O arquivo é lido em streaming e processado em blocos: cada bloco valida os
+``exercise_id`` com uma única query IN e grava templates e exercícios com
+dois ``bulk_create``. A importação inteira roda em uma transação; se algum
+template for inválido, nada é gravado e os erros são devolvidos.
+"""
+import csv
+import io
+import json
+from itertools import islice
+
+from django.db import transaction
+
+from exercises.models import Exercise
+from .models import WorkoutTemplate, WorkoutExercise
+from .serializers import WorkoutTemplateCreateSerializer
+
+CSV_TEMPLATE_FIELDS = ('name', 'description', 'goal', 'difficulty', 'estimated_duration')
+CSV_EXERCISE_FIELDS = ('exercise_id', 'sets', 'reps', 'rest_time', 'load_percentage', 'order', 'notes')
+FORMATS = ('csv', 'json')
+CHUNK_SIZE = 500
+READ_SIZE = 64 * 1024
+MAX_ERRORS = 50
+
+
+def detect_format(filename):
+    extension = filename.rsplit('.', 1)[-1].lower() if '.' in filename else ''
+    if extension == 'csv':
+        return 'csv'
+    if extension in ('json', 'jsonl'):
+        return 'json'
+    raise ValueError('Formato não reconhecido: use um arquivo .csv ou .json')
+
+
+def iter_json_templates(stream, read_size=READ_SIZE):
+    """Itens de uma lista JSON (ou JSON Lines) lidos aos poucos de ``stream``."""
+    decoder = json.JSONDecoder()
+    buffer, eof, started = '', False, False
+    while True:
+        buffer = buffer.lstrip()
+        if not started and buffer.startswith('['):
+            buffer, started = buffer[1:], True
+            continue
+        if buffer.startswith(','):
+            buffer = buffer[1:]
+            continue
+        if buffer.startswith(']'):
+            return
+        if buffer:
+            try:
+                item, end = decoder.raw_decode(buffer)
+            except json.JSONDecodeError:
+                if eof:
+                    raise ValueError('JSON inválido')
+            else:
+                yield item
+                buffer = buffer[end:]
+                continue
+        elif eof:
+            return
+        chunk = stream.read(read_size)
+        eof = not chunk
+        buffer += chunk
+
+
+def iter_csv_templates(stream):
+    """Templates montados a partir das linhas (uma por exercício) de um CSV."""
+    reader = csv.DictReader(stream)
+    current, key = None, None
+    for row in reader:
+        row_key = tuple(row.get(field) or '' for field in CSV_TEMPLATE_FIELDS)
+        if row_key != key:
+            if current is not None:
+                yield current
+            key = row_key
+            current = dict(zip(CSV_TEMPLATE_FIELDS, row_key), exercises=[])
+        exercise = {field: row[field] for field in CSV_EXERCISE_FIELDS if row.get(field) not in (None, '')}
+        if exercise:
+            current['exercises'].append(exercise)
+    if current is not None:
+        yield current
+
+
+def read_templates(binary_stream, file_format):
+    """Iterador de templates (dicts ainda não validados) de um arquivo binário."""
+    if file_format not in FORMATS:
+        raise ValueError(f'Formato inválido: {file_format}')
+    stream = io.TextIOWrapper(binary_stream, encoding='utf-8-sig', newline='')
+    if file_format == 'csv':
+        return iter_csv_templates(stream)
+    return iter_json_templates(stream)
+
+
+def _exercise_ids(items):
+    ids = set()
+    for item in items:
+        exercises = item.get('exercises') if isinstance(item, dict) else None
+        for exercise in exercises if isinstance(exercises, list) else []:
+            try:
+                ids.add(int(exercise['exercise_id']))
+            except (KeyError, TypeError, ValueError):
+                pass  # o serializer reporta o erro
+    return ids
+
+
+def _import_chunk(chunk, trainer, result):
+    known = set(Exercise.objects.filter(id__in=_exercise_ids(item for _, item in chunk))
+                .values_list('id', flat=True))
+    validated = []
+    for index, item in chunk:
+        serializer = WorkoutTemplateCreateSerializer(data=item, context={'exercise_ids': known})
+        if serializer.is_valid():
+            validated.append(serializer.validated_data)
+        elif len(result['errors']) < MAX_ERRORS:
+            result['errors'].append({'index': index, 'errors': serializer.errors})
+        else:
+            result['truncated_errors'] = True
+    if result['errors']:
+        return  # nada será gravado; segue só validando
+
+    templates = WorkoutTemplate.objects.bulk_create([
+        WorkoutTemplate(trainer=trainer, **{key: value for key, value in data.items() if key != 'exercises'})
+        for data in validated
+    ])
+    exercises = WorkoutExercise.objects.bulk_create([
+        WorkoutExercise(workout_template=template, **exercise)
+        for template, data in zip(templates, validated)
+        for exercise in data['exercises']
+    ])
+    result['templates'] += len(templates)
+    result['exercises'] += len(exercises)
+
+
+def import_templates(items, trainer, chunk_size=CHUNK_SIZE):
+    """
+    Valida e grava os templates de ``items`` para ``trainer``. Retorna
+    ``{'templates', 'exercises', 'errors'}``; com erros nada é gravado.
+    Erros de formato do arquivo levantam ValueError.
+    """
+    result = {'templates': 0, 'exercises': 0, 'errors': []}
+    numbered = enumerate(items)
+    with transaction.atomic():
+        while True:
+            chunk = list(islice(numbered, chunk_size))
+            if not chunk:
+                break
+            _import_chunk(chunk, trainer, result)
+        if result['errors']:
+            transaction.set_rollback(True)
+            result['templates'] = result['exercises'] = 0
+    return result
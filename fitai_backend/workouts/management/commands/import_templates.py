@@ -0,0 +1,38 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from accounts.models import User
+from workouts.importer import CHUNK_SIZE, FORMATS, detect_format, import_templates, read_templates
+
+
+class Command(BaseCommand):
+    help = 'Importa templates de treino em lote de um arquivo CSV ou JSON'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Arquivo .csv, .json ou .jsonl')
+        parser.add_argument('--trainer', required=True, help='Username do personal trainer dono dos templates')
+        parser.add_argument('--format', choices=FORMATS, help='Formato do arquivo (padrão: pela extensão)')
+        parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE,
+                            help='Templates validados/gravados por bloco')
+
+    def handle(self, *args, **options):
+        try:
+            trainer = User.objects.get(username=options['trainer'], role='trainer')
+        except User.DoesNotExist:
+            raise CommandError(f"Personal trainer não encontrado: {options['trainer']}")
+
+        try:
+            file_format = options['format'] or detect_format(options['path'])
+            with open(options['path'], 'rb') as stream:
+                result = import_templates(read_templates(stream, file_format), trainer,
+                                          chunk_size=options['chunk_size'])
+        except (OSError, ValueError) as e:
+            raise CommandError(str(e))
+
+        for error in result['errors']:
+            self.stderr.write(f"Template {error['index']}: {error['errors']}")
+        if result['errors']:
+            raise CommandError('Importação cancelada: nenhum template foi gravado')
+
+        self.stdout.write(self.style.SUCCESS(
+            f"{result['templates']} templates e {result['exercises']} exercícios importados!"
+        ))
@@ -0,0 +1,38 @@
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from workouts.models import WorkoutSchedule
+from workouts.scheduling import get_scheduling_settings, materialize
+
+
+class Command(BaseCommand):
+    help = 'Gera os treinos (UserWorkout) das agendas recorrentes até o fim da janela'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--weeks', type=int,
+                            help='Semanas à frente a partir de hoje (padrão: WINDOW_DAYS de WORKOUT_SCHEDULING)')
+        parser.add_argument('--chunk-size', type=int, default=1000, help='Agendas por transação')
+        parser.add_argument('--batch-size', type=int, help='Treinos por INSERT (padrão: BATCH_SIZE)')
+
+    def handle(self, *args, **options):
+        days = options['weeks'] * 7 if options['weeks'] else get_scheduling_settings()['WINDOW_DAYS']
+        until = timezone.localdate() + timedelta(days=days)
+        ids = list(
+            WorkoutSchedule.objects.filter(is_active=True).exclude(materialized_until__gte=until)
+            .order_by('id').values_list('id', flat=True)
+        )
+        self.stdout.write(f'Materializando {len(ids)} agendas até {until}...')
+
+        started = time.perf_counter()
+        total = 0
+        chunk_size = options['chunk_size']
+        for start in range(0, len(ids), chunk_size):
+            chunk = WorkoutSchedule.objects.filter(id__in=ids[start:start + chunk_size])
+            total += materialize(chunk, until=until, batch_size=options['batch_size'])
+        elapsed = time.perf_counter() - started
+        rate = total / elapsed if elapsed else 0.0
+        self.stdout.write(f'{total} treinos gerados em {elapsed:.2f}s ({rate:.0f} treinos/s)')
+        self.stdout.write(self.style.SUCCESS('Agendas materializadas!'))
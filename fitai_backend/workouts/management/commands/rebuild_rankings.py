@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from workouts.rankings import rebuild_rankings
+
+
+class Command(BaseCommand):
+    help = 'Recalcula os scores de popularidade dos templates a partir do histórico de treinos'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=2000,
+                            help='Linhas lidas/gravadas por bloco')
+
+    def handle(self, *args, **options):
+        total = rebuild_rankings(chunk_size=options['chunk_size'])
+        self.stdout.write(self.style.SUCCESS(f'Popularidade recalculada para {total} templates!'))
@@ -0,0 +1,31 @@
+import os
+
+from django.core.management.base import BaseCommand, CommandError
+
+from accounts.models import User
+from workouts.stats import rebuild_stats, DEFAULT_CHUNK_SIZE
+
+
+class Command(BaseCommand):
+    help = 'Recalcula as estatísticas pré-calculadas (UserStats/WeeklyStats) a partir do histórico'
+
+    def add_arguments(self, parser):
+        parser.add_argument('user_ids', nargs='*', type=int, help='IDs de usuários')
+        parser.add_argument('--all', action='store_true', help='Recalcula para todos os usuários')
+        parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                            help='Processos usados no cálculo (padrão: número de CPUs)')
+        parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE,
+                            help='Usuários por bloco de leitura/gravação')
+
+    def handle(self, *args, **options):
+        user_ids = options['user_ids']
+        if options['all']:
+            user_ids = list(User.objects.order_by('id').values_list('id', flat=True))
+        if not user_ids:
+            raise CommandError('Informe os IDs dos usuários ou use --all')
+
+        self.stdout.write(f'Recalculando estatísticas de {len(user_ids)} usuários...')
+        total, elapsed = rebuild_stats(user_ids, workers=options['workers'], chunk_size=options['chunk_size'])
+        rate = total / elapsed if elapsed else 0.0
+        self.stdout.write(f'{total} usuários processados em {elapsed:.2f}s ({rate:.1f} usuários/s)')
+        self.stdout.write(self.style.SUCCESS('Estatísticas recalculadas!'))
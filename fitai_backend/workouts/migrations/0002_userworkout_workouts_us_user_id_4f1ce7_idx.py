@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-18 05:39
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('workouts', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='userworkout',
+            index=models.Index(fields=['user', '-scheduled_date', '-id'], name='workouts_us_user_id_4f1ce7_idx'),
+        ),
+    ]
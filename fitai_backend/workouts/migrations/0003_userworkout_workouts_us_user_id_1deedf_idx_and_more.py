@@ -0,0 +1,27 @@
+# Generated by Django 5.2.18 on 2026-10-18 05:41
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('workouts', '0002_userworkout_workouts_us_user_id_4f1ce7_idx'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='userworkout',
+            index=models.Index(fields=['user', 'status'], name='workouts_us_user_id_1deedf_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='workouttemplate',
+            index=models.Index(fields=['trainer', 'goal'], name='workouts_wo_trainer_9a9533_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='workouttemplate',
+            index=models.Index(fields=['goal', 'difficulty'], name='workouts_wo_goal_c07966_idx'),
+        ),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 5.2.18 on 2026-10-18 05:42
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('exercises', '0003_exercise_exercises_e_equipme_548330_idx_and_more'),
+        ('workouts', '0003_userworkout_workouts_us_user_id_1deedf_idx_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ExerciseSetLog',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('client_id', models.UUIDField(help_text='ID gerado no app, torna o envio idempotente', unique=True)),
+                ('set_index', models.PositiveSmallIntegerField()),
+                ('reps', models.PositiveSmallIntegerField()),
+                ('load', models.FloatField(blank=True, help_text='Carga em kg', null=True)),
+                ('rpe', models.FloatField(blank=True, help_text='Esforço percebido (1-10)', null=True)),
+                ('started_at', models.DateTimeField(blank=True, null=True)),
+                ('completed_at', models.DateTimeField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('exercise', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='exercises.exercise')),
+                ('user_workout', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='set_logs', to='workouts.userworkout')),
+            ],
+            options={
+                'ordering': ['user_workout', 'exercise', 'set_index'],
+                'indexes': [models.Index(fields=['user_workout', 'exercise', 'set_index'], name='workouts_ex_user_wo_ca9fc8_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 5.2.18 on 2026-10-18 05:46
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('workouts', '0004_exercisesetlog'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='userworkout',
+            name='client_id',
+            field=models.UUIDField(blank=True, help_text='ID gerado no app para treinos criados offline', null=True, unique=True),
+        ),
+        migrations.AddField(
+            model_name='userworkout',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddField(
+            model_name='workouttemplate',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, db_index=True),
+        ),
+        migrations.AddIndex(
+            model_name='userworkout',
+            index=models.Index(fields=['user', 'updated_at'], name='workouts_us_user_id_b69aa3_idx'),
+        ),
+    ]
@@ -0,0 +1,48 @@
+# Generated by Django 5.2.18 on 2026-10-18 05:50
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0001_initial'),
+        ('workouts', '0005_userworkout_client_id_userworkout_updated_at_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UserStats',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='workout_stats', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('workouts_started', models.PositiveIntegerField(default=0)),
+                ('workouts_completed', models.PositiveIntegerField(default=0)),
+                ('total_minutes', models.PositiveIntegerField(default=0, help_text='Soma da duração estimada dos treinos concluídos')),
+                ('total_volume', models.FloatField(default=0, help_text='Soma de repetições x carga das séries')),
+                ('current_streak', models.PositiveIntegerField(default=0, help_text='Dias seguidos com treino concluído')),
+                ('longest_streak', models.PositiveIntegerField(default=0)),
+                ('last_workout_date', models.DateField(blank=True, null=True)),
+                ('muscle_groups_worked', models.JSONField(default=dict, help_text='Treinos concluídos por grupo muscular')),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='WeeklyStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('week_start', models.DateField(help_text='Segunda-feira da semana (horário local)')),
+                ('workouts_started', models.PositiveIntegerField(default=0)),
+                ('workouts_completed', models.PositiveIntegerField(default=0)),
+                ('total_minutes', models.PositiveIntegerField(default=0)),
+                ('total_volume', models.FloatField(default=0)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='weekly_stats', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['-week_start'],
+                'constraints': [models.UniqueConstraint(fields=('user', 'week_start'), name='unique_user_week_stats')],
+            },
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 5.2.18 on 2026-10-18 05:54
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('workouts', '0006_userstats_weeklystats'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TemplatePopularity',
+            fields=[
+                ('template', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='popularity', serialize=False, to='workouts.workouttemplate')),
+                ('score', models.FloatField(default=0, help_text='Score na escala da data de referência (ver rankings.py)')),
+                ('completions', models.PositiveIntegerField(default=0)),
+                ('skips', models.PositiveIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True, db_index=True)),
+            ],
+        ),
+    ]
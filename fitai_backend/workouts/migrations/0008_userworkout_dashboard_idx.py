@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-18 06:29
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('workouts', '0007_templatepopularity'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='userworkout',
+            index=models.Index(fields=['workout_template', 'user', 'status', 'scheduled_date', 'started_at', 'completed_at'], name='userworkout_dashboard_idx'),
+        ),
+    ]
@@ -0,0 +1,70 @@
+# Generated by Django 5.2.18 on 2026-10-18 06:31
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('workouts', '0008_userworkout_dashboard_idx'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='WorkoutScheduleTemplate',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('position', models.PositiveIntegerField()),
+            ],
+            options={
+                'ordering': ['position'],
+            },
+        ),
+        migrations.CreateModel(
+            name='WorkoutSchedule',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('weekdays', models.JSONField(default=list, help_text='Dias da semana (0 = segunda ... 6 = domingo)')),
+                ('time_of_day', models.TimeField(help_text='Horário local dos treinos')),
+                ('timezone', models.CharField(default='America/Sao_Paulo', max_length=64)),
+                ('start_date', models.DateField()),
+                ('end_date', models.DateField(blank=True, null=True)),
+                ('is_active', models.BooleanField(default=True)),
+                ('materialized_until', models.DateField(blank=True, help_text='Último dia local já gerado', null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='workout_schedules', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='userworkout',
+            name='schedule',
+            field=models.ForeignKey(blank=True, help_text='Recorrência que gerou o treino', null=True, on_delete=django.db.models.deletion.SET_NULL, to='workouts.workoutschedule'),
+        ),
+        migrations.AddConstraint(
+            model_name='userworkout',
+            constraint=models.UniqueConstraint(fields=('schedule', 'scheduled_date'), name='userworkout_schedule_occurrence'),
+        ),
+        migrations.AddField(
+            model_name='workoutscheduletemplate',
+            name='schedule',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='workouts.workoutschedule'),
+        ),
+        migrations.AddField(
+            model_name='workoutscheduletemplate',
+            name='workout_template',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='workouts.workouttemplate'),
+        ),
+        migrations.AddField(
+            model_name='workoutschedule',
+            name='templates',
+            field=models.ManyToManyField(through='workouts.WorkoutScheduleTemplate', to='workouts.workouttemplate'),
+        ),
+        migrations.AddIndex(
+            model_name='workoutschedule',
+            index=models.Index(fields=['is_active', 'materialized_until'], name='workouts_wo_is_acti_c15622_idx'),
+        ),
+    ]
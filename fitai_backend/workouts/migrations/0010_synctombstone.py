@@ -0,0 +1,27 @@
+# Generated by Django 5.2.18 on 2026-10-18 07:44
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('workouts', '0009_workoutschedule'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SyncTombstone',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('template', 'Template'), ('workout', 'Treino'), ('exercise', 'Exercício')], max_length=10)),
+                ('object_id', models.BigIntegerField()),
+                ('owner_id', models.BigIntegerField(blank=True, help_text='Usuário do treino ou trainer do template', null=True)),
+                ('deleted_at', models.DateTimeField(db_index=True, default=django.utils.timezone.now)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['kind', 'deleted_at'], name='workouts_sy_kind_12b7eb_idx')],
+            },
+        ),
+    ]
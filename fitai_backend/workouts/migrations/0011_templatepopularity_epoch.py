@@ -0,0 +1,32 @@
+# Generated by Django 5.2.18 on 2026-10-18 08:21
+
+import datetime
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('workouts', '0010_synctombstone'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='templatepopularity',
+            name='epoch',
+            # Linhas existentes foram gravadas na escala da antiga data de referência fixa
+            field=models.DateTimeField(default=datetime.datetime(2025, 1, 1, tzinfo=datetime.timezone.utc), help_text='Data de referência do score'),
+        ),
+        migrations.AlterField(
+            model_name='templatepopularity',
+            name='epoch',
+            field=models.DateTimeField(default=django.utils.timezone.now, help_text='Data de referência do score'),
+        ),
+        migrations.AlterField(
+            model_name='templatepopularity',
+            name='score',
+            field=models.FloatField(default=0, help_text='Score na escala de epoch (ver rankings.py)'),
+        ),
+    ]
@@ -1,5 +1,6 @@
 from django.db import models
 from django.conf import settings
+from django.utils import timezone
 from exercises.models import Exercise
 
 class WorkoutTemplate(models.Model):
@@ -27,6 +28,13 @@ class WorkoutTemplate(models.Model):
     )
     is_ai_generated = models.BooleanField(default=False)
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
+    
+    class Meta:
+        indexes = [
+            models.Index(fields=['trainer', 'goal']),
+            models.Index(fields=['goal', 'difficulty']),
+        ]
     
     def __str__(self):
         return f"{self.name} - {self.get_goal_display()}"
@@ -62,6 +70,152 @@ class UserWorkout(models.Model):
     completed_at = models.DateTimeField(null=True, blank=True)
     status = models.CharField(max_length=15, choices=STATUS_CHOICES, default='scheduled')
     notes = models.TextField(blank=True)
+    client_id = models.UUIDField(null=True, blank=True, unique=True, help_text="ID gerado no app para treinos criados offline")
+    schedule = models.ForeignKey('WorkoutSchedule', on_delete=models.SET_NULL, null=True, blank=True,
+                                 help_text="Recorrência que gerou o treino")
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        indexes = [
+            # Histórico paginado por cursor em UserWorkoutViewSet
+            models.Index(fields=['user', '-scheduled_date', '-id']),
+            models.Index(fields=['user', 'status']),
+            # Delta da sincronização offline
+            models.Index(fields=['user', 'updated_at']),
+            # Painel do trainer (workouts.dashboard): agrega por cliente sem ler a tabela
+            models.Index(fields=['workout_template', 'user', 'status', 'scheduled_date', 'started_at', 'completed_at'],
+                         name='userworkout_dashboard_idx'),
+        ]
+        constraints = [
+            # Uma ocorrência por horário: a materialização pode ser repetida sem duplicar treinos
+            models.UniqueConstraint(fields=['schedule', 'scheduled_date'], name='userworkout_schedule_occurrence'),
+        ]
+    
+    def __str__(self):
+        return f"{self.user.username} - {self.workout_template.name}"
+
+class WorkoutSchedule(models.Model):
+    """
+    Recorrência semanal de treinos: os templates se alternam em rodízio nos
+    dias da semana escolhidos, no horário local do fuso ``timezone``. As
+    ocorrências viram UserWorkout (workouts.scheduling) numa janela móvel.
+    """
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='workout_schedules')
+    templates = models.ManyToManyField(WorkoutTemplate, through='WorkoutScheduleTemplate')
+    weekdays = models.JSONField(default=list, help_text="Dias da semana (0 = segunda ... 6 = domingo)")
+    time_of_day = models.TimeField(help_text="Horário local dos treinos")
+    timezone = models.CharField(max_length=64, default=settings.TIME_ZONE)
+    start_date = models.DateField()
+    end_date = models.DateField(null=True, blank=True)
+    is_active = models.BooleanField(default=True)
+    materialized_until = models.DateField(null=True, blank=True, help_text="Último dia local já gerado")
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        indexes = [
+            # Agendas que ainda precisam ser materializadas
+            models.Index(fields=['is_active', 'materialized_until']),
+        ]
+    
+    def __str__(self):
+        return f"{self.user.username} - {self.weekdays}"
+
+class WorkoutScheduleTemplate(models.Model):
+    schedule = models.ForeignKey(WorkoutSchedule, on_delete=models.CASCADE)
+    workout_template = models.ForeignKey(WorkoutTemplate, on_delete=models.CASCADE)
+    position = models.PositiveIntegerField()
+    
+    class Meta:
+        ordering = ['position']
+
+class ExerciseSetLog(models.Model):
+    """Registro de uma série executada durante um treino"""
+    client_id = models.UUIDField(unique=True, help_text="ID gerado no app, torna o envio idempotente")
+    user_workout = models.ForeignKey(UserWorkout, on_delete=models.CASCADE, related_name='set_logs')
+    exercise = models.ForeignKey(Exercise, on_delete=models.CASCADE)
+    set_index = models.PositiveSmallIntegerField()
+    reps = models.PositiveSmallIntegerField()
+    load = models.FloatField(null=True, blank=True, help_text="Carga em kg")
+    rpe = models.FloatField(null=True, blank=True, help_text="Esforço percebido (1-10)")
+    started_at = models.DateTimeField(null=True, blank=True)
+    completed_at = models.DateTimeField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        ordering = ['user_workout', 'exercise', 'set_index']
+        indexes = [
+            models.Index(fields=['user_workout', 'exercise', 'set_index']),
+        ]
+    
+    def __str__(self):
+        return f"{self.exercise.name} - série {self.set_index}: {self.reps}x{self.load or 0}kg"
+
+class UserStats(models.Model):
+    """Totais do usuário mantidos incrementalmente por workouts.stats"""
+    user = models.OneToOneField(settings.AUTH_USER_MODEL, on_delete=models.CASCADE,
+                                primary_key=True, related_name='workout_stats')
+    workouts_started = models.PositiveIntegerField(default=0)
+    workouts_completed = models.PositiveIntegerField(default=0)
+    total_minutes = models.PositiveIntegerField(default=0, help_text="Soma da duração estimada dos treinos concluídos")
+    total_volume = models.FloatField(default=0, help_text="Soma de repetições x carga das séries")
+    current_streak = models.PositiveIntegerField(default=0, help_text="Dias seguidos com treino concluído")
+    longest_streak = models.PositiveIntegerField(default=0)
+    last_workout_date = models.DateField(null=True, blank=True)
+    muscle_groups_worked = models.JSONField(default=dict, help_text="Treinos concluídos por grupo muscular")
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    def __str__(self):
+        return f"Estatísticas - {self.user.username}"
+
+class WeeklyStats(models.Model):
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='weekly_stats')
+    week_start = models.DateField(help_text="Segunda-feira da semana (horário local)")
+    workouts_started = models.PositiveIntegerField(default=0)
+    workouts_completed = models.PositiveIntegerField(default=0)
+    total_minutes = models.PositiveIntegerField(default=0)
+    total_volume = models.FloatField(default=0)
+    
+    class Meta:
+        ordering = ['-week_start']
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'week_start'], name='unique_user_week_stats'),
+        ]
+    
+    def __str__(self):
+        return f"{self.user.username} - semana de {self.week_start}"
+
+class TemplatePopularity(models.Model):
+    """Score de popularidade com decaimento exponencial, mantido por workouts.rankings"""
+    template = models.OneToOneField(WorkoutTemplate, on_delete=models.CASCADE,
+                                    primary_key=True, related_name='popularity')
+    score = models.FloatField(default=0, help_text="Score na escala de epoch (ver rankings.py)")
+    epoch = models.DateTimeField(default=timezone.now, help_text="Data de referência do score")
+    completions = models.PositiveIntegerField(default=0)
+    skips = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
+    
+    def __str__(self):
+        return f"Popularidade - {self.template.name}"
+
+class SyncTombstone(models.Model):
+    """Remoção registrada para o delta da sincronização offline (ver workouts.sync)"""
+    KIND_CHOICES = [
+        ('template', 'Template'),
+        ('workout', 'Treino'),
+        ('exercise', 'Exercício'),
+    ]
+    
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES)
+    object_id = models.BigIntegerField()
+    # Sem FK: a linha é gravada durante a remoção em cascata do próprio dono
+    owner_id = models.BigIntegerField(null=True, blank=True, help_text="Usuário do treino ou trainer do template")
+    deleted_at = models.DateTimeField(default=timezone.now, db_index=True)
+    
+    class Meta:
+        indexes = [
+            models.Index(fields=['kind', 'deleted_at']),
+        ]
     
     def __str__(self):
-        return f"{self.user.username} - {self.workout_template.name}"
\ No newline at end of file
+        return f"{self.kind} {self.object_id} removido em {self.deleted_at}"
@@ -0,0 +1,216 @@
+"""
+Ranking de popularidade dos templates de treino.
+
+Cada conclusão soma e cada treino pulado subtrai pontos do template, com
+decaimento exponencial (meia-vida ``HALF_LIFE``). Para não ter que reescrever
+todos os scores com o passar do tempo, o valor gravado é o score "levado" à
+data de referência ``epoch`` da própria linha: um evento no instante t vale
+``peso * 2 ** ((t - epoch) / HALF_LIFE)``. O fator cresce com a distância
+até ``epoch``, então quando um evento chega mais de ``REBASE_AFTER`` depois
+dela a linha é re-baseada no mesmo UPDATE (score multiplicado pelo
+decaimento do período e ``epoch`` movida para o evento).
+
+Cada processo mantém em memória um heap por (objetivo, dificuldade), com os
+scores convertidos para a referência do próprio ranking (o instante da carga
+completa), atualizado em O(log n) pelos eventos locais e sincronizado com a tabela a
+cada ``REFRESH_INTERVAL`` segundos, lendo apenas as linhas alteradas.
+"""
+import heapq
+import threading
+import time
+from datetime import timedelta
+
+from django.db.models import F
+from django.utils import timezone
+
+from .models import TemplatePopularity, UserWorkout
+
+HALF_LIFE = timedelta(days=14)
+# Distância máxima entre um evento e a epoch da linha antes do re-base
+REBASE_AFTER = timedelta(days=28)
+COMPLETION_WEIGHT = 1.0
+SKIP_WEIGHT = -0.5
+REFRESH_INTERVAL = 30
+# Recarga completa periódica: remove templates apagados e corrige eventos
+# aplicados em memória por transações que depois sofreram rollback
+FULL_RELOAD_INTERVAL = 600
+# Margem para linhas gravadas por transações que ainda não tinham feito commit
+REFRESH_OVERLAP = timedelta(seconds=60)
+
+
+def event_score(weight, epoch, moment=None):
+    """Peso de um evento em ``moment`` já na escala da data de referência ``epoch``."""
+    moment = moment or timezone.now()
+    return weight * 2 ** ((moment - epoch) / HALF_LIFE)
+
+
+def current_score(score, epoch, moment=None):
+    """Score na escala de ``epoch`` convertido para o valor decaído em ``moment``."""
+    moment = moment or timezone.now()
+    return score * 2 ** (-(moment - epoch) / HALF_LIFE)
+
+
+class TemplateRanking:
+    """
+    Heaps de máximo (score negado) por (goal, difficulty) com remoção
+    preguiçosa: atualizar um template empurra uma nova entrada e a antiga é
+    descartada quando aparece no topo.
+    """
+
+    def __init__(self, reference=None):
+        self.reference = reference or timezone.now()
+        self._heaps = {}
+        self._entries = {}
+        self._stale = 0
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def scale(self, score, epoch):
+        """Score gravado na escala de ``epoch`` convertido para a referência do ranking."""
+        return current_score(score, epoch, self.reference)
+
+    def update(self, template_id, key, score):
+        with self._lock:
+            previous = self._entries.get(template_id)
+            if previous == (key, score):
+                return
+            if previous is not None:
+                self._stale += 1
+            self._entries[template_id] = (key, score)
+            heapq.heappush(self._heaps.setdefault(key, []), (-score, template_id))
+            if self._stale > max(len(self._entries), 64):
+                self._compact()
+
+    def _is_current(self, key, score, template_id):
+        return self._entries.get(template_id) == (key, score)
+
+    def _compact(self):
+        self._heaps = {}
+        for template_id, (key, score) in self._entries.items():
+            self._heaps.setdefault(key, []).append((-score, template_id))
+        for heap in self._heaps.values():
+            heapq.heapify(heap)
+        self._stale = 0
+
+    def _top_of(self, key, n):
+        heap = self._heaps.get(key, [])
+        popped, result = [], []
+        while heap and len(result) < n:
+            entry = heapq.heappop(heap)
+            if self._is_current(key, -entry[0], entry[1]):
+                popped.append(entry)
+                result.append((entry[1], -entry[0]))
+            else:
+                self._stale -= 1
+        for entry in popped:
+            heapq.heappush(heap, entry)
+        return result
+
+    def top(self, n, goal=None, difficulty=None):
+        """Até ``n`` pares ``(template_id, score)``, do mais popular para o menos."""
+        with self._lock:
+            keys = [key for key in self._heaps
+                    if (goal is None or key[0] == goal) and (difficulty is None or key[1] == difficulty)]
+            candidates = [item for key in keys for item in self._top_of(key, n)]
+        return heapq.nlargest(n, candidates, key=lambda item: (item[1], -item[0]))
+
+
+_ranking = TemplateRanking()
+# (monotonic da última leitura, instante da última leitura, monotonic da última recarga completa)
+_loaded_at = None
+_refresh_lock = threading.Lock()
+
+
+def _load(ranking, since=None):
+    rows = TemplatePopularity.objects.values_list(
+        'template_id', 'template__goal', 'template__difficulty', 'score', 'epoch'
+    )
+    if since is not None:
+        rows = rows.filter(updated_at__gte=since - REFRESH_OVERLAP)
+    for template_id, goal, difficulty, score, epoch in rows.iterator():
+        ranking.update(template_id, (goal, difficulty), ranking.scale(score, epoch))
+
+
+def get_ranking():
+    """Ranking do processo, sincronizado com a tabela se estiver desatualizado."""
+    global _ranking, _loaded_at
+    now = time.monotonic()
+    if _loaded_at is None or now - _loaded_at[0] >= REFRESH_INTERVAL:
+        with _refresh_lock:
+            if _loaded_at is None or now - _loaded_at[0] >= REFRESH_INTERVAL:
+                started = timezone.now()
+                if _loaded_at is None or now - _loaded_at[2] >= FULL_RELOAD_INTERVAL:
+                    ranking = TemplateRanking()
+                    _load(ranking)
+                    _ranking, _loaded_at = ranking, (now, started, now)
+                else:
+                    _load(_ranking, _loaded_at[1])
+                    _loaded_at = (now, started, _loaded_at[2])
+    return _ranking
+
+
+def reset_ranking():
+    """Descarta o ranking em memória (recarregado por completo no próximo acesso)."""
+    global _ranking, _loaded_at
+    with _refresh_lock:
+        _ranking = TemplateRanking()
+        _loaded_at = None
+
+
+def record_event(template, weight, moment=None, completion=False, skip=False):
+    """Soma um evento ao score do template na tabela e no ranking em memória."""
+    moment = moment or timezone.now()
+    row, _ = TemplatePopularity.objects.get_or_create(template_id=template.pk, defaults={'epoch': moment})
+    while row is not None:
+        epoch = row.epoch
+        rebased = moment if moment - epoch > REBASE_AFTER else epoch
+        # O filtro pela epoch lida repete a operação se outro processo re-baseou a linha
+        updated = TemplatePopularity.objects.filter(template_id=template.pk, epoch=epoch).update(
+            score=F('score') * current_score(1, epoch, rebased) + event_score(weight, rebased, moment),
+            epoch=rebased,
+            completions=F('completions') + int(completion),
+            skips=F('skips') + int(skip),
+            updated_at=timezone.now(),
+        )
+        if updated:
+            break
+        row = TemplatePopularity.objects.filter(template_id=template.pk).only('epoch').first()
+    if row is not None and _loaded_at is not None:
+        score, epoch = TemplatePopularity.objects.values_list('score', 'epoch').get(template_id=template.pk)
+        _ranking.update(template.pk, (template.goal, template.difficulty), _ranking.scale(score, epoch))
+
+
+def record_template_completion(workout):
+    record_event(workout.workout_template, COMPLETION_WEIGHT, workout.completed_at, completion=True)
+
+
+def record_template_skip(workout):
+    record_event(workout.workout_template, SKIP_WEIGHT, skip=True)
+
+
+def rebuild_rankings(chunk_size=2000):
+    """Recalcula a tabela inteira a partir do histórico de UserWorkout."""
+    epoch = timezone.now()
+    totals = {}
+    rows = (
+        UserWorkout.objects.filter(status__in=('completed', 'skipped'))
+        .values_list('workout_template_id', 'status', 'completed_at', 'updated_at')
+    )
+    for template_id, status, completed_at, updated_at in rows.iterator(chunk_size=chunk_size):
+        score, completions, skips = totals.get(template_id, (0.0, 0, 0))
+        if status == 'completed':
+            totals[template_id] = (score + event_score(COMPLETION_WEIGHT, epoch, completed_at or updated_at),
+                                   completions + 1, skips)
+        else:
+            totals[template_id] = (score + event_score(SKIP_WEIGHT, epoch, updated_at), completions, skips + 1)
+
+    TemplatePopularity.objects.all().delete()
+    TemplatePopularity.objects.bulk_create([
+        TemplatePopularity(template_id=template_id, score=score, epoch=epoch,
+                           completions=completions, skips=skips)
+        for template_id, (score, completions, skips) in totals.items()
+    ], batch_size=chunk_size)
+    reset_ranking()
+    return len(totals)
@@ -0,0 +1,200 @@
+"""
+Materialização das recorrências (WorkoutSchedule) em UserWorkout.
+
+As ocorrências de uma agenda são geradas por dia local, no fuso da agenda,
+até um horizonte móvel (``WINDOW_DAYS`` a partir de hoje) e gravadas em
+lotes por ``fitai_backend.bulk.insert_rows``. ``materialized_until`` guarda o
+último dia gerado, então cada chamada só produz os dias novos; a restrição
+única (schedule, scheduled_date) torna a repetição inofensiva. Assim
+``today`` e o calendário leem linhas prontas.
+
+O template de cada ocorrência segue o rodízio pela posição da ocorrência
+desde ``start_date``, calculada sem estado: alterar a janela não muda qual
+template cai em cada dia.
+
+``ensure_materialized`` é chamada nas leituras do usuário (só gera quando a
+janela está perto do fim) e ``manage.py materialize_schedules`` gera em
+massa. As leituras nunca materializam além de ``HORIZON_DAYS``: dias mais
+distantes são calculados por ``project_occurrences`` sem gravar nada.
+Configuração em ``settings.WORKOUT_SCHEDULING``.
+"""
+from datetime import datetime, timedelta
+from zoneinfo import ZoneInfo
+
+from django.conf import settings
+from django.db import router, transaction
+from django.utils import timezone
+
+from fitai_backend.bulk import adapt_datetime, insert_rows
+from .models import UserWorkout, WorkoutSchedule, WorkoutScheduleTemplate
+
+DEFAULTS = {
+    # Dias à frente mantidos materializados
+    'WINDOW_DAYS': 28,
+    # Leituras só materializam quando restam menos dias que isso na janela
+    'REFRESH_DAYS': 7,
+    # Limite do que as leituras materializam (o calendário pede até 93 dias)
+    'HORIZON_DAYS': 93,
+    'BATCH_SIZE': 2000,
+}
+
+WORKOUT_COLUMNS = (
+    'user_id', 'workout_template_id', 'scheduled_date', 'schedule_id', 'status', 'notes', 'updated_at',
+)
+
+# training_frequency -> dias da semana padrão, espaçados
+FREQUENCY_WEEKDAYS = {
+    1: [0],
+    2: [0, 3],
+    3: [0, 2, 4],
+    4: [0, 1, 3, 4],
+    5: [0, 1, 2, 3, 4],
+    6: [0, 1, 2, 3, 4, 5],
+    7: [0, 1, 2, 3, 4, 5, 6],
+}
+
+
+def get_scheduling_settings():
+    return {**DEFAULTS, **getattr(settings, 'WORKOUT_SCHEDULING', {})}
+
+
+def weekdays_for_frequency(frequency):
+    return FREQUENCY_WEEKDAYS[min(max(frequency, 1), 7)]
+
+
+def occurrences_before(schedule, day):
+    """Quantas ocorrências a agenda tem de ``start_date`` até o dia anterior a ``day``."""
+    days = (day - schedule.start_date).days
+    if days <= 0:
+        return 0
+    weekdays = set(schedule.weekdays)
+    full_weeks, rest = divmod(days, 7)
+    first = schedule.start_date.weekday()
+    return full_weeks * len(weekdays) + sum(1 for k in range(rest) if (first + k) % 7 in weekdays)
+
+
+def iter_occurrences(schedule, template_ids, first_day, last_day):
+    """``(dia local, template_id)`` de cada ocorrência entre os dias indicados."""
+    if not template_ids or not schedule.weekdays:
+        return
+    first_day = max(first_day, schedule.start_date)
+    if schedule.end_date:
+        last_day = min(last_day, schedule.end_date)
+    weekdays = set(schedule.weekdays)
+    index = occurrences_before(schedule, first_day)
+    day = first_day
+    while day <= last_day:
+        if day.weekday() in weekdays:
+            yield day, template_ids[index % len(template_ids)]
+            index += 1
+        day += timedelta(days=1)
+
+
+def occurrence_datetime(schedule, day):
+    return datetime.combine(day, schedule.time_of_day, tzinfo=ZoneInfo(schedule.timezone))
+
+
+def _rotations(schedules):
+    rotation = {}
+    for schedule_id, template_id in (
+        WorkoutScheduleTemplate.objects.filter(schedule__in=schedules)
+        .order_by('schedule_id', 'position').values_list('schedule_id', 'workout_template_id')
+    ):
+        rotation.setdefault(schedule_id, []).append(template_id)
+    return rotation
+
+
+def materialization_horizon(config=None):
+    """Último dia local que as leituras podem materializar."""
+    config = config or get_scheduling_settings()
+    return timezone.localdate() + timedelta(days=max(config['HORIZON_DAYS'], config['WINDOW_DAYS']))
+
+
+def materialize(schedules, until=None, batch_size=None):
+    """
+    Gera os UserWorkout de ``schedules`` (queryset) até o dia local ``until``
+    (padrão: hoje + WINDOW_DAYS). Retorna quantos treinos foram criados (as
+    ocorrências que já existiam são ignoradas pela restrição única).
+    """
+    config = get_scheduling_settings()
+    batch_size = batch_size or config['BATCH_SIZE']
+    until = until or timezone.localdate() + timedelta(days=config['WINDOW_DAYS'])
+    schedules = list(schedules.filter(is_active=True).exclude(materialized_until__gte=until))
+    if not schedules:
+        return 0
+
+    rotation = _rotations(schedules)
+
+    using = router.db_for_write(UserWorkout)
+    adapt = adapt_datetime(using)
+    updated_at = adapt(timezone.now())
+    # Muitas agendas caem no mesmo dia/horário/fuso: monta cada instante uma vez só
+    moments = {}
+    rows = []
+    for schedule in schedules:
+        # Não gera o passado: uma agenda nova começa hoje (no fuso dela) ou em start_date
+        first_day = max(
+            schedule.materialized_until + timedelta(days=1) if schedule.materialized_until else schedule.start_date,
+            timezone.localdate(timezone=ZoneInfo(schedule.timezone)),
+        )
+        for day, template_id in iter_occurrences(schedule, rotation.get(schedule.id), first_day, until):
+            key = (day, schedule.time_of_day, schedule.timezone)
+            if key not in moments:
+                moments[key] = adapt(occurrence_datetime(schedule, day))
+            rows.append((schedule.user_id, template_id, moments[key], schedule.id, 'scheduled', '', updated_at))
+
+    with transaction.atomic(using=using):
+        # SQL direto (fitai_backend.bulk): o bulk_create custa várias vezes mais nesses volumes
+        created = insert_rows(
+            UserWorkout, WORKOUT_COLUMNS, rows, batch_size=batch_size, using=using, ignore_conflicts=True,
+        )
+        WorkoutSchedule.objects.using(using).filter(id__in=[schedule.id for schedule in schedules]).update(
+            materialized_until=until,
+        )
+    return created
+
+
+def ensure_materialized(user, until=None):
+    """
+    Completa a janela das agendas de ``user`` quando ela está perto do fim ou
+    não cobre o dia ``until`` (limitado ao horizonte). Quando não há o que
+    gerar custa uma query.
+    """
+    config = get_scheduling_settings()
+    today = timezone.localdate()
+    if until is not None:
+        until = min(until, materialization_horizon(config))
+    threshold = max(today + timedelta(days=config['REFRESH_DAYS']), until or today)
+    pending = WorkoutSchedule.objects.filter(user=user, is_active=True).exclude(materialized_until__gte=threshold)
+    if pending.exists():
+        window = today + timedelta(days=config['WINDOW_DAYS'])
+        materialize(WorkoutSchedule.objects.filter(user=user), until=max(window, until or window))
+
+
+def project_occurrences(user, first_day, last_day):
+    """
+    UserWorkout não gravados (id None) das agendas ativas de ``user`` entre os
+    dias locais indicados, só depois do que cada agenda já materializou.
+    """
+    schedules = list(WorkoutSchedule.objects.filter(user=user, is_active=True))
+    rotation = _rotations(schedules)
+    workouts = []
+    for schedule in schedules:
+        start = first_day
+        if schedule.materialized_until:
+            start = max(start, schedule.materialized_until + timedelta(days=1))
+        for day, template_id in iter_occurrences(schedule, rotation.get(schedule.id), start, last_day):
+            workouts.append(UserWorkout(
+                user=user, workout_template_id=template_id, scheduled_date=occurrence_datetime(schedule, day),
+                schedule=schedule, status='scheduled',
+            ))
+    return workouts
+
+
+def clear_upcoming(schedule):
+    """Remove os treinos futuros ainda não iniciados da agenda, para que sejam gerados de novo."""
+    UserWorkout.objects.filter(
+        schedule=schedule, status='scheduled', scheduled_date__gte=timezone.now(),
+    ).delete()
+    WorkoutSchedule.objects.filter(pk=schedule.pk).update(materialized_until=None)
+    schedule.materialized_until = None
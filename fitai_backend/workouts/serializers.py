@@ -1,6 +1,17 @@
+from datetime import timedelta
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+from django.db import transaction
+from django.utils import timezone
 from rest_framework import serializers
-from .models import WorkoutTemplate, WorkoutExercise, UserWorkout
-from exercises.serializers import ExerciseSerializer
+from .models import (
+    WorkoutTemplate, WorkoutExercise, UserWorkout, ExerciseSetLog, UserStats, WeeklyStats,
+    WorkoutSchedule, WorkoutScheduleTemplate,
+)
+from ai_engine.models import UserProfile
+from exercises.models import Exercise
+from exercises.serializers import ExerciseSerializer, FastExerciseSerializer
+from fitai_backend.fast_serialization import FastSerializer
+from .scheduling import weekdays_for_frequency
 
 class WorkoutExerciseSerializer(serializers.ModelSerializer):
     exercise = ExerciseSerializer(read_only=True)
@@ -18,21 +29,87 @@ class WorkoutTemplateSerializer(serializers.ModelSerializer):
         model = WorkoutTemplate
         fields = '__all__'
 
+class FastWorkoutExerciseSerializer(FastSerializer):
+    serializer_class = WorkoutExerciseSerializer
+    custom_fields = ('exercise',)
+    
+    def __init__(self, context=None):
+        super().__init__(context)
+        # Colunas do exercício lidas no mesmo values() (JOIN, como o select_related)
+        self.exercise = FastExerciseSerializer(self.context)
+        self.extra_columns = [f'exercise__{column}' for column in self.exercise.columns]
+        self.columns += self.extra_columns
+    
+    def resolve_exercise(self, rows):
+        exercises = {}
+        for row in rows:
+            exercises.setdefault(row['exercise__id'], {
+                column: row[f'exercise__{column}'] for column in self.exercise.columns
+            })
+        by_id = {item['id']: item for item in self.exercise.serialize(exercises.values())}
+        return {row['id']: by_id[row['exercise__id']] for row in rows}
+
+class FastWorkoutTemplateSerializer(FastSerializer):
+    """Mesma saída de WorkoutTemplateSerializer(many=True) a partir de values()"""
+    serializer_class = WorkoutTemplateSerializer
+    custom_fields = ('exercises', 'trainer_name')
+    extra_columns = ('trainer__first_name', 'trainer__last_name')
+    
+    def resolve_exercises(self, rows):
+        exercises = FastWorkoutExerciseSerializer(self.context).serialize_grouped(
+            WorkoutExercise.objects.filter(workout_template_id__in=[row['id'] for row in rows]),
+            'workout_template_id',
+        )
+        return {row['id']: exercises.get(row['id'], []) for row in rows}
+    
+    def resolve_trainer_name(self, rows):
+        # User.get_full_name()
+        return {
+            row['id']: f"{row['trainer__first_name']} {row['trainer__last_name']}".strip()
+            for row in rows
+        }
+
+class WorkoutExerciseInputSerializer(serializers.Serializer):
+    """Exercício de um template na criação; exercise_id é validado em bloco pelo template"""
+    exercise_id = serializers.IntegerField()
+    sets = serializers.IntegerField(min_value=1)
+    reps = serializers.CharField(max_length=20)
+    rest_time = serializers.IntegerField(min_value=0)
+    load_percentage = serializers.FloatField(required=False, allow_null=True)
+    order = serializers.IntegerField(min_value=0, required=False)
+    notes = serializers.CharField(required=False, allow_blank=True)
+
 class WorkoutTemplateCreateSerializer(serializers.ModelSerializer):
-    exercises = WorkoutExerciseSerializer(many=True, write_only=True)
+    exercises = WorkoutExerciseInputSerializer(many=True, write_only=True)
     
     class Meta:
         model = WorkoutTemplate
         fields = ['name', 'description', 'goal', 'difficulty', 'estimated_duration', 'exercises']
     
+    def validate_exercises(self, value):
+        # Importações em lote passam os ids já conhecidos no contexto (uma query por bloco)
+        exercise_ids = {item['exercise_id'] for item in value}
+        known = self.context.get('exercise_ids')
+        if known is None:
+            known = set(Exercise.objects.filter(id__in=exercise_ids).values_list('id', flat=True))
+        missing = exercise_ids - known
+        if missing:
+            raise serializers.ValidationError(
+                [f"Exercício não encontrado: {pk}" for pk in sorted(missing)]
+            )
+        for position, item in enumerate(value):
+            item.setdefault('order', position)
+        return value
+    
     def create(self, validated_data):
         exercises_data = validated_data.pop('exercises')
         validated_data['trainer'] = self.context['request'].user
-        workout = WorkoutTemplate.objects.create(**validated_data)
-        
-        for exercise_data in exercises_data:
-            WorkoutExercise.objects.create(workout_template=workout, **exercise_data)
-        
+        with transaction.atomic():
+            workout = WorkoutTemplate.objects.create(**validated_data)
+            WorkoutExercise.objects.bulk_create([
+                WorkoutExercise(workout_template=workout, **exercise_data)
+                for exercise_data in exercises_data
+            ])
         return workout
 
 class UserWorkoutSerializer(serializers.ModelSerializer):
@@ -42,4 +119,189 @@ class UserWorkoutSerializer(serializers.ModelSerializer):
     class Meta:
         model = UserWorkout
         fields = '__all__'
-        read_only_fields = ('user',)
\ No newline at end of file
+        # schedule e client_id só mudam pela recorrência e pelo /sync
+        read_only_fields = ('user', 'schedule', 'client_id', 'updated_at')
+
+class WorkoutScheduleSerializer(serializers.ModelSerializer):
+    """
+    Recorrência do usuário. ``template_ids`` é o rodízio, na ordem; sem
+    ``weekdays`` os dias saem de training_frequency do perfil.
+    """
+    template_ids = serializers.ListField(child=serializers.IntegerField(), min_length=1, max_length=14, write_only=True)
+    weekdays = serializers.ListField(
+        child=serializers.IntegerField(min_value=0, max_value=6), min_length=1, max_length=7, required=False,
+    )
+    start_date = serializers.DateField(required=False)
+    
+    class Meta:
+        model = WorkoutSchedule
+        fields = ('id', 'template_ids', 'weekdays', 'time_of_day', 'timezone', 'start_date', 'end_date',
+                  'is_active', 'materialized_until', 'created_at', 'updated_at')
+        read_only_fields = ('materialized_until', 'created_at', 'updated_at')
+    
+    def to_representation(self, instance):
+        data = super().to_representation(instance)
+        data['template_ids'] = [link.workout_template_id for link in instance.workoutscheduletemplate_set.all()]
+        return data
+    
+    def validate_template_ids(self, value):
+        missing = set(value) - set(WorkoutTemplate.objects.filter(id__in=value).values_list('id', flat=True))
+        if missing:
+            raise serializers.ValidationError([f"Template não encontrado: {pk}" for pk in sorted(missing)])
+        return value
+    
+    def validate_weekdays(self, value):
+        return sorted(set(value))
+    
+    def validate_timezone(self, value):
+        try:
+            ZoneInfo(value)
+        except (ZoneInfoNotFoundError, ValueError):
+            raise serializers.ValidationError('Fuso horário inválido')
+        return value
+    
+    def validate(self, attrs):
+        start = attrs.get('start_date', getattr(self.instance, 'start_date', None))
+        end = attrs.get('end_date', getattr(self.instance, 'end_date', None))
+        if start and end and end < start:
+            raise serializers.ValidationError({'end_date': 'Deve ser posterior a start_date'})
+        return attrs
+    
+    def create(self, validated_data):
+        user = self.context['request'].user
+        validated_data['user'] = user
+        if 'weekdays' not in validated_data:
+            frequency = UserProfile.objects.filter(user=user).values_list('training_frequency', flat=True).first()
+            validated_data['weekdays'] = weekdays_for_frequency(frequency or 3)
+        validated_data.setdefault('start_date', timezone.localdate())
+        template_ids = validated_data.pop('template_ids')
+        with transaction.atomic():
+            schedule = WorkoutSchedule.objects.create(**validated_data)
+            self._set_templates(schedule, template_ids)
+        return schedule
+    
+    def update(self, instance, validated_data):
+        template_ids = validated_data.pop('template_ids', None)
+        with transaction.atomic():
+            instance = super().update(instance, validated_data)
+            if template_ids is not None:
+                instance.workoutscheduletemplate_set.all().delete()
+                self._set_templates(instance, template_ids)
+        return instance
+    
+    def _set_templates(self, schedule, template_ids):
+        WorkoutScheduleTemplate.objects.bulk_create([
+            WorkoutScheduleTemplate(schedule=schedule, workout_template_id=template_id, position=position)
+            for position, template_id in enumerate(template_ids)
+        ])
+        # Invalida o prefetch para a resposta refletir o novo rodízio
+        getattr(schedule, '_prefetched_objects_cache', {}).pop('workoutscheduletemplate_set', None)
+
+class ExerciseSetLogSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = ExerciseSetLog
+        fields = ('id', 'client_id', 'user_workout', 'exercise', 'set_index', 'reps',
+                  'load', 'rpe', 'started_at', 'completed_at', 'created_at')
+
+class SetLogInputSerializer(serializers.Serializer):
+    """Item do envio em lote; as FKs são validadas em bloco na ingestão"""
+    client_id = serializers.UUIDField()
+    user_workout_id = serializers.IntegerField(required=False)
+    exercise_id = serializers.IntegerField()
+    set_index = serializers.IntegerField(min_value=1, max_value=100)
+    reps = serializers.IntegerField(min_value=0, max_value=1000)
+    load = serializers.FloatField(min_value=0, required=False, allow_null=True)
+    rpe = serializers.FloatField(min_value=1, max_value=10, required=False, allow_null=True)
+    started_at = serializers.DateTimeField(required=False, allow_null=True)
+    completed_at = serializers.DateTimeField(required=False, allow_null=True)
+
+class SetLogBatchSerializer(serializers.Serializer):
+    sets = SetLogInputSerializer(many=True, allow_empty=False, max_length=1000)
+
+class SyncWorkoutSerializer(serializers.Serializer):
+    """Treino criado/alterado offline; identificado pelo client_id (e id, se já sincronizado)"""
+    client_id = serializers.UUIDField()
+    id = serializers.IntegerField(required=False)
+    workout_template_id = serializers.IntegerField()
+    scheduled_date = serializers.DateTimeField()
+    status = serializers.ChoiceField(choices=UserWorkout.STATUS_CHOICES)
+    started_at = serializers.DateTimeField(required=False, allow_null=True)
+    completed_at = serializers.DateTimeField(required=False, allow_null=True)
+    notes = serializers.CharField(required=False, allow_blank=True)
+
+class SyncSetSerializer(SetLogInputSerializer):
+    user_workout_client_id = serializers.UUIDField(required=False)
+    
+    def validate(self, attrs):
+        if 'user_workout_id' not in attrs and 'user_workout_client_id' not in attrs:
+            raise serializers.ValidationError("Informe user_workout_id ou user_workout_client_id")
+        return attrs
+
+class SyncFeedbackSerializer(serializers.Serializer):
+    recommendation_id = serializers.IntegerField()
+    rating = serializers.IntegerField(min_value=1, max_value=5)
+    notes = serializers.CharField(required=False, allow_blank=True)
+
+class SyncRequestSerializer(serializers.Serializer):
+    since = serializers.CharField(required=False, allow_null=True, allow_blank=True)
+    workouts = SyncWorkoutSerializer(many=True, required=False, max_length=500)
+    sets = SyncSetSerializer(many=True, required=False, max_length=5000)
+    feedback = SyncFeedbackSerializer(many=True, required=False, max_length=500)
+
+class SyncTemplateExerciseSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = WorkoutExercise
+        fields = ('exercise', 'sets', 'reps', 'rest_time', 'load_percentage', 'order', 'notes')
+
+class SyncTemplateSerializer(serializers.ModelSerializer):
+    """Versão compacta do template para o delta: exercícios apenas por id"""
+    exercises = SyncTemplateExerciseSerializer(source='workoutexercise_set', many=True, read_only=True)
+    
+    class Meta:
+        model = WorkoutTemplate
+        fields = ('id', 'name', 'description', 'goal', 'difficulty', 'estimated_duration',
+                  'trainer', 'is_ai_generated', 'updated_at', 'exercises')
+
+class SyncUserWorkoutSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = UserWorkout
+        fields = ('id', 'client_id', 'workout_template', 'scheduled_date', 'started_at',
+                  'completed_at', 'status', 'notes', 'updated_at')
+
+class WeeklyStatsSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = WeeklyStats
+        fields = ('week_start', 'workouts_started', 'workouts_completed', 'total_minutes', 'total_volume')
+
+class UserStatsSerializer(serializers.ModelSerializer):
+    total_workouts = serializers.IntegerField(source='workouts_completed')
+    total_minutes_exercised = serializers.IntegerField(source='total_minutes')
+    current_streak = serializers.SerializerMethodField()
+    
+    class Meta:
+        model = UserStats
+        fields = ('total_workouts', 'workouts_started', 'total_minutes_exercised', 'total_volume',
+                  'current_streak', 'longest_streak', 'last_workout_date', 'muscle_groups_worked')
+    
+    def get_current_streak(self, obj):
+        # A sequência só continua valendo se o último treino foi hoje ou ontem
+        if obj.last_workout_date and obj.last_workout_date >= timezone.localdate() - timedelta(days=1):
+            return obj.current_streak
+        return 0
+
+class TrainerClientMetricsSerializer(serializers.Serializer):
+    """Linha de workouts.dashboard.client_metrics (com with_clients)"""
+    client_id = serializers.IntegerField(source='user_id')
+    username = serializers.CharField()
+    full_name = serializers.CharField()
+    total_workouts = serializers.IntegerField(source='total')
+    completed = serializers.IntegerField()
+    skipped = serializers.IntegerField()
+    due = serializers.IntegerField()
+    pending = serializers.IntegerField()
+    adherence_rate = serializers.SerializerMethodField()
+    last_activity = serializers.DateTimeField(allow_null=True)
+    
+    def get_adherence_rate(self, row):
+        rate = row['adherence_rate']
+        return round(rate, 4) if rate is not None else None
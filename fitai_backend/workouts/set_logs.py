@@ -0,0 +1,74 @@
+"""
+Ingestão em lote dos registros de séries enviados pelo app.
+
+Todas as referências do lote são validadas com uma query ``IN`` por tabela e
+as séries novas são gravadas com ``bulk_create``. O ``client_id`` gerado no
+app torna o envio idempotente: reenvios após falha de rede são ignorados.
+
+O app offline costuma enviar as séries depois de concluir o treino: o volume
+das séries de um treino já contabilizado como concluído é somado às
+estatísticas aqui (``stats.record_late_sets``).
+"""
+from collections import defaultdict
+from contextlib import nullcontext
+
+from django.db import transaction
+from rest_framework import serializers
+
+from exercises.models import Exercise
+from .models import UserWorkout, ExerciseSetLog
+from .stats import record_late_sets
+
+BULK_BATCH_SIZE = 500
+
+
+def ingest_set_logs(user, items, user_workout=None, uncounted=()):
+    """
+    Grava os itens validados (dicts com os campos de ExerciseSetLog e
+    ``user_workout_id``/``exercise_id``). Com ``user_workout``, todos os itens
+    vão para esse treino, já verificado pela view. ``uncounted``: ids de
+    treinos concluídos cuja conclusão ainda vai ser contabilizada (com todas
+    as séries). Retorna ``{'created', 'duplicates'}``.
+    """
+    unique_items = list({item['client_id']: item for item in reversed(items)}.values())[::-1]
+
+    if user_workout is not None:
+        for item in unique_items:
+            item['user_workout_id'] = user_workout.id
+        workout_ids = {user_workout.id}
+        workouts = {user_workout.id: user_workout}
+    else:
+        workout_ids = {item['user_workout_id'] for item in unique_items}
+        workouts = UserWorkout.objects.filter(user=user).only(
+            'id', 'user_id', 'status', 'completed_at', 'updated_at',
+        ).in_bulk(workout_ids)
+    owned = workouts.keys()
+    if workout_ids - owned:
+        raise serializers.ValidationError({
+            'user_workout_id': [f'Treino não encontrado: {pk}' for pk in sorted(workout_ids - owned)]
+        })
+
+    exercise_ids = {item['exercise_id'] for item in unique_items}
+    known = set(Exercise.objects.filter(id__in=exercise_ids).values_list('id', flat=True))
+    if exercise_ids - known:
+        raise serializers.ValidationError({
+            'exercise_id': [f'Exercício não encontrado: {pk}' for pk in sorted(exercise_ids - known)]
+        })
+
+    existing = set(
+        ExerciseSetLog.objects.filter(client_id__in=[item['client_id'] for item in unique_items])
+        .values_list('client_id', flat=True)
+    )
+    new_logs = [ExerciseSetLog(**item) for item in unique_items if item['client_id'] not in existing]
+    late = defaultdict(float)
+    for log in new_logs:
+        workout = workouts[log.user_workout_id]
+        if workout.status == 'completed' and workout.id not in uncounted and log.load:
+            late[workout] += log.reps * log.load
+    with transaction.atomic() if late else nullcontext():
+        # ignore_conflicts cobre reenvios concorrentes que passaram pela checagem acima
+        ExerciseSetLog.objects.bulk_create(new_logs, batch_size=BULK_BATCH_SIZE, ignore_conflicts=True)
+        if late:
+            record_late_sets(late)
+
+    return {'created': len(new_logs), 'duplicates': len(items) - len(new_logs)}
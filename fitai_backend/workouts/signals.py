@@ -0,0 +1,27 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from django.utils import timezone
+
+from exercises.models import Exercise
+from .models import WorkoutTemplate, WorkoutExercise, UserWorkout, SyncTombstone
+
+
+@receiver([post_save, post_delete], sender=WorkoutExercise)
+def workout_exercise_changed(sender, instance, using, **kwargs):
+    """Alterar os exercícios de um template conta como alteração do template (delta da sincronização)"""
+    WorkoutTemplate.objects.using(using).filter(pk=instance.workout_template_id).update(updated_at=timezone.now())
+
+
+@receiver(post_delete, sender=WorkoutTemplate)
+def template_deleted(sender, instance, using, **kwargs):
+    SyncTombstone.objects.using(using).create(kind='template', object_id=instance.pk, owner_id=instance.trainer_id)
+
+
+@receiver(post_delete, sender=UserWorkout)
+def workout_deleted(sender, instance, using, **kwargs):
+    SyncTombstone.objects.using(using).create(kind='workout', object_id=instance.pk, owner_id=instance.user_id)
+
+
+@receiver(post_delete, sender=Exercise)
+def exercise_deleted(sender, instance, using, **kwargs):
+    SyncTombstone.objects.using(using).create(kind='exercise', object_id=instance.pk)
@@ -0,0 +1,278 @@
+"""
+Estatísticas de treino pré-calculadas (UserStats e WeeklyStats).
+
+As tabelas são atualizadas nas transições de status (``record_start`` ao
+iniciar e ``record_completion`` ao concluir; ``record_update`` e
+``revert_workout`` para edições e exclusões pela API), então o endpoint de
+estatísticas lê uma linha por usuário em vez de agregar todo o histórico.
+``rebuild_stats`` recalcula tudo a partir de UserWorkout/ExerciseSetLog, em
+blocos de usuários processados em paralelo, e corrige qualquer divergência.
+
+Semanas começam na segunda-feira e datas usam o fuso local (TIME_ZONE).
+"""
+import multiprocessing
+import time
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from datetime import timedelta
+
+from django.db import connections, transaction
+from django.db.models import F, Q, Sum
+from django.db.models.functions import Greatest
+from django.utils import timezone
+
+from exercises.models import MuscleGroup
+from .models import UserWorkout, WorkoutExercise, ExerciseSetLog, UserStats, WeeklyStats
+
+DEFAULT_CHUNK_SIZE = 500
+
+
+def local_date(moment):
+    return timezone.localtime(moment).date() if timezone.is_aware(moment) else moment.date()
+
+
+def week_start(moment):
+    day = local_date(moment)
+    return day - timedelta(days=day.weekday())
+
+
+def compute_streaks(days):
+    """``(atual, maior)`` sequência de dias consecutivos em ``days`` (datas ordenadas, sem repetição)."""
+    current = longest = 0
+    previous = None
+    for day in days:
+        current = current + 1 if previous is not None and day - previous == timedelta(days=1) else 1
+        longest = max(longest, current)
+        previous = day
+    return current, longest
+
+
+def _increment(user_id, week, **values):
+    WeeklyStats.objects.get_or_create(user_id=user_id, week_start=week)
+    WeeklyStats.objects.filter(user_id=user_id, week_start=week).update(
+        **{field: F(field) + value for field, value in values.items()}
+    )
+    UserStats.objects.get_or_create(user_id=user_id)
+    UserStats.objects.filter(user_id=user_id).update(
+        **{field: F(field) + value for field, value in values.items()}
+    )
+
+
+def _decrement(user_id, week, **values):
+    for model, lookup in ((WeeklyStats, {'user_id': user_id, 'week_start': week}), (UserStats, {'user_id': user_id})):
+        model.objects.filter(**lookup).update(**{
+            field: Greatest(F(field) - value, 0, output_field=model._meta.get_field(field))
+            for field, value in values.items()
+        })
+
+
+def _completion_totals(workout):
+    """``(minutos, volume, grupos musculares)`` que um treino concluído soma às estatísticas."""
+    minutes = workout.workout_template.estimated_duration
+    volume = workout.set_logs.aggregate(volume=Sum(F('reps') * F('load')))['volume'] or 0
+    muscle_groups = list(
+        MuscleGroup.objects.filter(exercises__workoutexercise__workout_template_id=workout.workout_template_id)
+        .values_list('name', flat=True).distinct()
+    )
+    return minutes, volume, muscle_groups
+
+
+def _completed_days(user_id, exclude=None):
+    return sorted({local_date(moment) for moment in UserWorkout.objects.filter(
+        user_id=user_id, status='completed', completed_at__isnull=False,
+    ).exclude(pk=exclude).values_list('completed_at', flat=True)})
+
+
+def record_start(workout):
+    """Contabiliza um treino que acabou de ser iniciado."""
+    with transaction.atomic():
+        _increment(workout.user_id, week_start(workout.started_at or timezone.now()), workouts_started=1)
+
+
+def record_completion(workout):
+    """Contabiliza um treino que acabou de ser concluído."""
+    minutes, volume, muscle_groups = _completion_totals(workout)
+    completed_at = workout.completed_at or timezone.now()
+    day = local_date(completed_at)
+
+    with transaction.atomic():
+        _increment(workout.user_id, week_start(completed_at),
+                   workouts_completed=1, total_minutes=minutes, total_volume=volume)
+        stats = UserStats.objects.select_for_update().get(user_id=workout.user_id)
+        for name in muscle_groups:
+            stats.muscle_groups_worked[name] = stats.muscle_groups_worked.get(name, 0) + 1
+
+        last = stats.last_workout_date
+        if last is None or day - last > timedelta(days=1):
+            stats.current_streak = 1
+        elif day - last == timedelta(days=1):
+            stats.current_streak += 1
+        if last is not None and day < last:
+            # Treino sincronizado fora de ordem: recalcula as sequências pelo histórico
+            stats.current_streak, stats.longest_streak = compute_streaks(_completed_days(workout.user_id))
+        else:
+            stats.last_workout_date = day
+            stats.longest_streak = max(stats.longest_streak, stats.current_streak)
+        stats.save(update_fields=['muscle_groups_worked', 'current_streak', 'longest_streak',
+                                  'last_workout_date', 'updated_at'])
+
+
+def record_late_sets(volumes):
+    """Soma ``{treino concluído: volume}`` de séries enviadas depois da conclusão já contabilizada."""
+    with transaction.atomic():
+        for workout, volume in volumes.items():
+            _increment(workout.user_id, week_start(workout.completed_at or workout.updated_at), total_volume=volume)
+
+
+def revert_start(workout):
+    """Desfaz ``record_start`` (treino excluído ou que deixou de ter início)."""
+    with transaction.atomic():
+        _decrement(workout.user_id, week_start(workout.started_at), workouts_started=1)
+
+
+def revert_completion(workout):
+    """
+    Desfaz ``record_completion``. ``workout`` tem os valores que foram
+    contabilizados; as sequências são recalculadas pelo histórico sem ele.
+    """
+    minutes, volume, muscle_groups = _completion_totals(workout)
+    with transaction.atomic():
+        _decrement(workout.user_id, week_start(workout.completed_at or workout.updated_at),
+                   workouts_completed=1, total_minutes=minutes, total_volume=volume)
+        stats = UserStats.objects.select_for_update().filter(user_id=workout.user_id).first()
+        if stats is None:
+            return
+        for name in muscle_groups:
+            count = stats.muscle_groups_worked.get(name, 0) - 1
+            if count > 0:
+                stats.muscle_groups_worked[name] = count
+            else:
+                stats.muscle_groups_worked.pop(name, None)
+        days = _completed_days(workout.user_id, exclude=workout.pk)
+        stats.current_streak, stats.longest_streak = compute_streaks(days)
+        stats.last_workout_date = days[-1] if days else None
+        stats.save(update_fields=['muscle_groups_worked', 'current_streak', 'longest_streak',
+                                  'last_workout_date', 'updated_at'])
+
+
+def record_update(previous, workout):
+    """
+    Ajusta as estatísticas de uma edição pela API; ``previous`` é uma cópia
+    do treino antes do save. Um treino concluído que muda de data ou template
+    é descontado e contado de novo.
+    """
+    counted = ('workout_template_id', 'completed_at')
+    completion_changed = previous.status == 'completed' and (
+        workout.status != 'completed' or
+        any(getattr(previous, field) != getattr(workout, field) for field in counted)
+    )
+    if previous.started_at and previous.started_at != workout.started_at:
+        revert_start(previous)
+    if completion_changed:
+        revert_completion(previous)
+    if workout.started_at and workout.started_at != previous.started_at:
+        record_start(workout)
+    if workout.status == 'completed' and (completion_changed or previous.status != 'completed'):
+        record_completion(workout)
+
+
+def revert_workout(workout):
+    """Desconta das estatísticas um treino que vai ser excluído (antes do delete: lê as séries)."""
+    if workout.started_at:
+        revert_start(workout)
+    if workout.status == 'completed':
+        revert_completion(workout)
+
+
+def _compute_chunk(user_ids):
+    """Executado nos workers: recalcula as estatísticas de um bloco de usuários."""
+    workouts = list(
+        UserWorkout.objects.filter(user_id__in=user_ids)
+        .filter(Q(started_at__isnull=False) | Q(status='completed', completed_at__isnull=False))
+        .values('id', 'user_id', 'status', 'started_at', 'completed_at',
+                'workout_template_id', 'workout_template__estimated_duration')
+    )
+    volumes = dict(
+        ExerciseSetLog.objects.filter(user_workout__user_id__in=user_ids, user_workout__status='completed')
+        .values('user_workout_id').annotate(volume=Sum(F('reps') * F('load')))
+        .values_list('user_workout_id', 'volume')
+    )
+    template_groups = defaultdict(set)
+    for template_id, name in (
+        WorkoutExercise.objects.filter(workout_template_id__in={row['workout_template_id'] for row in workouts})
+        .exclude(exercise__muscle_groups__name=None)
+        .values_list('workout_template_id', 'exercise__muscle_groups__name').distinct()
+    ):
+        template_groups[template_id].add(name)
+
+    totals = {user_id: {'user_id': user_id, 'workouts_started': 0, 'workouts_completed': 0,
+                        'total_minutes': 0, 'total_volume': 0.0, 'muscle_groups_worked': {}}
+              for user_id in user_ids}
+    weeks = {}
+    days = defaultdict(set)
+
+    def week_row(user_id, week):
+        key = (user_id, week)
+        if key not in weeks:
+            weeks[key] = {'user_id': user_id, 'week_start': week, 'workouts_started': 0,
+                          'workouts_completed': 0, 'total_minutes': 0, 'total_volume': 0.0}
+        return weeks[key]
+
+    for workout in workouts:
+        user_id = workout['user_id']
+        user_totals = totals[user_id]
+        if workout['started_at']:
+            user_totals['workouts_started'] += 1
+            week_row(user_id, week_start(workout['started_at']))['workouts_started'] += 1
+        if workout['status'] == 'completed' and workout['completed_at']:
+            volume = volumes.get(workout['id']) or 0
+            for row in (user_totals, week_row(user_id, week_start(workout['completed_at']))):
+                row['workouts_completed'] += 1
+                row['total_minutes'] += workout['workout_template__estimated_duration']
+                row['total_volume'] += volume
+            groups = user_totals['muscle_groups_worked']
+            for name in template_groups[workout['workout_template_id']]:
+                groups[name] = groups.get(name, 0) + 1
+            days[user_id].add(local_date(workout['completed_at']))
+
+    for user_id, user_totals in totals.items():
+        ordered = sorted(days[user_id])
+        user_totals['current_streak'], user_totals['longest_streak'] = compute_streaks(ordered)
+        user_totals['last_workout_date'] = ordered[-1] if ordered else None
+    return list(totals.values()), list(weeks.values())
+
+
+def _persist(user_ids, user_rows, week_rows):
+    with transaction.atomic():
+        WeeklyStats.objects.filter(user_id__in=user_ids).delete()
+        UserStats.objects.filter(user_id__in=user_ids).delete()
+        UserStats.objects.bulk_create([UserStats(**row) for row in user_rows])
+        WeeklyStats.objects.bulk_create([WeeklyStats(**row) for row in week_rows])
+
+
+def rebuild_stats(user_ids, workers=1, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Recalcula as estatísticas dos usuários indicados. Retorna
+    ``(usuários processados, segundos)``.
+
+    ``workers`` > 1 calcula os blocos em um pool de processos (start method
+    ``fork``); a gravação fica no processo atual.
+    """
+    started = time.perf_counter()
+    user_ids = list(dict.fromkeys(user_ids))
+    chunks = [user_ids[start:start + chunk_size] for start in range(0, len(user_ids), chunk_size)]
+
+    if workers > 1 and len(chunks) > 1 and 'fork' in multiprocessing.get_all_start_methods():
+        # Conexões abertas não devem ser compartilhadas com os processos filhos
+        for connection in connections.all(initialized_only=True):
+            if not connection.in_atomic_block:
+                connection.close()
+        context = multiprocessing.get_context('fork')
+        with ProcessPoolExecutor(max_workers=workers, mp_context=context) as executor:
+            for chunk, (user_rows, week_rows) in zip(chunks, executor.map(_compute_chunk, chunks)):
+                _persist(chunk, user_rows, week_rows)
+    else:
+        for chunk in chunks:
+            _persist(chunk, *_compute_chunk(chunk))
+
+    return len(user_ids), time.perf_counter() - started
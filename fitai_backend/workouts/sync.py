@@ -0,0 +1,260 @@
+"""
+Sincronização offline do app em uma única requisição.
+
+O app envia as mutações acumuladas (treinos iniciados/concluídos, séries e
+feedback de recomendações) junto com o token da última sincronização. As
+mutações são aplicadas em lote numa transação e a resposta traz apenas o que
+mudou no servidor desde o token: templates, treinos do usuário,
+recomendações e catálogo de exercícios.
+
+O token guarda o instante da leitura e a versão do catálogo. As consultas
+voltam ``OVERLAP`` no tempo para não perder linhas de transações que ainda
+não tinham feito commit; o app aplica o delta como upsert, então repetições
+são inofensivas. Remoções vêm de ``SyncTombstone`` (gravadas pelos signals),
+como listas de ids removidos desde o token em ``deleted``. Os tombstones são
+mantidos por ``TOMBSTONE_RETENTION``: um token mais antigo recebe tudo de novo,
+com ``reset`` verdadeiro para o app descartar a cópia local.
+
+Um treino concluído no servidor não muda mais de template, data ou notas; o
+reenvio é ignorado.
+"""
+import base64
+import json
+from datetime import timedelta
+
+from django.db import IntegrityError, transaction
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from rest_framework import serializers
+
+from ai_engine.models import AIWorkoutRecommendation
+from ai_engine.serializers import AIWorkoutRecommendationSerializer
+from exercises.catalog import get_catalog_version
+from exercises.models import Exercise, MuscleGroup
+from exercises.serializers import ExerciseListSerializer, MuscleGroupSerializer
+from fitai_backend.prefetch import optimize_queryset
+from .models import WorkoutTemplate, UserWorkout, SyncTombstone
+from .serializers import SyncTemplateSerializer, SyncUserWorkoutSerializer
+from .set_logs import ingest_set_logs
+from .rankings import record_template_completion, record_template_skip
+from .stats import record_start, record_completion
+
+OVERLAP = timedelta(seconds=60)
+TOMBSTONE_RETENTION = timedelta(days=30)
+WORKOUT_FIELDS = ['workout_template_id', 'scheduled_date', 'status', 'started_at',
+                  'completed_at', 'notes', 'updated_at']
+
+
+def encode_token(moment, catalog_version):
+    payload = json.dumps([moment.isoformat(), catalog_version])
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+
+def decode_token(token):
+    """``(instante, versão do catálogo)`` do token; ValueError se for inválido."""
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        moment, catalog_version = json.loads(base64.urlsafe_b64decode(padded.encode()).decode())
+        moment = parse_datetime(moment)
+    except Exception:
+        raise ValueError('Token de sincronização inválido')
+    if moment is None or not isinstance(catalog_version, int):
+        raise ValueError('Token de sincronização inválido')
+    return moment, catalog_version
+
+
+def visible_templates(user):
+    """Mesma regra de WorkoutTemplateViewSet: trainers veem só os próprios templates."""
+    queryset = WorkoutTemplate.objects.all()
+    if user.role == 'trainer':
+        queryset = queryset.filter(trainer=user)
+    return queryset
+
+
+def _merge_workout(workout, item, now):
+    """Aplica ``item`` em ``workout``; False se o treino já estava concluído no servidor."""
+    # Um treino concluído é histórico: não volta de estado nem muda de template, data ou notas
+    if workout.pk is not None and workout.status == 'completed':
+        return False
+    workout.status = item['status']
+    workout.started_at = item.get('started_at', workout.started_at)
+    workout.completed_at = item.get('completed_at', workout.completed_at)
+    workout.workout_template_id = item['workout_template_id']
+    workout.scheduled_date = item['scheduled_date']
+    workout.notes = item.get('notes', workout.notes)
+    workout.updated_at = now
+    return True
+
+
+def _apply_workouts(user, items):
+    """
+    Upsert dos treinos por id/client_id. Retorna ``{client_id: UserWorkout}``
+    e a lista de ``(treino, status anterior)`` para as estatísticas.
+    """
+    if not items:
+        return {}, []
+    ids = {item['id'] for item in items if 'id' in item}
+    client_ids = {item['client_id'] for item in items}
+    existing = list(UserWorkout.objects.filter(Q(id__in=ids, user=user) | Q(client_id__in=client_ids)))
+    if any(workout.user_id != user.id for workout in existing):
+        raise serializers.ValidationError({'workouts': ['client_id já utilizado por outro usuário']})
+    by_id = {workout.id: workout for workout in existing}
+    by_client = {workout.client_id: workout for workout in existing if workout.client_id}
+
+    missing_ids = ids - by_id.keys()
+    if missing_ids:
+        raise serializers.ValidationError({
+            'workouts': [f'Treino não encontrado: {pk}' for pk in sorted(missing_ids)]
+        })
+    template_ids = {item['workout_template_id'] for item in items}
+    known = set(WorkoutTemplate.objects.filter(id__in=template_ids).values_list('id', flat=True))
+    if template_ids - known:
+        raise serializers.ValidationError({
+            'workouts': [f'Template não encontrado: {pk}' for pk in sorted(template_ids - known)]
+        })
+
+    now = timezone.now()
+    to_create, to_update, result = [], {}, {}
+    previous = {}
+    for item in items:
+        workout = by_id.get(item.get('id')) or by_client.get(item['client_id'])
+        if workout is None:
+            workout = UserWorkout(user=user, client_id=item['client_id'])
+            by_client[item['client_id']] = workout
+            to_create.append(workout)
+        previous.setdefault(id(workout), (workout, workout.status if workout.pk else None))
+        if _merge_workout(workout, item, now) and workout.pk is not None:
+            to_update[workout.pk] = workout
+        result[item['client_id']] = workout
+
+    UserWorkout.objects.bulk_create(to_create)
+    UserWorkout.objects.bulk_update(list(to_update.values()), WORKOUT_FIELDS)
+    return result, list(previous.values())
+
+
+def _apply_sets(user, items, workouts, transitions):
+    if not items:
+        return {'created': 0, 'duplicates': 0}
+    client_map = {client_id: workout.id for client_id, workout in workouts.items()}
+    unresolved = {
+        item['user_workout_client_id'] for item in items if 'user_workout_id' not in item
+    } - client_map.keys()
+    if unresolved:
+        client_map.update(
+            UserWorkout.objects.filter(user=user, client_id__in=unresolved).values_list('client_id', 'id')
+        )
+    resolved = []
+    for item in items:
+        # Cópia: os itens originais são reaplicados se a transação for repetida
+        item = dict(item)
+        client_id = item.pop('user_workout_client_id', None)
+        if 'user_workout_id' not in item:
+            if client_id not in client_map:
+                raise serializers.ValidationError({'sets': [f'Treino não encontrado: {client_id}']})
+            item['user_workout_id'] = client_map[client_id]
+        resolved.append(item)
+    # Treinos concluídos neste lote: record_completion (depois) já soma todas as séries
+    uncounted = {workout.id for workout, previous in transitions
+                 if workout.status == 'completed' and previous != 'completed'}
+    return ingest_set_logs(user, resolved, uncounted=uncounted)
+
+
+def _apply_feedback(user, items):
+    if not items:
+        return 0
+    ids = {item['recommendation_id'] for item in items}
+    recommendations = AIWorkoutRecommendation.objects.filter(user_profile__user=user).in_bulk(ids)
+    if ids - recommendations.keys():
+        raise serializers.ValidationError({
+            'feedback': [f'Recomendação não encontrada: {pk}' for pk in sorted(ids - recommendations.keys())]
+        })
+    now = timezone.now()
+    for item in items:
+        recommendation = recommendations[item['recommendation_id']]
+        recommendation.feedback_rating = item['rating']
+        recommendation.feedback_notes = item.get('notes', recommendation.feedback_notes)
+        recommendation.updated_at = now
+    AIWorkoutRecommendation.objects.bulk_update(
+        list(recommendations.values()), ['feedback_rating', 'feedback_notes', 'updated_at']
+    )
+    return len(recommendations)
+
+
+def _record_stats(transitions):
+    active = ('in_progress', 'completed')
+    for workout, previous in transitions:
+        if workout.status in active and workout.started_at and previous not in active:
+            record_start(workout)
+        if workout.status == 'completed' and previous != 'completed':
+            record_completion(workout)
+            record_template_completion(workout)
+        elif workout.status == 'skipped' and previous != 'skipped':
+            record_template_skip(workout)
+
+
+def apply_mutations(user, data):
+    """Aplica as mutações do app numa única transação (tudo ou nada)."""
+    for attempt in range(2):
+        try:
+            with transaction.atomic():
+                workouts, transitions = _apply_workouts(user, data.get('workouts', []))
+                sets = _apply_sets(user, data.get('sets', []), workouts, transitions)
+                feedback = _apply_feedback(user, data.get('feedback', []))
+                # Depois das séries, para que o volume do treino concluído já as inclua
+                _record_stats(transitions)
+            break
+        except IntegrityError:
+            # Outra sincronização gravou os mesmos client_id entre a leitura e o insert:
+            # na segunda tentativa as linhas já existem e viram update
+            if attempt:
+                raise
+    return {
+        'workouts': [{'client_id': str(client_id), 'id': workout.id} for client_id, workout in workouts.items()],
+        'sets': sets,
+        'feedback': feedback,
+    }
+
+
+def collect_changes(user, since=None, catalog_version=None):
+    """
+    Delta desde o token (ou tudo, na primeira sincronização).
+    Retorna ``(changes, novo_token)``.
+    """
+    moment = timezone.now()
+    current_catalog = get_catalog_version()
+    SyncTombstone.objects.filter(deleted_at__lt=moment - TOMBSTONE_RETENTION).delete()
+    if since is not None and since < moment - TOMBSTONE_RETENTION:
+        since = catalog_version = None
+    after = since - OVERLAP if since is not None else None
+
+    def changed(queryset):
+        return queryset.filter(updated_at__gte=after) if after is not None else queryset
+
+    templates = optimize_queryset(changed(visible_templates(user)), SyncTemplateSerializer).order_by('id')
+    workouts = changed(UserWorkout.objects.filter(user=user)).order_by('id')
+    recommendations = changed(AIWorkoutRecommendation.objects.filter(user_profile__user=user)).order_by('id')
+    changes = {
+        'templates': SyncTemplateSerializer(templates, many=True).data,
+        'workouts': SyncUserWorkoutSerializer(workouts, many=True).data,
+        'recommendations': AIWorkoutRecommendationSerializer(recommendations, many=True).data,
+        'catalog': None,
+        'deleted': {'templates': [], 'workouts': [], 'exercises': []},
+        'reset': since is None,
+    }
+    if after is not None:
+        tombstones = SyncTombstone.objects.filter(deleted_at__gte=after).filter(
+            Q(kind='workout', owner_id=user.id) | Q(kind='exercise') |
+            (Q(kind='template', owner_id=user.id) if user.role == 'trainer' else Q(kind='template'))
+        )
+        for kind, object_id in tombstones.order_by('object_id').values_list('kind', 'object_id'):
+            changes['deleted'][f'{kind}s'].append(object_id)
+
+    if catalog_version != current_catalog:
+        exercises = optimize_queryset(changed(Exercise.objects.all()), ExerciseListSerializer).order_by('id')
+        changes['catalog'] = {
+            'version': current_catalog,
+            'exercises': ExerciseListSerializer(exercises, many=True).data,
+            'muscle_groups': MuscleGroupSerializer(MuscleGroup.objects.order_by('id'), many=True).data,
+        }
+    return changes, encode_token(moment, current_catalog)
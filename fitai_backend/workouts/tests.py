@@ -1,3 +1,827 @@
+import io
+import json
+import uuid
+from datetime import date, time as dt_time, timedelta
+from unittest import mock
+from zoneinfo import ZoneInfo
+
+from django.core.files.uploadedfile import SimpleUploadedFile
 from django.test import TestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from accounts.models import User
+from ai_engine.models import UserProfile, AIWorkoutRecommendation
+from exercises.models import Exercise, MuscleGroup
+from .models import (
+    WorkoutTemplate, WorkoutExercise, UserWorkout, ExerciseSetLog, UserStats, WeeklyStats,
+    WorkoutSchedule, WorkoutScheduleTemplate, TemplatePopularity,
+)
+from .importer import import_templates, iter_json_templates
+from .scheduling import iter_occurrences, materialization_horizon, materialize, weekdays_for_frequency
+from .rankings import TemplateRanking, current_score, event_score, record_event, rebuild_rankings, reset_ranking
+from .stats import compute_streaks, rebuild_stats
+from .sync import TOMBSTONE_RETENTION, encode_token
+
+
+def create_template(trainer, muscle_groups, name='Treino', n_exercises=3):
+    template = WorkoutTemplate.objects.create(
+        name=name,
+        description='Treino de teste',
+        goal='strength',
+        difficulty='intermediate',
+        estimated_duration=45,
+        trainer=trainer,
+    )
+    for order in range(n_exercises):
+        exercise = Exercise.objects.create(
+            name=f'{name} - exercício {order}',
+            description='Exercício de teste',
+            equipment='barbell',
+            difficulty='intermediate',
+            instructions='Execute o movimento',
+        )
+        exercise.muscle_groups.set(muscle_groups)
+        WorkoutExercise.objects.create(
+            workout_template=template,
+            exercise=exercise,
+            sets=4,
+            reps='8-12',
+            rest_time=90,
+            order=order,
+        )
+    return template
+
+
+class QueryCountTestCase(TestCase):
+    """Fixa o número de queries de cada endpoint, independente do volume de dados."""
+
+    def setUp(self):
+        self.trainer = User.objects.create_user(username='trainer', password='x', role='trainer')
+        self.client_user = User.objects.create_user(username='client', password='x')
+        self.muscle_groups = [
+            MuscleGroup.objects.create(name='Peito'),
+            MuscleGroup.objects.create(name='Braços'),
+        ]
+        self.api = APIClient()
+        self.api.force_authenticate(self.client_user)
+
+    def add_user_workouts(self, count):
+        for index in range(count):
+            template = create_template(self.trainer, self.muscle_groups, name=f'T{UserWorkout.objects.count()}')
+            UserWorkout.objects.create(
+                user=self.client_user,
+                workout_template=template,
+                scheduled_date=timezone.now() + timedelta(minutes=index),
+            )
+
+    def assertConstantQueries(self, url, expected, grow):
+        """Executa ``url`` antes e depois de ``grow()`` e exige o mesmo número de queries."""
+        with self.assertNumQueries(expected):
+            response = self.api.get(url)
+        self.assertEqual(response.status_code, 200)
+        grow()
+        with self.assertNumQueries(expected):
+            response = self.api.get(url)
+        self.assertEqual(response.status_code, 200)
+        return response
+
+    def test_user_workout_list(self):
+        self.add_user_workouts(1)
+        # user_workouts/template/trainer + exercícios do template + grupos musculares
+        response = self.assertConstantQueries(
+            '/api/workouts/user-workouts/', 3, lambda: self.add_user_workouts(19)
+        )
+        self.assertEqual(len(response.data['results']), 20)
+        exercise = response.data['results'][0]['workout_template']['exercises'][0]['exercise']
+        self.assertEqual(len(exercise['muscle_groups']), 2)
+        self.assertEqual(sorted(exercise['muscle_group_names']), ['Braços', 'Peito'])
+
+    def test_user_workout_detail(self):
+        self.add_user_workouts(1)
+        workout = UserWorkout.objects.get()
+        url = f'/api/workouts/user-workouts/{workout.pk}/'
+
+        def grow():
+            for order in range(5):
+                exercise = Exercise.objects.create(
+                    name=f'Extra {order}', description='', equipment='dumbbell',
+                    difficulty='beginner', instructions='',
+                )
+                exercise.muscle_groups.set(self.muscle_groups)
+                WorkoutExercise.objects.create(
+                    workout_template=workout.workout_template, exercise=exercise,
+                    sets=3, reps='10', rest_time=60, order=10 + order,
+                )
+
+        response = self.assertConstantQueries(url, 3, grow)
+        self.assertEqual(len(response.data['workout_template']['exercises']), 8)
+
+    def test_user_workout_today(self):
+        self.add_user_workouts(1)
+        # Verificação da janela das agendas + leitura com prefetch
+        self.assertConstantQueries('/api/workouts/user-workouts/today/', 4, lambda: self.add_user_workouts(5))
+
+    def test_template_list(self):
+        create_template(self.trainer, self.muscle_groups, name='A')
+        response = self.assertConstantQueries(
+            '/api/workouts/templates/', 4,
+            lambda: [create_template(self.trainer, self.muscle_groups, name=f'B{i}') for i in range(10)],
+        )
+        self.assertEqual(response.data['results'][0]['trainer_name'], self.trainer.get_full_name())
+
+    def test_template_detail(self):
+        template = create_template(self.trainer, self.muscle_groups, name='A')
+        self.assertConstantQueries(
+            f'/api/workouts/templates/{template.pk}/', 3,
+            lambda: WorkoutExercise.objects.create(
+                workout_template=template, exercise=Exercise.objects.first(),
+                sets=1, reps='1', rest_time=30, order=99,
+            ),
+        )
+
+
+class UserWorkoutKeysetPaginationTestCase(TestCase):
+
+    def setUp(self):
+        trainer = User.objects.create_user(username='trainer', password='x', role='trainer')
+        self.user = User.objects.create_user(username='client', password='x')
+        template = create_template(trainer, [], n_exercises=1)
+        # Pares com a mesma data para exercitar o desempate por id
+        base = timezone.now()
+        self.workouts = [
+            UserWorkout.objects.create(
+                user=self.user, workout_template=template,
+                scheduled_date=base - timedelta(days=index // 2),
+            )
+            for index in range(9)
+        ]
+        self.api = APIClient()
+        self.api.force_authenticate(self.user)
+
+    def test_walks_full_history_without_gaps(self):
+        url = '/api/workouts/user-workouts/?page_size=2'
+        seen = []
+        while url:
+            with self.assertNumQueries(3):
+                response = self.api.get(url)
+            seen += [row['id'] for row in response.data['results']]
+            url = response.data['next']
+        expected = sorted(self.workouts, key=lambda w: (w.scheduled_date, w.id), reverse=True)
+        self.assertEqual(seen, [workout.id for workout in expected])
+
+    def test_filters_apply_before_cursor(self):
+        self.workouts[0].status = 'completed'
+        self.workouts[0].save()
+        response = self.api.get('/api/workouts/user-workouts/?status=completed')
+        self.assertEqual([row['id'] for row in response.data['results']], [self.workouts[0].id])
+        self.assertIsNone(response.data['next'])
+
+    def test_invalid_cursor(self):
+        self.assertEqual(self.api.get('/api/workouts/user-workouts/?cursor=abc').status_code, 404)
+
+
+class SetLogIngestionTestCase(TestCase):
+
+    def setUp(self):
+        trainer = User.objects.create_user(username='trainer', password='x', role='trainer')
+        self.user = User.objects.create_user(username='client', password='x')
+        self.other = User.objects.create_user(username='other', password='x')
+        self.template = create_template(trainer, [MuscleGroup.objects.create(name='Peito')], n_exercises=2)
+        self.exercises = list(Exercise.objects.order_by('id'))
+        self.workout = UserWorkout.objects.create(
+            user=self.user, workout_template=self.template, scheduled_date=timezone.now()
+        )
+        self.api = APIClient()
+        self.api.force_authenticate(self.user)
+
+    def sets_payload(self, count, **extra):
+        return [
+            {'client_id': str(uuid.uuid4()), 'exercise_id': self.exercises[i % 2].id,
+             'set_index': i // 2 % 20 + 1, 'reps': 10, 'load': 40.0, 'rpe': 8, **extra}
+            for i in range(count)
+        ]
+
+    def test_batch_is_written_with_constant_queries(self):
+        url = f'/api/workouts/user-workouts/{self.workout.id}/sets/'
+        # treino + exercícios + client_ids já gravados + um INSERT por lote
+        with self.assertNumQueries(4):
+            response = self.api.post(url, self.sets_payload(90), format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data, {'created': 90, 'duplicates': 0})
+        self.assertEqual(self.api.get(url).data[0]['set_index'], 1)
+
+    def test_retry_is_idempotent(self):
+        url = f'/api/workouts/user-workouts/{self.workout.id}/sets/'
+        payload = self.sets_payload(5)
+        self.api.post(url, {'sets': payload}, format='json')
+        response = self.api.post(url, {'sets': payload + payload[:1]}, format='json')
+        self.assertEqual(response.data, {'created': 0, 'duplicates': 6})
+        self.assertEqual(ExerciseSetLog.objects.count(), 5)
+
+    def test_bulk_endpoint_rejects_foreign_workouts(self):
+        foreign = UserWorkout.objects.create(
+            user=self.other, workout_template=self.template, scheduled_date=timezone.now()
+        )
+        payload = self.sets_payload(2, user_workout_id=self.workout.id)
+        payload[1]['user_workout_id'] = foreign.id
+        response = self.api.post('/api/workouts/user-workouts/sets/', payload, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(ExerciseSetLog.objects.count(), 0)
+
+        response = self.api.post(f'/api/workouts/user-workouts/{foreign.id}/sets/', payload, format='json')
+        self.assertEqual(response.status_code, 404)
+
+    def test_invalid_rpe(self):
+        payload = self.sets_payload(1, rpe=11)
+        response = self.api.post(f'/api/workouts/user-workouts/{self.workout.id}/sets/', payload, format='json')
+        self.assertEqual(response.status_code, 400)
+
+
+class OfflineSyncTestCase(TestCase):
+
+    def setUp(self):
+        trainer = User.objects.create_user(username='trainer', password='x', role='trainer')
+        self.user = User.objects.create_user(username='client', password='x')
+        self.template = create_template(trainer, [MuscleGroup.objects.create(name='Peito')], n_exercises=2)
+        self.exercise = Exercise.objects.first()
+        profile = UserProfile.objects.create(
+            user=self.user, primary_goal='strength', experience_level='beginner',
+            training_frequency=3, available_equipment=['barbell'],
+        )
+        self.recommendation = AIWorkoutRecommendation.objects.create(
+            user_profile=profile, workout_data={}, confidence_score=0.8
+        )
+        # Tudo o que existia antes da última sincronização
+        past = timezone.now() - timedelta(days=1)
+        WorkoutTemplate.objects.update(updated_at=past)
+        AIWorkoutRecommendation.objects.update(updated_at=past)
+        Exercise.objects.update(updated_at=past)
+        self.api = APIClient()
+        self.api.force_authenticate(self.user)
+
+    def offline_payload(self):
+        workout_id = str(uuid.uuid4())
+        now = timezone.now()
+        return {
+            'workouts': [{
+                'client_id': workout_id, 'workout_template_id': self.template.id,
+                'scheduled_date': now.isoformat(), 'status': 'completed',
+                'started_at': (now - timedelta(hours=1)).isoformat(), 'completed_at': now.isoformat(),
+            }],
+            'sets': [
+                {'client_id': str(uuid.uuid4()), 'user_workout_client_id': workout_id,
+                 'exercise_id': self.exercise.id, 'set_index': index, 'reps': 8, 'load': 60}
+                for index in range(1, 4)
+            ],
+            'feedback': [{'recommendation_id': self.recommendation.id, 'rating': 4}],
+        }
+
+    def test_first_sync_applies_mutations_and_returns_everything(self):
+        response = self.api.post('/api/workouts/sync/', self.offline_payload(), format='json')
+        self.assertEqual(response.status_code, 200)
+        workout = UserWorkout.objects.get(user=self.user)
+        self.assertEqual(response.data['applied']['workouts'][0]['id'], workout.id)
+        self.assertEqual(response.data['applied']['sets'], {'created': 3, 'duplicates': 0})
+        self.assertEqual(workout.set_logs.count(), 3)
+        self.recommendation.refresh_from_db()
+        self.assertEqual(self.recommendation.feedback_rating, 4)
+        stats = UserStats.objects.get(user=self.user)
+        self.assertEqual((stats.workouts_completed, stats.total_volume), (1, 3 * 8 * 60))
+
+        changes = response.data['changes']
+        self.assertEqual([row['id'] for row in changes['templates']], [self.template.id])
+        self.assertEqual(len(changes['templates'][0]['exercises']), 2)
+        self.assertEqual(len(changes['catalog']['exercises']), 2)
+
+    def test_delta_since_token(self):
+        token = self.api.post('/api/workouts/sync/', {}, format='json').data['token']
+        response = self.api.post('/api/workouts/sync/', {'since': token}, format='json')
+        changes = response.data['changes']
+        self.assertEqual(changes['templates'], [])
+        self.assertEqual(changes['recommendations'], [])
+        self.assertIsNone(changes['catalog'])
+        self.assertEqual(changes['deleted'], {'templates': [], 'workouts': [], 'exercises': []})
+        self.assertFalse(changes['reset'])
+
+        WorkoutExercise.objects.filter(workout_template=self.template).first().delete()
+        self.exercise.muscle_groups.clear()
+        changes = self.api.post('/api/workouts/sync/', {'since': response.data['token']}, format='json').data['changes']
+        self.assertEqual([row['id'] for row in changes['templates']], [self.template.id])
+        self.assertEqual([row['id'] for row in changes['catalog']['exercises']], [self.exercise.id])
+
+    def test_delta_lists_only_deletions_since_token(self):
+        other = User.objects.create_user(username='other', password='x')
+        workout = UserWorkout.objects.create(user=self.user, workout_template=self.template,
+                                             scheduled_date=timezone.now())
+        UserWorkout.objects.create(user=other, workout_template=self.template, scheduled_date=timezone.now())
+        token = self.api.post('/api/workouts/sync/', {}, format='json').data['token']
+        exercise_id = self.exercise.id
+        self.exercise.delete()
+        template_id = self.template.id
+        self.template.delete()
+
+        changes = self.api.post('/api/workouts/sync/', {'since': token}, format='json').data['changes']
+        # O treino do outro usuário também foi removido em cascata, mas não aparece
+        self.assertEqual(changes['deleted'], {
+            'templates': [template_id], 'workouts': [workout.id], 'exercises': [exercise_id],
+        })
+
+    def test_expired_token_resets_client(self):
+        past = timezone.now() - TOMBSTONE_RETENTION - timedelta(days=1)
+        changes = self.api.post('/api/workouts/sync/', {'since': encode_token(past, 0)}, format='json').data['changes']
+        self.assertTrue(changes['reset'])
+        self.assertEqual([row['id'] for row in changes['templates']], [self.template.id])
+
+    def test_completed_workout_ignores_later_edits(self):
+        payload = self.offline_payload()
+        self.api.post('/api/workouts/sync/', payload, format='json')
+        other = create_template(self.template.trainer, list(MuscleGroup.objects.all()), name='Outro', n_exercises=1)
+        payload['workouts'][0].update(workout_template_id=other.id, notes='editado',
+                                      scheduled_date=(timezone.now() + timedelta(days=3)).isoformat())
+        self.api.post('/api/workouts/sync/', payload, format='json')
+        workout = UserWorkout.objects.get(user=self.user)
+        self.assertEqual((workout.workout_template_id, workout.notes), (self.template.id, ''))
+        self.assertLess(workout.scheduled_date, timezone.now())
+
+    def test_concurrent_insert_of_same_client_id_is_retried(self):
+        payload = self.offline_payload()
+        bulk_create = UserWorkout.objects.bulk_create
+        calls = []
+
+        def racing_bulk_create(objs, *args, **kwargs):
+            # Primeira tentativa: a mesma linha chega por outra requisição antes do insert
+            if not calls and objs:
+                calls.append(objs[0].client_id)
+                UserWorkout.objects.create(user=self.user, client_id=objs[0].client_id,
+                                           workout_template=self.template, scheduled_date=timezone.now())
+            return bulk_create(objs, *args, **kwargs)
+
+        with mock.patch.object(UserWorkout.objects, 'bulk_create', side_effect=racing_bulk_create):
+            response = self.api.post('/api/workouts/sync/', payload, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(UserWorkout.objects.get(user=self.user).status, 'completed')
+
+    def test_retry_is_idempotent_and_keeps_completed_status(self):
+        payload = self.offline_payload()
+        self.api.post('/api/workouts/sync/', payload, format='json')
+        payload['workouts'][0]['status'] = 'in_progress'
+        response = self.api.post('/api/workouts/sync/', payload, format='json')
+        self.assertEqual(response.data['applied']['sets'], {'created': 0, 'duplicates': 3})
+        self.assertEqual(UserWorkout.objects.get(user=self.user).status, 'completed')
+
+    def test_invalid_mutation_rolls_back_batch(self):
+        payload = self.offline_payload()
+        payload['sets'][0]['exercise_id'] = 999999
+        response = self.api.post('/api/workouts/sync/', payload, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(UserWorkout.objects.exists())
+
+    def test_invalid_token(self):
+        response = self.api.post('/api/workouts/sync/', {'since': 'abc'}, format='json')
+        self.assertEqual(response.status_code, 400)
+
+
+class UserStatsTestCase(TestCase):
+
+    def setUp(self):
+        trainer = User.objects.create_user(username='trainer', password='x', role='trainer')
+        self.user = User.objects.create_user(username='client', password='x')
+        self.template = create_template(trainer, [MuscleGroup.objects.create(name='Peito')], n_exercises=2)
+        self.api = APIClient()
+        self.api.force_authenticate(self.user)
+
+    def run_workout(self, sets=0):
+        workout = UserWorkout.objects.create(
+            user=self.user, workout_template=self.template, scheduled_date=timezone.now()
+        )
+        self.api.post(f'/api/workouts/user-workouts/{workout.id}/start_workout/')
+        if sets:
+            payload = [
+                {'client_id': str(uuid.uuid4()), 'exercise_id': Exercise.objects.first().id,
+                 'set_index': index + 1, 'reps': 10, 'load': 50}
+                for index in range(sets)
+            ]
+            self.api.post(f'/api/workouts/user-workouts/{workout.id}/sets/', payload, format='json')
+        self.api.post(f'/api/workouts/user-workouts/{workout.id}/complete_workout/')
+        return workout
+
+    def stats(self):
+        return self.api.get('/api/workouts/user-workouts/stats/').data
+
+    def test_transitions_update_stats(self):
+        self.run_workout(sets=3)
+        self.run_workout()
+        UserWorkout.objects.create(user=self.user, workout_template=self.template, scheduled_date=timezone.now())
+
+        with self.assertNumQueries(2):
+            data = self.stats()
+        self.assertEqual(data['total_workouts'], 2)
+        self.assertEqual(data['workouts_started'], 2)
+        self.assertEqual(data['total_minutes_exercised'], 90)
+        self.assertEqual(data['total_volume'], 1500)
+        self.assertEqual(data['current_streak'], 1)
+        self.assertEqual(data['muscle_groups_worked'], {'Peito': 2})
+        self.assertEqual(data['weekly_progress'][0]['workouts_completed'], 2)
+
+    def test_rebuild_matches_incremental(self):
+        self.run_workout(sets=2)
+        # Treino antigo sincronizado depois (fora de ordem)
+        old = self.run_workout()
+        past = timezone.now() - timedelta(days=8)
+        UserWorkout.objects.filter(pk=old.pk).update(started_at=past, completed_at=past)
+        rebuild_stats([self.user.id])
+        rebuilt = self.stats()
+        self.assertEqual(rebuilt['total_workouts'], 2)
+        self.assertEqual(len(rebuilt['weekly_progress']), 2)
+
+        UserStats.objects.all().delete()
+        WeeklyStats.objects.all().delete()
+        self.assertEqual(self.stats()['total_workouts'], 0)
+        rebuild_stats([self.user.id], chunk_size=1)
+        self.assertEqual(self.stats(), rebuilt)
+
+    def test_update_and_delete_keep_stats_in_sync(self):
+        completed = self.run_workout(sets=2)
+        patched = UserWorkout.objects.create(user=self.user, workout_template=self.template,
+                                             scheduled_date=timezone.now())
+        url = f'/api/workouts/user-workouts/{patched.id}/'
+        response = self.api.patch(url, {'status': 'completed'}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.stats()['total_workouts'], 2)
+
+        self.api.patch(url, {'status': 'scheduled'}, format='json')
+        self.assertEqual(self.stats()['total_workouts'], 1)
+        self.assertEqual(self.api.delete(f'/api/workouts/user-workouts/{completed.id}/').status_code, 204)
+        incremental = self.stats()
+        self.assertEqual((incremental['total_workouts'], incremental['total_volume']), (0, 0))
+        self.assertEqual(incremental['muscle_groups_worked'], {})
+        self.assertEqual(incremental['current_streak'], 0)
+
+        rebuild_stats([self.user.id])
+        self.assertEqual(self.stats(), incremental)
+
+    def test_sets_uploaded_after_completion_count_in_volume(self):
+        workout = self.run_workout()
+        self.assertEqual(self.stats()['total_volume'], 0)
+        payload = [
+            {'client_id': str(uuid.uuid4()), 'exercise_id': Exercise.objects.first().id,
+             'set_index': index + 1, 'reps': 10, 'load': 50}
+            for index in range(2)
+        ]
+        self.api.post(f'/api/workouts/user-workouts/{workout.id}/sets/', payload, format='json')
+        # Reenvio: nada muda
+        self.api.post(f'/api/workouts/user-workouts/{workout.id}/sets/', payload, format='json')
+        incremental = self.stats()
+        self.assertEqual(incremental['total_volume'], 1000)
+        self.assertEqual(incremental['weekly_progress'][0]['total_volume'], 1000)
+
+        rebuild_stats([self.user.id])
+        self.assertEqual(self.stats(), incremental)
+        self.api.delete(f'/api/workouts/user-workouts/{workout.id}/')
+        self.assertEqual(self.stats()['total_volume'], 0)
+
+    def test_compute_streaks(self):
+        today = timezone.localdate()
+        days = [today - timedelta(days=n) for n in (9, 8, 7, 2, 1, 0)]
+        self.assertEqual(compute_streaks(days), (3, 3))
+        self.assertEqual(compute_streaks(days[:4]), (1, 3))
+        self.assertEqual(compute_streaks([]), (0, 0))
+
+
+class TemplateRankingTestCase(TestCase):
+
+    def setUp(self):
+        reset_ranking()
+        trainer = User.objects.create_user(username='trainer', password='x', role='trainer')
+        self.user = User.objects.create_user(username='client', password='x')
+        UserProfile.objects.create(
+            user=self.user, primary_goal='strength', experience_level='expert',
+            training_frequency=3, available_equipment=['barbell'],
+        )
+        muscle_groups = [MuscleGroup.objects.create(name='Peito')]
+        self.strong = create_template(trainer, muscle_groups, name='Força A', n_exercises=1)
+        self.other = create_template(trainer, muscle_groups, name='Força B', n_exercises=1)
+        self.cardio = create_template(trainer, muscle_groups, name='Cardio', n_exercises=1)
+        WorkoutTemplate.objects.filter(pk=self.strong.pk).update(difficulty='advanced')
+        WorkoutTemplate.objects.filter(pk=self.cardio.pk).update(goal='endurance')
+        self.api = APIClient()
+        self.api.force_authenticate(self.user)
+
+    def complete(self, template, times=1):
+        for _ in range(times):
+            workout = UserWorkout.objects.create(
+                user=self.user, workout_template=template, scheduled_date=timezone.now()
+            )
+            self.api.post(f'/api/workouts/user-workouts/{workout.id}/start_workout/')
+            self.api.post(f'/api/workouts/user-workouts/{workout.id}/complete_workout/')
+
+    def ids(self, url):
+        return [row['id'] for row in self.api.get(url).data['results']]
+
+    def test_popular_ranks_by_completions_and_skips(self):
+        self.ids('/api/workouts/templates/popular/')  # carrega o ranking antes dos eventos
+        self.complete(self.other, times=2)
+        self.complete(self.strong)
+        self.complete(self.cardio, times=3)
+        self.assertEqual(self.ids('/api/workouts/templates/popular/'),
+                         [self.cardio.id, self.other.id, self.strong.id])
+        self.assertEqual(self.ids('/api/workouts/templates/popular/?goal=strength&limit=1'), [self.other.id])
+
+        for _ in range(3):
+            skipped = UserWorkout.objects.create(user=self.user, workout_template=self.other, scheduled_date=timezone.now())
+            self.api.patch(f'/api/workouts/user-workouts/{skipped.id}/', {'status': 'skipped'}, format='json')
+        self.assertEqual(self.ids('/api/workouts/templates/popular/?goal=strength'), [self.strong.id, self.other.id])
+
+        # O ranking recalculado do histórico bate com o incremental
+        rebuild_rankings()
+        self.assertEqual(self.ids('/api/workouts/templates/popular/?goal=strength'), [self.strong.id, self.other.id])
+
+    def test_recommended_uses_profile_and_pads_with_goal(self):
+        self.complete(self.other, times=2)
+        self.complete(self.strong)
+        self.complete(self.cardio, times=3)
+        # expert -> advanced primeiro, depois o mesmo objetivo, depois o resto
+        self.assertEqual(self.ids('/api/workouts/templates/recommended/'),
+                         [self.strong.id, self.other.id, self.cardio.id])
+        self.assertEqual(self.ids('/api/workouts/templates/recommended/?goal=endurance&limit=1'), [self.cardio.id])
+
+    def test_decay_and_heap_updates(self):
+        now = timezone.now()
+        self.assertAlmostEqual(event_score(1, now, now - timedelta(days=14)) / event_score(1, now, now), 0.5)
+        ranking = TemplateRanking()
+        for template_id in range(200):
+            ranking.update(template_id, ('strength', 'beginner'), float(template_id))
+        ranking.update(3, ('strength', 'advanced'), 1000.0)
+        self.assertEqual(ranking.top(2), [(3, 1000.0), (199, 199.0)])
+        self.assertEqual(ranking.top(1, difficulty='beginner'), [(199, 199.0)])
+        self.assertEqual(len(ranking), 200)
+
+    def test_events_far_from_epoch_rebase_the_row(self):
+        start = timezone.now()
+        record_event(self.strong, 1, start)
+        # Um evento anos depois re-baseia a linha em vez de estourar o fator
+        later = start + timedelta(days=365 * 60)
+        record_event(self.strong, 1, later)
+        row = TemplatePopularity.objects.get(template=self.strong)
+        self.assertEqual(row.epoch, later)
+        self.assertAlmostEqual(row.score, 1.0)
+        self.assertAlmostEqual(current_score(row.score, row.epoch, later + timedelta(days=14)), 0.5)
+
+        record_event(self.other, 1, start)
+        record_event(self.other, 1, start + timedelta(days=14))
+        row = TemplatePopularity.objects.get(template=self.other)
+        self.assertEqual(row.epoch, start)
+        self.assertAlmostEqual(current_score(row.score, row.epoch, start + timedelta(days=14)), 1.5)
+        self.assertEqual(row.completions, 0)
+
+
+class TemplateAuthoringTestCase(TestCase):
+
+    def setUp(self):
+        self.trainer = User.objects.create_user(username='trainer', password='x', role='trainer')
+        self.exercises = Exercise.objects.bulk_create([
+            Exercise(name=f'Exercício {i}', description='', equipment='barbell',
+                     difficulty='beginner', instructions='')
+            for i in range(60)
+        ])
+        self.api = APIClient()
+        self.api.force_authenticate(self.trainer)
+
+    def program(self, name='Programa', n_exercises=3, exercise_id=None):
+        return {
+            'name': name, 'description': 'Importado', 'goal': 'strength',
+            'difficulty': 'beginner', 'estimated_duration': 60,
+            'exercises': [
+                {'exercise_id': exercise_id or self.exercises[i].id, 'sets': 3, 'reps': '10', 'rest_time': 60}
+                for i in range(n_exercises)
+            ],
+        }
+
+    def test_create_uses_single_bulk_insert(self):
+        # validação IN + savepoint + template + bulk_create + release
+        with self.assertNumQueries(5):
+            response = self.api.post('/api/workouts/templates/', self.program(n_exercises=50), format='json')
+        self.assertEqual(response.status_code, 201)
+        orders = list(WorkoutExercise.objects.order_by('order').values_list('order', flat=True))
+        self.assertEqual(orders, list(range(50)))
+
+    def test_create_rejects_unknown_exercise(self):
+        response = self.api.post('/api/workouts/templates/', self.program(exercise_id=999999), format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(WorkoutTemplate.objects.exists())
+
+    def test_json_import_streams_in_chunks(self):
+        programs = [self.program(name=f'Programa {i}') for i in range(30)]
+        stream = io.StringIO(json.dumps(programs))
+        self.assertEqual(list(iter_json_templates(stream, read_size=7)), programs)
+        self.assertEqual(len(list(iter_json_templates(io.StringIO('\n'.join(map(json.dumps, programs)))))), 30)
+
+        with self.assertNumQueries(3 * 4 + 2):  # 4 blocos: IN + 2 bulk_create; + savepoint
+            result = import_templates(iter(programs), self.trainer, chunk_size=8)
+        self.assertEqual((result['templates'], result['exercises']), (30, 90))
+
+    def test_csv_upload_endpoint(self):
+        lines = ['name,description,goal,difficulty,estimated_duration,exercise_id,sets,reps,rest_time']
+        for template in range(3):
+            for exercise in self.exercises[:2]:
+                lines.append(f'Treino {template},CSV,hypertrophy,beginner,45,{exercise.id},4,8-12,90')
+        upload = SimpleUploadedFile('programas.csv', '\n'.join(lines).encode())
+        response = self.api.post('/api/workouts/templates/import/', {'file': upload}, format='multipart')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual((response.data['templates'], response.data['exercises']), (3, 6))
+        self.assertEqual(WorkoutTemplate.objects.filter(goal='hypertrophy', trainer=self.trainer).count(), 3)
+
+    def test_invalid_import_writes_nothing(self):
+        programs = [self.program(name='Válido'), self.program(name='Inválido', exercise_id=999999)]
+        upload = SimpleUploadedFile('programas.json', json.dumps(programs).encode())
+        response = self.api.post('/api/workouts/templates/import/', {'file': upload}, format='multipart')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data['errors'][0]['index'], 1)
+        self.assertFalse(WorkoutTemplate.objects.exists())
+
+
+class TrainerDashboardTestCase(TestCase):
+
+    def setUp(self):
+        self.trainer = User.objects.create_user(username='trainer', password='x', role='trainer')
+        other = User.objects.create_user(username='outro', password='x', role='trainer')
+        group = MuscleGroup.objects.create(name='Peito')
+        own = create_template(self.trainer, [group], name='Próprio', n_exercises=1)
+        foreign = create_template(other, [group], name='Alheio', n_exercises=1)
+        self.ana = User.objects.create_user(username='ana', password='x', first_name='Ana', last_name='Lima')
+        self.bia = User.objects.create_user(username='bia', password='x')
+        self.carol = User.objects.create_user(username='carol', password='x')
+        now = timezone.now()
+        day = timedelta(days=1)
+        UserWorkout.objects.bulk_create([
+            UserWorkout(user=self.ana, workout_template=own, scheduled_date=now - 3 * day,
+                        status='completed', completed_at=now - 3 * day),
+            UserWorkout(user=self.ana, workout_template=own, scheduled_date=now - 2 * day,
+                        status='completed', completed_at=now - day),
+            UserWorkout(user=self.ana, workout_template=own, scheduled_date=now - day, status='skipped'),
+            UserWorkout(user=self.ana, workout_template=own, scheduled_date=now + day),
+            UserWorkout(user=self.bia, workout_template=own, scheduled_date=now + day),
+            UserWorkout(user=self.bia, workout_template=own, scheduled_date=now + 2 * day),
+            # Treinos de templates de outro trainer não aparecem
+            UserWorkout(user=self.bia, workout_template=foreign, scheduled_date=now - day,
+                        status='completed', completed_at=now),
+            UserWorkout(user=self.carol, workout_template=foreign, scheduled_date=now - day),
+        ])
+        self.api = APIClient()
+        self.api.force_authenticate(self.trainer)
+
+    def test_metrics_per_client(self):
+        with self.assertNumQueries(3):  # count, página agregada, usuários da página
+            response = self.api.get('/api/workouts/trainer-dashboard/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['count'], 2)
+        ana, bia = response.data['results']
+        self.assertEqual((ana['username'], ana['full_name']), ('ana', 'Ana Lima'))
+        self.assertEqual(
+            (ana['total_workouts'], ana['completed'], ana['skipped'], ana['due'], ana['pending']),
+            (4, 2, 1, 3, 1),
+        )
+        self.assertEqual(ana['adherence_rate'], 0.6667)
+        self.assertIsNotNone(ana['last_activity'])
+        # Sem treinos vencidos e sem atividade: vai para o fim da ordenação padrão
+        self.assertEqual((bia['username'], bia['pending'], bia['adherence_rate'], bia['last_activity']),
+                         ('bia', 2, None, None))
+
+    def test_ordering_and_pagination(self):
+        response = self.api.get('/api/workouts/trainer-dashboard/?ordering=-pending&page_size=1')
+        self.assertEqual(response.data['results'][0]['username'], 'bia')
+        self.assertIsNotNone(response.data['next'])
+        response = self.api.get('/api/workouts/trainer-dashboard/?ordering=username')
+        self.assertEqual([row['username'] for row in response.data['results']], ['ana', 'bia'])
+        self.assertEqual(self.api.get('/api/workouts/trainer-dashboard/?ordering=password').status_code, 400)
+
+    def test_trainers_only(self):
+        self.api.force_authenticate(self.ana)
+        self.assertEqual(self.api.get('/api/workouts/trainer-dashboard/').status_code, 403)
+        self.assertEqual(self.api.get('/api/workouts/templates/my_templates/').status_code, 403)
+
+    def test_my_templates_is_paginated(self):
+        response = self.api.get('/api/workouts/templates/my_templates/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['count'], 1)
+        self.assertEqual(response.data['results'][0]['name'], 'Próprio')
+
+
+class WorkoutScheduleTestCase(TestCase):
+
+    def setUp(self):
+        trainer = User.objects.create_user(username='trainer', password='x', role='trainer')
+        group = MuscleGroup.objects.create(name='Costas')
+        self.templates = [create_template(trainer, [group], name=f'Treino {i}', n_exercises=1) for i in range(2)]
+        self.user = User.objects.create_user(username='client', password='x')
+        UserProfile.objects.create(
+            user=self.user, primary_goal='strength', experience_level='beginner',
+            training_frequency=2, available_equipment=[],
+        )
+        self.api = APIClient()
+        self.api.force_authenticate(self.user)
+        self.today = timezone.localdate()
+
+    def create_schedule(self, **data):
+        payload = {'template_ids': [t.id for t in self.templates], 'time_of_day': '07:00', **data}
+        response = self.api.post('/api/workouts/schedules/', payload, format='json')
+        self.assertEqual(response.status_code, 201, response.data)
+        return response.data
+
+    def test_create_materializes_rotation_in_local_time(self):
+        schedule = self.create_schedule(weekdays=[0, 1, 2, 3, 4, 5, 6])
+        self.assertEqual(schedule['template_ids'], [t.id for t in self.templates])
+        workouts = list(UserWorkout.objects.filter(user=self.user).order_by('scheduled_date'))
+        self.assertEqual(len(workouts), 29)  # hoje + WINDOW_DAYS
+        self.assertEqual([w.workout_template_id for w in workouts[:4]], [t.id for t in self.templates] * 2)
+        first = timezone.localtime(workouts[0].scheduled_date, ZoneInfo('America/Sao_Paulo'))
+        self.assertEqual((first.date(), first.hour, first.minute), (self.today, 7, 0))
+
+        # Repetir a materialização não duplica treinos
+        WorkoutSchedule.objects.update(materialized_until=None)
+        materialize(WorkoutSchedule.objects.all())
+        self.assertEqual(UserWorkout.objects.filter(user=self.user).count(), 29)
+
+    def test_default_weekdays_from_training_frequency(self):
+        schedule = self.create_schedule()
+        self.assertEqual(schedule['weekdays'], weekdays_for_frequency(2))
+        days = {timezone.localtime(w.scheduled_date).weekday() for w in UserWorkout.objects.all()}
+        self.assertEqual(days, {0, 3})
+
+    def test_rotation_position_does_not_depend_on_window(self):
+        schedule = WorkoutSchedule(weekdays=[0, 2, 4], start_date=self.today, time_of_day=dt_time(7))
+        ids = [t.id for t in self.templates]
+        full = list(iter_occurrences(schedule, ids, self.today, self.today + timedelta(days=20)))
+        split = (list(iter_occurrences(schedule, ids, self.today, self.today + timedelta(days=9)))
+                 + list(iter_occurrences(schedule, ids, self.today + timedelta(days=10), self.today + timedelta(days=20))))
+        self.assertEqual(full, split)
+
+    def test_today_and_calendar_materialize_lazily(self):
+        schedule = WorkoutSchedule.objects.create(
+            user=self.user, weekdays=list(range(7)), time_of_day=dt_time(12), start_date=self.today,
+        )
+        WorkoutScheduleTemplate.objects.create(schedule=schedule, workout_template=self.templates[0], position=0)
+        response = self.api.get('/api/workouts/user-workouts/today/')
+        self.assertEqual(len(response.data), 1)
+        # Janela já gerada: só a verificação (1) e a leitura com prefetch (3)
+        with self.assertNumQueries(4):
+            self.api.get('/api/workouts/user-workouts/today/')
+
+        end = self.today + timedelta(days=60)
+        response = self.api.get(f'/api/workouts/user-workouts/calendar/?start={self.today}&end={end}')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data), 61)
+        bad = self.api.get(f'/api/workouts/user-workouts/calendar/?start={self.today}&end={self.today + timedelta(days=100)}')
+        self.assertEqual(bad.status_code, 400)
+
+    def test_far_calendar_is_projected_without_materializing(self):
+        schedule = WorkoutSchedule.objects.create(
+            user=self.user, weekdays=list(range(7)), time_of_day=dt_time(12), start_date=self.today,
+        )
+        WorkoutScheduleTemplate.objects.create(schedule=schedule, workout_template=self.templates[0], position=0)
+        first = date(2100, 1, 1)
+        response = self.api.get(f'/api/workouts/user-workouts/calendar/?start={first}&end={first + timedelta(days=6)}')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data), 7)
+        self.assertEqual({row['id'] for row in response.data}, {None})
+        self.assertEqual(response.data[0]['workout_template']['id'], self.templates[0].id)
+        schedule.refresh_from_db()
+        self.assertEqual(schedule.materialized_until, materialization_horizon())
+        self.assertFalse(UserWorkout.objects.filter(scheduled_date__date__gt=materialization_horizon()).exists())
+
+    def test_update_and_delete_replace_upcoming_workouts(self):
+        schedule = self.create_schedule(weekdays=list(range(7)))
+        done = UserWorkout.objects.filter(user=self.user).order_by('scheduled_date').first()
+        UserWorkout.objects.filter(pk=done.pk).update(status='completed')
+
+        response = self.api.patch(f"/api/workouts/schedules/{schedule['id']}/",
+                                  {'template_ids': [self.templates[1].id]}, format='json')
+        self.assertEqual(response.status_code, 200)
+        upcoming = UserWorkout.objects.filter(user=self.user, status='scheduled')
+        self.assertEqual(set(upcoming.values_list('workout_template_id', flat=True)), {self.templates[1].id})
+
+        self.api.delete(f"/api/workouts/schedules/{schedule['id']}/")
+        self.assertFalse(upcoming.exists())
+        self.assertTrue(UserWorkout.objects.filter(pk=done.pk).exists())
+
+    def test_workout_cannot_be_moved_to_another_users_schedule(self):
+        schedule = self.create_schedule(weekdays=list(range(7)))
+        other = User.objects.create_user(username='other', password='x')
+        workout = UserWorkout.objects.create(user=other, workout_template=self.templates[0],
+                                             scheduled_date=timezone.now())
+        self.api.force_authenticate(other)
+        response = self.api.patch(f'/api/workouts/user-workouts/{workout.id}/', {
+            'schedule': schedule['id'], 'client_id': str(uuid.uuid4()), 'notes': 'ok',
+        }, format='json')
+        self.assertEqual(response.status_code, 200)
+        workout.refresh_from_db()
+        self.assertEqual((workout.schedule_id, workout.client_id, workout.notes), (None, None, 'ok'))
 
-# Create your tests here.
+    def test_validation(self):
+        response = self.api.post('/api/workouts/schedules/', {
+            'template_ids': [999999], 'weekdays': [7], 'time_of_day': '07:00', 'timezone': 'Marte/Base',
+        }, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(set(response.data), {'template_ids', 'weekdays', 'timezone'})
@@ -5,7 +5,10 @@ from . import views
 router = DefaultRouter()
 router.register(r'templates', views.WorkoutTemplateViewSet)
 router.register(r'user-workouts', views.UserWorkoutViewSet, basename='userworkout')
+router.register(r'schedules', views.WorkoutScheduleViewSet, basename='workoutschedule')
+router.register(r'trainer-dashboard', views.TrainerDashboardViewSet, basename='trainerdashboard')
 
 urlpatterns = [
+    path('sync/', views.sync, name='sync'),
     path('', include(router.urls)),
 ]
\ No newline at end of file
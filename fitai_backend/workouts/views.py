@@ -1,19 +1,56 @@
+import copy
+from datetime import date, datetime, time, timedelta
 from rest_framework import viewsets, status
-from rest_framework.decorators import action
+from rest_framework.decorators import action, api_view
+from rest_framework.pagination import PageNumberPagination
+from rest_framework.parsers import MultiPartParser
+from rest_framework.renderers import BrowsableAPIRenderer
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 from django_filters.rest_framework import DjangoFilterBackend
+from django.db import transaction
+from django.shortcuts import get_object_or_404
 from django.utils import timezone
-from .models import WorkoutTemplate, UserWorkout
+from fitai_backend.fast_serialization import FastListMixin
+from fitai_backend.pagination import KeysetPagination
+from fitai_backend.prefetch import SerializerPrefetchMixin, optimize_queryset
+from fitai_backend.renderers import FastJSONRenderer
+from fitai_backend.replicas import ReplicaReadMixin
+from ai_engine.models import UserProfile
+from .models import WorkoutTemplate, UserWorkout, ExerciseSetLog, UserStats, WeeklyStats, WorkoutSchedule
 from .serializers import (
     WorkoutTemplateSerializer, 
     WorkoutTemplateCreateSerializer,
-    UserWorkoutSerializer
+    FastWorkoutTemplateSerializer,
+    UserWorkoutSerializer,
+    ExerciseSetLogSerializer,
+    SetLogBatchSerializer,
+    SyncRequestSerializer,
+    UserStatsSerializer,
+    WeeklyStatsSerializer,
+    TrainerClientMetricsSerializer,
+    WorkoutScheduleSerializer
 )
+from .dashboard import client_metrics, order_metrics, with_clients
+from .scheduling import clear_upcoming, ensure_materialized, materialization_horizon, materialize, project_occurrences
+from .set_logs import ingest_set_logs
+from .importer import detect_format, import_templates, read_templates
+from .rankings import get_ranking, current_score, record_template_completion, record_template_skip
+from .stats import record_start, record_completion, record_update, revert_workout
+from .sync import apply_mutations, collect_changes, decode_token
 
-class WorkoutTemplateViewSet(viewsets.ModelViewSet):
-    queryset = WorkoutTemplate.objects.all()
+def today_bounds():
+    # Intervalo do dia local em vez de __date, que impede o uso do índice
+    today = timezone.localdate()
+    start = timezone.make_aware(datetime.combine(today, time.min))
+    end = timezone.make_aware(datetime.combine(today + timedelta(days=1), time.min))
+    return start, end
+
+class WorkoutTemplateViewSet(ReplicaReadMixin, FastListMixin, SerializerPrefetchMixin, viewsets.ModelViewSet):
+    queryset = WorkoutTemplate.objects.order_by('id')
     serializer_class = WorkoutTemplateSerializer
+    fast_serializer_class = FastWorkoutTemplateSerializer
+    renderer_classes = [FastJSONRenderer, BrowsableAPIRenderer]
     filter_backends = [DjangoFilterBackend]
     filterset_fields = ['goal', 'difficulty', 'trainer', 'is_ai_generated']
     
@@ -23,33 +60,185 @@ class WorkoutTemplateViewSet(viewsets.ModelViewSet):
         return WorkoutTemplateSerializer
     
     def get_queryset(self):
+        queryset = super().get_queryset()
         if self.request.user.role == 'trainer':
-            return self.queryset.filter(trainer=self.request.user)
-        return self.queryset
+            return queryset.filter(trainer=self.request.user)
+        return queryset
     
     @action(detail=False, methods=['get'])
-    def my_templates(self):
-        """Templates criados pelo trainer logado"""
-        if self.request.user.role != 'trainer':
+    def my_templates(self, request):
+        """Templates criados pelo trainer logado (paginado, com os mesmos filtros da listagem)"""
+        if request.user.role != 'trainer':
             return Response({'error': 'Apenas personal trainers podem acessar esta função'}, 
                           status=status.HTTP_403_FORBIDDEN)
+        # get_queryset já restringe aos templates do trainer
+        return self.list(request)
+    
+    @action(detail=False, methods=['post'], url_path='import', parser_classes=[MultiPartParser])
+    def import_templates(self, request):
+        """Importa templates em lote de um arquivo CSV ou JSON (campo "file")"""
+        if request.user.role != 'trainer':
+            return Response({'error': 'Apenas personal trainers podem importar templates'}, 
+                          status=status.HTTP_403_FORBIDDEN)
         
-        templates = self.queryset.filter(trainer=self.request.user)
-        serializer = self.get_serializer(templates, many=True)
-        return Response(serializer.data)
+        upload = request.FILES.get('file')
+        if upload is None:
+            return Response({'error': 'Envie o arquivo no campo "file"'}, 
+                          status=status.HTTP_400_BAD_REQUEST)
+        
+        try:
+            file_format = request.data.get('format') or detect_format(upload.name)
+            result = import_templates(read_templates(upload, file_format), request.user)
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        
+        response_status = status.HTTP_400_BAD_REQUEST if result['errors'] else status.HTTP_201_CREATED
+        return Response(result, status=response_status)
+    
+    @action(detail=False, methods=['get'])
+    def popular(self, request):
+        """Templates mais populares (conclusões recentes), por objetivo/dificuldade"""
+        limit = self._get_limit(request)
+        if limit is None:
+            return Response({'error': 'limit deve ser um número'}, status=status.HTTP_400_BAD_REQUEST)
+        goal = request.query_params.get('goal') or None
+        difficulty = request.query_params.get('difficulty') or None
+        ranking = get_ranking()
+        ranked = ranking.top(limit * 2, goal, difficulty)
+        return Response({'results': self._ranked_templates(ranking, ranked, limit)})
+    
+    @action(detail=False, methods=['get'])
+    def recommended(self, request):
+        """Populares para o objetivo e nível do usuário (perfil ou parâmetros goal/fitness_level)"""
+        limit = self._get_limit(request)
+        if limit is None:
+            return Response({'error': 'limit deve ser um número'}, status=status.HTTP_400_BAD_REQUEST)
+        profile = UserProfile.objects.filter(user=request.user).first()
+        goal = request.query_params.get('goal') or (profile.primary_goal if profile else None)
+        level = request.query_params.get('fitness_level') or (profile.experience_level if profile else None)
+        difficulty = 'advanced' if level == 'expert' else level
+        
+        # Completa com o mesmo objetivo em outras dificuldades e depois com o ranking geral
+        ranking = get_ranking()
+        ranked = []
+        for filters in ((goal, difficulty), (goal, None), (None, None)):
+            seen = {template_id for template_id, _ in ranked}
+            ranked += [item for item in ranking.top(limit * 2, *filters) if item[0] not in seen]
+            if len(ranked) >= limit * 2:
+                break
+        return Response({'results': self._ranked_templates(ranking, ranked, limit)})
+    
+    def _get_limit(self, request):
+        try:
+            return min(max(int(request.query_params.get('limit', 10)), 1), 50)
+        except ValueError:
+            return None
+    
+    def _ranked_templates(self, ranking, ranked, limit):
+        # Busca o dobro do limite: templates apagados ou de outro trainer são descartados aqui
+        templates = self.get_queryset().in_bulk([template_id for template_id, _ in ranked])
+        results = []
+        for template_id, score in ranked:
+            if template_id in templates and len(results) < limit:
+                data = self.get_serializer(templates[template_id]).data
+                data['popularity'] = round(current_score(score, ranking.reference), 4)
+                results.append(data)
+        return results
+
+class TrainerDashboardPagination(PageNumberPagination):
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+
+class TrainerDashboardViewSet(ReplicaReadMixin, viewsets.GenericViewSet):
+    """
+    Painel do trainer: adesão, última atividade, conclusões e treinos pendentes
+    de cada cliente dos seus templates (uma query agrupada por página).
+    Ordenação por ``ordering``: adherence_rate, last_activity, completed,
+    pending ou username, com ``-`` para decrescente.
+    """
+    serializer_class = TrainerClientMetricsSerializer
+    pagination_class = TrainerDashboardPagination
+    
+    def get_queryset(self):
+        return client_metrics(self.request.user)
+    
+    def list(self, request):
+        if request.user.role != 'trainer':
+            return Response({'error': 'Apenas personal trainers podem acessar esta função'}, 
+                          status=status.HTTP_403_FORBIDDEN)
+        
+        queryset = order_metrics(self.get_queryset(), request.query_params.get('ordering'))
+        if queryset is None:
+            return Response({'error': 'ordering inválido'}, status=status.HTTP_400_BAD_REQUEST)
+        
+        page = self.paginate_queryset(queryset)
+        serializer = self.get_serializer(with_clients(page), many=True)
+        return self.get_paginated_response(serializer.data)
+
+class WorkoutScheduleViewSet(viewsets.ModelViewSet):
+    """Recorrências do usuário; os treinos das próximas semanas são gerados ao salvar"""
+    serializer_class = WorkoutScheduleSerializer
+    
+    def get_queryset(self):
+        return (WorkoutSchedule.objects.filter(user=self.request.user).order_by('start_date', 'id')
+                .prefetch_related('workoutscheduletemplate_set'))
+    
+    def perform_create(self, serializer):
+        schedule = serializer.save()
+        materialize(WorkoutSchedule.objects.filter(pk=schedule.pk))
+    
+    def perform_update(self, serializer):
+        with transaction.atomic():
+            schedule = serializer.save()
+            # Treinos já gerados e não iniciados seguem a nova regra
+            clear_upcoming(schedule)
+            materialize(WorkoutSchedule.objects.filter(pk=schedule.pk))
+    
+    def perform_destroy(self, instance):
+        with transaction.atomic():
+            clear_upcoming(instance)
+            instance.delete()
+
+class UserWorkoutPagination(KeysetPagination):
+    ordering = ('-scheduled_date', '-id')
 
-class UserWorkoutViewSet(viewsets.ModelViewSet):
+class UserWorkoutViewSet(ReplicaReadMixin, SerializerPrefetchMixin, viewsets.ModelViewSet):
+    queryset = UserWorkout.objects.all()
     serializer_class = UserWorkoutSerializer
+    pagination_class = UserWorkoutPagination
     permission_classes = [IsAuthenticated]
     filter_backends = [DjangoFilterBackend]
     filterset_fields = ['status', 'scheduled_date']
     
     def get_queryset(self):
-        return UserWorkout.objects.filter(user=self.request.user)
+        return super().get_queryset().filter(user=self.request.user)
     
     def perform_create(self, serializer):
         serializer.save(user=self.request.user)
     
+    def perform_update(self, serializer):
+        previous = copy.copy(serializer.instance)
+        data = serializer.validated_data
+        new_status = data.get('status', previous.status)
+        # Mudar o status pelo PUT/PATCH conta como iniciar/concluir o treino
+        moments = {}
+        if new_status in ('in_progress', 'completed') and not data.get('started_at', previous.started_at):
+            moments['started_at'] = timezone.now()
+        if new_status == 'completed' and not data.get('completed_at', previous.completed_at):
+            moments['completed_at'] = timezone.now()
+        with transaction.atomic():
+            workout = serializer.save(**moments)
+            record_update(previous, workout)
+            if workout.status == 'completed' and previous.status != 'completed':
+                record_template_completion(workout)
+            elif workout.status == 'skipped' and previous.status != 'skipped':
+                record_template_skip(workout)
+    
+    def perform_destroy(self, instance):
+        with transaction.atomic():
+            revert_workout(instance)
+            instance.delete()
+    
     @action(detail=True, methods=['post'])
     def start_workout(self, request, pk=None):
         """Iniciar um treino"""
@@ -60,7 +249,9 @@ class UserWorkoutViewSet(viewsets.ModelViewSet):
         
         workout.status = 'in_progress'
         workout.started_at = timezone.now()
-        workout.save()
+        with transaction.atomic():
+            workout.save()
+            record_start(workout)
         
         serializer = self.get_serializer(workout)
         return Response(serializer.data)
@@ -76,15 +267,124 @@ class UserWorkoutViewSet(viewsets.ModelViewSet):
         workout.status = 'completed'
         workout.completed_at = timezone.now()
         workout.notes = request.data.get('notes', '')
-        workout.save()
+        with transaction.atomic():
+            workout.save()
+            record_completion(workout)
+            record_template_completion(workout)
         
         serializer = self.get_serializer(workout)
         return Response(serializer.data)
     
     @action(detail=False, methods=['get'])
-    def today(self):
+    def today(self, request):
         """Treinos agendados para hoje"""
-        today = timezone.now().date()
-        workouts = self.get_queryset().filter(scheduled_date__date=today)
+        ensure_materialized(request.user)
+        start, end = today_bounds()
+        workouts = self.get_queryset().filter(scheduled_date__gte=start, scheduled_date__lt=end)
+        serializer = self.get_serializer(workouts, many=True)
+        return Response(serializer.data)
+    
+    @action(detail=False, methods=['get'])
+    def calendar(self, request):
+        """
+        Treinos entre os dias locais start e end (inclusive, YYYY-MM-DD; até 93
+        dias). Além do horizonte materializado as ocorrências das agendas vêm
+        calculadas, com id null.
+        """
+        try:
+            first = date.fromisoformat(request.query_params['start']) if 'start' in request.query_params else timezone.localdate()
+            last = date.fromisoformat(request.query_params['end']) if 'end' in request.query_params else first + timedelta(days=6)
+        except ValueError:
+            return Response({'error': 'start e end devem estar no formato YYYY-MM-DD'}, 
+                          status=status.HTTP_400_BAD_REQUEST)
+        if last < first or (last - first).days > 92:
+            return Response({'error': 'Intervalo inválido (máximo de 93 dias)'}, 
+                          status=status.HTTP_400_BAD_REQUEST)
+        
+        ensure_materialized(request.user, until=last)
+        start = timezone.make_aware(datetime.combine(first, time.min))
+        end = timezone.make_aware(datetime.combine(last + timedelta(days=1), time.min))
+        workouts = self.get_queryset().filter(scheduled_date__gte=start, scheduled_date__lt=end).order_by('scheduled_date', 'id')
+        horizon = materialization_horizon()
+        if last > horizon:
+            projected = [
+                workout for workout in project_occurrences(request.user, max(first, horizon + timedelta(days=1)), last)
+                if start <= workout.scheduled_date < end
+            ]
+            templates = optimize_queryset(
+                WorkoutTemplate.objects.filter(id__in={workout.workout_template_id for workout in projected}),
+                WorkoutTemplateSerializer,
+            ).in_bulk()
+            for workout in projected:
+                workout.workout_template = templates[workout.workout_template_id]
+            workouts = sorted([*workouts, *projected], key=lambda workout: workout.scheduled_date)
         serializer = self.get_serializer(workouts, many=True)
-        return Response(serializer.data)
\ No newline at end of file
+        return Response(serializer.data)
+    
+    @action(detail=False, methods=['get'])
+    def stats(self, request):
+        """Estatísticas pré-calculadas do usuário e progresso das últimas semanas"""
+        try:
+            weeks = min(max(int(request.query_params.get('weeks', 12)), 1), 52)
+        except ValueError:
+            return Response({'error': 'weeks deve ser um número'}, status=status.HTTP_400_BAD_REQUEST)
+        
+        stats = UserStats.objects.filter(user=request.user).first() or UserStats(user=request.user)
+        data = UserStatsSerializer(stats).data
+        data['weekly_progress'] = WeeklyStatsSerializer(
+            WeeklyStats.objects.filter(user=request.user)[:weeks], many=True
+        ).data
+        return Response(data)
+    
+    @action(detail=True, methods=['get', 'post'])
+    def sets(self, request, pk=None):
+        """Séries registradas no treino; POST aceita um lote de séries"""
+        # Status e conclusão: séries de um treino já concluído entram nas estatísticas
+        workout = get_object_or_404(UserWorkout.objects.only('id', 'user_id', 'status', 'completed_at', 'updated_at'),
+                                    pk=pk, user=request.user)
+        
+        if request.method == 'GET':
+            logs = ExerciseSetLog.objects.filter(user_workout=workout)
+            return Response(ExerciseSetLogSerializer(logs, many=True).data)
+        
+        serializer = SetLogBatchSerializer(data=self._set_batch_data(request))
+        serializer.is_valid(raise_exception=True)
+        result = ingest_set_logs(request.user, serializer.validated_data['sets'], user_workout=workout)
+        return Response(result, status=status.HTTP_201_CREATED)
+    
+    @action(detail=False, methods=['post'], url_path='sets')
+    def bulk_sets(self, request):
+        """Lote de séries de vários treinos; cada item informa user_workout_id"""
+        serializer = SetLogBatchSerializer(data=self._set_batch_data(request))
+        serializer.is_valid(raise_exception=True)
+        items = serializer.validated_data['sets']
+        if any('user_workout_id' not in item for item in items):
+            return Response({'error': 'user_workout_id é obrigatório em cada série'}, 
+                          status=status.HTTP_400_BAD_REQUEST)
+        return Response(ingest_set_logs(request.user, items), status=status.HTTP_201_CREATED)
+    
+    def _set_batch_data(self, request):
+        # Aceita tanto {"sets": [...]} quanto a lista pura
+        return {'sets': request.data} if isinstance(request.data, list) else request.data
+
+
+@api_view(['POST'])
+def sync(request):
+    """
+    Sincronização offline: aplica as mutações do app e devolve o delta do
+    servidor desde o token ``since``, junto com o próximo token.
+    """
+    serializer = SyncRequestSerializer(data=request.data)
+    serializer.is_valid(raise_exception=True)
+    data = serializer.validated_data
+    
+    since, catalog_version = None, None
+    if data.get('since'):
+        try:
+            since, catalog_version = decode_token(data['since'])
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+    
+    applied = apply_mutations(request.user, data)
+    changes, token = collect_changes(request.user, since, catalog_version)
+    return Response({'token': token, 'applied': applied, 'changes': changes})